@@ -3,9 +3,16 @@ from sqlalchemy import create_engine
 from app.db.base import Base
 from app.core.config import DATABASE_URL
 from alembic import context
+from app.models.company_model import Company
 from app.models.user_model import User
 from app.models.shareholder_model import ShareholderProfile
 from app.models.issuance_model import ShareIssuance
+from app.models.idempotency_model import IdempotencyKey
+from app.models.certificate_artifact_model import CertificateArtifact
+from app.models.statement_model import StatementRun, StatementDelivery
+from app.models.audit_model import AuditEvent
+from app.models.vesting_model import VestingSchedule
+from app.models.ledger_model import ShareTransaction, ShareBalance
 
 config = context.config
 
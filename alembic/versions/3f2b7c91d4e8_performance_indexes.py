@@ -0,0 +1,66 @@
+"""Performance indexes for listings and aggregates
+
+Revision ID: 3f2b7c91d4e8
+Revises: 9471e3ef794f
+Create Date: 2026-10-19 09:12:44.517203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f2b7c91d4e8'
+down_revision: Union[str, Sequence[str], None] = '9471e3ef794f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Tables may not exist yet (init_db creates them with these indexes) or may
+# already carry an index created by Base.metadata.create_all.
+def _missing_index(table: str, name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table(table):
+        return False
+    return name not in {index["name"] for index in inspector.get_indexes(table)}
+
+
+def _existing_index(table: str, name: str) -> bool:
+    inspector = sa.inspect(op.get_bind())
+    return inspector.has_table(table) and name in {index["name"] for index in inspector.get_indexes(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _missing_index("share_issuances", "ix_share_issuances_shareholder_id_issue_date"):
+        op.create_index(
+            "ix_share_issuances_shareholder_id_issue_date",
+            "share_issuances",
+            ["shareholder_id", "issue_date"],
+        )
+    if _missing_index("share_issuances", "ix_share_issuances_issue_date"):
+        op.create_index("ix_share_issuances_issue_date", "share_issuances", ["issue_date"])
+    if _missing_index("users", "ix_users_role_created_at"):
+        op.create_index("ix_users_role_created_at", "users", ["role", "created_at"])
+    if _missing_index("users", "ix_users_active_shareholders_created_at"):
+        op.create_index(
+            "ix_users_active_shareholders_created_at",
+            "users",
+            ["created_at"],
+            postgresql_where=sa.text("role = 'SHAREHOLDER' AND is_active"),
+            sqlite_where=sa.text("role = 'SHAREHOLDER' AND is_active = 1"),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, name in [
+        ("users", "ix_users_active_shareholders_created_at"),
+        ("users", "ix_users_role_created_at"),
+        ("share_issuances", "ix_share_issuances_issue_date"),
+        ("share_issuances", "ix_share_issuances_shareholder_id_issue_date"),
+    ]:
+        if _existing_index(table, name):
+            op.drop_index(name, table_name=table)
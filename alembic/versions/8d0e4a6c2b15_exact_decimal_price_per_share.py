@@ -0,0 +1,48 @@
+"""Store price_per_share as an exact decimal
+
+Revision ID: 8d0e4a6c2b15
+Revises: 3f2b7c91d4e8
+Create Date: 2026-10-19 11:40:03.284611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d0e4a6c2b15'
+down_revision: Union[str, Sequence[str], None] = '3f2b7c91d4e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_table(table: str) -> bool:
+    return sa.inspect(op.get_bind()).has_table(table)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _has_table("share_issuances"):
+        return
+    with op.batch_alter_table("share_issuances") as batch_op:
+        batch_op.alter_column(
+            "price_per_share",
+            existing_type=sa.Float(),
+            type_=sa.Numeric(18, 4),
+            postgresql_using="price_per_share::numeric(18, 4)",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _has_table("share_issuances"):
+        return
+    with op.batch_alter_table("share_issuances") as batch_op:
+        batch_op.alter_column(
+            "price_per_share",
+            existing_type=sa.Numeric(18, 4),
+            type_=sa.Float(),
+            postgresql_using="price_per_share::double precision",
+        )
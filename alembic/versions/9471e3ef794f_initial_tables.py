@@ -1,7 +1,7 @@
 """Initial tables
 
 Revision ID: 9471e3ef794f
-Revises: de581849006b
+Revises:
 Create Date: 2025-08-06 13:33:12.908727
 
 """
@@ -13,7 +13,7 @@ import sqlalchemy as sa
 
 # revision identifiers, used by Alembic.
 revision: str = '9471e3ef794f'
-down_revision: Union[str, Sequence[str], None] = 'de581849006b'
+down_revision: Union[str, Sequence[str], None] = None
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
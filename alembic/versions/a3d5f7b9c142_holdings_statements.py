@@ -0,0 +1,61 @@
+"""Holdings statement runs and delivery checkpoints
+
+Revision ID: a3d5f7b9c142
+Revises: e7b3a9c5d201
+Create Date: 2026-10-19 17:21:05.402981
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3d5f7b9c142'
+down_revision: Union[str, Sequence[str], None] = 'e7b3a9c5d201'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("statement_runs"):
+        op.create_table(
+            "statement_runs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("period", sa.String(length=7), nullable=False),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.Column("skipped", sa.Integer(), nullable=False),
+            sa.Column("sent", sa.Integer(), nullable=False),
+            sa.Column("failed", sa.Integer(), nullable=False),
+            sa.Column("error", sa.Text()),
+            sa.Column("started_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("finished_at", sa.DateTime(timezone=True)),
+        )
+        op.create_index("ix_statement_runs_period_status", "statement_runs", ["period", "status"])
+    if not inspector.has_table("statement_deliveries"):
+        op.create_table(
+            "statement_deliveries",
+            sa.Column("period", sa.String(length=7), primary_key=True),
+            sa.Column("shareholder_id", sa.String(), primary_key=True),
+            sa.Column("run_id", sa.String(), nullable=False),
+            sa.Column("status", sa.String(length=16), nullable=False),
+            sa.Column("error", sa.Text()),
+            sa.Column("delivered_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_statement_deliveries_run_id", "statement_deliveries", ["run_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("statement_deliveries"):
+        op.drop_index("ix_statement_deliveries_run_id", table_name="statement_deliveries")
+        op.drop_table("statement_deliveries")
+    if inspector.has_table("statement_runs"):
+        op.drop_index("ix_statement_runs_period_status", table_name="statement_runs")
+        op.drop_table("statement_runs")
@@ -0,0 +1,47 @@
+"""Vesting schedules
+
+Revision ID: a8c4e6f0b317
+Revises: f5a7c9e1b203
+Create Date: 2026-10-19 22:14:51.306728
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c4e6f0b317'
+down_revision: Union[str, Sequence[str], None] = 'f5a7c9e1b203'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_COMPANY_ID = "default"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("vesting_schedules"):
+        return
+    op.create_table(
+        "vesting_schedules",
+        sa.Column("issuance_id", sa.String(), primary_key=True),
+        sa.Column("company_id", sa.String(), sa.ForeignKey("companies.id"), nullable=False, server_default=DEFAULT_COMPANY_ID),
+        sa.Column("start_date", sa.Date(), nullable=False),
+        sa.Column("cliff_months", sa.Integer(), nullable=False),
+        sa.Column("duration_months", sa.Integer(), nullable=False),
+        sa.Column("frequency_months", sa.Integer(), nullable=False),
+        sa.Column("acceleration", sa.String(16), nullable=False),
+        sa.Column("acceleration_percent", sa.Integer(), nullable=False),
+        sa.Column("change_of_control_date", sa.Date()),
+        sa.Column("termination_date", sa.Date()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_vesting_schedules_company_id", "vesting_schedules", ["company_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("vesting_schedules")
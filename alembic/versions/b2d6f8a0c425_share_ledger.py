@@ -0,0 +1,87 @@
+"""Share transaction ledger and balances
+
+Revision ID: b2d6f8a0c425
+Revises: a8c4e6f0b317
+Create Date: 2026-10-19 22:51:07.584190
+
+"""
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d6f8a0c425'
+down_revision: Union[str, Sequence[str], None] = 'a8c4e6f0b317'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_COMPANY_ID = "default"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if inspector.has_table("share_transactions"):
+        return
+    transactions = op.create_table(
+        "share_transactions",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("company_id", sa.String(), nullable=False, server_default=DEFAULT_COMPANY_ID),
+        sa.Column("kind", sa.String(16), nullable=False),
+        sa.Column("from_holder_id", sa.String()),
+        sa.Column("to_holder_id", sa.String()),
+        sa.Column("number_of_shares", sa.Integer(), nullable=False),
+        sa.Column("price_per_share", sa.Numeric(18, 4)),
+        sa.Column("issuance_id", sa.String()),
+        sa.Column("actor_id", sa.String()),
+        sa.Column("note", sa.String()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_share_transactions_company_id_created_at", "share_transactions", ["company_id", "created_at"])
+    op.create_index("ix_share_transactions_company_id_from_holder_id", "share_transactions", ["company_id", "from_holder_id"])
+    op.create_index("ix_share_transactions_company_id_to_holder_id", "share_transactions", ["company_id", "to_holder_id"])
+    op.create_index("ix_share_transactions_issuance_id", "share_transactions", ["issuance_id"])
+    op.create_table(
+        "share_balances",
+        sa.Column("holder_id", sa.String(), primary_key=True),
+        sa.Column("company_id", sa.String(), nullable=False, server_default=DEFAULT_COMPANY_ID),
+        sa.Column("balance", sa.Integer(), nullable=False),
+        sa.Column("last_transaction_id", sa.String()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_share_balances_company_id", "share_balances", ["company_id"])
+
+    if not inspector.has_table("share_issuances"):
+        return
+    # Every existing issuance becomes an issue entry, dated when it was issued
+    issuances = bind.execute(sa.text(
+        "SELECT id, company_id, shareholder_id, number_of_shares, price_per_share, issue_date "
+        "FROM share_issuances WHERE shareholder_id IS NOT NULL"
+    ).columns(price_per_share=sa.Numeric(18, 4), issue_date=sa.DateTime(timezone=True))).fetchall()
+    op.bulk_insert(transactions, [
+        {
+            "id": str(uuid.uuid4()),
+            "company_id": row.company_id,
+            "kind": "issue",
+            "to_holder_id": row.shareholder_id,
+            "number_of_shares": row.number_of_shares,
+            "price_per_share": row.price_per_share,
+            "issuance_id": row.id,
+            "created_at": row.issue_date,
+        }
+        for row in issuances
+    ])
+    op.execute(
+        "INSERT INTO share_balances (holder_id, company_id, balance) "
+        "SELECT to_holder_id, MIN(company_id), SUM(number_of_shares) FROM share_transactions GROUP BY to_holder_id"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("share_balances")
+    op.drop_table("share_transactions")
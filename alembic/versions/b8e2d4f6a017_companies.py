@@ -0,0 +1,120 @@
+"""Companies (tenants) and tenant-leading indexes
+
+Revision ID: b8e2d4f6a017
+Revises: a3d5f7b9c142
+Create Date: 2026-10-19 18:40:12.551730
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a017'
+down_revision: Union[str, Sequence[str], None] = 'a3d5f7b9c142'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_COMPANY_ID = "default"
+
+# (table, name, columns, index options); replaced by the tenant-leading indexes below
+PREVIOUS_INDEXES = [
+    ("users", "ix_users_role_created_at", ["role", "created_at"], {}),
+    ("users", "ix_users_active_shareholders_created_at", ["created_at"], {
+        "postgresql_where": sa.text("role = 'SHAREHOLDER' AND is_active"),
+        "sqlite_where": sa.text("role = 'SHAREHOLDER' AND is_active = 1"),
+    }),
+    ("share_issuances", "ix_share_issuances_shareholder_id_issue_date", ["shareholder_id", "issue_date"], {}),
+    ("share_issuances", "ix_share_issuances_issue_date", ["issue_date"], {}),
+    ("statement_runs", "ix_statement_runs_period_status", ["period", "status"], {}),
+]
+NEW_INDEXES = [
+    ("users", "ix_users_company_id_role_created_at", ["company_id", "role", "created_at"], {}),
+    ("users", "ix_users_company_id_active_shareholders_created_at", ["company_id", "created_at"], {
+        "postgresql_where": sa.text("role = 'SHAREHOLDER' AND is_active"),
+        "sqlite_where": sa.text("role = 'SHAREHOLDER' AND is_active = 1"),
+    }),
+    ("share_issuances", "ix_share_issuances_company_id_shareholder_id_issue_date", ["company_id", "shareholder_id", "issue_date"], {}),
+    ("share_issuances", "ix_share_issuances_company_id_issue_date", ["company_id", "issue_date"], {}),
+    ("statement_runs", "ix_statement_runs_company_id_period_status", ["company_id", "period", "status"], {}),
+]
+SEARCH_INDEXES = [
+    ("ix_users_lower_full_name_prefix", "ix_users_company_id_lower_full_name_prefix", "lower(full_name) text_pattern_ops"),
+    ("ix_users_lower_email_prefix", "ix_users_company_id_lower_email_prefix", "lower(email) text_pattern_ops"),
+]
+
+
+def _indexes(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _columns(table: str) -> set:
+    return {column["name"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("companies"):
+        op.create_table(
+            "companies",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False, unique=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+    # Existing rows all belong to the deployment's one company
+    if bind.execute(sa.text("SELECT 1 FROM companies WHERE id = :id"), {"id": DEFAULT_COMPANY_ID}).first() is None:
+        bind.execute(
+            sa.text("INSERT INTO companies (id, name) VALUES (:id, :name)"),
+            {"id": DEFAULT_COMPANY_ID, "name": os.getenv("COMPANY_NAME", "Cap Table Management")}
+        )
+
+    for table in ("users", "share_issuances", "statement_runs"):
+        if not inspector.has_table(table) or "company_id" in _columns(table):
+            continue
+        op.add_column(table, sa.Column("company_id", sa.String(), nullable=False, server_default=DEFAULT_COMPANY_ID))
+        # SQLite cannot add constraints to an existing table
+        if bind.dialect.name == "postgresql" and table != "statement_runs":
+            op.create_foreign_key(f"fk_{table}_company_id", table, "companies", ["company_id"], ["id"])
+
+    for table, name, columns, kwargs in PREVIOUS_INDEXES:
+        if inspector.has_table(table) and name in _indexes(table):
+            op.drop_index(name, table_name=table)
+    for table, name, columns, kwargs in NEW_INDEXES:
+        if inspector.has_table(table) and name not in _indexes(table):
+            op.create_index(name, table, columns, **kwargs)
+
+    if bind.dialect.name == "postgresql":
+        for old, new, expression in SEARCH_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {old}")
+            op.execute(f"CREATE INDEX IF NOT EXISTS {new} ON users (company_id, {expression})")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        for old, new, expression in SEARCH_INDEXES:
+            op.execute(f"DROP INDEX IF EXISTS {new}")
+            op.execute(f"CREATE INDEX IF NOT EXISTS {old} ON users ({expression})")
+
+    inspector = sa.inspect(bind)
+    for table, name, columns, kwargs in NEW_INDEXES:
+        if inspector.has_table(table) and name in _indexes(table):
+            op.drop_index(name, table_name=table)
+    for table in ("users", "share_issuances", "statement_runs"):
+        if inspector.has_table(table) and "company_id" in _columns(table):
+            if bind.dialect.name == "postgresql" and table != "statement_runs":
+                op.drop_constraint(f"fk_{table}_company_id", table, type_="foreignkey")
+            with op.batch_alter_table(table) as batch:
+                batch.drop_column("company_id")
+
+    for table, name, columns, kwargs in PREVIOUS_INDEXES:
+        if inspector.has_table(table) and name not in _indexes(table):
+            op.create_index(name, table, columns, **kwargs)
+    if inspector.has_table("companies"):
+        op.drop_table("companies")
@@ -0,0 +1,44 @@
+"""Shareholder search indexes
+
+Revision ID: c4a1d7e2f913
+Revises: 5b7e9f1a3c60
+Create Date: 2026-10-19 15:12:08.441027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a1d7e2f913'
+down_revision: Union[str, Sequence[str], None] = '5b7e9f1a3c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # SQLite is served by the in-process search index
+        return
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_lower_full_name_prefix ON users (lower(full_name) text_pattern_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_lower_email_prefix ON users (lower(email) text_pattern_ops)")
+    available = bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")).first()
+    if available is None:
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_lower_full_name_trgm ON users USING gin (lower(full_name) gin_trgm_ops)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_users_lower_email_trgm ON users USING gin (lower(email) gin_trgm_ops)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("DROP INDEX IF EXISTS ix_users_lower_email_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_lower_full_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_users_lower_email_prefix")
+    op.execute("DROP INDEX IF EXISTS ix_users_lower_full_name_prefix")
@@ -0,0 +1,56 @@
+"""Idempotency key leases and binary response bodies
+
+Revision ID: c7e9a1b3d540
+Revises: b2d6f8a0c425
+Create Date: 2026-10-19 23:48:12.406518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7e9a1b3d540'
+down_revision: Union[str, Sequence[str], None] = 'b2d6f8a0c425'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("idempotency_keys"):
+        return
+    if any(c["name"] == "lease_expires_at" for c in inspector.get_columns("idempotency_keys")):
+        return
+    op.add_column("idempotency_keys", sa.Column("lease_expires_at", sa.DateTime(timezone=True)))
+    if bind.dialect.name == "postgresql":
+        op.alter_column(
+            "idempotency_keys", "response_body", type_=sa.LargeBinary(),
+            postgresql_using="convert_to(response_body, 'UTF8')"
+        )
+    else:
+        op.execute("UPDATE idempotency_keys SET response_body = CAST(response_body AS BLOB)")
+        with op.batch_alter_table("idempotency_keys") as batch_op:
+            batch_op.alter_column("response_body", type_=sa.LargeBinary())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("idempotency_keys"):
+        return
+    # Stored responses need not be UTF-8 and cannot all be kept as text
+    op.execute("DELETE FROM idempotency_keys WHERE response_body IS NOT NULL")
+    if bind.dialect.name == "postgresql":
+        op.alter_column(
+            "idempotency_keys", "response_body", type_=sa.Text(),
+            postgresql_using="response_body::text"
+        )
+    else:
+        with op.batch_alter_table("idempotency_keys") as batch_op:
+            batch_op.alter_column("response_body", type_=sa.Text())
+    op.drop_column("idempotency_keys", "lease_expires_at")
@@ -0,0 +1,34 @@
+"""Optional range partitioning of share_issuances by issue_date
+
+Revision ID: d2f4a6c8e391
+Revises: b8e2d4f6a017
+Create Date: 2026-10-19 20:05:37.184263
+
+Postgres only, and only with SHARE_ISSUANCES_PARTITIONED=true. To
+partition an existing deployment later, downgrade to b8e2d4f6a017 and
+upgrade again with the setting on.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+from app.core.config import settings
+from app.db.partitions import partition_share_issuances, unpartition_share_issuances
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2f4a6c8e391'
+down_revision: Union[str, Sequence[str], None] = 'b8e2d4f6a017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if settings.SHARE_ISSUANCES_PARTITIONED:
+        partition_share_issuances(op.get_bind())
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    unpartition_share_issuances(op.get_bind())
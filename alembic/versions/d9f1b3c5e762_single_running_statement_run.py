@@ -0,0 +1,50 @@
+"""One running statement run per company and period
+
+Revision ID: d9f1b3c5e762
+Revises: c7e9a1b3d540
+Create Date: 2026-10-19 23:56:38.117204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd9f1b3c5e762'
+down_revision: Union[str, Sequence[str], None] = 'c7e9a1b3d540'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEX = "uq_statement_runs_company_id_period_running"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("statement_runs"):
+        return
+    if INDEX in {index["name"] for index in inspector.get_indexes("statement_runs")}:
+        return
+    # Keep the latest of any runs claimed concurrently before the index existed
+    op.execute(
+        "UPDATE statement_runs SET status = 'interrupted' "
+        "WHERE status = 'running' AND EXISTS ("
+        "SELECT 1 FROM statement_runs later "
+        "WHERE later.company_id = statement_runs.company_id AND later.period = statement_runs.period "
+        "AND later.status = 'running' AND (later.started_at, later.id) > (statement_runs.started_at, statement_runs.id))"
+    )
+    op.create_index(
+        INDEX, "statement_runs", ["company_id", "period"], unique=True,
+        postgresql_where=sa.text("status = 'running'"), sqlite_where=sa.text("status = 'running'")
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("statement_runs") and INDEX in {
+        index["name"] for index in inspector.get_indexes("statement_runs")
+    }:
+        op.drop_index(INDEX, table_name="statement_runs")
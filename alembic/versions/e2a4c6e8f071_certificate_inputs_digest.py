@@ -0,0 +1,39 @@
+"""Record the inputs each stored certificate was rendered from
+
+Revision ID: e2a4c6e8f071
+Revises: d9f1b3c5e762
+Create Date: 2026-10-20 00:14:27.530816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a4c6e8f071'
+down_revision: Union[str, Sequence[str], None] = 'd9f1b3c5e762'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("certificate_artifacts"):
+        return
+    if any(c["name"] == "inputs_digest" for c in inspector.get_columns("certificate_artifacts")):
+        return
+    # Existing certificates have no digest and are re-rendered on their next download
+    op.add_column("certificate_artifacts", sa.Column("inputs_digest", sa.String(length=64)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if inspector.has_table("certificate_artifacts") and any(
+        c["name"] == "inputs_digest" for c in inspector.get_columns("certificate_artifacts")
+    ):
+        with op.batch_alter_table("certificate_artifacts") as batch_op:
+            batch_op.drop_column("inputs_digest")
@@ -0,0 +1,40 @@
+"""Certificate artifacts
+
+Revision ID: e7b3a9c5d201
+Revises: c4a1d7e2f913
+Create Date: 2026-10-19 16:02:37.118604
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3a9c5d201'
+down_revision: Union[str, Sequence[str], None] = 'c4a1d7e2f913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("certificate_artifacts"):
+        return
+    op.create_table(
+        "certificate_artifacts",
+        sa.Column("issuance_id", sa.String(), primary_key=True),
+        sa.Column("digest", sa.String(length=64), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("template_version", sa.Integer(), nullable=False),
+        sa.Column("rendered_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_certificate_artifacts_template_version", "certificate_artifacts", ["template_version"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("certificate_artifacts"):
+        op.drop_index("ix_certificate_artifacts_template_version", table_name="certificate_artifacts")
+        op.drop_table("certificate_artifacts")
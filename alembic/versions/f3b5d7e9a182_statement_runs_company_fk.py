@@ -0,0 +1,56 @@
+"""Reference the company of each statement run
+
+Revision ID: f3b5d7e9a182
+Revises: e2a4c6e8f071
+Create Date: 2026-10-20 00:41:08.216394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3b5d7e9a182'
+down_revision: Union[str, Sequence[str], None] = 'e2a4c6e8f071'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CONSTRAINT = "fk_statement_runs_company_id"
+
+
+def _company_fks(inspector) -> list:
+    # Tables made by create_all carry the constraint under its default name
+    return [
+        fk["name"] for fk in inspector.get_foreign_keys("statement_runs")
+        if fk["referred_table"] == "companies" and fk["constrained_columns"] == ["company_id"]
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    # SQLite cannot add constraints to an existing table
+    if bind.dialect.name != "postgresql":
+        return
+    inspector = sa.inspect(bind)
+    if not inspector.has_table("statement_runs") or not inspector.has_table("companies"):
+        return
+    if _company_fks(inspector):
+        return
+    # Runs of companies that no longer exist cannot satisfy the constraint
+    op.execute(
+        "DELETE FROM statement_runs WHERE company_id NOT IN (SELECT id FROM companies)"
+    )
+    op.create_foreign_key(CONSTRAINT, "statement_runs", "companies", ["company_id"], ["id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    inspector = sa.inspect(bind)
+    if inspector.has_table("statement_runs") and CONSTRAINT in _company_fks(inspector):
+        op.drop_constraint(CONSTRAINT, "statement_runs", type_="foreignkey")
@@ -0,0 +1,46 @@
+"""Audit events
+
+Revision ID: f5a7c9e1b203
+Revises: d2f4a6c8e391
+Create Date: 2026-10-19 21:32:08.417952
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5a7c9e1b203'
+down_revision: Union[str, Sequence[str], None] = 'd2f4a6c8e391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table("audit_events"):
+        return
+    op.create_table(
+        "audit_events",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("company_id", sa.String(), nullable=False),
+        sa.Column("actor_id", sa.String()),
+        sa.Column("action", sa.String(64), nullable=False),
+        sa.Column("entity_type", sa.String(32), nullable=False),
+        sa.Column("entity_id", sa.String()),
+        sa.Column("details", sa.JSON()),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index("ix_audit_events_company_id_created_at", "audit_events", ["company_id", "created_at"])
+    op.create_index(
+        "ix_audit_events_company_id_entity_created_at", "audit_events",
+        ["company_id", "entity_type", "entity_id", "created_at"]
+    )
+    op.create_index("ix_audit_events_company_id_actor_id_created_at", "audit_events", ["company_id", "actor_id", "created_at"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("audit_events")
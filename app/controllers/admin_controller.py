@@ -0,0 +1,165 @@
+import os
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_db
+from app.dependencies.auth import get_admin_user
+from app.core.cache import cache_stats
+from app.core.audit import audit_log, record_audit, WORKER_PROFILED, STATEMENT_RUN_STARTED
+from app.core.config import settings
+from app.core.passwords import password_hasher
+from app.core.profiler import ProfilerBusy, profile
+from app.core.single_flight import single_flight
+from app.models.user_model import User
+from app.schemas.audit_schema import AuditEventResponse
+from app.schemas.company_schema import CompanyResponse
+from app.schemas.profile_schema import ProfileResponse
+from app.services.audit_service import query_audit_events
+from app.services.company_service import get_company
+from app.schemas.statement_schema import StatementRunCreate, StatementRunResponse
+from app.services.statement_service import (
+    start_statement_run,
+    get_statement_run,
+    list_statement_runs,
+    statement_run_progress
+)
+
+router = APIRouter(
+    tags=["Admin"],
+    dependencies=[Depends(get_admin_user)]
+)
+
+@router.get(
+    "/metrics",
+    summary="Runtime metrics",
+    description="Cache hit rates and request coalescing counters per namespace, audit writer counters and password hashing cost and latency, for the worker serving the request (Admin only)"
+)
+def get_metrics():
+    return {
+        "cache": cache_stats(),
+        "single_flight": {
+            "in_flight": single_flight.in_flight(),
+            "namespaces": single_flight.stats()
+        },
+        "audit": audit_log.stats(),
+        "password_hashing": password_hasher.stats()
+    }
+
+@router.get(
+    "/company",
+    response_model=CompanyResponse,
+    summary="Current company",
+    description="The company (tenant) the admin belongs to"
+)
+def get_current_company(db: Session = Depends(get_db), current_user: User = Depends(get_admin_user)):
+    return get_company(db, current_user.company_id)
+
+@router.get(
+    "/audit-events",
+    response_model=List[AuditEventResponse],
+    summary="Audit trail",
+    description="Audit events of the admin's company, newest first, filtered by actor, action, entity or time (Admin only)"
+)
+def get_audit_events(
+    action: Optional[str] = None,
+    actor_id: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return query_audit_events(
+        db,
+        current_user.company_id,
+        action=action,
+        actor_id=actor_id,
+        entity_type=entity_type,
+        entity_id=entity_id,
+        since=since,
+        until=until,
+        skip=skip,
+        limit=limit
+    )
+
+@router.post(
+    "/profile",
+    response_model=ProfileResponse,
+    summary="Profile this worker",
+    description=(
+        "Sample the stacks of every thread in the worker serving the request for `seconds` "
+        "and return them collapsed for flamegraph tools (`format=collapsed` returns the bare "
+        "text). `allocations` > 0 also traces memory and lists that many lines that "
+        "allocated the most. One session at a time per worker (Admin only)"
+    ),
+    responses={409: {"description": "A profiling session is already running in this worker"}}
+)
+def profile_worker(
+    seconds: float = Query(10, gt=0),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000),
+    allocations: int = Query(0, ge=0, le=100),
+    include_idle: bool = False,
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    current_user: User = Depends(get_admin_user)
+):
+    if seconds > settings.PROFILER_MAX_SECONDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Profiling sessions are limited to {settings.PROFILER_MAX_SECONDS} seconds"
+        )
+    try:
+        result = profile(seconds, (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000, allocations, include_idle)
+    except ProfilerBusy:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="A profiling session is already running in this worker"
+        )
+    record_audit(WORKER_PROFILED, "worker", str(os.getpid()), current_user, {"seconds": seconds, "allocations": allocations})
+    if format == "collapsed":
+        return PlainTextResponse(result.collapsed())
+    return result.to_dict()
+
+@router.post(
+    "/statements",
+    response_model=StatementRunResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Send holdings statements",
+    description="Start a statement run for a quarter; resumes where an interrupted run stopped (Admin only)"
+)
+def create_statement_run(
+    run_data: StatementRunCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    run = start_statement_run(db, run_data.period, current_user.company_id)
+    record_audit(STATEMENT_RUN_STARTED, "statement_run", run.id, current_user, {"period": run.period})
+    return statement_run_progress(run)
+
+@router.get(
+    "/statements",
+    response_model=List[StatementRunResponse],
+    summary="List statement runs"
+)
+def get_statement_runs(
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return [statement_run_progress(run) for run in list_statement_runs(db, limit, current_user.company_id)]
+
+@router.get(
+    "/statements/{run_id}",
+    response_model=StatementRunResponse,
+    summary="Statement run progress"
+)
+def get_statement_run_progress(
+    run_id: str,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return statement_run_progress(get_statement_run(db, run_id, current_user.company_id))
@@ -0,0 +1,75 @@
+from datetime import datetime
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_cached_read_db
+from app.dependencies.auth import get_admin_user
+from app.models.user_model import User
+from app.schemas.analytics_schema import (
+    CapitalAnalytics,
+    CapitalSummary,
+    MonthlyIssuanceVolume,
+    ShareholderIssuanceVolume
+)
+from app.services.analytics_service import get_capital_analytics
+
+router = APIRouter(
+    tags=["Analytics"],
+    dependencies=[Depends(get_admin_user)]
+)
+
+@router.get(
+    "/capital",
+    response_model=CapitalAnalytics,
+    summary="Capital raised and issuance volume",
+    description="Totals, weighted average price and volume per month and per shareholder (Admin only)"
+)
+def capital_analytics(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return get_capital_analytics(db, start_date, end_date, current_user.company_id)
+
+@router.get(
+    "/capital/summary",
+    response_model=CapitalSummary,
+    summary="Total capital raised",
+    description="Total capital raised and price-weighted average price per share (Admin only)"
+)
+def capital_summary(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return get_capital_analytics(db, start_date, end_date, current_user.company_id)
+
+@router.get(
+    "/issuances/monthly",
+    response_model=List[MonthlyIssuanceVolume],
+    summary="Issuance volume per month",
+    description="Issuance count, shares and capital raised per calendar month (Admin only)"
+)
+def monthly_issuance_volume(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return get_capital_analytics(db, start_date, end_date, current_user.company_id)["by_month"]
+
+@router.get(
+    "/issuances/by-shareholder",
+    response_model=List[ShareholderIssuanceVolume],
+    summary="Issuance volume per shareholder",
+    description="Issuance count, shares and capital raised per shareholder (Admin only)"
+)
+def shareholder_issuance_volume(
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return get_capital_analytics(db, start_date, end_date, current_user.company_id)["by_shareholder"]
@@ -1,10 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from datetime import timedelta
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db.session import get_db
 from app.schemas.user_schema import Token, UserResponse, RefreshTokenRequest
-from app.schemas.auth_schema import LoginRequest, RegisterRequest
+from app.schemas.auth_schema import AcceptInviteRequest, LoginRequest, RegisterRequest
 from app.services.auth_service import (
+    accept_invite,
     authenticate_user,  # Now this will work
     create_access_token,
     create_refresh_token,
@@ -13,43 +16,65 @@ from app.services.auth_service import (
     verify_token
 )
 from app.dependencies.auth import get_current_user, get_admin_user
+from app.core.rate_limit import client_ip, login_rate_limiter
+from app.core.audit import record_audit, USER_REGISTERED
+from app.core.cache import SHAREHOLDERS_CHANGED, bump_cap_table_version
+from app.services.shareholder_search_service import index_shareholder
 from app.models.user_model import User, UserRole
 
 router = APIRouter(tags=["Authentication"])
 
+def issue_tokens(user: User) -> dict:
+    """Access and refresh tokens for `user`, in the Token response shape"""
+    return {
+        "access_token": create_access_token(data={"sub": user.email}),
+        "refresh_token": create_refresh_token(data={"sub": user.email}),
+        "token_type": "bearer",
+        "user": UserResponse(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role.value,
+            is_active=user.is_active,
+            is_disabled=user.is_disabled,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+    }
+
 @router.post("/token", response_model=Token)
 async def login_for_access_token(
     login_data: LoginRequest,
+    request: Request,
     db: Session = Depends(get_db)
 ):
-    user = authenticate_user(db, login_data.email, login_data.password)
+    # Reserve the attempt before paying for a bcrypt verify, so concurrent
+    # attempts cannot all slip through one check
+    ip = client_ip(request)
+    retry_after = login_rate_limiter.reserve(ip, login_data.email)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    # bcrypt runs off the event loop
+    try:
+        user = await run_in_threadpool(authenticate_user, db, login_data.email, login_data.password)
+    except BaseException:
+        login_rate_limiter.release(ip, login_data.email)
+        raise
     if not user:
+        # The reserved token stays spent
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    access_token = create_access_token(data={"sub": user.email})
-    refresh_token = create_refresh_token(data={"sub": user.email})
-    
-    user_response = UserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        role=user.role.value,
-        is_active=user.is_active,
-        is_disabled=user.is_disabled,
-        created_at=user.created_at,
-        updated_at=user.updated_at
-    )
-    
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer",
-        "user": user_response
-    }
+    login_rate_limiter.register_success(ip, login_data.email)
+    return issue_tokens(user)
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
@@ -77,28 +102,35 @@ async def refresh_token(
             detail="User not found"
         )
     
-    access_token = create_access_token(data={"sub": user.email})
-    refresh_token = create_refresh_token(data={"sub": user.email})
-    
-    user_response = UserResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        role=user.role.value,
-        is_active=user.is_active,
-        is_disabled=user.is_disabled,
-        created_at=user.created_at,
-        updated_at=user.updated_at
-    )
-    
-    return {
-        "access_token": access_token,
-        "refresh_token": refresh_token,
-        "token_type": "bearer",
-        "user": user_response
-    }
+    return issue_tokens(user)
 
-@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/invites/accept",
+    response_model=Token,
+    summary="Accept an invitation",
+    description="Set the password of an account created by bulk import with an invite token, and sign in"
+)
+async def accept_invitation(
+    invite: AcceptInviteRequest,
+    db: Session = Depends(get_db)
+):
+    user = await run_in_threadpool(accept_invite, db, invite.token, invite.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid, expired or already used invite token"
+        )
+    return issue_tokens(user)
+
+@router.post(
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    description=(
+        "Create a user in the admin's company (Admin only). Emails are sign-in names and unique across all "
+        "companies, so an address registered with another company is rejected as already registered."
+    )
+)
 async def register_user(
     register_data: RegisterRequest,
     db: Session = Depends(get_db),
@@ -117,17 +149,22 @@ async def register_user(
             detail="Email already registered"
         )
     
-    hashed_password = get_password_hash(register_data.password)
+    hashed_password = await run_in_threadpool(get_password_hash, register_data.password)
     new_user = User(
         email=register_data.email,
         hashed_password=hashed_password,
         full_name=register_data.full_name,
-        role=register_data.role
+        role=register_data.role,
+        # New users join the registering admin's company
+        company_id=current_user.company_id
     )
     
     db.add(new_user)
     db.commit()
+    bump_cap_table_version(new_user.company_id, SHAREHOLDERS_CHANGED)
     db.refresh(new_user)
+    index_shareholder(new_user)
+    record_audit(USER_REGISTERED, "user", new_user.id, current_user, {"role": new_user.role.value})
     
     return UserResponse(
         id=new_user.id,
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends, Header
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.core.events import broker, HEARTBEAT
+from app.dependencies.auth import get_streaming_user
+from app.models.user_model import User, UserRole
+
+router = APIRouter(tags=["Events"])
+
+async def event_stream(shareholder_id: Optional[str], is_admin: bool, last_event_id: Optional[int], company_id: str):
+    # Subscribed once the response streams, so the finally below always runs for it
+    subscription = broker.subscribe(
+        shareholder_id=shareholder_id,
+        is_admin=is_admin,
+        last_event_id=last_event_id,
+        company_id=company_id
+    )
+    try:
+        # Ask the browser to reconnect quickly after a dropped connection
+        yield "retry: 3000\n\n"
+        while True:
+            item = await subscription.get()
+            if item is None:
+                break
+            if item is HEARTBEAT:
+                yield ": keep-alive\n\n"
+                continue
+            yield item.to_sse()
+    finally:
+        broker.unsubscribe(subscription)
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    summary="Stream cap-table changes",
+    description=(
+        "Server-sent events for issuance.created, shareholder.updated, holdings.changed and distribution.changed. "
+        "Admins receive every event of their company, shareholders only events about themselves."
+    )
+)
+async def stream_events(
+    current_user: User = Depends(get_streaming_user),
+    last_event_id: Optional[int] = Header(None, alias="Last-Event-ID")
+):
+    is_admin = current_user.role == UserRole.ADMIN
+    return StreamingResponse(
+        event_stream(None if is_admin else current_user.id, is_admin, last_event_id, current_user.company_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,9 +1,10 @@
-from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import StreamingResponse
+from datetime import date, datetime
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, status
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.db.session import get_db
+from pydantic import TypeAdapter
+from app.db.session import get_cached_read_db, get_db, get_read_db
 from app.dependencies.auth import get_current_user, get_admin_user
 from app.models.issuance_model import ShareIssuance
 from app.schemas.issuance_schema import (
@@ -11,22 +12,48 @@ from app.schemas.issuance_schema import (
     ShareIssuanceResponse,
     OwnershipDistribution
 )
+from app.schemas.vesting_schema import VestedOwnership, VestingScheduleResponse, VestingScheduleSet
 from app.services.issuance_service import (
     create_issuance,
     get_issuances,
     get_issuance_by_id,
-    get_ownership_distribution
+    get_ownership_distribution,
+    ISSUANCE_FIELDS,
+    ISSUANCE_INCLUDES
 )
 from app.models.user_model import User, UserRole
+from app.schemas.user_schema import UserResponse
 from app.utils.pdf_utils import generate_share_certificate
 from app.utils.email_utils import send_certificate_email
+from app.core.audit import record_audit, CERTIFICATE_DOWNLOADED, ISSUANCE_CREATED, VESTING_SCHEDULE_SET
 from app.core.config import settings
+from app.utils.fieldsets import parse_fieldset, require_includes, sparse_response
+from app.utils.compression import CompressedVariantCache
+from app.utils.artifact_store import get_artifact_store
+from app.services.company_service import tenant_filter
+from app.services.certificate_service import (
+    certificate_data,
+    render_certificate,
+    store_certificate,
+    get_certificate
+)
+from app.services.vesting_service import (
+    compute_vested_distribution,
+    get_vesting_schedule,
+    set_vesting_schedule,
+    vesting_schedule_response
+)
 import logging
 
 router = APIRouter(tags=["Issuances"])
 logger = logging.getLogger(__name__)
 
-def validate_issuance_data(issuance_data: ShareIssuanceCreate, db: Session):
+# Distribution JSON per company, cap-table version and encoding
+response_variants = CompressedVariantCache("distribution")
+_distribution_adapter = TypeAdapter(List[OwnershipDistribution])
+_vested_distribution_adapter = TypeAdapter(List[VestedOwnership])
+
+def validate_issuance_data(issuance_data: ShareIssuanceCreate):
     """Advanced validation for share issuance"""
     if issuance_data.number_of_shares <= 0:
         raise HTTPException(
@@ -38,13 +65,13 @@ def validate_issuance_data(issuance_data: ShareIssuanceCreate, db: Session):
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Price per share cannot be negative"
         )
-    # Validate shareholder exists
-    shareholder = db.query(User).filter(User.id == issuance_data.shareholder_id).first()
-    if not shareholder:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Shareholder not found"
-        )
+
+def sparse_issuance(issuance: ShareIssuance, fields: set) -> dict:
+    """Only the requested attributes; touching the others would load them row by row"""
+    data = {name: getattr(issuance, name) for name in fields if name != "shareholder"}
+    if "shareholder" in fields:
+        data["shareholder"] = UserResponse.model_validate(issuance.shareholder) if issuance.shareholder else None
+    return data
 
 @router.post(
     "/",
@@ -54,70 +81,55 @@ def validate_issuance_data(issuance_data: ShareIssuanceCreate, db: Session):
 )
 def create_new_issuance(
     issuance: ShareIssuanceCreate,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
 ):
     """Create new share issuance with automatic email notification"""
-    # Validate input
-    validate_issuance_data(issuance, db)
-    
-    # Audit log
-    logger.info(f"Creating new share issuance for shareholder {issuance.shareholder_id}")
+    # Validate input; the shareholder lookup happens inside the write transaction
+    validate_issuance_data(issuance)
     
     try:
-        # Create the issuance record
-        db_issuance = create_issuance(db, issuance)
-        
-        # Get shareholder details
-        shareholder = db.query(User).filter(User.id == issuance.shareholder_id).first()
-        if not shareholder:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Shareholder not found"
-            )
-        
-        # Prepare certificate data
-        cert_data = {
-            "id": db_issuance.id,
-            "number_of_shares": db_issuance.number_of_shares,
-            "price_per_share": db_issuance.price_per_share,
-            "issue_date": db_issuance.issue_date
-        }
-        
-        # Generate PDF certificate
-        pdf_buffer = generate_share_certificate(
-            cert_data,
-            {
-                "id": shareholder.id,
-                "full_name": shareholder.full_name
-            }
+        db_issuance = create_issuance(db, issuance, current_user.company_id, current_user.id)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("Error creating issuance for shareholder %s", issuance.shareholder_id)
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to create share issuance"
         )
-        pdf_bytes = pdf_buffer.read()
+    
+    record_audit(ISSUANCE_CREATED, "issuance", db_issuance.id, current_user, {
+        "shareholder_id": db_issuance.shareholder_id,
+        "number_of_shares": db_issuance.number_of_shares,
+        "price_per_share": str(db_issuance.price_per_share) if db_issuance.price_per_share is not None else None
+    })
+    
+    # Rendering, storing and emailing the certificate happen after the
+    # response; the issuance is already committed
+    background_tasks.add_task(send_certificate_notification, db_issuance, db_issuance.shareholder)
+    return db_issuance
+
+def send_certificate_notification(issuance: ShareIssuance, shareholder: User):
+    """Render the certificate once, store it and email it to the shareholder"""
+    try:
+        pdf_bytes = render_certificate(issuance, shareholder)
+        store_certificate(issuance, shareholder, pdf_bytes)
         
         # Send email with certificate
         email_sent = send_certificate_email(
             to_email=shareholder.email,
             shareholder_name=shareholder.full_name,
-            issuance_data=cert_data,
+            issuance_data=certificate_data(issuance),
             pdf_attachment=pdf_bytes
         )
         
         if not email_sent:
-            logger.error(f"Failed to send certificate email to {shareholder.email}")
-        
-        # Update certificate URL in database
-        db_issuance.certificate_url = f"/api/v1/issuances/{db_issuance.id}/certificate"
-        db.commit()
-        db.refresh(db_issuance)
-        
-        return db_issuance
-        
+            logger.error("Failed to send certificate email to %s", shareholder.email)
     except Exception as e:
-        logger.error(f"Error creating issuance: {str(e)}")
-        db.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Failed to create share issuance"
-        )
+        logger.exception("Error sending certificate for issuance %s", issuance.id)
 
 @router.get(
     "/",
@@ -126,12 +138,36 @@ def create_new_issuance(
 def list_issuances(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(
+        None,
+        description=f"Comma-separated fields to return (id is always included): {', '.join(ISSUANCE_FIELDS)}"
+    ),
+    include: Optional[str] = Query(
+        None, description="Comma-separated relations to embed: shareholder (required for the shareholder field)"
+    ),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """List all issuances (admin sees all, shareholders see only their own)"""
+    """List all issuances (admins see their company's, shareholders only their own)"""
+    fieldset = parse_fieldset(fields, ISSUANCE_FIELDS)
+    includes = parse_fieldset(include, ISSUANCE_INCLUDES, "include") or set()
+    require_includes(fieldset, includes, {"shareholder": "shareholder"})
+    include_shareholder = "shareholder" in includes
+    if fieldset is not None:
+        fieldset.add("id")
+        if include_shareholder:
+            fieldset.add("shareholder")
+
     shareholder_id = None if current_user.role == UserRole.ADMIN else current_user.id
-    return get_issuances(db, skip, limit, shareholder_id)
+    issuances = get_issuances(
+        db, skip, limit, shareholder_id,
+        fields=fieldset,
+        include_shareholder=include_shareholder,
+        company_id=current_user.company_id
+    )
+    if fieldset is None:
+        return issuances
+    return sparse_response([sparse_issuance(issuance, fieldset) for issuance in issuances], fieldset)
 
 @router.get(
     "/distribution",
@@ -139,26 +175,93 @@ def list_issuances(
     dependencies=[Depends(get_admin_user)]
 )
 def get_distribution(
-    db: Session = Depends(get_db)
+    request: Request,
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_admin_user)
 ):
     """Get ownership distribution data for visualization"""
-    return get_ownership_distribution(db)
+    def render():
+        distribution = get_ownership_distribution(db, current_user.role, current_user.company_id)
+        return _distribution_adapter.dump_json(_distribution_adapter.validate_python(distribution))
+    
+    return response_variants.response(
+        request, "distribution", render, media_type="application/json", company_id=current_user.company_id
+    )
+
+@router.get(
+    "/distribution/vested",
+    response_model=List[VestedOwnership],
+    dependencies=[Depends(get_admin_user)]
+)
+def get_vested_distribution(
+    request: Request,
+    as_of: Optional[date] = Query(None, description="Date to compute vesting on (default today)"),
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Ownership distribution counting only the shares vested on `as_of`"""
+    as_of = as_of or date.today()
+
+    def render():
+        distribution = compute_vested_distribution(db, as_of, current_user.company_id)
+        return _vested_distribution_adapter.dump_json(_vested_distribution_adapter.validate_python(distribution))
+    
+    return response_variants.response(
+        request, ("distribution.vested", as_of), render, media_type="application/json", company_id=current_user.company_id
+    )
+
+@router.put(
+    "/{issuance_id}/vesting",
+    response_model=VestingScheduleResponse,
+    dependencies=[Depends(get_admin_user)]
+)
+def set_issuance_vesting(
+    issuance_id: str,
+    schedule_data: VestingScheduleSet,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Attach a vesting schedule to an issuance, replacing any it had"""
+    issuance, schedule = set_vesting_schedule(db, issuance_id, schedule_data, current_user.company_id)
+    record_audit(VESTING_SCHEDULE_SET, "issuance", issuance.id, current_user, schedule_data.model_dump(mode="json"))
+    return vesting_schedule_response(issuance, schedule, date.today())
+
+@router.get(
+    "/{issuance_id}/vesting",
+    response_model=VestingScheduleResponse
+)
+def get_issuance_vesting(
+    issuance_id: str,
+    as_of: Optional[date] = Query(None, description="Date to compute vesting on (default today)"),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """An issuance's vesting schedule with its vested shares on `as_of`"""
+    issuance, schedule = get_vesting_schedule(db, issuance_id, current_user.company_id)
+    if not issuance:
+        raise HTTPException(status_code=404, detail="Issuance not found")
+    if current_user.role != UserRole.ADMIN and issuance.shareholder_id != current_user.id:
+        raise HTTPException(status_code=403, detail="Not authorized to access this issuance")
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Issuance has no vesting schedule")
+    return vesting_schedule_response(issuance, schedule, as_of or date.today())
 
 @router.get(
     "/{issuance_id}/certificate",
-    response_class=StreamingResponse
+    response_class=FileResponse
 )
 def generate_certificate(
     issuance_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Generate and download a share certificate PDF"""
-    issuance = get_issuance_by_id(db, issuance_id)
+    """Download a share certificate PDF, rendered once and served from the artifact store"""
+    issuance = get_issuance_by_id(db, issuance_id, current_user.company_id)
     if not issuance:
         raise HTTPException(status_code=404, detail="Issuance not found")
     
-    # Verify ownership (admin can access any)
+    # Verify ownership (admins can access any in their company)
     if current_user.role != UserRole.ADMIN and issuance.shareholder_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this certificate")
     
@@ -166,44 +269,50 @@ def generate_certificate(
     if not shareholder:
         raise HTTPException(status_code=404, detail="Shareholder not found")
     
-    # Generate PDF
-    cert_data = {
-        "id": issuance.id,
-        "number_of_shares": issuance.number_of_shares,
-        "price_per_share": issuance.price_per_share,
-        "issue_date": issuance.issue_date
-    }
-    shareholder_data = {
-        "id": shareholder.id,
-        "full_name": shareholder.full_name
-    }
+    artifact = get_certificate(db, issuance, shareholder)
     
-    pdf_buffer = generate_share_certificate(cert_data, shareholder_data)
+    record_audit(CERTIFICATE_DOWNLOADED, "issuance", issuance.id, current_user)
     
-    # Audit log
-    logger.info(f"Certificate downloaded for issuance {issuance_id} by user {current_user.id}")
+    return certificate_response(request, artifact, f"share_certificate_{issuance.id}.pdf")
+
+def certificate_response(request: Request, artifact, filename: str):
+    """Serve a stored certificate straight from the artifact store.
+
+    PDFs are already deflated inside, so they are served as stored, never compressed again.
+    """
+    key = artifact.digest
+    headers = {"Cache-Control": f"private, max-age={settings.CERTIFICATE_CACHE_MAX_AGE}"}
     
-    return StreamingResponse(
-        pdf_buffer,
-        media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=share_certificate_{issuance.id}.pdf"
-        }
-    )
+    # Content-addressed, so the key is a strong validator
+    headers["ETag"] = f'"{key}"'
+    if headers["ETag"] in request.headers.get("if-none-match", ""):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    store = get_artifact_store()
+    path = store.path(key)
+    if path is not None:
+        return FileResponse(path, media_type="application/pdf", filename=filename, headers=headers)
+    headers["Content-Disposition"] = f"attachment; filename={filename}"
+    return StreamingResponse(store.open(key), media_type="application/pdf", headers=headers)
 
 @router.get("/test-email")
-def test_email(issuance_id: str = Query(...), db: Session = Depends(get_db)):
-    """Send a test email using an existing issuance ID"""
+def test_email(
+    issuance_id: str = Query(...),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    """Send a test email using an existing issuance ID of the admin's company (Admin only)"""
     try:
         # 1. Get the issuance record
-        issuance = db.query(ShareIssuance).filter(ShareIssuance.id == issuance_id).first()
+        issuance = db.query(ShareIssuance).filter(
+            ShareIssuance.id == issuance_id,
+            *tenant_filter(ShareIssuance.company_id, current_user.company_id)
+        ).first()
         if not issuance:
             raise HTTPException(status_code=404, detail="Issuance not found")
 
         # 2. Get the shareholder (user) associated with the issuance
         shareholder = issuance.shareholder
-        print("sdfsdfsdfsdfsdfsdf", shareholder.email.strip())
-        print(f"Raw email: {repr(shareholder.email)}")
         if not shareholder:
             raise HTTPException(status_code=404, detail="Shareholder not found")
 
@@ -227,6 +336,7 @@ def test_email(issuance_id: str = Query(...), db: Session = Depends(get_db)):
         
         # 6. Send the email
         email = shareholder.email.strip()
+        logger.info("Sending test email for issuance %s to %s", issuance.id, email)
         success = send_certificate_email(
             to_email=f"{email}",
             shareholder_name=shareholder.full_name,
@@ -240,5 +350,8 @@ def test_email(issuance_id: str = Query(...), db: Session = Depends(get_db)):
             "shareholder_email": shareholder.email
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
+        logger.exception("Test email for issuance %s failed", issuance_id)
         return {"error": str(e)}
@@ -0,0 +1,131 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from app.db.session import get_db, get_read_db
+from app.dependencies.auth import get_current_user, get_admin_user
+from app.core.audit import record_audit, LEDGER_REPAIRED, SHARE_TRANSACTION_POSTED
+from app.models.user_model import User, UserRole
+from app.schemas.ledger_schema import (
+    LedgerCheckResponse,
+    ShareBalanceResponse,
+    ShareTransactionCreate,
+    ShareTransactionResponse
+)
+from app.services.ledger_service import (
+    check_ledger,
+    get_balance,
+    get_balances,
+    get_transactions,
+    post_transaction
+)
+
+router = APIRouter(tags=["Ledger"])
+
+def own_holder_id(current_user: User, holder_id: Optional[str]) -> Optional[str]:
+    """Shareholders only ever see their own holdings"""
+    if current_user.role == UserRole.ADMIN:
+        return holder_id
+    if holder_id is not None and holder_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to access this holder")
+    return current_user.id
+
+@router.post(
+    "/transactions",
+    response_model=ShareTransactionResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Record a transfer, cancellation or repurchase",
+    description="Append a ledger entry and move the holders' balances with it (Admin only)"
+)
+def create_transaction(
+    transaction: ShareTransactionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    db_transaction = post_transaction(
+        db,
+        transaction.kind,
+        transaction.number_of_shares,
+        current_user.company_id,
+        from_holder_id=transaction.from_holder_id,
+        to_holder_id=transaction.to_holder_id,
+        price_per_share=transaction.price_per_share,
+        actor_id=current_user.id,
+        note=transaction.note
+    )
+    record_audit(SHARE_TRANSACTION_POSTED, "share_transaction", db_transaction.id, current_user, {
+        "kind": db_transaction.kind,
+        "from_holder_id": db_transaction.from_holder_id,
+        "to_holder_id": db_transaction.to_holder_id,
+        "number_of_shares": db_transaction.number_of_shares
+    })
+    return db_transaction
+
+@router.get(
+    "/transactions",
+    response_model=List[ShareTransactionResponse],
+    summary="List ledger entries",
+    description="Newest first; admins see their company's ledger, shareholders the entries touching them"
+)
+def list_transactions(
+    holder_id: Optional[str] = None,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    return get_transactions(db, current_user.company_id, own_holder_id(current_user, holder_id), skip, limit)
+
+@router.get(
+    "/balances",
+    response_model=List[ShareBalanceResponse],
+    summary="List balances",
+    description="Shares each holder has now, largest first (Admin only)"
+)
+def list_balances(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return get_balances(db, current_user.company_id, skip, limit)
+
+@router.get(
+    "/balances/{holder_id}",
+    response_model=ShareBalanceResponse,
+    summary="Get a balance",
+    description="Shares a holder has now, read from the maintained balance (admins, or the holder)"
+)
+def read_balance(
+    holder_id: str,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    holder_id = own_holder_id(current_user, holder_id)
+    return {"holder_id": holder_id, "balance": get_balance(db, holder_id, current_user.company_id)}
+
+@router.get(
+    "/consistency",
+    response_model=LedgerCheckResponse,
+    summary="Check balances against the ledger",
+    description="Recompute every balance from the ledger and list those that differ (Admin only)"
+)
+def check_consistency(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_admin_user)
+):
+    return check_ledger(db, current_user.company_id)
+
+@router.post(
+    "/consistency/repair",
+    response_model=LedgerCheckResponse,
+    summary="Repair balances from the ledger",
+    description="Set every balance that differs from the ledger to the ledger's figure (Admin only)"
+)
+def repair_consistency(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_admin_user)
+):
+    result = check_ledger(db, current_user.company_id, repair=True)
+    if result["repaired"]:
+        record_audit(LEDGER_REPAIRED, "ledger", None, current_user, {"mismatches": result["mismatches"]})
+    return result
@@ -1,47 +1,120 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from starlette.concurrency import run_in_threadpool
+from typing import List, Optional
+from app.db.session import get_cached_read_db, get_db, get_read_db
 from app.dependencies.auth import get_admin_user as get_current_admin_user
 from app.schemas.shareholder_schema import (
     ShareholderProfileResponse,
     ShareholderWithSharesResponse,
+    ShareIssuanceResponse,
     ShareholderCreate,
-    ShareholderUpdate
+    ShareholderUpdate,
+    ShareholderSearchResult,
+    ShareholderImportResult
 )
 from app.services.shareholder_service import (
     get_shareholders,
     get_shareholder_by_id,
+    get_total_shares,
     create_shareholder,
     update_shareholder,
-    deactivate_shareholder
+    deactivate_shareholder,
+    SHAREHOLDER_FIELDS,
+    SHAREHOLDER_INCLUDES
 )
+from app.services.shareholder_import_service import IMPORT_FORMATS, import_shareholders, parse_rows
+from app.services.shareholder_search_service import search_shareholders
 from app.models.user_model import User
+from app.utils.fieldsets import parse_fieldset, require_includes, sparse_response
+from app.core.audit import record_audit, SHAREHOLDER_CREATED, SHAREHOLDER_DEACTIVATED, SHAREHOLDER_UPDATED
+from app.core.single_flight import coalesce
+from app.core.config import settings
 
 router = APIRouter(
     tags=["Shareholders"],
     dependencies=[Depends(get_current_admin_user)]  # All endpoints in this router require admin
 )
 
+FIELDS_DESCRIPTION = f"Comma-separated fields to return (id is always included): {', '.join(SHAREHOLDER_FIELDS)}"
+INCLUDE_DESCRIPTION = (
+    "Comma-separated relations to embed: issuances (paginated, newest first; "
+    "required for the issuances and issuance_count fields)"
+)
+
+def parse_shareholder_fieldset(fields: Optional[str], include: Optional[str]):
+    """Validated (fields, include_issuances) from the query parameters"""
+    fieldset = parse_fieldset(fields, SHAREHOLDER_FIELDS)
+    includes = parse_fieldset(include, SHAREHOLDER_INCLUDES, "include") or set()
+    require_includes(fieldset, includes, {"issuances": "issuances", "issuance_count": "issuances"})
+    include_issuances = "issuances" in includes
+    if fieldset is not None:
+        fieldset.add("id")
+        if include_issuances:
+            fieldset.update({"issuances", "issuance_count"})
+    return fieldset, include_issuances
+
 @router.get(
     "/",
     response_model=List[ShareholderWithSharesResponse],
     summary="List all shareholders",
-    description="Retrieve a list of all shareholders with their total shares (Admin only)"
+    description=(
+        "Retrieve a list of all shareholders with their total shares (Admin only). "
+        "Use fields= for a sparse response and include=issuances to embed a page of each shareholder's issuances."
+    )
 )
 def list_shareholders(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    issuances_offset: int = Query(0, ge=0),
+    issuances_limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_cached_read_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
-    shareholders_data = get_shareholders(db, skip=skip, limit=limit)
-    return [
-        build_shareholder_response(
-            shareholder_data["user"],
-            shareholder_data["total_shares"]
+    fieldset, include_issuances = parse_shareholder_fieldset(fields, include)
+    
+    def build_listing():
+        shareholders_data = get_shareholders(
+            db,
+            skip=skip,
+            limit=limit,
+            fields=fieldset,
+            include_issuances=include_issuances,
+            issuances_offset=issuances_offset,
+            issuances_limit=issuances_limit,
+            company_id=current_user.company_id
         )
-        for shareholder_data in shareholders_data
-    ]
+        return [
+            build_shareholder_response(fields=fieldset, **shareholder_data)
+            for shareholder_data in shareholders_data
+        ]
+    
+    # Coalesced on the built responses: ORM rows belong to the leader's session
+    key = (
+        current_user.role, skip, limit,
+        tuple(sorted(fieldset)) if fieldset is not None else None,
+        include_issuances, issuances_offset, issuances_limit
+    )
+    return sparse_response(
+        coalesce("shareholders.list", key, build_listing, company_id=current_user.company_id),
+        fieldset
+    )
+
+@router.get(
+    "/search",
+    response_model=List[ShareholderSearchResult],
+    summary="Search shareholders",
+    description="Ranked prefix and substring search on shareholder name and email (Admin only)"
+)
+def search_shareholder_directory(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    return search_shareholders(db, q, limit, current_user.company_id)
 
 @router.post(
     "/",
@@ -52,7 +125,8 @@ def list_shareholders(
 )
 def create_new_shareholder(
     shareholder: ShareholderCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
     if shareholder.role != "shareholder":
         raise HTTPException(
@@ -60,9 +134,77 @@ def create_new_shareholder(
             detail="Can only create shareholders through this endpoint"
         )
     
-    db_user = create_shareholder(db, shareholder)
+    db_user = create_shareholder(db, shareholder, current_user.company_id)
+    record_audit(SHAREHOLDER_CREATED, "shareholder", db_user.id, current_user)
     return build_shareholder_response(db_user, 0)
 
+@router.post(
+    "/bulk",
+    response_model=ShareholderImportResult,
+    summary="Bulk create shareholders",
+    description=(
+        "Create shareholders from a CSV (text/csv, with a header row) or NDJSON (application/x-ndjson) upload "
+        "with the fields email, full_name, password, address and phone (Admin only). "
+        "Rows without a password are invited: their result carries a token for /invites/accept. "
+        "Responses with invite tokens are not stored for Idempotency-Key replays. "
+        "Each row is reported as created or failed; failed rows do not stop the others."
+    ),
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}}
+            }
+        }
+    }
+)
+async def bulk_create_shareholders(
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
+):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    fmt = IMPORT_FORMATS.get(content_type)
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Upload one of: {', '.join(IMPORT_FORMATS)}"
+        )
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.BULK_IMPORT_MAX_BYTES:
+            raise HTTPException(
+                status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+                detail=f"Uploads are limited to {settings.BULK_IMPORT_MAX_BYTES} bytes"
+            )
+    try:
+        text = body.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Upload must be UTF-8")
+
+    # Parsing, hashing and the inserts all block; keep them off the event loop
+    rows = await run_in_threadpool(parse_rows, text, fmt)
+    result = await run_in_threadpool(import_and_audit, db, rows, current_user)
+    if result["invited"]:
+        # Invite tokens are credentials: keep them out of caches and the idempotency store
+        response.headers["Cache-Control"] = "no-store"
+    return result
+
+def import_and_audit(db: Session, rows, current_user: User):
+    result = import_shareholders(db, rows, current_user.company_id)
+    # Recording waits when the audit queue is full, so this stays off the event loop too
+    for row in result["rows"]:
+        if row["status"] == "created":
+            record_audit(
+                SHAREHOLDER_CREATED, "shareholder", row["id"], current_user,
+                {"bulk": True, "invited": bool(row["invite_token"])}
+            )
+    return result
+
 @router.get(
     "/{shareholder_id}",
     response_model=ShareholderWithSharesResponse,
@@ -71,18 +213,29 @@ def create_new_shareholder(
 )
 def get_shareholder(
     shareholder_id: str,
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    include: Optional[str] = Query(None, description=INCLUDE_DESCRIPTION),
+    issuances_offset: int = Query(0, ge=0),
+    issuances_limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
-    shareholder_data = get_shareholder_by_id(db, shareholder_id)
+    fieldset, include_issuances = parse_shareholder_fieldset(fields, include)
+    shareholder_data = get_shareholder_by_id(
+        db,
+        shareholder_id,
+        fields=fieldset,
+        include_issuances=include_issuances,
+        issuances_offset=issuances_offset,
+        issuances_limit=issuances_limit,
+        company_id=current_user.company_id
+    )
     if not shareholder_data:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shareholder not found"
         )
-    return build_shareholder_response(
-        shareholder_data["user"],
-        shareholder_data["total_shares"]
-    )
+    return sparse_response(build_shareholder_response(fields=fieldset, **shareholder_data), fieldset)
 
 @router.put(
     "/{shareholder_id}",
@@ -93,16 +246,20 @@ def get_shareholder(
 def update_shareholder_info(
     shareholder_id: str,
     shareholder_data: ShareholderUpdate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
-    db_user = update_shareholder(db, shareholder_id, shareholder_data)
+    db_user = update_shareholder(db, shareholder_id, shareholder_data, current_user.company_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shareholder not found"
         )
-    total_shares = sum(issuance.number_of_shares for issuance in db_user.issuances)
-    return build_shareholder_response(db_user, total_shares)
+    record_audit(
+        SHAREHOLDER_UPDATED, "shareholder", db_user.id, current_user,
+        {"fields": sorted(shareholder_data.model_dump(exclude_unset=True))}
+    )
+    return build_shareholder_response(db_user, get_total_shares(db, db_user.id, current_user.company_id))
 
 @router.delete(
     "/{shareholder_id}",
@@ -112,38 +269,49 @@ def update_shareholder_info(
 )
 def deactivate_shareholder_account(
     shareholder_id: str,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin_user)
 ):
-    db_user = deactivate_shareholder(db, shareholder_id)
+    db_user = deactivate_shareholder(db, shareholder_id, current_user.company_id)
     if not db_user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Shareholder not found"
         )
-    total_shares = sum(issuance.number_of_shares for issuance in db_user.issuances)
-    return build_shareholder_response(db_user, total_shares)
+    record_audit(SHAREHOLDER_DEACTIVATED, "shareholder", db_user.id, current_user)
+    return build_shareholder_response(db_user, get_total_shares(db, db_user.id, current_user.company_id))
 
 # Helper function to build consistent responses
-def build_shareholder_response(user: User, total_shares: int):
-    profile = user.shareholder_profile
-    profile_response = None
-    if profile:
-        profile_response = ShareholderProfileResponse(
+def build_shareholder_response(
+    user: User,
+    total_shares: int = 0,
+    issuances: Optional[list] = None,
+    issuance_count: Optional[int] = None,
+    fields: Optional[set] = None
+):
+    """Full response model, or a plain dict of just `fields` for sparse requests"""
+    def wanted(name):
+        return fields is None or name in fields
+
+    data = {"id": user.id}
+    for name in ("email", "full_name", "is_active", "is_disabled", "created_at", "updated_at"):
+        if wanted(name):
+            data[name] = getattr(user, name)
+    if wanted("role"):
+        data["role"] = user.role.value
+    if wanted("total_shares"):
+        data["total_shares"] = total_shares
+    if wanted("shareholder_profile"):
+        profile = user.shareholder_profile
+        data["shareholder_profile"] = ShareholderProfileResponse(
             id=profile.id,
             address=profile.address,
             phone=profile.phone
-        )
-    
-    return ShareholderWithSharesResponse(
-        id=user.id,
-        email=user.email,
-        full_name=user.full_name,
-        role=user.role.value,
-        is_active=user.is_active,
-        is_disabled=user.is_disabled,
-        created_at=user.created_at,
-        updated_at=user.updated_at,
-        total_shares=total_shares,
-        shareholder_profile=profile_response,
-        issuances=user.issuances
-    )
\ No newline at end of file
+        ) if profile else None
+    if issuances is not None:
+        data["issuances"] = [ShareIssuanceResponse.model_validate(issuance) for issuance in issuances]
+        data["issuance_count"] = issuance_count
+
+    if fields is None:
+        return ShareholderWithSharesResponse(**data)
+    return data
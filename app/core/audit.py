@@ -0,0 +1,211 @@
+import json
+import logging
+import queue
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import insert
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.audit_model import AuditEvent
+from app.models.company_model import DEFAULT_COMPANY_ID
+
+logger = logging.getLogger(__name__)
+
+ISSUANCE_CREATED = "issuance.created"
+CERTIFICATE_DOWNLOADED = "certificate.downloaded"
+SHAREHOLDER_CREATED = "shareholder.created"
+SHAREHOLDER_UPDATED = "shareholder.updated"
+SHAREHOLDER_DEACTIVATED = "shareholder.deactivated"
+USER_REGISTERED = "user.registered"
+STATEMENT_RUN_STARTED = "statement_run.started"
+WORKER_PROFILED = "worker.profiled"
+VESTING_SCHEDULE_SET = "vesting_schedule.set"
+SHARE_TRANSACTION_POSTED = "share_transaction.posted"
+LEDGER_REPAIRED = "ledger.repaired"
+
+# A batch that keeps failing is logged and given up on rather than blocking the trail
+_MAX_ATTEMPTS = 3
+
+@dataclass
+class AuditStats:
+    recorded: int = 0
+    written: int = 0
+    batches: int = 0
+    # Events given up on: the queue stayed full or their batch kept failing
+    dropped: int = 0
+    failed_flushes: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "recorded": self.recorded,
+            "written": self.written,
+            "batches": self.batches,
+            "dropped": self.dropped,
+            "failed_flushes": self.failed_flushes
+        }
+
+def write_audit_events(rows: List[Dict[str, Any]]) -> None:
+    """One multi-row INSERT per batch"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(AuditEvent).values(rows))
+        db.commit()
+    finally:
+        db.close()
+
+class AuditLog:
+    """Queues audit events in memory and writes them in batches off the request path.
+
+    `record` only enqueues. A background thread writes whatever is queued
+    every flush interval, or sooner once a batch has filled up. The queue is
+    bounded: when the writer falls behind, callers wait up to the enqueue
+    timeout and the event is then dropped and logged instead of holding up
+    the request further. A batch that fails to write is kept and retried
+    on the next flush.
+    """
+
+    def __init__(
+        self,
+        sink: Callable[[List[Dict[str, Any]]], None] = write_audit_events,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        enqueue_timeout: Optional[float] = None
+    ):
+        self._sink = sink
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or settings.AUDIT_QUEUE_SIZE)
+        self._batch_size = batch_size or settings.AUDIT_BATCH_SIZE
+        self._flush_interval = settings.AUDIT_FLUSH_INTERVAL_SECONDS if flush_interval is None else flush_interval
+        self._enqueue_timeout = settings.AUDIT_ENQUEUE_TIMEOUT_SECONDS if enqueue_timeout is None else enqueue_timeout
+        # Serialises flushes between the writer thread and explicit flush() calls
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._retry: List[Dict[str, Any]] = []
+        self._attempts = 0
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = AuditStats()
+
+    def record(
+        self,
+        action: str,
+        entity_type: str,
+        entity_id: Optional[str] = None,
+        actor_id: Optional[str] = None,
+        company_id: Optional[str] = None,
+        details: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Enqueue one event; False if it had to be dropped"""
+        row = {
+            "id": str(uuid.uuid4()),
+            "company_id": company_id or DEFAULT_COMPANY_ID,
+            "actor_id": actor_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "details": details,
+            "created_at": datetime.now(timezone.utc)
+        }
+        try:
+            self._queue.put(row, timeout=self._enqueue_timeout)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats.dropped += 1
+            logger.error("Audit queue full, event dropped: %s", json.dumps(row, default=str))
+            return False
+        with self._stats_lock:
+            self._stats.recorded += 1
+        if self._queue.qsize() >= self._batch_size:
+            self._wake.set()
+        return True
+
+    def flush(self) -> int:
+        """Write everything queued so far; returns the number of events written"""
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch, self._retry = self._retry, []
+                while len(batch) < self._batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not batch:
+                    return written
+                try:
+                    self._sink(batch)
+                except Exception:
+                    self._attempts += 1
+                    with self._stats_lock:
+                        self._stats.failed_flushes += 1
+                    if self._attempts < _MAX_ATTEMPTS:
+                        logger.exception("Writing %d audit events failed; will retry", len(batch))
+                        self._retry = batch
+                    else:
+                        logger.exception(
+                            "Writing %d audit events failed %d times, dropped: %s",
+                            len(batch), self._attempts, json.dumps(batch, default=str)
+                        )
+                        self._attempts = 0
+                        with self._stats_lock:
+                            self._stats.dropped += len(batch)
+                    return written
+                self._attempts = 0
+                written += len(batch)
+                with self._stats_lock:
+                    self._stats.written += len(batch)
+                    self._stats.batches += 1
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the writer and flush what is left"""
+        if self._thread is not None:
+            self._stopping.set()
+            self._wake.set()
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+        pending = self.pending()
+        if pending:
+            logger.error("%d audit events could not be written before shutdown", pending)
+
+    def pending(self) -> int:
+        return self._queue.qsize() + len(self._retry)
+
+    def stats(self) -> Dict[str, int]:
+        with self._stats_lock:
+            return {**self._stats.to_dict(), "pending": self.pending()}
+
+audit_log = AuditLog()
+
+def record_audit(
+    action: str,
+    entity_type: str,
+    entity_id: Optional[str] = None,
+    actor=None,
+    details: Optional[Dict[str, Any]] = None
+) -> bool:
+    """Record an action by `actor` (a User) in the actor's company"""
+    return audit_log.record(
+        action,
+        entity_type,
+        entity_id,
+        actor_id=getattr(actor, "id", None),
+        company_id=getattr(actor, "company_id", None),
+        details=details
+    )
@@ -0,0 +1,334 @@
+"""Cap-table versions and the caches keyed by them.
+
+Cached read models are stored together with the cap-table version of
+their company they were built from, and ignored once that version moves
+on. The version counters live in the cache backend: in this process with
+the memory backend, or on a Redis-protocol server shared by every worker.
+There, each write increments the shared counter and publishes the new
+version so the other workers stop serving what they cached before it, and
+cached values are stored on the server as well, so one worker's result
+serves the others. Each worker mirrors the counters, so reading a version
+never leaves the process.
+
+A worker that cannot hear the other workers' invalidations does not serve
+from its caches; its own writes made meanwhile are replayed once it is
+back in sync.
+"""
+import hashlib
+import logging
+import os
+import pickle
+import threading
+import uuid
+import weakref
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Why a version moved, passed along to the other workers: holdings (issuances,
+# their schedules, ledger postings) or shareholders themselves. None means
+# anything may have changed
+ISSUANCES_CHANGED = "issuances"
+SHAREHOLDERS_CHANGED = "shareholders"
+
+# Counter moved by bumping without a company (the epoch); every company's
+# version includes it
+_EPOCH = ""
+
+# Tells this worker's own invalidations apart from the other workers' (the
+# pid separates workers forked after import)
+_INSTANCE = uuid.uuid4().hex
+
+def _origin() -> str:
+    return f"{_INSTANCE}:{os.getpid()}"
+
+class CacheBackend(ABC):
+    """Holds the version counters and, when `shared`, cache entries all workers see.
+
+    `start` connects and hands over two callbacks: `on_version` for every
+    version another worker publishes, and `on_resync` whenever the backend
+    (re)connects and the counters may have moved unheard.
+    """
+    name = "memory"
+    # Entries set on the backend are visible to every worker
+    shared = False
+
+    def start(self, on_version: Callable[[Dict[str, Any]], None], on_resync: Callable[[], None]) -> None:
+        on_resync()
+
+    def stop(self) -> None:
+        pass
+
+    def reset(self) -> None:
+        """Reconnect and resync; called after a write could not reach the backend"""
+
+    @property
+    def healthy(self) -> bool:
+        return True
+
+    @abstractmethod
+    def incr_version(self, counter: str) -> int:
+        """Increment `counter` and return its new value"""
+
+    @abstractmethod
+    def versions(self) -> Dict[str, int]:
+        """Every counter's current value"""
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        pass
+
+    def get(self, key: str) -> Optional[bytes]:
+        return None
+
+    def set(self, key: str, value: bytes, ttl: int) -> None:
+        pass
+
+class MemoryCacheBackend(CacheBackend):
+    """Single-process backend: counters in a dict, entries only in each cache"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, int] = {}
+
+    def incr_version(self, counter):
+        with self._lock:
+            self._counters[counter] = self._counters.get(counter, 0) + 1
+            return self._counters[counter]
+
+    def versions(self):
+        with self._lock:
+            return dict(self._counters)
+
+_backend: CacheBackend = MemoryCacheBackend()
+_version_lock = threading.Lock()
+# Counters mirrored from the backend, and those bumped while it was unreachable
+_versions: Dict[str, int] = {}
+_pending: Set[str] = set()
+# Counters this worker moved while a resync was reading the backend's
+_moved_during_resync: Optional[Set[str]] = None
+_listeners: List[Callable[[Optional[str], Optional[str]], None]] = []
+_caches: "weakref.WeakSet[VersionedCache]" = weakref.WeakSet()
+
+def _counter(company_id: Optional[str]) -> str:
+    return _EPOCH if company_id is None else company_id
+
+def _advance(counter: str, version: int) -> None:
+    with _version_lock:
+        if version > _versions.get(counter, 0):
+            _versions[counter] = version
+        if _moved_during_resync is not None:
+            _moved_during_resync.add(counter)
+
+def get_cap_table_version(company_id: Optional[str] = None) -> int:
+    version = _versions.get(_EPOCH, 0)
+    if company_id is not None:
+        version += _versions.get(company_id, 0)
+    return version
+
+def bump_cap_table_version(company_id: Optional[str] = None, reason: Optional[str] = None) -> int:
+    """Move the company's version (every company's without one) and tell the other workers"""
+    counter = _counter(company_id)
+    try:
+        version = _backend.incr_version(counter)
+    except Exception:
+        logger.warning("Cache backend unreachable; invalidation of %r will be replayed", company_id, exc_info=True)
+        with _version_lock:
+            _pending.add(counter)
+            _versions[counter] = _versions.get(counter, 0) + 1
+        _backend.reset()
+        return get_cap_table_version(company_id)
+    _advance(counter, version)
+    _publish(counter, version, reason)
+    return get_cap_table_version(company_id)
+
+def _publish(counter: str, version: int, reason: Optional[str]) -> None:
+    try:
+        _backend.publish({"origin": _origin(), "counter": counter, "version": version, "reason": reason})
+    except Exception:
+        # The counter has moved; other workers pick it up when they next resync
+        logger.warning("Failed to broadcast invalidation of %r", counter or None, exc_info=True)
+        _backend.reset()
+
+def on_remote_invalidation(listener: Callable[[Optional[str], Optional[str]], None]) -> None:
+    """Call `listener(company_id, reason)` when another worker moves a version.
+
+    After a resync the listener gets (None, None): anything may have changed.
+    """
+    _listeners.append(listener)
+
+def _notify(company_id: Optional[str], reason: Optional[str]) -> None:
+    for listener in _listeners:
+        try:
+            listener(company_id, reason)
+        except Exception:
+            logger.exception("Invalidation listener failed")
+
+def _on_version(message: Dict[str, Any]) -> None:
+    if message.get("origin") == _origin():
+        return
+    counter = message["counter"]
+    _advance(counter, int(message["version"]))
+    _notify(None if counter == _EPOCH else counter, message.get("reason"))
+
+def _resync() -> None:
+    """Replay invalidations that could not be sent, then mirror the backend's counters"""
+    global _moved_during_resync
+    with _version_lock:
+        pending = sorted(_pending)
+        _pending.clear()
+        _moved_during_resync = set()
+    try:
+        for counter in pending:
+            _publish(counter, _backend.incr_version(counter), None)
+        versions = _backend.versions()
+    except Exception:
+        with _version_lock:
+            _pending.update(pending)
+            _moved_during_resync = None
+        raise
+    with _version_lock:
+        # Mirror the backend exactly (it may have restarted empty), except
+        # for counters bumped here after it was read
+        for counter in _moved_during_resync:
+            versions[counter] = max(versions.get(counter, 0), _versions.get(counter, 0))
+        _moved_during_resync = None
+        _versions.clear()
+        _versions.update(versions)
+    # Entries may carry versions that were moved without this worker hearing
+    for cache in list(_caches):
+        cache.clear()
+    _notify(None, None)
+
+def configure_cache(backend: Optional[CacheBackend] = None) -> CacheBackend:
+    """Switch to `backend`, or the one CACHE_BACKEND names; called at startup"""
+    global _backend
+    if backend is None:
+        backend = _backend_from_settings()
+    _backend.stop()
+    _backend = backend
+    with _version_lock:
+        _versions.clear()
+        _pending.clear()
+    backend.start(_on_version, _resync)
+    return backend
+
+def shutdown_cache() -> None:
+    _backend.stop()
+
+def _backend_from_settings() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        from app.core.redis_cache import RedisCacheBackend
+        return RedisCacheBackend.from_url(settings.CACHE_URL)
+    if settings.CACHE_BACKEND != "memory":
+        raise ValueError(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r}")
+    return MemoryCacheBackend()
+
+@dataclass
+class CacheStats:
+    # Lookups answered by this worker's copy, by the shared backend, not at
+    # all, and skipped because the backend was out of sync
+    hits: int = 0
+    shared_hits: int = 0
+    misses: int = 0
+    bypassed: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        lookups = self.hits + self.shared_hits + self.misses + self.bypassed
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "hit_rate": round((self.hits + self.shared_hits) / lookups, 4) if lookups else None
+        }
+
+_stats_lock = threading.Lock()
+_stats: Dict[str, CacheStats] = {}
+
+def _count(namespace: str, outcome: str) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(namespace, CacheStats())
+        setattr(stats, outcome, getattr(stats, outcome) + 1)
+
+def cache_stats() -> Dict[str, Any]:
+    """Backend, whether it is in sync, and lookups per namespace in this worker"""
+    with _stats_lock:
+        namespaces = {namespace: stats.to_dict() for namespace, stats in _stats.items()}
+    return {"backend": _backend.name, "healthy": _backend.healthy, "namespaces": namespaces}
+
+def reset_cache_stats() -> None:
+    with _stats_lock:
+        _stats.clear()
+
+class VersionedCache:
+    """Cache whose entries are valid for one cap-table version of their company.
+
+    Entries are kept in this process and, for `shared` caches on a shared
+    backend, on the backend too (pickled, expiring after CACHE_TTL_SECONDS).
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 256, shared: bool = True):
+        self.namespace = namespace
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[Optional[str], Hashable], Tuple[int, Any]] = {}
+        self._max_entries = max_entries
+        _caches.add(self)
+
+    def _shared_key(self, key: Hashable, company_id: Optional[str], version: int) -> str:
+        digest = hashlib.sha1(repr((company_id, key)).encode()).hexdigest()
+        return f"{self.namespace}:{version}:{digest}"
+
+    def get(self, key: Hashable, company_id: Optional[str] = None) -> Optional[Any]:
+        if not _backend.healthy:
+            _count(self.namespace, "bypassed")
+            return None
+        version = get_cap_table_version(company_id)
+        with self._lock:
+            entry = self._entries.get((company_id, key))
+        if entry is not None and entry[0] == version:
+            _count(self.namespace, "hits")
+            return entry[1]
+        if self.shared and _backend.shared:
+            try:
+                data = _backend.get(self._shared_key(key, company_id, version))
+                value = None if data is None else pickle.loads(data)
+            except Exception:
+                logger.warning("Shared cache read failed in %s", self.namespace, exc_info=True)
+                data = None
+            if data is not None:
+                self._store((company_id, key), version, value)
+                _count(self.namespace, "shared_hits")
+                return value
+        _count(self.namespace, "misses")
+        return None
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None, company_id: Optional[str] = None) -> None:
+        """Store `value`; pass the version read before computing it to avoid caching stale data"""
+        if not _backend.healthy:
+            return
+        version = get_cap_table_version(company_id) if version is None else version
+        self._store((company_id, key), version, value)
+        if self.shared and _backend.shared:
+            try:
+                data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+                _backend.set(self._shared_key(key, company_id, version), data, settings.CACHE_TTL_SECONDS)
+            except Exception:
+                logger.warning("Shared cache write failed in %s", self.namespace, exc_info=True)
+
+    def _store(self, entry_key: Tuple[Optional[str], Hashable], version: int, value: Any) -> None:
+        with self._lock:
+            if len(self._entries) >= self._max_entries and entry_key not in self._entries:
+                self._entries = {
+                    k: v for k, v in self._entries.items() if v[0] == get_cap_table_version(k[0])
+                }
+                if len(self._entries) >= self._max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._entries[entry_key] = (version, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
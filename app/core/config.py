@@ -5,6 +5,8 @@ from pydantic_settings import BaseSettings, SettingsConfigDict
 load_dotenv()
 
 DATABASE_URL: str = os.getenv("DATABASE_URL")
+# Optional read replica; read-only endpoints use it when set
+DATABASE_REPLICA_URL: str = os.getenv("DATABASE_REPLICA_URL")
 SECRET_KEY: str = os.getenv("SECRET_KEY", "EWERSDFSFSFSDFSDFSDFT5QT5")
 ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
@@ -19,8 +21,121 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = os.getenv("SMTP_PASS")
     SMTP_FROM: str = os.getenv("SMTP_FROM")
     ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
+    # "json" for one JSON object per line, "text" for humans
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "json")
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     SMTP_USE_TLS: bool = True 
 
+    # Password hashing: bcrypt rounds are calibrated at startup to the fewest
+    # whose verify takes PASSWORD_HASH_TARGET_MS here, never below the
+    # floor. PASSWORD_HASH_ROUNDS pins the cost and skips calibration
+    PASSWORD_HASH_TARGET_MS: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", 250))
+    PASSWORD_HASH_MIN_ROUNDS: int = int(os.getenv("PASSWORD_HASH_MIN_ROUNDS", 10))
+    PASSWORD_HASH_MAX_ROUNDS: int = int(os.getenv("PASSWORD_HASH_MAX_ROUNDS", 16))
+    PASSWORD_HASH_ROUNDS: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 0))
+
+    # Login throttling (token buckets, only failed attempts drain them).
+    # Rates below one per hour are raised to it
+    LOGIN_RATE_LIMIT_ENABLED: bool = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    LOGIN_RATE_LIMIT_IP_CAPACITY: int = int(os.getenv("LOGIN_RATE_LIMIT_IP_CAPACITY", 20))
+    LOGIN_RATE_LIMIT_IP_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_LIMIT_IP_PER_MINUTE", 10))
+    LOGIN_RATE_LIMIT_EMAIL_CAPACITY: int = int(os.getenv("LOGIN_RATE_LIMIT_EMAIL_CAPACITY", 5))
+    LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE: float = float(os.getenv("LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE", 1))
+    # Reverse proxies in front of the app. With 0 clients are throttled by
+    # their peer address; behind proxies set it to their number so the client
+    # is read from X-Forwarded-For instead of every client sharing the proxy's
+    TRUSTED_PROXY_COUNT: int = int(os.getenv("TRUSTED_PROXY_COUNT", 0))
+
+    # Idempotency-Key handling for write requests
+    IDEMPOTENCY_KEY_TTL_HOURS: int = int(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", 24))
+    IDEMPOTENCY_CACHE_SECONDS: int = int(os.getenv("IDEMPOTENCY_CACHE_SECONDS", 300))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", 30))
+    # The request holding a key renews its lease while it runs; a key whose
+    # lease lapses (its worker died) can be claimed again
+    IDEMPOTENCY_LEASE_SECONDS: float = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", 30))
+
+    # Reads carrying a consistency token stay on the primary for this long
+    # when the replica's replay position cannot be checked
+    REPLICA_MAX_LAG_SECONDS: float = float(os.getenv("REPLICA_MAX_LAG_SECONDS", 5))
+
+    # Full rebuild interval of the in-process shareholder search index (SQLite)
+    SEARCH_INDEX_REFRESH_SECONDS: int = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", 300))
+
+    # Response compression; bodies below the minimum size are sent as-is
+    COMPRESSION_MINIMUM_SIZE: int = int(os.getenv("COMPRESSION_MINIMUM_SIZE", 1024))
+    GZIP_COMPRESSION_LEVEL: int = int(os.getenv("GZIP_COMPRESSION_LEVEL", 6))
+    BROTLI_COMPRESSION_QUALITY: int = int(os.getenv("BROTLI_COMPRESSION_QUALITY", 5))
+    ZSTD_COMPRESSION_LEVEL: int = int(os.getenv("ZSTD_COMPRESSION_LEVEL", 3))
+
+    # Rendered certificates, stored by content hash
+    ARTIFACT_STORE_DIR: str = os.getenv("ARTIFACT_STORE_DIR", "artifacts")
+    CERTIFICATE_CACHE_MAX_AGE: int = int(os.getenv("CERTIFICATE_CACHE_MAX_AGE", 86400))
+
+    # Holdings statement runs: render processes (0 renders in the calling
+    # process), SMTP pacing, and how long a silent run counts as still active
+    STATEMENT_RENDER_WORKERS: int = int(os.getenv("STATEMENT_RENDER_WORKERS", os.cpu_count() or 1))
+    STATEMENT_EMAILS_PER_SECOND: float = float(os.getenv("STATEMENT_EMAILS_PER_SECOND", 5))
+    STATEMENT_BATCH_SIZE: int = int(os.getenv("STATEMENT_BATCH_SIZE", 200))
+    STATEMENT_RUN_STALE_SECONDS: int = int(os.getenv("STATEMENT_RUN_STALE_SECONDS", 300))
+
+    # Bulk shareholder imports: rows per insert batch, password hashing
+    # processes (0 hashes in the request thread) and upload limits
+    BULK_IMPORT_CHUNK_SIZE: int = int(os.getenv("BULK_IMPORT_CHUNK_SIZE", 500))
+    BULK_IMPORT_HASH_WORKERS: int = int(os.getenv("BULK_IMPORT_HASH_WORKERS", os.cpu_count() or 1))
+    BULK_IMPORT_MAX_ROWS: int = int(os.getenv("BULK_IMPORT_MAX_ROWS", 10000))
+    BULK_IMPORT_MAX_BYTES: int = int(os.getenv("BULK_IMPORT_MAX_BYTES", 10 * 1024 * 1024))
+    # How long an invite token from a bulk import can be redeemed
+    INVITE_TTL_HOURS: float = float(os.getenv("INVITE_TTL_HOURS", 168))
+
+    # Range-partition share_issuances by quarter of issue_date (Postgres
+    # only), keeping this many future quarters created ahead of time
+    SHARE_ISSUANCES_PARTITIONED: bool = os.getenv("SHARE_ISSUANCES_PARTITIONED", "false").lower() == "true"
+    SHARE_ISSUANCE_PARTITIONS_AHEAD: int = int(os.getenv("SHARE_ISSUANCE_PARTITIONS_AHEAD", 4))
+
+    # Audit trail: events are queued in memory and written in batches. When
+    # the queue is full, callers wait up to the enqueue timeout before the
+    # event is dropped (and logged)
+    AUDIT_QUEUE_SIZE: int = int(os.getenv("AUDIT_QUEUE_SIZE", 10000))
+    AUDIT_BATCH_SIZE: int = int(os.getenv("AUDIT_BATCH_SIZE", 500))
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = float(os.getenv("AUDIT_FLUSH_INTERVAL_SECONDS", 1))
+    AUDIT_ENQUEUE_TIMEOUT_SECONDS: float = float(os.getenv("AUDIT_ENQUEUE_TIMEOUT_SECONDS", 0.1))
+
+    # Request tracing: the fraction of requests traced (0 turns it off), and
+    # where sampled traces go as OTLP/JSON: appended to the file, or posted
+    # to a collector's /v1/traces URL when one is set. Incoming W3C
+    # traceparent headers decide sampling only when trusted
+    TRACE_SAMPLE_RATE: float = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+    TRACE_EXPORT_PATH: str = os.getenv("TRACE_EXPORT_PATH", "traces.jsonl")
+    TRACE_EXPORT_URL: str = os.getenv("TRACE_EXPORT_URL", "")
+    TRACE_TRUST_PARENT: bool = os.getenv("TRACE_TRUST_PARENT", "false").lower() == "true"
+    # Traces waiting for export (more are dropped), and how many go in one request
+    TRACE_QUEUE_SIZE: int = int(os.getenv("TRACE_QUEUE_SIZE", 2048))
+    TRACE_EXPORT_BATCH_SIZE: int = int(os.getenv("TRACE_EXPORT_BATCH_SIZE", 64))
+
+    # Caches of cap-table read models: "memory" keeps them per worker,
+    # "redis" shares entries and invalidations between workers through a
+    # Redis-protocol server at CACHE_URL. Shared values are pickled, so the
+    # server must be trusted
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_URL: str = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_KEY_PREFIX: str = os.getenv("CACHE_KEY_PREFIX", "captable")
+    CACHE_TTL_SECONDS: int = int(os.getenv("CACHE_TTL_SECONDS", 3600))
+    CACHE_SOCKET_TIMEOUT_SECONDS: float = float(os.getenv("CACHE_SOCKET_TIMEOUT_SECONDS", 0.5))
+
+    # Event stream (GET /events/stream) delivery between workers: "local"
+    # reaches only the clients of the worker that published, so it refuses
+    # to start when WEB_CONCURRENCY (the worker count uvicorn and gunicorn
+    # read) is above 1; "redis" goes through the server at EVENT_BUS_URL
+    EVENT_BUS_BACKEND: str = os.getenv("EVENT_BUS_BACKEND", "local")
+    EVENT_BUS_URL: str = os.getenv("EVENT_BUS_URL", os.getenv("CACHE_URL", "redis://localhost:6379/0"))
+    EVENT_BUS_KEY_PREFIX: str = os.getenv("EVENT_BUS_KEY_PREFIX", "captable")
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))
+
+    # On-demand profiling (POST /admin/profile): longest session allowed and
+    # the default sampling interval
+    PROFILER_MAX_SECONDS: int = int(os.getenv("PROFILER_MAX_SECONDS", 60))
+    PROFILER_INTERVAL_MS: float = float(os.getenv("PROFILER_INTERVAL_MS", 10))
+
     model_config = SettingsConfigDict(
         case_sensitive=True,
         env_file=".env",
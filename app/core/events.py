@@ -0,0 +1,316 @@
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ISSUANCE_CREATED = "issuance.created"
+SHAREHOLDER_UPDATED = "shareholder.updated"
+# A holder's balance moved through the ledger (transfer, cancellation,
+# repurchase or a repair)
+HOLDINGS_CHANGED = "holdings.changed"
+DISTRIBUTION_CHANGED = "distribution.changed"
+
+# Sentinels pushed into subscriber queues
+HEARTBEAT = object()
+_CLOSED = object()
+
+@dataclass
+class Event:
+    type: str
+    data: Dict[str, Any]
+    # Shareholder the event concerns; None means admins only
+    shareholder_id: Optional[str] = None
+    # Only admins of this company see the event
+    company_id: Optional[str] = None
+    id: int = 0
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "type": self.type,
+            "data": self.data,
+            "shareholder_id": self.shareholder_id,
+            "company_id": self.company_id,
+            "created_at": self.created_at
+        }
+
+    def to_sse(self) -> str:
+        payload = json.dumps({**self.data, "created_at": self.created_at}, default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+class Subscription:
+    """One connected client. Holds a bounded queue owned by the client's event loop."""
+
+    __slots__ = ("shareholder_id", "is_admin", "company_id", "loop", "queue", "closed")
+
+    def __init__(
+        self,
+        shareholder_id: Optional[str],
+        is_admin: bool,
+        loop: asyncio.AbstractEventLoop,
+        max_queue: int,
+        company_id: Optional[str] = None
+    ):
+        self.shareholder_id = shareholder_id
+        self.is_admin = is_admin
+        self.company_id = company_id
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.closed = False
+
+    def _offer(self, item):
+        # Runs on the subscriber's loop
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            if item is HEARTBEAT:
+                return
+            # A client that cannot keep up is disconnected and will reconnect
+            # with Last-Event-ID instead of buffering without bound
+            self.closed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(_CLOSED)
+
+    async def get(self):
+        """Next Event, HEARTBEAT, or None once the subscription is closed"""
+        item = await self.queue.get()
+        if item is _CLOSED:
+            return None
+        return item
+
+class EventBus(ABC):
+    """Carries events between workers. The broker publishes to the bus and
+    receives every event (including its own) back through `on_event`.
+
+    Event ids come from the bus when an event is published, so every worker
+    knows an event by the same id and a client can resume with Last-Event-ID
+    on whichever worker it reconnects to. A bus shared by several workers
+    must draw them from a shared increasing sequence.
+    """
+
+    @abstractmethod
+    def start(self, on_event: Callable[[Dict[str, Any]], None]) -> None:
+        ...
+
+    @abstractmethod
+    def next_id(self) -> int:
+        ...
+
+    @abstractmethod
+    def publish(self, event: Dict[str, Any]) -> None:
+        ...
+
+    def stop(self) -> None:
+        pass
+
+class LocalEventBus(EventBus):
+    """Single-process bus: delivers straight back to this worker's broker.
+
+    Clients connected to another worker never see the events, so it is only
+    right for a single worker; see configure_event_bus.
+    """
+
+    def __init__(self):
+        self._on_event: Optional[Callable[[Dict[str, Any]], None]] = None
+        # Seeded from the clock so a restarted worker does not reuse ids its
+        # clients have already seen
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._ids_lock = threading.Lock()
+
+    def start(self, on_event):
+        self._on_event = on_event
+
+    def next_id(self):
+        with self._ids_lock:
+            return next(self._ids)
+
+    def publish(self, event):
+        if self._on_event is not None:
+            self._on_event(event)
+
+class EventBroker:
+    """Fans cap-table events out to the SSE subscribers of this worker.
+
+    Subscribers are indexed by audience so a publish only touches the admins
+    of the event's company and the one shareholder concerned, and deliveries
+    are batched into a single call_soon_threadsafe per event loop. Idle
+    subscribers cost one queue each; keep-alives come from one shared timer.
+    """
+
+    def __init__(self, bus: Optional[EventBus] = None, max_queue: int = 100, history: int = 1000):
+        self._lock = threading.Lock()
+        self._admins: Dict[Optional[str], Set[Subscription]] = {}
+        self._by_shareholder: Dict[str, Set[Subscription]] = {}
+        self._history: Deque[Event] = deque(maxlen=history)
+        self._max_queue = max_queue
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self.bus = bus or LocalEventBus()
+        self.bus.start(self._dispatch)
+
+    def set_bus(self, bus: EventBus) -> None:
+        self.bus.stop()
+        self.bus = bus
+        self.bus.start(self._dispatch)
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._admins.values()) + sum(len(s) for s in self._by_shareholder.values())
+
+    def subscribe(
+        self,
+        shareholder_id: Optional[str],
+        is_admin: bool,
+        last_event_id: Optional[int] = None,
+        company_id: Optional[str] = None
+    ) -> Subscription:
+        """Register a client; must be called from the client's event loop"""
+        subscription = Subscription(shareholder_id, is_admin, asyncio.get_running_loop(), self._max_queue, company_id)
+        with self._lock:
+            if is_admin:
+                self._admins.setdefault(company_id, set()).add(subscription)
+            else:
+                self._by_shareholder.setdefault(shareholder_id, set()).add(subscription)
+            missed = [e for e in self._history if last_event_id is not None and e.id > last_event_id]
+        for event in missed:
+            if self._visible(event, subscription):
+                subscription._offer(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscription.closed = True
+        with self._lock:
+            if subscription.is_admin:
+                admins = self._admins.get(subscription.company_id)
+                if admins is not None:
+                    admins.discard(subscription)
+                    if not admins:
+                        del self._admins[subscription.company_id]
+            else:
+                holders = self._by_shareholder.get(subscription.shareholder_id)
+                if holders is not None:
+                    holders.discard(subscription)
+                    if not holders:
+                        del self._by_shareholder[subscription.shareholder_id]
+
+    @staticmethod
+    def _visible(event: Event, subscription: Subscription) -> bool:
+        if subscription.is_admin:
+            return event.company_id == subscription.company_id
+        return event.shareholder_id is not None and event.shareholder_id == subscription.shareholder_id
+
+    def publish(
+        self,
+        event_type: str,
+        data: Dict[str, Any],
+        shareholder_id: Optional[str] = None,
+        company_id: Optional[str] = None
+    ) -> None:
+        """Publish from any thread; delivery goes through the configured bus"""
+        try:
+            event = Event(event_type, data, shareholder_id, company_id, id=self.bus.next_id())
+            self.bus.publish(event.to_dict())
+        except Exception:
+            logger.exception("Failed to publish %s event", event_type)
+
+    def _dispatch(self, payload: Dict[str, Any]) -> None:
+        event = Event(
+            id=payload["id"],
+            type=payload["type"],
+            data=payload["data"],
+            shareholder_id=payload.get("shareholder_id"),
+            company_id=payload.get("company_id"),
+            created_at=payload.get("created_at") or datetime.now(timezone.utc).isoformat()
+        )
+        with self._lock:
+            self._history.append(event)
+            targets = list(self._admins.get(event.company_id, ()))
+            if event.shareholder_id is not None:
+                targets.extend(self._by_shareholder.get(event.shareholder_id, ()))
+        self._deliver(targets, event)
+
+    def _all_subscriptions(self) -> List[Subscription]:
+        # Caller holds the lock
+        return [s for subs in self._admins.values() for s in subs] + [
+            s for subs in self._by_shareholder.values() for s in subs
+        ]
+
+    @staticmethod
+    def _deliver(targets: List[Subscription], item) -> None:
+        by_loop: Dict[asyncio.AbstractEventLoop, List[Subscription]] = {}
+        for subscription in targets:
+            by_loop.setdefault(subscription.loop, []).append(subscription)
+        for loop, subscriptions in by_loop.items():
+            def offer_all(subscriptions=subscriptions):
+                for subscription in subscriptions:
+                    subscription._offer(item)
+            try:
+                loop.call_soon_threadsafe(offer_all)
+            except RuntimeError:
+                # Loop already closed; its subscribers are gone
+                pass
+
+    async def _heartbeat(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            with self._lock:
+                targets = self._all_subscriptions()
+            self._deliver(targets, HEARTBEAT)
+
+    def start(self, heartbeat_interval: float = 15.0) -> None:
+        if self._heartbeat_task is None:
+            self._heartbeat_task = asyncio.get_running_loop().create_task(self._heartbeat(heartbeat_interval))
+
+    async def stop(self) -> None:
+        if self._heartbeat_task is not None:
+            self._heartbeat_task.cancel()
+            self._heartbeat_task = None
+        with self._lock:
+            targets = self._all_subscriptions()
+        self._deliver(targets, _CLOSED)
+
+broker = EventBroker()
+
+def configure_event_bus(bus: Optional[EventBus] = None) -> EventBus:
+    """Switch the broker to `bus`, or the one EVENT_BUS_BACKEND names; called at startup"""
+    if bus is None:
+        bus = _bus_from_settings()
+    broker.set_bus(bus)
+    return bus
+
+def shutdown_event_bus() -> None:
+    broker.bus.stop()
+
+def _bus_from_settings() -> EventBus:
+    if settings.EVENT_BUS_BACKEND == "redis":
+        from app.core.redis_events import RedisEventBus
+        return RedisEventBus.from_url(settings.EVENT_BUS_URL)
+    if settings.EVENT_BUS_BACKEND != "local":
+        raise ValueError(f"Unknown EVENT_BUS_BACKEND {settings.EVENT_BUS_BACKEND!r}")
+    if settings.WEB_CONCURRENCY > 1:
+        raise RuntimeError(
+            f"EVENT_BUS_BACKEND=local only reaches the clients of one worker but WEB_CONCURRENCY is "
+            f"{settings.WEB_CONCURRENCY}; set EVENT_BUS_BACKEND=redis"
+        )
+    return LocalEventBus()
+
+def publish_event(
+    event_type: str,
+    data: Dict[str, Any],
+    shareholder_id: Optional[str] = None,
+    company_id: Optional[str] = None
+) -> None:
+    broker.publish(event_type, data, shareholder_id, company_id)
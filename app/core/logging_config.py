@@ -0,0 +1,141 @@
+"""Structured JSON logs written off the request path.
+
+Loggers hand records to a QueueHandler; a QueueListener thread formats
+them and does the I/O, so a request thread never waits on stdout or a
+log shipper. Each record is tagged with the request id, user id and
+route of the request that emitted it, taken from `request_context`.
+"""
+import json
+import logging
+import queue
+import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from decimal import Decimal
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+# One mutable dict per request, set by RequestContextMiddleware. Mutable so
+# that values filled in later (the user, once authenticated) are seen by
+# every thread and task serving the request.
+request_context: ContextVar[Optional[Dict[str, Any]]] = ContextVar("request_context", default=None)
+
+# Arguments of these types are immutable, so rendering the message can wait
+# for the listener thread
+_LAZY_ARG_TYPES = (str, int, float, bool, type(None), Decimal)
+
+# LogRecord attributes; anything else on a record came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[QueueHandler] = None
+
+def set_request_user(user_id: Optional[str]) -> None:
+    context = request_context.get()
+    if context is not None:
+        context["user_id"] = user_id
+
+def route_template(path: str, path_params: Dict[str, Any]) -> str:
+    """/api/v1/shareholders/abc with {"shareholder_id": "abc"} -> /api/v1/shareholders/{shareholder_id}"""
+    names: Dict[str, List[str]] = {}
+    for name, value in path_params.items():
+        names.setdefault(str(value), []).append(name)
+    segments = path.split("/")
+    for i in range(len(segments) - 1, -1, -1):
+        if names.get(segments[i]):
+            segments[i] = "{" + names[segments[i]].pop() + "}"
+    return "/".join(segments)
+
+def _route(context: Dict[str, Any]) -> Optional[str]:
+    route = context.get("route")
+    if route is None:
+        scope = context["scope"]
+        if "endpoint" not in scope:
+            # Not routed (yet): the raw path
+            return scope.get("path")
+        route = context["route"] = route_template(scope["path"], scope.get("path_params") or {})
+    return route
+
+class RequestContextFilter(logging.Filter):
+    """Copies the current request's ids onto the record; runs in the emitting thread"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = request_context.get()
+        if context is None:
+            record.request_id = record.user_id = record.route = None
+            return True
+        record.request_id = context.get("request_id")
+        record.user_id = context.get("user_id")
+        record.route = _route(context)
+        return True
+
+class LazyQueueHandler(QueueHandler):
+    """Enqueues records without formatting them in the calling thread.
+
+    The stock QueueHandler renders the message before enqueueing. Here the
+    message is only rendered early when an argument is mutable (it could
+    change before the listener gets to it); tracebacks are rendered early
+    because they hold on to the caller's frames.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = logging.makeLogRecord(record.__dict__)
+        args = record.args
+        if args and not all(isinstance(arg, _LAZY_ARG_TYPES) for arg in (args.values() if isinstance(args, dict) else args)):
+            record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; `extra=` fields are included as-is"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "user_id": getattr(record, "user_id", None),
+            "route": getattr(record, "route", None),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s %(route)s]: %(message)s"
+
+def configure_logging(stream=None) -> QueueListener:
+    """Route all logging through the queue to one stream handler (stdout by default); safe to call twice"""
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    _handler = handler = LazyQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestContextFilter())
+    root = logging.getLogger()
+    root.addHandler(handler)
+    root.setLevel(settings.LOG_LEVEL.upper())
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+def shutdown_logging() -> None:
+    """Write out queued records and stop the listener thread"""
+    global _listener, _handler
+    if _listener is not None:
+        logging.getLogger().removeHandler(_handler)
+        _listener.stop()
+        _listener = _handler = None
@@ -0,0 +1,202 @@
+"""Password hashing: the one bcrypt context in the app.
+
+The cost factor is calibrated at startup: the fewest rounds whose verify
+takes at least PASSWORD_HASH_TARGET_MS on this machine, never fewer than
+PASSWORD_HASH_MIN_ROUNDS. Hashes made with a lower cost keep working and
+are replaced on the next successful login; stronger ones are left alone,
+so a rehash only ever raises the cost and workers whose calibration lands
+either side of a boundary do not rehash each other's passwords back and
+forth.
+
+Accounts created by invitation have no password yet: their hash column
+holds the expiry and a digest of a one-time invite secret instead, which
+never verifies as a password.
+"""
+import hashlib
+import hmac
+import logging
+import math
+import secrets
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from passlib.context import CryptContext
+from app.core.config import settings
+from app.core.tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Latency percentiles are computed over this many recent calls
+_LATENCY_WINDOW = 1000
+
+INVITE_PREFIX = "invite$"
+
+class _Latency:
+    def __init__(self):
+        self.count = 0
+        self.recent = deque(maxlen=_LATENCY_WINDOW)
+
+    def add(self, ms: float) -> None:
+        self.count += 1
+        self.recent.append(ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        if not recent:
+            return {"count": self.count}
+        return {
+            "count": self.count,
+            "p50_ms": round(recent[len(recent) // 2], 2),
+            "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))], 2),
+            "max_ms": round(recent[-1], 2)
+        }
+
+def _context(rounds: int) -> CryptContext:
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        # Only hashes below the cost count as outdated
+        bcrypt__min_rounds=rounds
+    )
+
+def hash_passwords(passwords: List[str], rounds: int) -> List[str]:
+    """Hash a batch at a fixed cost; runs in worker processes for bulk imports"""
+    context = _context(rounds)
+    return [context.hash(password) for password in passwords]
+
+def new_invite(ttl_seconds: Optional[float] = None) -> Tuple[str, str]:
+    """(secret for the invitee, value to store in place of a password hash)
+
+    The stored value is `invite$<expiry, unix seconds>$<sha256 of the secret>`.
+    """
+    ttl_seconds = settings.INVITE_TTL_HOURS * 3600 if ttl_seconds is None else ttl_seconds
+    secret = secrets.token_urlsafe(24)
+    expires_at = int(time.time() + ttl_seconds)
+    return secret, f"{INVITE_PREFIX}{expires_at}${hashlib.sha256(secret.encode()).hexdigest()}"
+
+def invite_expires_at(stored: str) -> Optional[int]:
+    """Expiry of a stored invite; None for invites stored before expiries were"""
+    expires_at, separator, _ = stored[len(INVITE_PREFIX):].partition("$")
+    return int(expires_at) if separator and expires_at.isdigit() else None
+
+def invite_matches(stored: str, secret: str) -> bool:
+    if not stored.startswith(INVITE_PREFIX):
+        return False
+    digest = stored[len(INVITE_PREFIX):].rpartition("$")[2]
+    return hmac.compare_digest(digest, hashlib.sha256(secret.encode()).hexdigest())
+
+class PasswordHasher:
+    def __init__(self, rounds: Optional[int] = None):
+        self.rounds = rounds or settings.PASSWORD_HASH_ROUNDS or settings.PASSWORD_HASH_MIN_ROUNDS
+        self.calibrated_ms: Optional[float] = None
+        self._context = _context(self.rounds)
+        self._lock = threading.Lock()
+        self._hash = _Latency()
+        self._verify = _Latency()
+        self._rehashed = 0
+
+    def calibrate(self, target_ms: Optional[float] = None, min_rounds: Optional[int] = None, max_rounds: Optional[int] = None) -> int:
+        """Pick the cost for this machine and return it.
+
+        A verify at the floor is timed and the cost extrapolated from it
+        (each round doubles the work); the pick is then timed and adjusted
+        until it is the fewest rounds reaching the target.
+        PASSWORD_HASH_ROUNDS, when set, is used as-is.
+        """
+        if settings.PASSWORD_HASH_ROUNDS and target_ms is None:
+            self._use(settings.PASSWORD_HASH_ROUNDS, None)
+            return self.rounds
+        target_ms = settings.PASSWORD_HASH_TARGET_MS if target_ms is None else target_ms
+        min_rounds = min_rounds or settings.PASSWORD_HASH_MIN_ROUNDS
+        max_rounds = max_rounds or settings.PASSWORD_HASH_MAX_ROUNDS
+
+        rounds = min_rounds
+        measured = self._time_verify(rounds)
+        if measured < target_ms:
+            rounds = min(max_rounds, rounds + math.ceil(math.log2(target_ms / max(measured, 0.01))))
+            measured = self._time_verify(rounds)
+            # A noisy floor measurement makes the extrapolation miss either way
+            while measured < target_ms and rounds < max_rounds:
+                rounds += 1
+                measured = self._time_verify(rounds)
+            while rounds > min_rounds and measured / 2 >= target_ms:
+                rounds -= 1
+                measured /= 2
+        self._use(rounds, measured)
+        logger.info("bcrypt calibrated to %d rounds (%.0fms per verify, target %.0fms)", rounds, measured, target_ms)
+        return rounds
+
+    def _time_verify(self, rounds: int) -> float:
+        context = _context(rounds)
+        hashed = context.hash("calibration")
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            context.verify("calibration", hashed)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _use(self, rounds: int, measured_ms: Optional[float]) -> None:
+        with self._lock:
+            self.rounds = rounds
+            self.calibrated_ms = measured_ms
+            self._context = _context(rounds)
+
+    def hash(self, password: str) -> str:
+        with span("password.hash", rounds=self.rounds):
+            started = time.perf_counter()
+            hashed = self._context.hash(password)
+        self._record(self._hash, started)
+        return hashed
+
+    def hash_many(self, passwords: List[str], pool=None, workers: int = 1) -> List[str]:
+        """Hash a batch, split across `pool` (a process pool of `workers`) when given"""
+        if pool is None or len(passwords) < 2:
+            return [self.hash(password) for password in passwords]
+        size = -(-len(passwords) // workers)
+        with span("password.hash_many", count=len(passwords), rounds=self.rounds):
+            futures = [
+                pool.submit(hash_passwords, passwords[start:start + size], self.rounds)
+                for start in range(0, len(passwords), size)
+            ]
+            return [hashed for future in futures for hashed in future.result()]
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self.verify_and_update(password, hashed)[0]
+
+    def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(valid, replacement hash or None); a replacement is only made for
+        a valid password whose hash was made with other parameters"""
+        if hashed.startswith(INVITE_PREFIX):
+            # Invitation not accepted yet: there is no password to match
+            return False, None
+        with span("password.verify"):
+            started = time.perf_counter()
+            valid = self._context.verify(password, hashed)
+        self._record(self._verify, started)
+        if not valid or not self._context.needs_update(hashed):
+            return valid, None
+        with self._lock:
+            self._rehashed += 1
+        return True, self.hash(password)
+
+    def _record(self, latency: _Latency, started: float) -> None:
+        ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            latency.add(ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rounds": self.rounds,
+                "calibrated_verify_ms": round(self.calibrated_ms, 2) if self.calibrated_ms is not None else None,
+                "target_ms": settings.PASSWORD_HASH_TARGET_MS,
+                "hash": self._hash.to_dict(),
+                "verify": self._verify.to_dict(),
+                "rehashed": self._rehashed
+            }
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,128 @@
+"""On-demand sampling profiler for the running worker.
+
+Every interval the profiling thread reads the current frame of every other
+thread (`sys._current_frames`) and counts the stack, root first, in the
+collapsed format flamegraph.pl, inferno and speedscope read: one
+"frame;frame;frame count" line per distinct stack. Nothing is installed in
+the profiled threads, so they only pay for the GIL the sampler holds.
+tracemalloc, when allocations are asked for, does slow every allocation
+down for the duration of the session.
+
+Only one session runs at a time per process; a second one is refused
+rather than queued.
+"""
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+# Leaf frames of threads that are waiting rather than working (thread
+# pools waiting for work, the event loop in select); left out by default
+IDLE_FRAMES = {"threading:wait", "selectors:select", "queue:get", "concurrent.futures.thread:_worker"}
+
+_session = threading.Lock()
+
+class ProfilerBusy(Exception):
+    """Another profiling session is running in this process"""
+
+@dataclass
+class ProfileResult:
+    seconds: float
+    interval: float
+    samples: int
+    stacks: Counter
+    allocations: Optional[List[Dict[str, Any]]] = None
+
+    def collapsed(self) -> str:
+        """The stacks in collapsed format, most frequent first"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "seconds": self.seconds,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "collapsed": self.collapsed(),
+            "allocations": self.allocations
+        }
+
+def _label(frame) -> str:
+    return f"{frame.f_globals.get('__name__', frame.f_code.co_filename)}:{frame.f_code.co_name}"
+
+def collapse(frame) -> str:
+    """Root-first stack of `frame` joined with semicolons"""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+def sample(stacks: Counter, include_idle: bool = False) -> None:
+    """Add the current stack of every other thread to `stacks`"""
+    me = threading.get_ident()
+    for ident, frame in sys._current_frames().items():
+        if ident == me or (not include_idle and _label(frame) in IDLE_FRAMES):
+            continue
+        stacks[collapse(frame)] += 1
+
+def _allocation_report(start: tracemalloc.Snapshot, end: tracemalloc.Snapshot, top: int) -> List[Dict[str, Any]]:
+    """Lines that allocated the most memory still held at the end of the session"""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+    grown = [
+        stat for stat in end.filter_traces(ignore).compare_to(start.filter_traces(ignore), "lineno")
+        if stat.size_diff > 0
+    ]
+    grown.sort(key=lambda stat: stat.size_diff, reverse=True)
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_bytes": stat.size_diff,
+            "count": stat.count_diff
+        }
+        for stat in grown[:top]
+    ]
+
+def profile(seconds: float, interval: float, allocations_top: int = 0, include_idle: bool = False) -> ProfileResult:
+    """Sample every thread of this process for `seconds`, blocking the caller.
+
+    With `allocations_top`, tracemalloc runs for the session too and the
+    report lists that many lines that grew the most. Raises ProfilerBusy if
+    a session is already running.
+    """
+    if not _session.acquire(blocking=False):
+        raise ProfilerBusy()
+    started_tracing = False
+    try:
+        start_snapshot = None
+        if allocations_top:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            start_snapshot = tracemalloc.take_snapshot()
+
+        stacks: Counter = Counter()
+        samples = 0
+        started = time.monotonic()
+        deadline = started + seconds
+        while time.monotonic() < deadline:
+            sample(stacks, include_idle)
+            samples += 1
+            time.sleep(interval)
+        elapsed = time.monotonic() - started
+
+        report = None
+        if start_snapshot is not None:
+            report = _allocation_report(start_snapshot, tracemalloc.take_snapshot(), allocations_top)
+        return ProfileResult(round(elapsed, 3), interval, samples, stacks, report)
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+        _session.release()
+
+def is_running() -> bool:
+    return _session.locked()
@@ -0,0 +1,187 @@
+import math
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+# Slowest refill a configured rate is raised to (one attempt an hour)
+MIN_REFILL_PER_MINUTE = 1 / 60
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets. Implementations must be safe to share between threads."""
+
+    @abstractmethod
+    def acquire(self, key: str, capacity: float, refill_per_second: float, cost: float = 1) -> float:
+        """Take `cost` tokens if they are all there and return 0; otherwise take
+        nothing and return seconds until they are. Checking and taking are one step."""
+
+    @abstractmethod
+    def refund(self, key: str, capacity: float, refill_per_second: float, cost: float = 1) -> None:
+        """Give back tokens taken by `acquire`, up to the capacity"""
+
+    @abstractmethod
+    def reset(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+class _Shard:
+    __slots__ = ("lock", "buckets")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (tokens, last_refill_monotonic, capacity, refill_per_second)
+        self.buckets: Dict[str, Tuple[float, float, float, float]] = {}
+
+class ShardedMemoryBackend(RateLimitBackend):
+    """In-process token buckets split over independently locked shards.
+
+    Each worker process keeps its own buckets; use a shared backend when
+    running several workers behind one address.
+    """
+
+    def __init__(self, shards: int = 16, max_keys_per_shard: int = 10000):
+        self._shards = [_Shard() for _ in range(shards)]
+        self._max_keys_per_shard = max_keys_per_shard
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[zlib.crc32(key.encode()) % len(self._shards)]
+
+    @staticmethod
+    def _refill(bucket: Optional[Tuple[float, float, float, float]], capacity: float, rate: float, now: float) -> float:
+        if bucket is None:
+            return capacity
+        tokens, last = bucket[0], bucket[1]
+        return min(capacity, tokens + (now - last) * rate)
+
+    @staticmethod
+    def _wait(tokens: float, rate: float, cost: float = 1) -> float:
+        if tokens >= cost:
+            return 0.0
+        return (cost - tokens) / rate if rate > 0 else math.inf
+
+    def acquire(self, key, capacity, refill_per_second, cost=1):
+        shard = self._shard(key)
+        now = time.monotonic()
+        with shard.lock:
+            tokens = self._refill(shard.buckets.get(key), capacity, refill_per_second, now)
+            wait = self._wait(tokens, refill_per_second, cost)
+            if wait:
+                return wait
+            shard.buckets[key] = (tokens - cost, now, capacity, refill_per_second)
+            if len(shard.buckets) > self._max_keys_per_shard:
+                self._evict_full(shard, now)
+        return 0.0
+
+    def refund(self, key, capacity, refill_per_second, cost=1):
+        shard = self._shard(key)
+        now = time.monotonic()
+        with shard.lock:
+            bucket = shard.buckets.get(key)
+            if bucket is None:
+                return
+            tokens = min(capacity, self._refill(bucket, capacity, refill_per_second, now) + cost)
+            shard.buckets[key] = (tokens, now, capacity, refill_per_second)
+
+    def _evict_full(self, shard: _Shard, now: float):
+        # A bucket that has refilled completely carries no state worth keeping;
+        # each is judged by the capacity and rate it was last used with
+        for key in [
+            k for k, b in shard.buckets.items() if self._refill(b, b[2], b[3], now) >= b[2]
+        ]:
+            del shard.buckets[key]
+
+    def reset(self, key):
+        shard = self._shard(key)
+        with shard.lock:
+            shard.buckets.pop(key, None)
+
+    def clear(self):
+        for shard in self._shards:
+            with shard.lock:
+                shard.buckets.clear()
+
+def _per_second(per_minute: float) -> float:
+    # A rate of zero would never refill and lock the key out for good
+    return max(per_minute, MIN_REFILL_PER_MINUTE) / 60
+
+class LoginRateLimiter:
+    """Throttle failed logins per client IP and per email.
+
+    Each attempt reserves a token from both buckets before the password is
+    verified, so a credential-stuffing run is rejected without paying for a
+    bcrypt verify, and concurrent attempts cannot all pass one check. A
+    successful login gives its reservation back, so legitimate users are
+    unaffected.
+    """
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None):
+        self.backend = backend or ShardedMemoryBackend()
+
+    def _limits(self, client_ip: str, email: str) -> List[Tuple[str, float, float]]:
+        return [
+            (f"login:ip:{client_ip}", settings.LOGIN_RATE_LIMIT_IP_CAPACITY, _per_second(settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE)),
+            (f"login:email:{email.strip().lower()}", settings.LOGIN_RATE_LIMIT_EMAIL_CAPACITY, _per_second(settings.LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE)),
+        ]
+
+    def reserve(self, client_ip: str, email: str) -> float:
+        """Take a token for an attempt; return 0 if allowed, else seconds to wait (nothing taken)"""
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return 0.0
+        taken = []
+        for key, capacity, rate in self._limits(client_ip, email):
+            wait = self.backend.acquire(key, capacity, rate)
+            if wait:
+                for taken_key, taken_capacity, taken_rate in taken:
+                    self.backend.refund(taken_key, taken_capacity, taken_rate)
+                return wait
+            taken.append((key, capacity, rate))
+        return 0.0
+
+    def release(self, client_ip: str, email: str) -> None:
+        """Give back a reservation for an attempt that did not fail on the credentials"""
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        for key, capacity, rate in self._limits(client_ip, email):
+            self.backend.refund(key, capacity, rate)
+
+    def register_success(self, client_ip: str, email: str) -> None:
+        self.release(client_ip, email)
+        self.backend.reset(f"login:email:{email.strip().lower()}")
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+login_rate_limiter = LoginRateLimiter()
+
+def set_rate_limit_backend(backend: RateLimitBackend) -> None:
+    """Swap the bucket store, e.g. for a backend shared by all workers"""
+    login_rate_limiter.backend = backend
+
+def client_ip(request) -> str:
+    """Address to throttle a request by.
+
+    Without TRUSTED_PROXY_COUNT this is the peer address, which behind a
+    reverse proxy or load balancer is the proxy's and would make every
+    client share one bucket. With it set to the number of proxies in front
+    of the app, the client is read from X-Forwarded-For, counting that many
+    entries from the right: entries further left were supplied by the client
+    and cannot be trusted.
+    """
+    peer = request.client.host if request.client else "unknown"
+    hops = settings.TRUSTED_PROXY_COUNT
+    if hops <= 0:
+        return peer
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",")
+        if address.strip()
+    ]
+    if not forwarded:
+        return peer
+    return forwarded[-min(hops, len(forwarded))]
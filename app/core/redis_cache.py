@@ -0,0 +1,257 @@
+"""Cache backend on a Redis-protocol server (Redis, Valkey, KeyDB, ...).
+
+Speaks RESP2 over plain sockets: a small pool of connections runs
+commands, and one more connection stays subscribed to the invalidation
+channel, read by a daemon thread that reconnects with backoff. The worker
+counts as healthy only while that subscription is up and the counters
+have been resynced after it was made, since otherwise it could miss
+another worker's write.
+
+Keys, all under CACHE_KEY_PREFIX:
+- `<prefix>:versions`, a hash of cap-table version counters by company
+- `<prefix>:invalidations`, the channel new versions are published on
+- `<prefix>:<namespace>:<version>:<digest>`, cached values
+"""
+import json
+import logging
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import unquote, urlsplit
+from app.core.cache import CacheBackend
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class RespError(Exception):
+    """An error reply from the server"""
+
+class RespConnection:
+    """One connection speaking RESP2; not thread-safe"""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        db: int = 0,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        self._sock = socket.create_connection((host, port), timeout=timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._reader = self._sock.makefile("rb")
+        try:
+            if password is not None:
+                self.execute("AUTH", *([username] if username else []), password)
+            if db:
+                self.execute("SELECT", db)
+        except BaseException:
+            self.close()
+            raise
+
+    @staticmethod
+    def encode(*args) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def settimeout(self, timeout: Optional[float]) -> None:
+        self._sock.settimeout(timeout)
+
+    def send(self, *args) -> None:
+        self._sock.sendall(self.encode(*args))
+
+    def read_reply(self) -> Any:
+        line = self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Connection closed by the cache server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest.decode()
+        if kind == b"-":
+            raise RespError(rest.decode())
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("Connection closed by the cache server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [self.read_reply() for _ in range(length)]
+        raise ConnectionError(f"Unexpected reply from the cache server: {line!r}")
+
+    def execute(self, *args) -> Any:
+        self.send(*args)
+        return self.read_reply()
+
+    def close(self) -> None:
+        try:
+            # Also wakes a thread blocked reading from the socket
+            self._sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._reader.close()
+        self._sock.close()
+
+class RedisCacheBackend(CacheBackend):
+    name = "redis"
+    shared = True
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        prefix: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_size: int = 8
+    ):
+        self._address = (host, port, db, username, password)
+        self._prefix = prefix or settings.CACHE_KEY_PREFIX
+        self._timeout = settings.CACHE_SOCKET_TIMEOUT_SECONDS if timeout is None else timeout
+        self._pool: List[RespConnection] = []
+        self._pool_lock = threading.Lock()
+        self._pool_size = pool_size
+        self._subscriber: Optional[RespConnection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._synced = threading.Event()
+        self._failing = False
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisCacheBackend":
+        """redis://[[user]:password@]host[:port][/db]"""
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported cache URL scheme {parts.scheme!r}")
+        return cls(
+            parts.hostname or "localhost",
+            parts.port or 6379,
+            int(parts.path.lstrip("/") or 0),
+            unquote(parts.username) if parts.username else None,
+            unquote(parts.password) if parts.password is not None else None,
+            **kwargs
+        )
+
+    @property
+    def channel(self) -> str:
+        return f"{self._prefix}:invalidations"
+
+    @property
+    def healthy(self) -> bool:
+        return self._synced.is_set()
+
+    def _connect(self) -> RespConnection:
+        host, port, db, username, password = self._address
+        return RespConnection(host, port, db, username, password, self._timeout)
+
+    def _execute(self, *args) -> Any:
+        with self._pool_lock:
+            connection = self._pool.pop() if self._pool else None
+        if connection is None:
+            connection = self._connect()
+        try:
+            reply = connection.execute(*args)
+        except RespError:
+            self._release(connection)
+            raise
+        except BaseException:
+            # The reply may still be on its way; the connection cannot be reused
+            connection.close()
+            raise
+        self._release(connection)
+        return reply
+
+    def _release(self, connection: RespConnection) -> None:
+        with self._pool_lock:
+            if len(self._pool) < self._pool_size:
+                self._pool.append(connection)
+                return
+        connection.close()
+
+    def incr_version(self, counter):
+        return int(self._execute("HINCRBY", f"{self._prefix}:versions", counter, 1))
+
+    def versions(self):
+        reply = self._execute("HGETALL", f"{self._prefix}:versions") or []
+        return {reply[i].decode(): int(reply[i + 1]) for i in range(0, len(reply), 2)}
+
+    def publish(self, message):
+        self._execute("PUBLISH", self.channel, json.dumps(message))
+
+    def get(self, key):
+        return self._execute("GET", f"{self._prefix}:{key}")
+
+    def set(self, key, value, ttl):
+        self._execute("SET", f"{self._prefix}:{key}", value, "EX", ttl)
+
+    def start(self, on_version, on_resync):
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._listen, args=(on_version, on_resync), name="cache-invalidations", daemon=True
+        )
+        self._thread.start()
+        # Give the first sync a moment so the first requests are served from the cache
+        self._synced.wait(self._timeout)
+
+    def _listen(self, on_version: Callable[[Dict[str, Any]], None], on_resync: Callable[[], None]) -> None:
+        backoff = 0.1
+        while not self._stopped.is_set():
+            try:
+                self._subscriber = self._connect()
+                self._subscriber.execute("SUBSCRIBE", self.channel)
+                # Subscribed first, so nothing published after the resync reads the counters is missed
+                on_resync()
+                self._subscriber.settimeout(None)
+                self._synced.set()
+                if self._failing:
+                    logger.info("Cache server reachable again")
+                    self._failing = False
+                backoff = 0.1
+                while True:
+                    reply = self._subscriber.read_reply()
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        try:
+                            on_version(json.loads(reply[2]))
+                        except Exception:
+                            logger.exception("Bad invalidation message")
+            except Exception as e:
+                self._synced.clear()
+                self._close_subscriber()
+                if self._stopped.is_set():
+                    break
+                if not self._failing:
+                    logger.warning("Cache server unreachable, caching is off until it is back: %s", e)
+                    self._failing = True
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 5.0)
+
+    def _close_subscriber(self) -> None:
+        subscriber, self._subscriber = self._subscriber, None
+        if subscriber is not None:
+            subscriber.close()
+
+    def reset(self):
+        self._synced.clear()
+        self._close_subscriber()
+
+    def stop(self):
+        self._stopped.set()
+        self.reset()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._pool_lock:
+            pool, self._pool = self._pool, []
+        for connection in pool:
+            connection.close()
@@ -0,0 +1,156 @@
+"""Event bus on a Redis-protocol server, for running several workers.
+
+Every worker publishes its events on one channel and hears them all back
+through a subscribed connection, read by a daemon thread that reconnects
+with backoff. Event ids come from one counter on the server, seeded from
+the clock when it is missing, so a client can resume with Last-Event-ID on
+whichever worker it reconnects to.
+
+Keys, all under EVENT_BUS_KEY_PREFIX:
+- `<prefix>:event-ids`, the id counter
+- `<prefix>:events`, the channel events are published on
+
+Events published while the server is unreachable are dropped (and
+logged); clients see what happens after it is back.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import unquote, urlsplit
+from app.core.config import settings
+from app.core.events import EventBus
+from app.core.redis_cache import RespConnection, RespError
+
+logger = logging.getLogger(__name__)
+
+class RedisEventBus(EventBus):
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        prefix: Optional[str] = None,
+        timeout: Optional[float] = None
+    ):
+        self._address = (host, port, db, username, password)
+        self._prefix = prefix or settings.EVENT_BUS_KEY_PREFIX
+        self._timeout = settings.CACHE_SOCKET_TIMEOUT_SECONDS if timeout is None else timeout
+        # Commands share one connection; publishing is one round trip
+        self._connection: Optional[RespConnection] = None
+        self._connection_lock = threading.Lock()
+        self._subscriber: Optional[RespConnection] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._subscribed = threading.Event()
+        self._failing = False
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisEventBus":
+        """redis://[[user]:password@]host[:port][/db]"""
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported event bus URL scheme {parts.scheme!r}")
+        return cls(
+            parts.hostname or "localhost",
+            parts.port or 6379,
+            int(parts.path.lstrip("/") or 0),
+            unquote(parts.username) if parts.username else None,
+            unquote(parts.password) if parts.password is not None else None,
+            **kwargs
+        )
+
+    @property
+    def channel(self) -> str:
+        return f"{self._prefix}:events"
+
+    @property
+    def ids_key(self) -> str:
+        return f"{self._prefix}:event-ids"
+
+    @property
+    def connected(self) -> bool:
+        return self._subscribed.is_set()
+
+    def _connect(self) -> RespConnection:
+        host, port, db, username, password = self._address
+        return RespConnection(host, port, db, username, password, self._timeout)
+
+    def _execute(self, *args) -> Any:
+        with self._connection_lock:
+            if self._connection is None:
+                self._connection = self._connect()
+            try:
+                return self._connection.execute(*args)
+            except RespError:
+                raise
+            except BaseException:
+                # The reply may still be on its way; the connection cannot be reused
+                self._connection.close()
+                self._connection = None
+                raise
+
+    def next_id(self):
+        return int(self._execute("INCR", self.ids_key))
+
+    def publish(self, event):
+        self._execute("PUBLISH", self.channel, json.dumps(event, default=str))
+
+    def start(self, on_event):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._listen, args=(on_event,), name="event-bus", daemon=True)
+        self._thread.start()
+        # Events published before the subscription is up would not reach this worker's clients
+        self._subscribed.wait(self._timeout)
+
+    def _listen(self, on_event: Callable[[Dict[str, Any]], None]) -> None:
+        backoff = 0.1
+        while not self._stopped.is_set():
+            try:
+                self._subscriber = self._connect()
+                self._subscriber.execute("SUBSCRIBE", self.channel)
+                # A new (or flushed) counter starts past the ids clients may have seen
+                self._execute("SET", self.ids_key, int(time.time() * 1000), "NX")
+                self._subscriber.settimeout(None)
+                self._subscribed.set()
+                if self._failing:
+                    logger.info("Event bus server reachable again")
+                    self._failing = False
+                backoff = 0.1
+                while True:
+                    reply = self._subscriber.read_reply()
+                    if isinstance(reply, list) and len(reply) == 3 and reply[0] == b"message":
+                        try:
+                            on_event(json.loads(reply[2]))
+                        except Exception:
+                            logger.exception("Bad event message")
+            except Exception as e:
+                self._subscribed.clear()
+                self._close_subscriber()
+                if self._stopped.is_set():
+                    break
+                if not self._failing:
+                    logger.warning("Event bus server unreachable, events are dropped until it is back: %s", e)
+                    self._failing = True
+                self._stopped.wait(backoff)
+                backoff = min(backoff * 2, 5.0)
+
+    def _close_subscriber(self) -> None:
+        subscriber, self._subscriber = self._subscriber, None
+        if subscriber is not None:
+            subscriber.close()
+
+    def stop(self):
+        self._stopped.set()
+        self._subscribed.clear()
+        self._close_subscriber()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        with self._connection_lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
@@ -0,0 +1,94 @@
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from app.core.cache import get_cap_table_version
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+@dataclass
+class SingleFlightStats:
+    # Calls into the layer, computations actually run, and calls that
+    # waited for another caller's computation instead
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors
+        }
+
+class SingleFlight:
+    """Concurrent identical reads share one in-flight computation.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait and receive the same result (or exception). Nothing is kept
+    once the computation finishes, so this complements caches rather than
+    replacing them. Results are shared between callers and must be treated
+    as read-only.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats: Dict[str, SingleFlightStats] = {}
+
+    def do(self, namespace: str, key: Tuple, fn: Callable[[], Any]) -> Any:
+        full_key = (namespace, key)
+        with self._lock:
+            stats = self._stats.setdefault(namespace, SingleFlightStats())
+            stats.calls += 1
+            call = self._calls.get(full_key)
+            leader = call is None
+            if leader:
+                call = self._calls[full_key] = _Call()
+                stats.executions += 1
+            else:
+                stats.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                stats.errors += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[full_key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {namespace: stats.to_dict() for namespace, stats in self._stats.items()}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+single_flight = SingleFlight()
+
+def coalesce(namespace: str, key: Tuple, fn: Callable[[], Any], company_id: Optional[str] = None) -> Any:
+    """Run `fn` once for all concurrent callers with the same key at the company's current cap-table version"""
+    return single_flight.do(namespace, (company_id, get_cap_table_version(company_id), *key), fn)
@@ -0,0 +1,286 @@
+"""Sampled request tracing, exported as OTLP/JSON.
+
+A sampled request gets a root span and everything under it opens child
+spans with `span(...)`; SQL statements are traced through engine events.
+When the root span ends the trace is handed to a background exporter that
+writes the traces waiting for it as one OTLP/JSON ExportTraceServiceRequest:
+a line in a file, or a POST to a collector's /v1/traces. Unsampled requests carry no span at
+all, so `span` returns a shared no-op after one context variable lookup.
+"""
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+SERVICE_NAME = "cap-table-backend"
+
+# W3C trace context: version-traceid-parentid-flags
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+class Trace:
+    def __init__(self, trace_id: str, exporter):
+        self.trace_id = trace_id
+        self.exporter = exporter
+        self.spans: List["Span"] = []
+        self.root: Optional["Span"] = None
+        # Spans end on the event loop and in threadpool threads
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            self.spans.append(span)
+
+class Span:
+    """A timed operation within a trace; a context manager that makes itself the current span"""
+
+    __slots__ = ("trace", "span_id", "parent_id", "name", "kind", "attributes", "start_ns", "end_ns", "status", "status_message", "_token")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str] = None, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = 0
+        self.status_message: Optional[str] = None
+        self._token = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        self.trace.add(self)
+        if self is self.trace.root:
+            self.trace.exporter.export(self.trace.spans)
+
+    def __enter__(self) -> "Span":
+        self._token = current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc is not None:
+            self.set_error(exc)
+        self.end()
+        current_span.reset(self._token)
+        return False
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+NOOP_SPAN = _NoopSpan()
+
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes):
+    """A child of the current span, or a no-op outside a sampled trace"""
+    parent = current_span.get()
+    if parent is None:
+        return NOOP_SPAN
+    return Span(parent.trace, name, parent.span_id, kind, attributes)
+
+def traced(name: str):
+    """Decorator: run the function in a span named `name`"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        encoded = {"boolValue": value}
+    elif isinstance(value, int):
+        # int64 is a string in the protobuf JSON mapping
+        encoded = {"intValue": str(value)}
+    elif isinstance(value, float):
+        encoded = {"doubleValue": value}
+    else:
+        encoded = {"stringValue": str(value)}
+    return {"key": key, "value": encoded}
+
+def encode_spans(spans: List[Span], service_name: str = SERVICE_NAME) -> Dict[str, Any]:
+    """An OTLP/JSON ExportTraceServiceRequest holding `spans`"""
+    encoded = []
+    for s in spans:
+        item = {
+            "traceId": s.trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": s.kind,
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns),
+            "attributes": [_attribute(key, value) for key, value in s.attributes.items() if value is not None],
+            "status": {"code": s.status, **({"message": s.status_message} if s.status_message else {})},
+        }
+        if s.parent_id:
+            item["parentSpanId"] = s.parent_id
+        encoded.append(item)
+    return {"resourceSpans": [{
+        "resource": {"attributes": [_attribute("service.name", service_name)]},
+        "scopeSpans": [{"scope": {"name": __name__}, "spans": encoded}],
+    }]}
+
+class OTLPJsonExporter:
+    """Writes finished traces on a background thread, to a file (one request
+    per line, as the collector's file exporter does) or to an OTLP/HTTP URL.
+
+    Traces waiting to be written are sent together, up to `batch_size` per
+    request, so a slow collector costs one round trip per batch rather than
+    per trace. At most `max_queue` traces wait; past that new ones are
+    dropped and counted instead of piling up in memory.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        url: Optional[str] = None,
+        timeout: float = 5.0,
+        max_queue: Optional[int] = None,
+        batch_size: Optional[int] = None
+    ):
+        self.path = path
+        self.url = url
+        self.timeout = timeout
+        self.exported = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue or settings.TRACE_QUEUE_SIZE)
+        self._batch_size = batch_size or settings.TRACE_EXPORT_BATCH_SIZE
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            # Counted without locking: only an approximate figure is needed
+            self.dropped += 1
+            logger.warning("Trace export queue full, trace dropped")
+            return
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                    self._thread.start()
+
+    def _write(self, payload: bytes) -> None:
+        if self.url:
+            request = urllib.request.Request(self.url, data=payload, headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=self.timeout):
+                pass
+        else:
+            with open(self.path, "ab") as handle:
+                handle.write(payload + b"\n")
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < self._batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            traces = [spans for spans in batch if spans is not None]
+            stopping = len(traces) < len(batch)
+            try:
+                if traces:
+                    # Every trace comes from this service, so they share one resource
+                    payload = encode_spans([s for spans in traces for s in spans])
+                    self._write(json.dumps(payload, separators=(",", ":")).encode())
+                    self.exported += len(traces)
+            except Exception:
+                self.failed += len(traces)
+                logger.exception("Exporting %d traces failed", len(traces))
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self) -> None:
+        """Wait until every trace handed over so far is written"""
+        if self._thread is not None:
+            self._queue.join()
+
+    def shutdown(self) -> None:
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            try:
+                self._queue.put(None, timeout=self.timeout)
+            except queue.Full:
+                pass
+            thread.join(self.timeout)
+
+class Tracer:
+    """Decides which requests are traced and where their traces go"""
+
+    def __init__(self, exporter=None):
+        self.exporter = exporter or OTLPJsonExporter(path=settings.TRACE_EXPORT_PATH, url=settings.TRACE_EXPORT_URL)
+
+    def start_trace(self, name: str, traceparent: Optional[str] = None, kind: int = SPAN_KIND_SERVER, **attributes) -> Optional[Span]:
+        """The root span of a new trace, or None when this one is not sampled"""
+        parent = _TRACEPARENT.match(traceparent) if traceparent and settings.TRACE_TRUST_PARENT else None
+        if parent is not None:
+            if not int(parent.group(3), 16) & 1:
+                return None
+            trace_id, parent_id = parent.group(1), parent.group(2)
+        else:
+            rate = settings.TRACE_SAMPLE_RATE
+            if rate <= 0 or (rate < 1 and random.random() >= rate):
+                return None
+            trace_id, parent_id = os.urandom(16).hex(), None
+        trace = Trace(trace_id, self.exporter)
+        # Under a propagated context the root's parent is the caller's span
+        trace.root = Span(trace, name, parent_id, kind, attributes)
+        return trace.root
+
+    def shutdown(self) -> None:
+        self.exporter.shutdown()
+
+tracer = Tracer()
@@ -0,0 +1,158 @@
+"""Vesting arithmetic over a whole grant set at once.
+
+Every grant is one position in a set of parallel NumPy arrays, so "how
+much had vested on date D" is a handful of array operations whatever the
+number of grants, rather than a Python loop over them.
+
+The schedule model:
+
+- vesting runs `duration_months` from `start`, in steps of
+  `frequency_months`, with nothing vested before `cliff_months`; a month
+  completes on the start's day of the month (or the last day of a
+  shorter month), and share counts round down until the final step
+- a termination date stops vesting there
+- acceleration vests `acceleration_percent` of what was still unvested at
+  the trigger on top of the schedule: a single trigger fires at the
+  change of control, a double trigger at a termination on or after it
+- grants without a schedule vest in full on their issue date
+
+Shares issued after the as-of date count neither as granted nor vested.
+"""
+from dataclasses import dataclass
+from datetime import date
+from typing import Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+
+ACCELERATION_NONE = "none"
+ACCELERATION_SINGLE_TRIGGER = "single_trigger"
+ACCELERATION_DOUBLE_TRIGGER = "double_trigger"
+ACCELERATIONS = (ACCELERATION_NONE, ACCELERATION_SINGLE_TRIGGER, ACCELERATION_DOUBLE_TRIGGER)
+
+# Stands in for "no date" so comparisons need no NaT handling
+NEVER = np.datetime64("9999-12-31", "D")
+
+# One grant, in GrantSet.from_records order. Schedule fields are None for
+# grants without a schedule
+GrantRecord = Tuple[
+    str, int, date,  # holder, shares, issued
+    Optional[date], Optional[int], Optional[int], Optional[int],  # start, cliff, duration, frequency
+    Optional[str], Optional[int], Optional[date], Optional[date]  # acceleration, percent, change of control, termination
+]
+
+def _dates(values: Iterable[Optional[date]], default=NEVER) -> np.ndarray:
+    return np.array([default if value is None else value for value in values], dtype="datetime64[D]")
+
+def _ints(values: Iterable[Optional[int]], default: int) -> np.ndarray:
+    return np.array([default if value is None else value for value in values], dtype=np.int64)
+
+@dataclass
+class GrantSet:
+    """Parallel arrays, one position per grant.
+
+    Everything that does not depend on the as-of date (month arithmetic at
+    the termination and trigger dates, vesting at the trigger) is worked
+    out once when the set is built.
+    """
+    holders: List[str]        # distinct holder ids
+    holder_index: np.ndarray  # per grant, its position in `holders`
+    shares: np.ndarray
+    issued: np.ndarray
+    start: np.ndarray
+    start_month: np.ndarray   # months since 1970-01
+    start_day: np.ndarray     # day of the month, from 0
+    cliff: np.ndarray
+    duration: np.ndarray
+    frequency: np.ndarray
+    elapsed_at_stop: np.ndarray  # months vested up to termination; huge if none
+    trigger: np.ndarray          # when acceleration applies, NEVER if it does not
+    accelerated: np.ndarray      # shares acceleration adds at the trigger
+
+    def __len__(self) -> int:
+        return len(self.shares)
+
+    @classmethod
+    def from_records(cls, records: Sequence[GrantRecord]) -> "GrantSet":
+        if not records:
+            columns = [()] * 11
+        else:
+            columns = list(zip(*records))
+        holder, shares, issued, start, cliff, duration, frequency, acceleration, percent, change_of_control, termination = columns
+
+        holders, holder_index = np.unique(np.array(holder, dtype=object).astype(str), return_inverse=True)
+        issued = _dates(issued)
+        # Unscheduled grants: immediate vesting from the issue date
+        start = np.where(np.array([value is None for value in start], dtype=bool), issued, _dates(start)).astype("datetime64[D]")
+        stop = _dates(termination)
+        change_of_control = _dates(change_of_control)
+        kind = np.array([value or ACCELERATION_NONE for value in acceleration], dtype=object)
+        trigger = np.where(
+            kind == ACCELERATION_SINGLE_TRIGGER,
+            change_of_control,
+            # A termination before the change of control is not a second trigger
+            np.where((kind == ACCELERATION_DOUBLE_TRIGGER) & (stop >= change_of_control), stop, NEVER)
+        ).astype("datetime64[D]")
+
+        start_month = start.astype("datetime64[M]")
+        grants = cls(
+            holders=[str(h) for h in holders],
+            holder_index=holder_index.reshape(-1).astype(np.int64),
+            shares=_ints(shares, 0),
+            issued=issued,
+            start=start,
+            start_month=start_month.astype(np.int64),
+            start_day=(start - start_month.astype("datetime64[D]")).astype(np.int64),
+            cliff=_ints(cliff, 0),
+            duration=_ints(duration, 0),
+            frequency=np.maximum(_ints(frequency, 1), 1),
+            elapsed_at_stop=months_elapsed(start, stop),
+            trigger=trigger,
+            accelerated=np.zeros(len(issued), dtype=np.int64)
+        )
+        # Vesting stops at termination, so the schedule at the trigger is fixed too
+        at_trigger = _scheduled(grants, np.minimum(months_elapsed(start, trigger), grants.elapsed_at_stop))
+        grants.accelerated = (grants.shares - at_trigger) * _ints(percent, 0) // 100
+        return grants
+
+def months_elapsed(start: np.ndarray, at: np.ndarray) -> np.ndarray:
+    """Whole months from `start` to `at`, negative before the start"""
+    start_month = start.astype("datetime64[M]")
+    at_month = at.astype("datetime64[M]")
+    months = (at_month - start_month).astype(np.int64)
+    start_day = (start - start_month.astype("datetime64[D]")).astype(np.int64)
+    at_day = (at - at_month.astype("datetime64[D]")).astype(np.int64)
+    last_day = ((at_month + 1).astype("datetime64[D]") - at_month.astype("datetime64[D]")).astype(np.int64) - 1
+    # A month completes on the start's day of the month, or the last day of a shorter month
+    return months - (at_day < np.minimum(start_day, last_day))
+
+def _elapsed_on(grants: GrantSet, as_of: date) -> np.ndarray:
+    """months_elapsed from every start to one date, with vesting stopped at termination"""
+    at = np.datetime64(as_of, "D")
+    at_month = at.astype("datetime64[M]")
+    at_day = int((at - at_month.astype("datetime64[D]")).astype(np.int64))
+    last_day = int(((at_month + 1).astype("datetime64[D]") - at_month.astype("datetime64[D]")).astype(np.int64)) - 1
+    elapsed = at_month.astype(np.int64) - grants.start_month - (at_day < np.minimum(grants.start_day, last_day))
+    return np.minimum(elapsed, grants.elapsed_at_stop)
+
+def _scheduled(grants: GrantSet, elapsed: np.ndarray) -> np.ndarray:
+    """Shares vested by the schedule alone after `elapsed` months (per grant)"""
+    steps = np.clip(elapsed, 0, grants.duration) // grants.frequency * grants.frequency
+    vested = grants.shares * steps // np.maximum(grants.duration, 1)
+    vested = np.where(elapsed >= grants.duration, grants.shares, vested)
+    return np.where((elapsed < 0) | (elapsed < grants.cliff), 0, vested)
+
+def vesting_as_of(grants: GrantSet, as_of: date) -> Tuple[np.ndarray, np.ndarray]:
+    """(granted, vested) shares per grant on `as_of`"""
+    at = np.datetime64(as_of, "D")
+    vested = _scheduled(grants, _elapsed_on(grants, as_of))
+    vested = np.where(grants.trigger <= at, np.minimum(grants.shares, vested + grants.accelerated), vested)
+    issued = grants.issued <= at
+    return np.where(issued, grants.shares, 0), np.where(issued, vested, 0)
+
+def vesting_by_holder(grants: GrantSet, as_of: date) -> Tuple[np.ndarray, np.ndarray]:
+    """(granted, vested) shares per holder on `as_of`, in `grants.holders` order"""
+    granted, vested = vesting_as_of(grants, as_of)
+    size = len(grants.holders)
+    return (
+        np.bincount(grants.holder_index, weights=granted, minlength=size).astype(np.int64),
+        np.bincount(grants.holder_index, weights=vested, minlength=size).astype(np.int64)
+    )
@@ -0,0 +1,53 @@
+import logging
+import re
+import time
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Returned after writes and sent back by clients on the reads that follow
+CONSISTENCY_HEADER = "X-Consistency-Token"
+
+_LSN_PATTERN = re.compile(r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$")
+
+def issue_token(primary: Engine) -> str:
+    """Token for the primary's state right after a write.
+
+    Format is "<epoch_ms>" with ":<WAL LSN>" appended on Postgres so the
+    replica's replay position can be compared exactly.
+    """
+    issued_at = int(time.time() * 1000)
+    if primary.dialect.name == "postgresql":
+        try:
+            with primary.connect() as conn:
+                lsn = conn.execute(text("SELECT pg_current_wal_lsn()")).scalar()
+            return f"{issued_at}:{lsn}"
+        except Exception:
+            logger.warning("Could not read the primary WAL position", exc_info=True)
+    return str(issued_at)
+
+def replica_caught_up(replica: Engine, token: str) -> bool:
+    """Whether the replica already reflects the write the token was issued for"""
+    issued_at, _, lsn = token.partition(":")
+    if lsn and not _LSN_PATTERN.match(lsn):
+        return False
+    if lsn and replica.dialect.name == "postgresql":
+        try:
+            with replica.connect() as conn:
+                replayed = conn.execute(
+                    text("SELECT pg_last_wal_replay_lsn() >= CAST(:lsn AS pg_lsn)"),
+                    {"lsn": lsn}
+                ).scalar()
+            # NULL when the replica is not a streaming standby; fall back to time
+            if replayed is not None:
+                return replayed
+        except Exception:
+            logger.warning("Could not read the replica replay position", exc_info=True)
+            return False
+    try:
+        issued_at_seconds = int(issued_at) / 1000
+    except ValueError:
+        return False
+    return time.time() - issued_at_seconds >= settings.REPLICA_MAX_LAG_SECONDS
@@ -1,15 +1,51 @@
+from sqlalchemy import text
 from app.db.base import Base
+from app.db.partitions import ensure_partitions
 from app.db.session import engine, SessionLocal
 from app.models import User  # Import from models package
 from app.services.auth_service import get_password_hash
+from app.services.company_service import ensure_default_company
+
+# Prefix searches run within one company
+SEARCH_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_users_company_id_lower_full_name_prefix ON users (company_id, lower(full_name) text_pattern_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_company_id_lower_email_prefix ON users (company_id, lower(email) text_pattern_ops)",
+)
+
+TRIGRAM_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_users_lower_full_name_trgm ON users USING gin (lower(full_name) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_users_lower_email_trgm ON users USING gin (lower(email) gin_trgm_ops)",
+)
+
+def create_search_indexes():
+    """Expression indexes behind shareholder search; Postgres only"""
+    if engine.dialect.name != "postgresql":
+        return
+    with engine.begin() as conn:
+        for statement in SEARCH_INDEXES:
+            conn.execute(text(statement))
+        available = conn.execute(
+            text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        ).first()
+        if available is None:
+            return
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        for statement in TRIGRAM_INDEXES:
+            conn.execute(text(statement))
 
 def init_db():
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    create_search_indexes()
+    with engine.begin() as conn:
+        ensure_partitions(conn)
     
     db = SessionLocal()
     
     try:
+        # Users and issuances without a company belong to the default one
+        ensure_default_company(db)
+        
         # Create initial admin user if not exists
         admin_user = db.query(User).filter(User.email == "admin@example.com").first()
         if not admin_user:
@@ -0,0 +1,173 @@
+"""Range partitioning of share_issuances by issue_date (Postgres only).
+
+The partitioned table has one partition per calendar quarter plus a
+default partition that catches anything outside them. Partitions are
+created ahead of time by `ensure_partitions`, which also moves rows that
+landed in the default partition into a quarter of their own. The primary
+key becomes (id, issue_date), as Postgres requires the partition key in
+every unique constraint; the ORM keeps identifying issuances by id.
+"""
+import logging
+from datetime import date, datetime, timezone
+from typing import List, Optional
+from sqlalchemy import (
+    Column, DateTime, ForeignKeyConstraint, Index, Integer, MetaData, Numeric,
+    PrimaryKeyConstraint, String, Table, text
+)
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+from app.core.config import settings
+from app.models.company_model import DEFAULT_COMPANY_ID
+
+logger = logging.getLogger(__name__)
+
+TABLE = "share_issuances"
+DEFAULT_PARTITION = f"{TABLE}_default"
+COLUMNS = "id, company_id, shareholder_id, number_of_shares, price_per_share, issue_date, certificate_url"
+# Held for the duration of the transaction so concurrent workers create each partition once
+_LOCK_KEY = 0x5351_5041
+
+def quarter_start(value: date) -> date:
+    return date(value.year, 3 * ((value.month - 1) // 3) + 1, 1)
+
+def next_quarter(start: date) -> date:
+    return date(start.year + 1, 1, 1) if start.month == 10 else date(start.year, start.month + 3, 1)
+
+def partition_name(start: date) -> str:
+    return f"{TABLE}_{start.year}q{(start.month - 1) // 3 + 1}"
+
+def quarters(since: date, until: date) -> List[date]:
+    """Starts of every quarter from the one containing `since` through the one containing `until`"""
+    starts, start = [], quarter_start(since)
+    while start <= until:
+        starts.append(start)
+        start = next_quarter(start)
+    return starts
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": TABLE}
+    ).first() is not None
+
+def list_partitions(conn: Connection) -> List[str]:
+    return list(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(:table) ORDER BY c.relname"
+    ), {"table": TABLE}).scalars())
+
+def _bound(start: date) -> str:
+    # Bounds in UTC, whatever the session time zone
+    return f"'{start.isoformat()} 00:00:00+00'"
+
+def _create_partition(conn: Connection, start: date) -> str:
+    """Attach the quarter's partition, moving its rows out of the default partition first"""
+    name, low, high = partition_name(start), _bound(start), _bound(next_quarter(start))
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE issue_date >= {low} AND issue_date < {high} RETURNING *) "
+        f"INSERT INTO {name} ({COLUMNS}) SELECT {COLUMNS} FROM moved"
+    ))
+    conn.execute(text(f"ALTER TABLE {TABLE} ATTACH PARTITION {name} FOR VALUES FROM ({low}) TO ({high})"))
+    return name
+
+def ensure_partitions(conn: Connection, ahead: Optional[int] = None, since: Optional[date] = None, today: Optional[date] = None) -> List[str]:
+    """Create quarterly partitions through `ahead` quarters from now; returns the ones created.
+
+    Quarters that have rows in the default partition, and every quarter
+    from `since` on, get a partition too. A no-op unless share_issuances
+    is partitioned.
+    """
+    if not is_partitioned(conn):
+        return []
+    ahead = settings.SHARE_ISSUANCE_PARTITIONS_AHEAD if ahead is None else ahead
+    today = today or datetime.now(timezone.utc).date()
+
+    conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _LOCK_KEY})
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {TABLE} DEFAULT"))
+
+    until = today
+    for _ in range(ahead):
+        until = next_quarter(quarter_start(until))
+    wanted = set(quarters(since or today, until))
+    wanted.update(row[0].date() for row in conn.execute(text(
+        f"SELECT DISTINCT date_trunc('quarter', issue_date AT TIME ZONE 'UTC') FROM {DEFAULT_PARTITION}"
+    )))
+
+    existing = set(list_partitions(conn))
+    created = [_create_partition(conn, start) for start in sorted(wanted) if partition_name(start) not in existing]
+    if created:
+        logger.info("Created %d share_issuances partitions: %s", len(created), ", ".join(created))
+    return created
+
+def _table(name: str, partitioned: bool) -> Table:
+    """share_issuances as the model defines it, with a partition-friendly key when partitioned"""
+    key = ("id", "issue_date") if partitioned else ("id",)
+    kwargs = {"postgresql_partition_by": "RANGE (issue_date)"} if partitioned else {}
+    metadata = MetaData()
+    # Referenced tables, only so the foreign keys resolve; never created here
+    Table("companies", metadata, Column("id", String, primary_key=True))
+    Table("users", metadata, Column("id", String, primary_key=True))
+    return Table(
+        name, metadata,
+        Column("id", String, nullable=False),
+        Column("company_id", String, nullable=False, server_default=DEFAULT_COMPANY_ID),
+        Column("shareholder_id", String),
+        Column("number_of_shares", Integer, nullable=False),
+        Column("price_per_share", Numeric(18, 4)),
+        Column("issue_date", DateTime(timezone=True), nullable=not partitioned, server_default=func.now()),
+        Column("certificate_url", String),
+        PrimaryKeyConstraint(*key, name=f"{TABLE}_pkey"),
+        ForeignKeyConstraint(["company_id"], ["companies.id"], name=f"fk_{TABLE}_company_id"),
+        ForeignKeyConstraint(["shareholder_id"], ["users.id"], name=f"{TABLE}_shareholder_id_fkey"),
+        **kwargs
+    )
+
+def _indexes(table: Table) -> List[Index]:
+    return [
+        Index(f"ix_{TABLE}_id", table.c.id),
+        Index(f"ix_{TABLE}_company_id_shareholder_id_issue_date", table.c.company_id, table.c.shareholder_id, table.c.issue_date),
+        Index(f"ix_{TABLE}_company_id_issue_date", table.c.company_id, table.c.issue_date),
+    ]
+
+def _rebuild(conn: Connection, partitioned: bool) -> None:
+    """Recreate share_issuances with or without partitioning and copy the rows across"""
+    old = f"{TABLE}_old"
+    conn.execute(text(f"ALTER TABLE {TABLE} RENAME TO {old}"))
+    conn.execute(text(f"ALTER TABLE {old} RENAME CONSTRAINT {TABLE}_pkey TO {old}_pkey"))
+    for (index,) in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :table AND indexname <> :pkey"
+    ), {"table": old, "pkey": f"{old}_pkey"}):
+        conn.execute(text(f"DROP INDEX {index}"))
+
+    table = _table(TABLE, partitioned)
+    table.create(conn)
+    for index in _indexes(table):
+        index.create(conn)
+    if partitioned:
+        since = conn.execute(text(f"SELECT min(issue_date) FROM {old}")).scalar()
+        ensure_partitions(conn, since=since.astimezone(timezone.utc).date() if since else None)
+
+    # Partition keys cannot be null; undated rows take the migration date
+    conn.execute(text(
+        f"INSERT INTO {TABLE} ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('issue_date', 'COALESCE(issue_date, now())')} FROM {old}"
+    ))
+    conn.execute(text(f"DROP TABLE {old} CASCADE"))
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+def partition_share_issuances(conn: Connection) -> bool:
+    """Convert share_issuances into a partitioned table; False when there is nothing to do"""
+    if conn.dialect.name != "postgresql" or is_partitioned(conn):
+        return False
+    _rebuild(conn, partitioned=True)
+    return True
+
+def unpartition_share_issuances(conn: Connection) -> bool:
+    """Convert share_issuances back into a plain table"""
+    if not is_partitioned(conn):
+        return False
+    _rebuild(conn, partitioned=False)
+    return True
@@ -1,14 +1,108 @@
-from sqlalchemy import create_engine
+from fastapi import Depends, Request
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from app.core.config import DATABASE_URL
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.config import DATABASE_URL, DATABASE_REPLICA_URL
+from app.db.consistency import CONSISTENCY_HEADER, replica_caught_up
+from app.core.tracing import SPAN_KIND_CLIENT, current_span, span
+
+# Statements are cut to this length in trace spans
+_TRACED_STATEMENT_LENGTH = 2000
+
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany):
+    if context is None or current_span.get() is None:
+        return
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = span(
+        operation,
+        SPAN_KIND_CLIENT,
+        **{
+            "db.system.name": conn.dialect.name,
+            "db.query.text": statement[:_TRACED_STATEMENT_LENGTH],
+            "db.operation.batch": executemany or None
+        }
+    )
+
+def _end_statement_span(conn, cursor, statement, parameters, context, executemany):
+    statement_span = getattr(context, "_trace_span", None)
+    if statement_span is not None:
+        statement_span.end()
+
+def _fail_statement_span(exception_context):
+    statement_span = getattr(exception_context.execution_context, "_trace_span", None)
+    if statement_span is not None:
+        statement_span.set_error(exception_context.original_exception)
+        statement_span.end()
+
+def instrument_engine(engine) -> None:
+    """A span per SQL statement executed inside a sampled trace"""
+    event.listen(engine, "before_cursor_execute", _start_statement_span)
+    event.listen(engine, "after_cursor_execute", _end_statement_span)
+    event.listen(engine, "handle_error", _fail_statement_span)
+
+class TracedSession(Session):
+    """Session whose commits (including the flush they trigger) show up as spans"""
+
+    def commit(self) -> None:
+        with span("db.commit", SPAN_KIND_CLIENT):
+            super().commit()
 
 engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+instrument_engine(engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=TracedSession)
+
+replica_engine = create_engine(DATABASE_REPLICA_URL) if DATABASE_REPLICA_URL else None
+if replica_engine is not None:
+    instrument_engine(replica_engine)
+ReplicaSessionLocal = (
+    sessionmaker(autocommit=False, autoflush=False, bind=replica_engine, class_=TracedSession)
+    if replica_engine is not None else None
+)
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def commit_keep_loaded(db: Session) -> None:
+    """Commit without expiring loaded objects, so returning them needs no refresh round-trip"""
+    expire_on_commit = getattr(db, "expire_on_commit", True)
+    db.expire_on_commit = False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+def get_read_db(request: Request, db: Session = Depends(get_db)):
+    """Session for read-only endpoints.
+
+    Uses the replica when one is configured, unless the request carries a
+    consistency token from a recent write that the replica has not replayed
+    yet; those reads reuse the primary session.
+    """
+    if ReplicaSessionLocal is None:
+        yield db
+        return
+    token = request.headers.get(CONSISTENCY_HEADER)
+    if token and not replica_caught_up(replica_engine, token):
+        yield db
+        return
+    replica_db = ReplicaSessionLocal()
+    try:
+        yield replica_db
+    finally:
+        replica_db.close()
+
+def get_cached_read_db(db: Session = Depends(get_db)):
+    """Session for reads whose results are kept per cap-table version (the
+    versioned caches and coalesced reads).
+
+    Always the primary: the version comes from this worker, which has seen
+    every write it counts, while a lagging replica may not have, and its
+    result would be kept under a version it does not reflect until the next
+    write. Sessions connect on first use, so cache hits cost the primary
+    nothing; only misses are read there.
+    """
+    yield db
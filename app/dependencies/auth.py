@@ -4,7 +4,8 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from sqlalchemy.orm import Session
 from app.core.config import SECRET_KEY, ALGORITHM
-from app.db.session import get_db
+from app.core.logging_config import set_request_user
+from app.db.session import get_db, SessionLocal
 from app.models.user_model import User, UserRole
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/token")
@@ -39,6 +40,7 @@ async def get_current_user(
     user = db.query(User).filter(User.email == email).first()
     if user is None:
         raise credentials_exception
+    set_request_user(user.id)
     return user
 
 async def get_current_active_user(
@@ -51,6 +53,18 @@ async def get_current_active_user(
         )
     return current_user
 
+async def get_streaming_user(
+    token: Annotated[str, Depends(oauth2_scheme)]
+):
+    """Authenticate like get_current_active_user but release the DB session
+    right away, so long-lived streaming responses do not pin a connection"""
+    db = SessionLocal()
+    try:
+        user = await get_current_user(token, db)
+        return await get_current_active_user(user)
+    finally:
+        db.close()
+
 async def get_admin_user(
     current_user: Annotated[User, Depends(get_current_active_user)]
 ):
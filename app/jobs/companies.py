@@ -0,0 +1,45 @@
+"""Create a company (tenant) together with its first admin.
+
+    python -m app.jobs.companies "Acme Inc" --admin-email admin@acme.test --admin-password ...
+"""
+import argparse
+import logging
+import sys
+from fastapi import HTTPException
+from app.db.session import SessionLocal
+from app.models.user_model import UserRole
+from app.schemas.user_schema import UserCreate
+from app.services.company_service import create_company
+from app.services.user_service import create_user
+
+log = logging.getLogger("app.jobs.companies")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("name", help="company name")
+    parser.add_argument("--admin-email", required=True)
+    parser.add_argument("--admin-password", required=True)
+    parser.add_argument("--admin-name", default="Admin User")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        company = create_company(db, args.name)
+        admin = create_user(db, UserCreate(
+            email=args.admin_email,
+            password=args.admin_password,
+            full_name=args.admin_name,
+            role=UserRole.ADMIN
+        ), company.id)
+    except (HTTPException, ValueError) as e:
+        log.error("%s", getattr(e, "detail", e))
+        return 1
+    finally:
+        db.close()
+
+    log.info("Created company %s (%s) with admin %s", company.name, company.id, admin.email)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
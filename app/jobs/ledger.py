@@ -0,0 +1,37 @@
+"""Check share balances against the transaction ledger, and optionally repair them.
+
+    python -m app.jobs.ledger [--company COMPANY_ID] [--repair]
+
+Exits 1 when balances differ from the ledger and were not repaired.
+"""
+import argparse
+import logging
+import sys
+from app.db.session import SessionLocal
+from app.services.ledger_service import check_ledger
+
+log = logging.getLogger("app.jobs.ledger")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--company", help="only this company (default: all)")
+    parser.add_argument("--repair", action="store_true", help="set differing balances to the ledger's figure")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    db = SessionLocal()
+    try:
+        result = check_ledger(db, args.company, repair=args.repair)
+    finally:
+        db.close()
+
+    for mismatch in result["mismatches"]:
+        log.warning("holder %s: balance %s, ledger %s", mismatch["holder_id"], mismatch["balance"], mismatch["ledger"])
+    log.info(
+        "%d holders checked, %d mismatches, %d repaired",
+        result["holders"], len(result["mismatches"]), result["repaired"]
+    )
+    return 0 if result["consistent"] or result["repaired"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
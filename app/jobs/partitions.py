@@ -0,0 +1,32 @@
+"""Create upcoming share_issuances partitions (Postgres, when partitioned).
+
+    python -m app.jobs.partitions [--ahead 4]
+
+Meant to run from cron, e.g. weekly. Rows that landed in the default
+partition are moved into partitions of their own quarter.
+"""
+import argparse
+import logging
+import sys
+from app.db.partitions import ensure_partitions, is_partitioned, list_partitions
+from app.db.session import engine
+
+log = logging.getLogger("app.jobs.partitions")
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ahead", type=int, default=None, help="future quarters to keep created")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    with engine.begin() as conn:
+        if not is_partitioned(conn):
+            log.info("share_issuances is not partitioned; nothing to do")
+            return 0
+        created = ensure_partitions(conn, ahead=args.ahead)
+        partitions = list_partitions(conn)
+    log.info("%d partitions created, %d in total", len(created), len(partitions))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Send quarterly holdings statements to every active shareholder.
+
+    python -m app.jobs.statements --period 2026-Q3 [--company <id>]
+
+Runs once per company unless --company is given. Each delivery is
+checkpointed, so running the command again after a crash only sends what
+is still outstanding for the period.
+"""
+import argparse
+import logging
+import sys
+from fastapi import HTTPException
+from app.db.session import SessionLocal
+from app.models.company_model import Company
+from app.services.statement_service import claim_statement_run, execute_statement_run, statement_run_progress
+
+log = logging.getLogger("app.jobs.statements")
+
+def run_company(company_id: str, args) -> bool:
+    db = SessionLocal()
+    try:
+        run = claim_statement_run(db, args.period, company_id)
+    except HTTPException as e:
+        log.error("%s: %s", company_id, e.detail)
+        return False
+    finally:
+        db.close()
+
+    log.info(
+        "Statement run %s for %s, company %s: %d shareholders, %d already delivered",
+        run.id, run.period, company_id, run.total, run.skipped
+    )
+    run = execute_statement_run(run.id, workers=args.workers, messages_per_second=args.rate, batch_size=args.batch_size)
+    progress = statement_run_progress(run)
+    log.info(
+        "Sent %d, failed %d, skipped %d at %.2f statements/s",
+        progress["sent"], progress["failed"], progress["skipped"], progress["statements_per_second"]
+    )
+    return run.failed == 0
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--period", help="quarter such as 2026-Q3 (default: last completed quarter)")
+    parser.add_argument("--company", help="company id (default: every company)")
+    parser.add_argument("--workers", type=int, help="render processes (0 renders in this process)")
+    parser.add_argument("--rate", type=float, help="maximum emails per second")
+    parser.add_argument("--batch-size", type=int, help="shareholders fetched per query")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    if args.company:
+        company_ids = [args.company]
+    else:
+        db = SessionLocal()
+        try:
+            company_ids = [row.id for row in db.query(Company.id).order_by(Company.created_at, Company.id)]
+        finally:
+            db.close()
+
+    ok = True
+    for company_id in company_ids:
+        ok = run_company(company_id, args) and ok
+    return 0 if ok else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,32 +4,78 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.routes.api import api_router
 from fastapi.openapi.utils import get_openapi
 from app.db.init_db import init_db
-from app.utils.openapi_utils import custom_openapi
+from app.utils.openapi_utils import install_openapi
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.consistency import ConsistencyTokenMiddleware
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.request_context import RequestContextMiddleware, REQUEST_ID_HEADER
+from app.middleware.tracing import TracingMiddleware
+from app.core.tracing import tracer
+from app.core.passwords import password_hasher
+from app.core.cache import configure_cache, shutdown_cache
+from app.core.logging_config import configure_logging, shutdown_logging
+from app.services.idempotency_service import purge_expired_keys
+from app.core.audit import audit_log
+from app.core.events import broker, configure_event_bus, shutdown_event_bus
+from app.services.certificate_service import start_certificate_rerender
+from app.services.shareholder_import_service import shutdown_hash_pool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
+    configure_logging()
+    password_hasher.calibrate()
+    configure_cache()
     init_db()
+    purge_expired_keys()
+    start_certificate_rerender()
+    configure_event_bus()
+    broker.start()
+    audit_log.start()
+    # Generated and compressed before the first request asks for it
+    app.state.openapi_document.build()
     yield
+    await broker.stop()
+    shutdown_event_bus()
+    # Write out queued audit events before the process exits
+    audit_log.stop()
+    shutdown_cache()
+    shutdown_hash_pool()
+    tracer.shutdown()
+    shutdown_logging()
 
 app = FastAPI(
     title="Cap Table Management API",
     description="API for managing company capitalization tables",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # Served by install_openapi from pre-encoded bytes
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None
 )
 
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ConsistencyTokenMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Consistency-Token", REQUEST_ID_HEADER],
 )
+# Outermost, so idempotent replays and cached bodies are stored uncompressed
+app.add_middleware(CompressionMiddleware)
+# Traces cover the whole middleware stack and carry the request id
+app.add_middleware(TracingMiddleware)
+# Outside everything else so every log record of the request carries its id
+app.add_middleware(RequestContextMiddleware)
 
-app.openapi = custom_openapi(app)
 app.include_router(api_router, prefix="/api/v1")
 
 @app.get("/")
 def read_root():
-    return {"message": "Cap Table Management API is running"}
\ No newline at end of file
+    return {"message": "Cap Table Management API is running"}
+
+install_openapi(app)
@@ -0,0 +1,98 @@
+from typing import Optional
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+from app.utils.compression import StreamCompressor, is_compressible, negotiate_encoding
+
+def _vary_on_encoding(headers: MutableHeaders) -> None:
+    vary = {value.strip().lower() for value in headers.get("vary", "").split(",")}
+    if "accept-encoding" not in vary:
+        headers.add_vary_header("Accept-Encoding")
+
+class CompressionMiddleware:
+    """Negotiates gzip, brotli or zstd from Accept-Encoding.
+
+    Whole bodies under the size threshold go out as they are; streaming
+    responses are compressed chunk by chunk and flushed as they go.
+    Responses that already carry a Content-Encoding (cached variants,
+    pre-compressed files) and range responses are left alone.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MINIMUM_SIZE if minimum_size is None else minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        if encoding is None or "range" in headers:
+            await self.app(scope, receive, send)
+            return
+        await _CompressedResponse(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+class _CompressedResponse:
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.passthrough = False
+        self.compressor: Optional[StreamCompressor] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            headers = Headers(raw=message["headers"])
+            self.passthrough = (
+                message["status"] in (204, 206, 304)
+                or message["status"] < 200
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                if is_compressible(headers.get("content-type", "")):
+                    _vary_on_encoding(MutableHeaders(raw=message["headers"]))
+                await self.send(message)
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start is not None:
+            start, self.start = self.start, None
+            headers = MutableHeaders(raw=start["headers"])
+            _vary_on_encoding(headers)
+            if not more_body and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self.send(start)
+                await self.send(message)
+                return
+            headers["Content-Encoding"] = self.encoding
+            self.compressor = StreamCompressor(self.encoding)
+            if not more_body:
+                body = self.compressor.compress(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(start)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            # Length is unknown until the stream ends
+            del headers["Content-Length"]
+            await self.send(start)
+
+        if more_body:
+            chunk = self.compressor.compress(body) + self.compressor.flush()
+        else:
+            chunk = self.compressor.compress(body) + self.compressor.finish()
+        await self.send({"type": "http.response.body", "body": chunk, "more_body": more_body})
@@ -0,0 +1,31 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import MutableHeaders
+from app.db import session
+from app.db.consistency import CONSISTENCY_HEADER, issue_token
+
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+class ConsistencyTokenMiddleware:
+    """Attach a consistency token to successful writes when a read replica is
+    configured. Clients echo it on later reads, which then stay on the
+    primary until the replica has caught up (see get_read_db)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in WRITE_METHODS
+            or session.replica_engine is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_token(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                token = await run_in_threadpool(issue_token, session.engine)
+                MutableHeaders(scope=message)[CONSISTENCY_HEADER] = token
+            await send(message)
+
+        await self.app(scope, receive, send_with_token)
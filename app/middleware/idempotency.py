@@ -0,0 +1,129 @@
+import asyncio
+import hashlib
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse, Response
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from app.core.security import verify_token
+from app.core.config import settings
+from app.services.idempotency_service import abort_request, begin_request, complete_request, renew_lease
+
+IDEMPOTENT_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+STORED_HEADERS = {"content-type", "location"}
+# Stored instead of a response marked Cache-Control: no-store (e.g. one
+# carrying credentials), so a retry learns the request completed
+NOT_STORED_BODY = b'{"detail":"This request already completed; its response was not stored"}'
+MAX_KEY_LENGTH = 255
+
+class IdempotencyMiddleware:
+    """Replay the stored response for writes retried with the same Idempotency-Key.
+
+    The first request with a key runs normally and its response is stored;
+    retries return that response without running the endpoint again, and
+    duplicates arriving while it runs wait for it. Keys are scoped to the
+    caller and the route, and 5xx responses are not stored so they can be
+    retried. Responses marked Cache-Control: no-store are not stored either;
+    retries of those get a 409 saying the request already completed.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in IDEMPOTENT_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        key = headers.get("idempotency-key")
+        if not key:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > MAX_KEY_LENGTH:
+            await JSONResponse({"detail": "Idempotency-Key is too long"}, status_code=400)(scope, receive, send)
+            return
+
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+        key_scope = f"{self._caller(headers)}:{scope['method']} {scope['path']}"
+        request_hash = hashlib.sha256(
+            scope.get("query_string", b"") + b"\n" + body
+        ).hexdigest()
+
+        try:
+            stored = await begin_request(key_scope, key, request_hash)
+        except HTTPException as exc:
+            await JSONResponse({"detail": exc.detail}, status_code=exc.status_code)(scope, receive, send)
+            return
+        if stored is not None:
+            replay = Response(
+                content=stored.body,
+                status_code=stored.status_code,
+                headers={**stored.headers, "Idempotent-Replayed": "true"}
+            )
+            await replay(scope, receive, send)
+            return
+
+        body_sent = False
+
+        async def replay_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "headers": {}, "body": b"", "no_store": False}
+
+        async def capture(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["no_store"] = "no-store" in Headers(raw=message.get("headers", [])).get("cache-control", "")
+                response["headers"] = {
+                    name.decode("latin-1"): value.decode("latin-1")
+                    for name, value in message.get("headers", [])
+                    if name.decode("latin-1").lower() in STORED_HEADERS
+                }
+            elif message["type"] == "http.response.body":
+                response["body"] += message.get("body", b"")
+            await send(message)
+
+        heartbeat = asyncio.get_running_loop().create_task(self._renew(key_scope, key))
+        try:
+            await self.app(scope, replay_body, capture)
+        except BaseException:
+            await run_in_threadpool(abort_request, key_scope, key)
+            raise
+        finally:
+            heartbeat.cancel()
+
+        if response["status"] >= 500:
+            await run_in_threadpool(abort_request, key_scope, key)
+        elif response["no_store"]:
+            await run_in_threadpool(
+                complete_request, key_scope, key, 409, {"content-type": "application/json"}, NOT_STORED_BODY
+            )
+        else:
+            await run_in_threadpool(
+                complete_request, key_scope, key, response["status"], response["headers"], response["body"]
+            )
+
+    @staticmethod
+    async def _renew(key_scope: str, key: str):
+        while True:
+            await asyncio.sleep(settings.IDEMPOTENCY_LEASE_SECONDS / 3)
+            await run_in_threadpool(renew_lease, key_scope, key)
+
+    @staticmethod
+    def _caller(headers: Headers) -> str:
+        authorization = headers.get("authorization", "")
+        if authorization.startswith("Bearer "):
+            payload = verify_token(authorization.split(" ", 1)[1])
+            if payload and payload.get("sub"):
+                return payload["sub"]
+        return "anonymous"
@@ -0,0 +1,50 @@
+import logging
+import re
+import time
+import uuid
+from starlette.datastructures import MutableHeaders
+from app.core.logging_config import request_context
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Client-supplied ids are echoed into logs, so only plain tokens are accepted
+_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+access_logger = logging.getLogger("app.access")
+
+class RequestContextMiddleware:
+    """Give every request an id (the client's X-Request-ID when valid) that
+    is attached to its log records and returned in the response, and write
+    one access log record per request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        supplied = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"x-request-id"), None)
+        request_id = supplied if supplied and _REQUEST_ID.match(supplied) else uuid.uuid4().hex
+        context = {"request_id": request_id, "user_id": None, "scope": scope}
+        token = request_context.set(context)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            access_logger.info(
+                "%s %s %s %.2fms", scope["method"], scope["path"], status_code, duration_ms,
+                extra={"method": scope["method"], "status": status_code, "duration_ms": duration_ms}
+            )
+            request_context.reset(token)
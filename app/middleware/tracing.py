@@ -0,0 +1,44 @@
+from app.core.logging_config import request_context, route_template
+from app.core.tracing import STATUS_ERROR, tracer
+
+class TracingMiddleware:
+    """Open the root span of sampled requests. Background tasks run inside
+    it, so a trace also covers work done after the response was sent."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = next((value.decode("latin-1") for name, value in scope["headers"] if name == b"traceparent"), None)
+        root = tracer.start_trace(scope["method"], traceparent)
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        context = request_context.get()
+        root.set_attribute("http.request.method", scope["method"])
+        root.set_attribute("url.path", scope["path"])
+        root.set_attribute("request.id", context and context.get("request_id"))
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with root:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                if "endpoint" in scope:
+                    route = route_template(scope["path"], scope.get("path_params") or {})
+                    root.name = f"{scope['method']} {route}"
+                    root.set_attribute("http.route", route)
+                root.set_attribute("http.response.status_code", status_code)
+                if status_code >= 500:
+                    root.status = STATUS_ERROR
@@ -1,5 +1,12 @@
+from .company_model import Company
 from .user_model import User
 from .shareholder_model import ShareholderProfile
 from .issuance_model import ShareIssuance
+from .idempotency_model import IdempotencyKey
+from .certificate_artifact_model import CertificateArtifact
+from .statement_model import StatementRun, StatementDelivery
+from .audit_model import AuditEvent
+from .vesting_model import VestingSchedule
+from .ledger_model import ShareTransaction, ShareBalance
 
-__all__ = ["User", "ShareholderProfile", "ShareIssuance"]
\ No newline at end of file
+__all__ = ["Company", "User", "ShareholderProfile", "ShareIssuance", "IdempotencyKey", "CertificateArtifact", "StatementRun", "StatementDelivery", "AuditEvent", "VestingSchedule", "ShareTransaction", "ShareBalance"]
\ No newline at end of file
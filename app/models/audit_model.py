@@ -0,0 +1,24 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, JSON, Index
+from app.db.base import Base
+
+class AuditEvent(Base):
+    """Who did what to which entity, written in batches by app.core.audit"""
+    __tablename__ = "audit_events"
+    __table_args__ = (
+        # Every query is within one company, newest first
+        Index("ix_audit_events_company_id_created_at", "company_id", "created_at"),
+        Index("ix_audit_events_company_id_entity_created_at", "company_id", "entity_type", "entity_id", "created_at"),
+        Index("ix_audit_events_company_id_actor_id_created_at", "company_id", "actor_id", "created_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String, nullable=False)
+    # No foreign keys: the trail outlives the users and rows it mentions
+    actor_id = Column(String)
+    action = Column(String(64), nullable=False)
+    entity_type = Column(String(32), nullable=False)
+    entity_id = Column(String)
+    details = Column(JSON)
+    # When the action happened, not when the batch was written
+    created_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, Integer, DateTime
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class CertificateArtifact(Base):
+    __tablename__ = "certificate_artifacts"
+
+    # No foreign key to share_issuances: artifacts are a derived cache
+    issuance_id = Column(String, primary_key=True)
+    digest = Column(String(64), nullable=False)
+    size = Column(Integer, nullable=False)
+    # Stale rows (older template) are re-rendered in the background
+    template_version = Column(Integer, nullable=False, index=True)
+    # SHA-256 of the rendered inputs; a mismatch (e.g. the holder was renamed)
+    # means the stored PDF is out of date
+    inputs_digest = Column(String(64))
+    rendered_at = Column(DateTime(timezone=True), server_default=func.now())
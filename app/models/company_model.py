@@ -0,0 +1,18 @@
+import uuid
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+# Tenant of single-company deployments and of rows created before companies
+# existed; named after settings.COMPANY_NAME
+DEFAULT_COMPANY_ID = "default"
+
+class Company(Base):
+    __tablename__ = "companies"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    name = Column(String, unique=True, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    users = relationship("User", back_populates="company")
@@ -0,0 +1,26 @@
+import uuid
+from sqlalchemy import Column, String, Integer, Text, LargeBinary, DateTime, UniqueConstraint, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        # One row per client key and caller; concurrent duplicates collide here
+        UniqueConstraint("scope", "key", name="uq_idempotency_keys_scope_key"),
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    scope = Column(String, nullable=False)
+    key = Column(String(255), nullable=False)
+    request_hash = Column(String(64), nullable=False)
+    status = Column(String(16), nullable=False, default="in_progress")
+    response_status = Column(Integer)
+    response_headers = Column(Text)
+    # Stored as sent: responses need not be UTF-8
+    response_body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True))
+    # An in-progress key whose lease lapsed belongs to a worker that died
+    lease_expires_at = Column(DateTime(timezone=True))
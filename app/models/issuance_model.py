@@ -1,18 +1,41 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
+from app.core.config import settings
 from app.db.base import Base
+from app.models.company_model import DEFAULT_COMPANY_ID
 
 class ShareIssuance(Base):
     __tablename__ = "share_issuances"
+    __table_args__ = (
+        # Tenant-leading. Per-shareholder listings, holdings sums and the distribution GROUP BY
+        Index("ix_share_issuances_company_id_shareholder_id_issue_date", "company_id", "shareholder_id", "issue_date"),
+        # Date-bucketed aggregates and date-range filters
+        Index("ix_share_issuances_company_id_issue_date", "company_id", "issue_date"),
+        # Quarterly range partitions on Postgres, see app.db.partitions; ignored elsewhere
+        {"postgresql_partition_by": "RANGE (issue_date)"} if settings.SHARE_ISSUANCES_PARTITIONED else {},
+    )
     
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    # Always the shareholder's company; denormalised so tenant scans need no join
+    company_id = Column(String, ForeignKey("companies.id"), nullable=False, default=DEFAULT_COMPANY_ID, server_default=DEFAULT_COMPANY_ID)
     shareholder_id = Column(String, ForeignKey('users.id'))
     number_of_shares = Column(Integer, nullable=False)
-    price_per_share = Column(Float)
-    issue_date = Column(DateTime(timezone=True), server_default=func.now())
+    # Money is stored as an exact decimal so aggregates do not drift
+    price_per_share = Column(Numeric(18, 4))
+    # Part of the table's primary key when partitioned, as Postgres requires
+    issue_date = Column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        primary_key=settings.SHARE_ISSUANCES_PARTITIONED,
+        nullable=not settings.SHARE_ISSUANCES_PARTITIONED
+    )
     certificate_url = Column(String)
     
-    shareholder = relationship("User", back_populates="issuances")
\ No newline at end of file
+    shareholder = relationship("User", back_populates="issuances")
+    
+    # Issuances are identified by id alone either way. Fetch server defaults
+    # (issue_date) with RETURNING on insert instead of a refresh
+    __mapper_args__ = {"eager_defaults": True, "primary_key": [id]}
\ No newline at end of file
@@ -0,0 +1,51 @@
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Integer, Numeric, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+from app.models.company_model import DEFAULT_COMPANY_ID
+
+# Ledger entry kinds: issue credits the receiving holder, transfer moves
+# shares between holders, cancel and repurchase take them off a holder
+TRANSACTION_ISSUE = "issue"
+TRANSACTION_TRANSFER = "transfer"
+TRANSACTION_CANCEL = "cancel"
+TRANSACTION_REPURCHASE = "repurchase"
+TRANSACTION_KINDS = (TRANSACTION_ISSUE, TRANSACTION_TRANSFER, TRANSACTION_CANCEL, TRANSACTION_REPURCHASE)
+
+class ShareTransaction(Base):
+    """One append-only ledger entry; balances are the sum of these"""
+    __tablename__ = "share_transactions"
+    __table_args__ = (
+        Index("ix_share_transactions_company_id_created_at", "company_id", "created_at"),
+        # A holder's history, and the per-holder sums of the consistency check
+        Index("ix_share_transactions_company_id_from_holder_id", "company_id", "from_holder_id"),
+        Index("ix_share_transactions_company_id_to_holder_id", "company_id", "to_holder_id"),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    # No foreign keys: like the audit trail, the ledger outlives the rows it mentions
+    company_id = Column(String, nullable=False, default=DEFAULT_COMPANY_ID, server_default=DEFAULT_COMPANY_ID)
+    kind = Column(String(16), nullable=False)
+    from_holder_id = Column(String)
+    to_holder_id = Column(String)
+    number_of_shares = Column(Integer, nullable=False)
+    price_per_share = Column(Numeric(18, 4))
+    # The issuance an issue entry records
+    issuance_id = Column(String, index=True)
+    actor_id = Column(String)
+    note = Column(String)
+    # Set here rather than by the database: SQLite's now() has whole seconds,
+    # and entries are listed in the order they were posted
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+
+class ShareBalance(Base):
+    """Shares a holder has now, kept in step with the ledger in the same transaction"""
+    __tablename__ = "share_balances"
+
+    # No foreign keys, as for the ledger entries
+    holder_id = Column(String, primary_key=True)
+    company_id = Column(String, nullable=False, index=True, default=DEFAULT_COMPANY_ID, server_default=DEFAULT_COMPANY_ID)
+    balance = Column(Integer, nullable=False, default=0)
+    last_transaction_id = Column(String)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
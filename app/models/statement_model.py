@@ -0,0 +1,45 @@
+import uuid
+from sqlalchemy import Column, ForeignKey, String, Integer, Text, DateTime, Index, text
+from sqlalchemy.sql import func
+from app.db.base import Base
+from app.models.company_model import DEFAULT_COMPANY_ID
+
+class StatementRun(Base):
+    __tablename__ = "statement_runs"
+    __table_args__ = (
+        Index("ix_statement_runs_company_id_period_status", "company_id", "period", "status"),
+        # At most one live run per company and period, across workers
+        Index(
+            "uq_statement_runs_company_id_period_running", "company_id", "period", unique=True,
+            postgresql_where=text("status = 'running'"), sqlite_where=text("status = 'running'")
+        ),
+    )
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String, ForeignKey("companies.id"), nullable=False, default=DEFAULT_COMPANY_ID, server_default=DEFAULT_COMPANY_ID)
+    period = Column(String(7), nullable=False)
+    # running, completed, failed or interrupted (found stale by a later run)
+    status = Column(String(16), nullable=False, default="running")
+    total = Column(Integer, nullable=False, default=0)
+    # Already delivered for the period when the run started
+    skipped = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Heartbeat, advanced with every checkpoint
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+class StatementDelivery(Base):
+    """Checkpoint: one row per shareholder and period, written as each statement is sent"""
+    __tablename__ = "statement_deliveries"
+
+    period = Column(String(7), primary_key=True)
+    # No foreign key: deliveries are an audit of what was sent, kept if the user goes
+    shareholder_id = Column(String, primary_key=True)
+    run_id = Column(String, nullable=False, index=True)
+    # sent or failed; failed rows are retried by the next run for the period
+    status = Column(String(16), nullable=False)
+    error = Column(Text)
+    delivered_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -1,9 +1,10 @@
 from enum import Enum
 import uuid
-from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime
+from sqlalchemy import Column, String, Boolean, Enum as SQLEnum, DateTime, ForeignKey, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.base import Base
+from app.models.company_model import DEFAULT_COMPANY_ID
 
 class UserRole(str, Enum):
     ADMIN = "admin"
@@ -11,8 +12,23 @@ class UserRole(str, Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Tenant-leading: every query is scoped to one company first.
+        # Shareholder listings filter on role and page by creation time
+        Index("ix_users_company_id_role_created_at", "company_id", "role", "created_at"),
+        Index(
+            "ix_users_company_id_active_shareholders_created_at",
+            "company_id",
+            "created_at",
+            postgresql_where=text("role = 'SHAREHOLDER' AND is_active"),
+            sqlite_where=text("role = 'SHAREHOLDER' AND is_active = 1"),
+        ),
+    )
 
     id = Column(String, primary_key=True, index=True, default=lambda: str(uuid.uuid4()))
+    company_id = Column(String, ForeignKey("companies.id"), nullable=False, default=DEFAULT_COMPANY_ID, server_default=DEFAULT_COMPANY_ID)
+    # The sign-in name, and logins do not name a company, so it is unique
+    # across all companies: one address cannot hold accounts in two of them
     email = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     full_name = Column(String)
@@ -23,6 +39,7 @@ class User(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Use string references for relationships
+    company = relationship("Company", back_populates="users")
     shareholder_profile = relationship("ShareholderProfile", back_populates="user", uselist=False)
     issuances = relationship("ShareIssuance", back_populates="shareholder")
 
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.db.base import Base
+from app.models.company_model import DEFAULT_COMPANY_ID
+
+class VestingSchedule(Base):
+    """How the shares of one issuance vest; see app.core.vesting for the arithmetic"""
+    __tablename__ = "vesting_schedules"
+
+    # No foreign key to share_issuances: its primary key includes issue_date when partitioned
+    issuance_id = Column(String, primary_key=True)
+    # The issuance's company; the vested distribution loads a company's schedules at once
+    company_id = Column(String, ForeignKey("companies.id"), nullable=False, index=True, default=DEFAULT_COMPANY_ID, server_default=DEFAULT_COMPANY_ID)
+    start_date = Column(Date, nullable=False)
+    cliff_months = Column(Integer, nullable=False, default=0)
+    duration_months = Column(Integer, nullable=False)
+    frequency_months = Column(Integer, nullable=False, default=1)
+    # none, single_trigger or double_trigger
+    acceleration = Column(String(16), nullable=False, default="none")
+    # Share of the then-unvested shares that vests when acceleration applies
+    acceleration_percent = Column(Integer, nullable=False, default=100)
+    change_of_control_date = Column(Date)
+    termination_date = Column(Date)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -2,7 +2,11 @@ from fastapi import APIRouter
 from app.controllers import (
     auth_controller,
     shareholder_controller,
-    issuance_controller
+    issuance_controller,
+    analytics_controller,
+    events_controller,
+    admin_controller,
+    ledger_controller
 )
 
 api_router = APIRouter()
@@ -10,3 +14,7 @@ api_router = APIRouter()
 api_router.include_router(auth_controller.router, tags=["Authentication"])
 api_router.include_router(shareholder_controller.router, prefix="/shareholders", tags=["Shareholders"])
 api_router.include_router(issuance_controller.router, prefix="/issuances")
+api_router.include_router(analytics_controller.router, prefix="/analytics")
+api_router.include_router(events_controller.router, prefix="/events")
+api_router.include_router(admin_controller.router, prefix="/admin")
+api_router.include_router(ledger_controller.router, prefix="/ledger")
@@ -0,0 +1,33 @@
+from decimal import Decimal
+from typing import List, Optional
+from pydantic import BaseModel
+
+# Money fields are Decimal and serialize as strings so no precision is lost
+# in transit (sums are exact when computed on Postgres)
+
+class MonthlyIssuanceVolume(BaseModel):
+    month: str
+    issuance_count: int
+    total_shares: int
+    capital_raised: Decimal
+
+class ShareholderIssuanceVolume(BaseModel):
+    shareholder_id: str
+    shareholder_name: Optional[str] = None
+    issuance_count: int
+    total_shares: int
+    # Now, after transfers and cancellations
+    shares_held: int = 0
+    capital_raised: Decimal
+
+class CapitalSummary(BaseModel):
+    issuance_count: int
+    total_shares: int
+    # Now, after transfers and cancellations
+    shares_outstanding: int = 0
+    total_capital_raised: Decimal
+    weighted_average_price: Optional[Decimal] = None
+
+class CapitalAnalytics(CapitalSummary):
+    by_month: List[MonthlyIssuanceVolume] = []
+    by_shareholder: List[ShareholderIssuanceVolume] = []
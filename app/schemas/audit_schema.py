@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any, Dict, Optional
+from pydantic import BaseModel
+from pydantic.config import ConfigDict
+
+class AuditEventResponse(BaseModel):
+    id: str
+    actor_id: Optional[str] = None
+    action: str
+    entity_type: str
+    entity_id: Optional[str] = None
+    details: Optional[Dict[str, Any]] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
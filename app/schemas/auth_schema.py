@@ -14,7 +14,7 @@ class LoginRequest(BaseModel):
     )
 
 class RegisterRequest(BaseModel):
-    email: str
+    email: str = Field(..., description="Sign-in name; unique across all companies, not per company")
     password: str
     full_name: str
     role: str
@@ -28,4 +28,17 @@ class RegisterRequest(BaseModel):
                 "role": "shareholder"
             }
         }
-    )
\ No newline at end of file
+    )
+
+class AcceptInviteRequest(BaseModel):
+    token: str
+    password: str = Field(..., min_length=8)
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "token": "0b6f7c1e-5d2a-4e8b-9f1a-3c4d5e6f7a8b.Yx3k9...",
+                "password": "strongpassword123"
+            }
+        }
+    )
@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+from pydantic.config import ConfigDict
+
+class CompanyResponse(BaseModel):
+    id: str
+    name: str
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
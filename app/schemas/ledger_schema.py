@@ -0,0 +1,59 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field
+
+class ShareTransactionCreate(BaseModel):
+    # Issues are recorded through POST /issuances, which also makes the certificate
+    kind: Literal["transfer", "cancel", "repurchase"]
+    from_holder_id: str
+    # Only for transfers
+    to_holder_id: Optional[str] = None
+    number_of_shares: int = Field(..., gt=0)
+    price_per_share: Optional[float] = Field(None, ge=0)
+    note: Optional[str] = Field(None, max_length=500)
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "kind": "transfer",
+                "from_holder_id": "seller-user-id",
+                "to_holder_id": "buyer-user-id",
+                "number_of_shares": 250,
+                "price_per_share": 12.5,
+                "note": "Secondary sale"
+            }
+        }
+    )
+
+class ShareTransactionResponse(BaseModel):
+    id: str
+    kind: str
+    from_holder_id: Optional[str] = None
+    to_holder_id: Optional[str] = None
+    number_of_shares: int
+    price_per_share: Optional[float] = None
+    issuance_id: Optional[str] = None
+    actor_id: Optional[str] = None
+    note: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ShareBalanceResponse(BaseModel):
+    holder_id: str
+    balance: int
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class LedgerMismatch(BaseModel):
+    holder_id: str
+    # None when the holder has no balance row
+    balance: Optional[int] = None
+    ledger: int
+
+class LedgerCheckResponse(BaseModel):
+    holders: int
+    consistent: bool
+    mismatches: List[LedgerMismatch]
+    repaired: int = 0
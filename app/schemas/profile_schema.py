@@ -0,0 +1,16 @@
+from typing import List, Optional
+from pydantic import BaseModel
+
+class AllocationStat(BaseModel):
+    location: str
+    size_bytes: int
+    count: int
+
+class ProfileResponse(BaseModel):
+    pid: int
+    seconds: float
+    interval_ms: float
+    samples: int
+    # Collapsed stacks ("frame;frame;frame count" per line) for flamegraph tools
+    collapsed: str
+    allocations: Optional[List[AllocationStat]] = None
@@ -39,7 +39,19 @@ class ShareIssuanceResponse(BaseModel):
 class ShareholderWithSharesResponse(UserResponse):
     shareholder_profile: Optional[ShareholderProfileResponse] = None
     total_shares: int = 0
+    # Only populated with include=issuances; one page, newest first
     issuances: List[ShareIssuanceResponse] = []
+    issuance_count: Optional[int] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class ShareholderSearchResult(BaseModel):
+    id: str
+    email: str
+    full_name: Optional[str] = None
+    is_active: Optional[bool] = None
+    # 0 = name or email starts with the query, 1 = a word of the name does, 2 = substring
+    rank: int
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -82,4 +94,29 @@ class ShareholderUpdate(BaseModel):
                 }
             }
         }
-    )
\ No newline at end of file
+    )
+
+class ShareholderImportRow(BaseModel):
+    """One row of a bulk upload; a shareholder without a password is invited"""
+    # Unique across all companies, like every sign-in email
+    email: EmailStr
+    full_name: Optional[str] = None
+    password: Optional[str] = None
+    address: Optional[str] = None
+    phone: Optional[str] = None
+
+class ShareholderImportRowResult(BaseModel):
+    # Line of the upload the row starts on (the CSV header is line 1)
+    row: int
+    email: Optional[str] = None
+    status: str  # "created" or "failed"
+    id: Optional[str] = None
+    # Only for rows without a password; redeem at /invites/accept
+    invite_token: Optional[str] = None
+    error: Optional[str] = None
+
+class ShareholderImportResult(BaseModel):
+    created: int
+    invited: int
+    failed: int
+    rows: List[ShareholderImportRowResult]
@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class StatementRunCreate(BaseModel):
+    # Defaults to the last completed quarter
+    period: Optional[str] = Field(None, examples=["2026-Q3"])
+
+class StatementRunResponse(BaseModel):
+    id: str
+    period: str
+    status: str
+    total: int
+    skipped: int
+    sent: int
+    failed: int
+    remaining: int
+    error: Optional[str] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    statements_per_second: float
+    eta_seconds: Optional[float] = None
@@ -21,6 +21,7 @@ class UserBase(BaseModel):
     )
 
 class UserCreate(UserBase):
+    email: EmailStr = Field(..., description="Sign-in name; unique across all companies, not per company")
     password: str
     role: UserRole
     
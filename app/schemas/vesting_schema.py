@@ -0,0 +1,57 @@
+from datetime import date, datetime
+from typing import Literal, Optional
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+class VestingScheduleBase(BaseModel):
+    # Defaults to the issue date
+    start_date: Optional[date] = None
+    cliff_months: int = Field(0, ge=0, le=600)
+    duration_months: int = Field(..., ge=0, le=600)
+    frequency_months: int = Field(1, ge=1, le=600)
+    acceleration: Literal["none", "single_trigger", "double_trigger"] = "none"
+    acceleration_percent: int = Field(100, ge=0, le=100)
+    change_of_control_date: Optional[date] = None
+    # Vesting stops here; the second trigger of double-trigger acceleration
+    termination_date: Optional[date] = None
+
+class VestingScheduleSet(VestingScheduleBase):
+    @model_validator(mode="after")
+    def check_cliff(self):
+        if self.cliff_months > self.duration_months:
+            raise ValueError("cliff_months cannot exceed duration_months")
+        return self
+
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "start_date": "2026-01-01",
+                "cliff_months": 12,
+                "duration_months": 48,
+                "frequency_months": 1,
+                "acceleration": "double_trigger",
+                "acceleration_percent": 100
+            }
+        }
+    )
+
+class VestingScheduleResponse(VestingScheduleBase):
+    issuance_id: str
+    start_date: date
+    number_of_shares: int
+    # As of `as_of`
+    as_of: date
+    vested_shares: int
+    unvested_shares: int
+    updated_at: Optional[datetime] = None
+
+class VestedOwnership(BaseModel):
+    shareholder_id: str
+    shareholder_name: str
+    # Issued on or before the as-of date
+    total_shares: int
+    vested_shares: int
+    unvested_shares: int
+    # Held now, after transfers and cancellations
+    shares_held: int = 0
+    # Of all shares vested on the as-of date
+    percentage: float
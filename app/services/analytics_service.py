@@ -0,0 +1,192 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import select, func, case, tuple_, literal, null, union_all, String
+from sqlalchemy.orm import Session
+from app.models.issuance_model import ShareIssuance
+from app.models.user_model import User
+from app.core.cache import VersionedCache, get_cap_table_version
+from app.core.single_flight import coalesce
+from app.services.ledger_service import get_holdings
+
+PRICE_QUANTUM = Decimal("0.0001")
+
+_analytics_cache = VersionedCache("analytics")
+
+def _month_bucket(dialect_name: str):
+    if dialect_name == "postgresql":
+        return func.to_char(func.date_trunc("month", ShareIssuance.issue_date), "YYYY-MM")
+    return func.strftime("%Y-%m", ShareIssuance.issue_date)
+
+def _aggregate_columns():
+    capital = ShareIssuance.number_of_shares * ShareIssuance.price_per_share
+    priced_shares = case((ShareIssuance.price_per_share.isnot(None), ShareIssuance.number_of_shares), else_=0)
+    return [
+        func.count(ShareIssuance.id).label("issuance_count"),
+        func.coalesce(func.sum(ShareIssuance.number_of_shares), 0).label("total_shares"),
+        func.coalesce(func.sum(capital), 0).label("capital_raised"),
+        func.coalesce(func.sum(priced_shares), 0).label("priced_shares"),
+    ]
+
+def _filters(company_id: Optional[str], start_date: Optional[datetime], end_date: Optional[datetime]):
+    # Tenant-leading, matching the (company_id, issue_date) index
+    filters = [ShareIssuance.company_id == company_id] if company_id is not None else []
+    if start_date:
+        filters.append(ShareIssuance.issue_date >= start_date)
+    if end_date:
+        filters.append(ShareIssuance.issue_date < end_date)
+    return filters
+
+def _grouping_sets_query(dialect_name: str, filters):
+    """One pass: GROUPING SETS ((month), (shareholder), ())"""
+    month = _month_bucket(dialect_name)
+    level = case(
+        (func.grouping(month) == 0, literal("month")),
+        (func.grouping(ShareIssuance.shareholder_id) == 0, literal("shareholder")),
+        else_=literal("total"),
+    )
+    return (
+        select(
+            level.label("level"),
+            month.label("month"),
+            ShareIssuance.shareholder_id,
+            User.full_name,
+            *_aggregate_columns()
+        )
+        .select_from(ShareIssuance)
+        .outerjoin(User, User.id == ShareIssuance.shareholder_id)
+        .where(*filters)
+        .group_by(func.grouping_sets(
+            tuple_(month),
+            tuple_(ShareIssuance.shareholder_id, User.full_name),
+            tuple_()
+        ))
+    )
+
+def _union_query(dialect_name: str, filters):
+    """Fallback for databases without GROUPING SETS (SQLite): one statement, three groupings"""
+    month = _month_bucket(dialect_name)
+    by_month = (
+        select(
+            literal("month").label("level"),
+            month.label("month"),
+            null().cast(String).label("shareholder_id"),
+            null().cast(String).label("full_name"),
+            *_aggregate_columns()
+        )
+        .where(*filters)
+        .group_by(month)
+    )
+    by_shareholder = (
+        select(
+            literal("shareholder").label("level"),
+            null().cast(String).label("month"),
+            ShareIssuance.shareholder_id,
+            User.full_name,
+            *_aggregate_columns()
+        )
+        .select_from(ShareIssuance)
+        .outerjoin(User, User.id == ShareIssuance.shareholder_id)
+        .where(*filters)
+        .group_by(ShareIssuance.shareholder_id, User.full_name)
+    )
+    total = (
+        select(
+            literal("total").label("level"),
+            null().cast(String).label("month"),
+            null().cast(String).label("shareholder_id"),
+            null().cast(String).label("full_name"),
+            *_aggregate_columns()
+        )
+        .where(*filters)
+    )
+    return union_all(by_month, by_shareholder, total)
+
+def _money(value) -> Decimal:
+    # Postgres sums NUMERIC exactly and returns Decimal. SQLite has no
+    # decimal type and sums in floating point: going through the shortest
+    # repr keeps binary noise out of the digits, but such sums are only
+    # exact to the quantum while they fit in a double
+    if isinstance(value, float):
+        value = repr(value)
+    return Decimal(value or 0).quantize(PRICE_QUANTUM)
+
+def compute_capital_analytics(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    company_id: Optional[str] = None
+):
+    """Total capital raised, weighted average price and issuance volume per month and per shareholder.
+
+    Issuance figures cover the date range; shares held now come from the
+    ledger balances. Money is summed as exact decimals on Postgres only;
+    see `_money` for SQLite.
+    """
+    dialect_name = db.get_bind().dialect.name
+    filters = _filters(company_id, start_date, end_date)
+    if dialect_name == "postgresql":
+        query = _grouping_sets_query(dialect_name, filters)
+    else:
+        query = _union_query(dialect_name, filters)
+
+    holdings = get_holdings(db, company_id)
+    summary = {
+        "issuance_count": 0,
+        "total_shares": 0,
+        "shares_outstanding": sum(holdings.values()),
+        "total_capital_raised": _money(0),
+        "weighted_average_price": None,
+        "by_month": [],
+        "by_shareholder": [],
+    }
+    for row in db.execute(query).all():
+        if row.level == "month":
+            summary["by_month"].append({
+                "month": row.month,
+                "issuance_count": row.issuance_count,
+                "total_shares": row.total_shares,
+                "capital_raised": _money(row.capital_raised),
+            })
+        elif row.level == "shareholder":
+            summary["by_shareholder"].append({
+                "shareholder_id": row.shareholder_id,
+                "shareholder_name": row.full_name,
+                "issuance_count": row.issuance_count,
+                "total_shares": row.total_shares,
+                "shares_held": holdings.get(row.shareholder_id, 0),
+                "capital_raised": _money(row.capital_raised),
+            })
+        else:
+            summary["issuance_count"] = row.issuance_count
+            summary["total_shares"] = row.total_shares
+            summary["total_capital_raised"] = _money(row.capital_raised)
+            if row.priced_shares:
+                summary["weighted_average_price"] = (
+                    _money(row.capital_raised) / Decimal(row.priced_shares)
+                ).quantize(PRICE_QUANTUM)
+
+    summary["by_month"].sort(key=lambda r: r["month"] or "")
+    summary["by_shareholder"].sort(key=lambda r: r["capital_raised"], reverse=True)
+    return summary
+
+def get_capital_analytics(
+    db: Session,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    company_id: Optional[str] = None
+):
+    """Cached per company cap-table version; recomputed after any issuance or shareholder change in that company"""
+    key = ("capital", start_date, end_date)
+    cached = _analytics_cache.get(key, company_id)
+    if cached is not None:
+        return cached
+    version = get_cap_table_version(company_id)
+    # A burst of cache misses after a write runs the aggregate once
+    result = coalesce(
+        "analytics.capital", (start_date, end_date),
+        lambda: compute_capital_analytics(db, start_date, end_date, company_id),
+        company_id=company_id
+    )
+    _analytics_cache.set(key, result, version, company_id)
+    return result
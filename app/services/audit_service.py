@@ -0,0 +1,34 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.core.audit import audit_log
+from app.models.audit_model import AuditEvent
+
+def query_audit_events(
+    db: Session,
+    company_id: str,
+    action: Optional[str] = None,
+    actor_id: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    skip: int = 0,
+    limit: int = 100
+):
+    """A company's audit events, newest first. Pending events are flushed first so the trail includes them."""
+    audit_log.flush()
+    query = db.query(AuditEvent).filter(AuditEvent.company_id == company_id)
+    if actor_id is not None:
+        query = query.filter(AuditEvent.actor_id == actor_id)
+    if entity_type is not None:
+        query = query.filter(AuditEvent.entity_type == entity_type)
+    if entity_id is not None:
+        query = query.filter(AuditEvent.entity_id == entity_id)
+    if action is not None:
+        query = query.filter(AuditEvent.action == action)
+    if since is not None:
+        query = query.filter(AuditEvent.created_at >= since)
+    if until is not None:
+        query = query.filter(AuditEvent.created_at < until)
+    return query.order_by(AuditEvent.created_at.desc(), AuditEvent.id.desc()).offset(skip).limit(limit).all()
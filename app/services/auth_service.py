@@ -1,18 +1,12 @@
-from datetime import datetime, timedelta
+import time
+from datetime import datetime, timedelta, timezone
 from jose import jwt
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
-from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES
+from app.core.config import SECRET_KEY, ALGORITHM, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_MINUTES, settings
 from app.models.user_model import User
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
-# Password utilities
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
-
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
+from app.core.passwords import invite_expires_at, invite_matches, password_hasher
+from app.core.security import get_password_hash, verify_password
+from app.db.session import commit_keep_loaded
 
 # Token utilities
 def create_access_token(data: dict, expires_delta: timedelta = None):
@@ -45,6 +39,31 @@ def authenticate_user(db: Session, email: str, password: str):
     user = get_user(db, email)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = password_hasher.verify_and_update(password, user.hashed_password)
+    if not valid:
         return False
-    return user
\ No newline at end of file
+    if new_hash is not None:
+        # Hashed with an older cost; replace it while the password is at hand
+        user.hashed_password = new_hash
+        commit_keep_loaded(db)
+    return user
+
+def _invite_expired(user: User) -> bool:
+    expires_at = invite_expires_at(user.hashed_password)
+    if expires_at is None:
+        # Invited before expiries were stored: counted from account creation
+        created_at = user.created_at or datetime.now(timezone.utc)
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        expires_at = created_at.timestamp() + settings.INVITE_TTL_HOURS * 3600
+    return time.time() >= expires_at
+
+def accept_invite(db: Session, token: str, password: str):
+    """Set the first password of an invited user; None if the token is unknown, used or expired"""
+    user_id, _, secret = token.partition(".")
+    user = db.get(User, user_id) if secret else None
+    if not user or not invite_matches(user.hashed_password, secret) or _invite_expired(user):
+        return None
+    user.hashed_password = get_password_hash(password)
+    commit_keep_loaded(db)
+    return user
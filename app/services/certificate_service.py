@@ -0,0 +1,154 @@
+import hashlib
+import json
+import logging
+import threading
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+from app.db.session import SessionLocal, commit_keep_loaded
+from app.models.certificate_artifact_model import CertificateArtifact
+from app.models.issuance_model import ShareIssuance
+from app.services.company_service import get_company_name
+from app.utils.artifact_store import get_artifact_store
+from app.utils.pdf_utils import generate_share_certificate, CERTIFICATE_TEMPLATE_VERSION
+
+logger = logging.getLogger(__name__)
+
+def certificate_data(issuance) -> dict:
+    return {
+        "id": issuance.id,
+        "number_of_shares": issuance.number_of_shares,
+        "price_per_share": issuance.price_per_share,
+        "issue_date": issuance.issue_date,
+        "company_name": get_company_name(issuance.company_id)
+    }
+
+def holder_data(shareholder) -> dict:
+    return {"id": shareholder.id, "full_name": shareholder.full_name}
+
+def inputs_digest(issuance, shareholder) -> str:
+    """Hash of the names printed on the certificate; the issuance itself does not change.
+    A stored certificate is stale once this changes."""
+    inputs = json.dumps([
+        issuance.id, issuance.number_of_shares, get_company_name(issuance.company_id), holder_data(shareholder)
+    ])
+    return hashlib.sha256(inputs.encode()).hexdigest()
+
+def render_certificate(issuance, shareholder) -> bytes:
+    return generate_share_certificate(certificate_data(issuance), holder_data(shareholder)).read()
+
+def store_certificate(issuance, shareholder, pdf_bytes: bytes = None) -> CertificateArtifact:
+    """Render (unless already rendered), store by content hash and record it against the issuance"""
+    data = pdf_bytes if pdf_bytes is not None else render_certificate(issuance, shareholder)
+    digest = get_artifact_store().put(data)
+
+    db = SessionLocal()
+    try:
+        for attempt in range(2):
+            try:
+                previous = db.get(CertificateArtifact, issuance.id)
+                replaced = previous.digest if previous is not None else None
+                artifact = db.merge(CertificateArtifact(
+                    issuance_id=issuance.id,
+                    digest=digest,
+                    size=len(data),
+                    template_version=CERTIFICATE_TEMPLATE_VERSION,
+                    inputs_digest=inputs_digest(issuance, shareholder)
+                ))
+                commit_keep_loaded(db)
+                if replaced is not None and replaced != digest:
+                    delete_unreferenced_artifacts(db, [replaced])
+                return artifact
+            except IntegrityError:
+                # A concurrent first render inserted the row; update it instead
+                db.rollback()
+                if attempt:
+                    raise
+    finally:
+        db.close()
+
+def delete_unreferenced_artifacts(db: Session, digests) -> None:
+    """Remove stored certificates (and any legacy compressed copies) no artifact row points at any more.
+
+    Renders are deterministic and carry the issuance id, so a digest is
+    only ever shared by renders of the same certificate.
+    """
+    digests = set(digests)
+    if not digests:
+        return
+    referenced = {
+        row.digest for row in db.query(CertificateArtifact.digest).filter(CertificateArtifact.digest.in_(digests))
+    }
+    store = get_artifact_store()
+    for digest in digests - referenced:
+        try:
+            store.delete_with_variants(digest)
+        except Exception:
+            logger.warning("Failed to delete unreferenced certificate %s", digest, exc_info=True)
+
+def get_certificate(db: Session, issuance, shareholder) -> CertificateArtifact:
+    """Stored certificate for an issuance, rendered on first use, after a template change
+    or when what it shows (such as the holder's or company's name) has changed"""
+    artifact = db.get(CertificateArtifact, issuance.id)
+    if (
+        artifact is not None
+        and artifact.template_version == CERTIFICATE_TEMPLATE_VERSION
+        and artifact.inputs_digest == inputs_digest(issuance, shareholder)
+        and get_artifact_store().exists(artifact.digest)
+    ):
+        return artifact
+    return store_certificate(issuance, shareholder)
+
+def _stale_certificates(db: Session):
+    return db.query(CertificateArtifact.issuance_id).filter(
+        CertificateArtifact.template_version != CERTIFICATE_TEMPLATE_VERSION
+    )
+
+def rerender_stale_certificates(batch_size: int = 100) -> int:
+    """Re-render certificates stored with an older template version; returns how many were rendered"""
+    db = SessionLocal()
+    rendered, failed = 0, set()
+    try:
+        while True:
+            query = _stale_certificates(db)
+            if failed:
+                query = query.filter(CertificateArtifact.issuance_id.notin_(failed))
+            ids = [row.issuance_id for row in query.limit(batch_size).all()]
+            if not ids:
+                return rendered
+
+            issuances = db.query(ShareIssuance).options(joinedload(ShareIssuance.shareholder)).filter(
+                ShareIssuance.id.in_(ids)
+            ).all()
+            for issuance in issuances:
+                try:
+                    artifact = store_certificate(issuance, issuance.shareholder)
+                    # Compressed copies from template version 2 and before are no longer served
+                    get_artifact_store().delete_variants(artifact.digest)
+                    rendered += 1
+                except Exception:
+                    logger.exception("Failed to re-render certificate for issuance %s", issuance.id)
+                    failed.add(issuance.id)
+
+            # Artifacts whose issuance no longer exists
+            orphaned = set(ids) - {issuance.id for issuance in issuances}
+            if orphaned:
+                orphans = db.query(CertificateArtifact).filter(CertificateArtifact.issuance_id.in_(orphaned))
+                digests = [row.digest for row in orphans.with_entities(CertificateArtifact.digest)]
+                orphans.delete(synchronize_session=False)
+                db.commit()
+                delete_unreferenced_artifacts(db, digests)
+            db.expire_all()
+    finally:
+        db.close()
+
+def start_certificate_rerender() -> bool:
+    """Re-render in a background thread if any certificate predates the current template"""
+    db = SessionLocal()
+    try:
+        stale = _stale_certificates(db).first() is not None
+    finally:
+        db.close()
+    if stale:
+        logger.info("Certificate template is now version %s; re-rendering stored certificates", CERTIFICATE_TEMPLATE_VERSION)
+        threading.Thread(target=rerender_stale_certificates, name="certificate-rerender", daemon=True).start()
+    return stale
@@ -0,0 +1,59 @@
+import threading
+from typing import Dict, Optional
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.company_model import Company, DEFAULT_COMPANY_ID
+
+_names: Dict[str, str] = {}
+_names_lock = threading.Lock()
+
+def tenant_filter(column, company_id: Optional[str]) -> list:
+    """Conditions scoping `column` to one company; none for cross-company jobs (company_id None)"""
+    return [] if company_id is None else [column == company_id]
+
+def ensure_default_company(db: Session) -> Company:
+    company = db.get(Company, DEFAULT_COMPANY_ID)
+    if company is None:
+        company = Company(id=DEFAULT_COMPANY_ID, name=settings.COMPANY_NAME)
+        db.add(company)
+        db.commit()
+    return company
+
+def create_company(db: Session, name: str) -> Company:
+    company = Company(name=name)
+    db.add(company)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Company already exists"
+        )
+    db.refresh(company)
+    return company
+
+def get_company(db: Session, company_id: str) -> Company:
+    company = db.get(Company, company_id)
+    if company is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Company not found")
+    return company
+
+def get_company_name(company_id: Optional[str]) -> str:
+    """Display name for certificates and emails, cached per process"""
+    if company_id is None:
+        return settings.COMPANY_NAME
+    name = _names.get(company_id)
+    if name is None:
+        db = SessionLocal()
+        try:
+            company = db.get(Company, company_id)
+        finally:
+            db.close()
+        name = company.name if company is not None else settings.COMPANY_NAME
+        with _names_lock:
+            _names[company_id] = name
+    return name
@@ -0,0 +1,264 @@
+import asyncio
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.idempotency_model import IdempotencyKey
+
+@dataclass
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    headers: Dict[str, str]
+    body: bytes
+
+# Hot cache of completed responses so replays skip the database
+_cache_lock = threading.Lock()
+_cache: Dict[Tuple[str, str], Tuple[float, StoredResponse]] = {}
+_CACHE_MAX_ENTRIES = 10000
+
+# Keys currently being processed by this worker, with the duplicates waiting
+# for them: (event loop, future) pairs, woken from whichever thread finishes
+_inflight_lock = threading.Lock()
+_inflight: Dict[Tuple[str, str], List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]] = {}
+
+def _cache_get(cache_key) -> Optional[StoredResponse]:
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del _cache[cache_key]
+            return None
+        return entry[1]
+
+def _cache_put(cache_key, stored: StoredResponse):
+    with _cache_lock:
+        if len(_cache) >= _CACHE_MAX_ENTRIES:
+            now = time.monotonic()
+            for k in [k for k, (expires, _) in _cache.items() if expires < now] or [next(iter(_cache))]:
+                del _cache[k]
+        _cache[cache_key] = (time.monotonic() + settings.IDEMPOTENCY_CACHE_SECONDS, stored)
+
+def _wake(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+def _release(cache_key):
+    with _inflight_lock:
+        waiters = _inflight.pop(cache_key, None) or []
+    for loop, future in waiters:
+        try:
+            loop.call_soon_threadsafe(_wake, future)
+        except RuntimeError:
+            # Loop already closed; its waiter is gone
+            pass
+
+def _checked(stored: StoredResponse, request_hash: str) -> StoredResponse:
+    if stored.request_hash != request_hash:
+        raise HTTPException(
+            status_code=422,
+            detail="Idempotency-Key was already used with a different request"
+        )
+    return stored
+
+def _still_running():
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed"
+    )
+
+def _is_expired(row: IdempotencyKey) -> bool:
+    created_at = row.created_at
+    if created_at is None:
+        return False
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at < datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+
+def _lease_end() -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS)
+
+def _to_stored(row: IdempotencyKey) -> StoredResponse:
+    return StoredResponse(
+        request_hash=row.request_hash,
+        status_code=row.response_status,
+        headers=json.loads(row.response_headers or "{}"),
+        body=row.response_body or b""
+    )
+
+# _try_claim outcomes besides a stored response
+_CLAIMED = "claimed"
+_RETRY = "retry"
+_BUSY = "busy"
+
+def _try_claim(scope: str, key: str, request_hash: str):
+    """One attempt at inserting the in-progress row; blocking, run in the threadpool"""
+    db = SessionLocal()
+    try:
+        db.add(IdempotencyKey(
+            scope=scope, key=key, request_hash=request_hash, status="in_progress", lease_expires_at=_lease_end()
+        ))
+        db.commit()
+        return _CLAIMED
+    except IntegrityError:
+        db.rollback()
+        row = db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        ).first()
+        if row is None:
+            # The first request failed and released the key in between
+            return _RETRY
+        if _is_expired(row):
+            db.delete(row)
+            db.commit()
+            return _RETRY
+        if row.status == "in_progress":
+            # The owner renews its lease while it runs; one that lapsed
+            # belongs to a worker that died, and the key is free again
+            reclaimed = db.query(IdempotencyKey).filter(
+                IdempotencyKey.id == row.id,
+                IdempotencyKey.status == "in_progress",
+                or_(IdempotencyKey.lease_expires_at.is_(None), IdempotencyKey.lease_expires_at < datetime.now(timezone.utc))
+            ).delete(synchronize_session=False)
+            db.commit()
+            if reclaimed:
+                return _RETRY
+        _checked(_to_stored(row), request_hash)
+        if row.status == "completed":
+            stored = _to_stored(row)
+            _cache_put((scope, key), stored)
+            return stored
+        return _BUSY
+    finally:
+        db.close()
+
+async def _claim_or_wait(scope: str, key: str, request_hash: str, deadline: float) -> Optional[StoredResponse]:
+    """Insert the in-progress row, or wait for whoever inserted it first (possibly another worker)"""
+    poll_interval = 0.05
+    while True:
+        outcome = await run_in_threadpool(_try_claim, scope, key, request_hash)
+        if outcome is _CLAIMED:
+            return None
+        if outcome is _RETRY:
+            continue
+        if outcome is not _BUSY:
+            return outcome
+        if time.monotonic() >= deadline:
+            raise _still_running()
+        await asyncio.sleep(poll_interval)
+        poll_interval = min(poll_interval * 2, 0.5)
+
+async def begin_request(scope: str, key: str, request_hash: str) -> Optional[StoredResponse]:
+    """Return the stored response for a replay, or None if the caller now owns the key.
+
+    Duplicates wait on the event loop rather than in a threadpool thread.
+    An owner must renew_lease while it runs and finish with complete_request
+    or abort_request.
+    """
+    cache_key = (scope, key)
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    loop = asyncio.get_running_loop()
+    while True:
+        stored = _cache_get(cache_key)
+        if stored is not None:
+            return _checked(stored, request_hash)
+
+        future = None
+        with _inflight_lock:
+            waiters = _inflight.get(cache_key)
+            if waiters is None:
+                _inflight[cache_key] = []
+            else:
+                future = loop.create_future()
+                waiters.append((loop, future))
+        if future is not None:
+            # Same key already running in this worker: wait for it instead of racing
+            try:
+                await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise _still_running()
+            continue
+
+        try:
+            stored = await _claim_or_wait(scope, key, request_hash, deadline)
+        except BaseException:
+            _release(cache_key)
+            raise
+        if stored is None:
+            return None
+        _release(cache_key)
+        return _checked(stored, request_hash)
+
+def renew_lease(scope: str, key: str):
+    """Extend an owned key's lease; the owner calls this while it runs"""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == "in_progress"
+        ).update({"lease_expires_at": _lease_end()}, synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+def complete_request(scope: str, key: str, status_code: int, headers: Dict[str, str], body: bytes):
+    """Persist the response of an owned key and wake up waiting duplicates"""
+    cache_key = (scope, key)
+    db = SessionLocal()
+    try:
+        row = db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key
+        ).first()
+        if row is not None:
+            row.status = "completed"
+            row.response_status = status_code
+            row.response_headers = json.dumps(headers)
+            row.response_body = bytes(body)
+            row.completed_at = datetime.now(timezone.utc)
+            row.lease_expires_at = None
+            db.commit()
+            _cache_put(cache_key, StoredResponse(row.request_hash, status_code, headers, bytes(body)))
+    finally:
+        db.close()
+        _release(cache_key)
+
+def abort_request(scope: str, key: str):
+    """Release an owned key without storing a response so a retry can run again"""
+    db = SessionLocal()
+    try:
+        db.query(IdempotencyKey).filter(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status == "in_progress"
+        ).delete()
+        db.commit()
+    finally:
+        db.close()
+        _release((scope, key))
+
+def purge_expired_keys():
+    """Delete keys older than the retention window"""
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    db = SessionLocal()
+    try:
+        deleted = db.query(IdempotencyKey).filter(IdempotencyKey.created_at < cutoff).delete()
+        db.commit()
+        return deleted
+    finally:
+        db.close()
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
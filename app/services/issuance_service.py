@@ -1,41 +1,123 @@
+import uuid
 from typing import Optional
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, load_only, noload, selectinload
 from app.models.issuance_model import ShareIssuance
-from app.models.user_model import User
+from app.models.ledger_model import ShareBalance
+from app.models.user_model import User, UserRole
 from app.schemas.issuance_schema import ShareIssuanceCreate
+from app.db.session import commit_keep_loaded
+from app.core.cache import ISSUANCES_CHANGED, bump_cap_table_version
+from app.core.single_flight import coalesce
+from app.core.events import publish_event, ISSUANCE_CREATED, DISTRIBUTION_CHANGED
+from app.services.company_service import tenant_filter
+from app.services.ledger_service import record_issuance
 from fastapi import HTTPException, status
 
-def create_issuance(db: Session, issuance: ShareIssuanceCreate):
-    db_issuance = ShareIssuance(**issuance.model_dump())
+def certificate_url(issuance_id: str) -> str:
+    return f"/api/v1/issuances/{issuance_id}/certificate"
+
+def create_issuance(db: Session, issuance: ShareIssuanceCreate, company_id: Optional[str] = None, actor_id: Optional[str] = None):
+    """Insert an issuance in one transaction: existence check, INSERT ... RETURNING, ledger entry, commit"""
+    shareholder = db.query(User).filter(
+        User.id == issuance.shareholder_id,
+        *tenant_filter(User.company_id, company_id)
+    ).first()
+    if not shareholder:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Shareholder not found"
+        )
+    
+    issuance_id = str(uuid.uuid4())
+    db_issuance = ShareIssuance(
+        id=issuance_id,
+        certificate_url=certificate_url(issuance_id),
+        company_id=shareholder.company_id,
+        **issuance.model_dump()
+    )
+    db_issuance.shareholder = shareholder
     db.add(db_issuance)
-    db.commit()
-    db.refresh(db_issuance)
+    db.flush()
+    # The ledger entry and the holder's balance commit with the issuance
+    record_issuance(db, db_issuance, actor_id)
+    commit_keep_loaded(db)
+    version = bump_cap_table_version(db_issuance.company_id, ISSUANCES_CHANGED)
+    publish_event(ISSUANCE_CREATED, {
+        "id": db_issuance.id,
+        "shareholder_id": db_issuance.shareholder_id,
+        "number_of_shares": db_issuance.number_of_shares,
+        "price_per_share": db_issuance.price_per_share,
+        "issue_date": db_issuance.issue_date
+    }, shareholder_id=db_issuance.shareholder_id, company_id=db_issuance.company_id)
+    publish_event(DISTRIBUTION_CHANGED, {"cap_table_version": version}, company_id=db_issuance.company_id)
     return db_issuance
 
-def get_issuances(db: Session, skip: int = 0, limit: int = 100, shareholder_id: Optional[str] = None):
+ISSUANCE_COLUMN_FIELDS = ("number_of_shares", "price_per_share", "issue_date", "certificate_url")
+ISSUANCE_FIELDS = ("id", "shareholder_id", *ISSUANCE_COLUMN_FIELDS, "shareholder")
+ISSUANCE_INCLUDES = ("shareholder",)
+
+def get_issuances(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    shareholder_id: Optional[str] = None,
+    fields=None,
+    include_shareholder: bool = False,
+    company_id: Optional[str] = None
+):
+    columns = [ShareIssuance.id, ShareIssuance.shareholder_id] + [
+        getattr(ShareIssuance, name) for name in ISSUANCE_COLUMN_FIELDS
+        if fields is None or name in fields
+    ]
+    if include_shareholder:
+        relation = selectinload(ShareIssuance.shareholder).load_only(
+            User.id, User.email, User.full_name, User.role,
+            User.is_active, User.is_disabled, User.created_at, User.updated_at
+        )
+    else:
+        # Serialised as null instead of a lazy load per row
+        relation = noload(ShareIssuance.shareholder)
     query = db.query(ShareIssuance)
+    if company_id is not None:
+        query = query.filter(ShareIssuance.company_id == company_id)
     if shareholder_id:
         query = query.filter(ShareIssuance.shareholder_id == shareholder_id)
-    return query.offset(skip).limit(limit).all()
+    return query.options(load_only(*columns), relation).offset(skip).limit(limit).all()
+
+def get_issuance_by_id(db: Session, issuance_id: str, company_id: Optional[str] = None):
+    return db.query(ShareIssuance).filter(
+        ShareIssuance.id == issuance_id,
+        *tenant_filter(ShareIssuance.company_id, company_id)
+    ).first()
 
-def get_issuance_by_id(db: Session, issuance_id: str):
-    return db.query(ShareIssuance).filter(ShareIssuance.id == issuance_id).first()
+def get_ownership_distribution(db: Session, role: UserRole = UserRole.ADMIN, company_id: Optional[str] = None):
+    """Concurrent identical requests for the same company share one computation"""
+    return coalesce(
+        "issuances.distribution", (role,),
+        lambda: compute_ownership_distribution(db, company_id),
+        company_id=company_id
+    )
 
-def get_ownership_distribution(db: Session):
-    from sqlalchemy import func
-    result = db.query(
-        ShareIssuance.shareholder_id,
-        func.sum(ShareIssuance.number_of_shares).label('total_shares')
-    ).group_by(ShareIssuance.shareholder_id).all()
+def compute_ownership_distribution(db: Session, company_id: Optional[str] = None):
+    """Current holdings from the ledger balances, so transfers and cancellations count"""
+    query = db.query(
+        ShareBalance.holder_id.label('shareholder_id'),
+        ShareBalance.balance.label('total_shares'),
+        User.full_name
+    ).outerjoin(User, User.id == ShareBalance.holder_id)
+    # Totals and percentages are per company
+    result = query.filter(
+        *tenant_filter(ShareBalance.company_id, company_id),
+        ShareBalance.balance != 0
+    ).order_by(ShareBalance.holder_id).all()
     
     total_company_shares = sum([r.total_shares for r in result]) or 1
     
     distribution = []
     for r in result:
-        user = db.query(User).filter(User.id == r.shareholder_id).first()
         distribution.append({
             "shareholder_id": r.shareholder_id,
-            "shareholder_name": user.full_name if user else "Unknown",
+            "shareholder_name": r.full_name or "Unknown",
             "total_shares": r.total_shares,
             "percentage": (r.total_shares / total_company_shares) * 100
         })
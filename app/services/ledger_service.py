@@ -0,0 +1,292 @@
+"""Share transaction ledger with balances maintained alongside it.
+
+Every posting appends one ShareTransaction and moves the balances of the
+holders it touches in the same database transaction. When a posting
+takes shares off a holder, the balance rows are locked (SELECT ... FOR
+UPDATE) in holder id order before they are checked, so concurrent
+postings touching the same holders queue up instead of overdrawing them
+or deadlocking, and the updates themselves are relative (balance =
+balance + delta). SQLite has no row locks; there the insert of missing
+balance rows that precedes the read already takes the database write
+lock. A posting that only adds shares (an issue) cannot overdraw, and is
+a single atomic upsert.
+
+Reading a balance is a primary key lookup; check_ledger recomputes every
+balance from the ledger.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.core.cache import ISSUANCES_CHANGED, bump_cap_table_version, get_cap_table_version
+from app.core.events import publish_event, DISTRIBUTION_CHANGED, HOLDINGS_CHANGED
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import (
+    ShareBalance,
+    ShareTransaction,
+    TRANSACTION_ISSUE,
+    TRANSACTION_TRANSFER
+)
+from app.models.user_model import User
+from app.services.company_service import tenant_filter
+
+def _deltas(kind: str, from_holder_id: Optional[str], to_holder_id: Optional[str], shares: int) -> Dict[str, int]:
+    """Balance change per holder for a valid posting"""
+    deltas = {}
+    if from_holder_id is not None:
+        deltas[from_holder_id] = -shares
+    if to_holder_id is not None:
+        deltas[to_holder_id] = deltas.get(to_holder_id, 0) + shares
+    return deltas
+
+def _validate(kind: str, from_holder_id: Optional[str], to_holder_id: Optional[str], shares: int) -> None:
+    def bad_request(detail):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+    if shares <= 0:
+        bad_request("Number of shares must be positive")
+    if kind == TRANSACTION_ISSUE:
+        if to_holder_id is None or from_holder_id is not None:
+            bad_request("An issue credits to_holder_id only")
+    elif kind == TRANSACTION_TRANSFER:
+        if from_holder_id is None or to_holder_id is None:
+            bad_request("A transfer needs from_holder_id and to_holder_id")
+        if from_holder_id == to_holder_id:
+            bad_request("Cannot transfer shares to the same holder")
+    elif from_holder_id is None or to_holder_id is not None:
+        bad_request(f"A {kind} debits from_holder_id only")
+
+def _dialect_insert(db: Session):
+    return postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+
+def _ensure_balances(db: Session, company_id: str, holder_ids: Iterable[str]) -> None:
+    """Create missing balance rows at zero, so there is always a row to lock"""
+    db.execute(
+        _dialect_insert(db)(ShareBalance)
+        .values([{"holder_id": holder_id, "company_id": company_id, "balance": 0} for holder_id in holder_ids])
+        .on_conflict_do_nothing(index_elements=["holder_id"])
+    )
+
+def _lock_balances(db: Session, holder_ids: Iterable[str]) -> Dict[str, int]:
+    """Current balances, with the rows locked until commit; always in the same order"""
+    rows = db.execute(
+        select(ShareBalance.holder_id, ShareBalance.balance)
+        .where(ShareBalance.holder_id.in_(sorted(holder_ids)))
+        .order_by(ShareBalance.holder_id)
+        .with_for_update()
+    ).all()
+    return {row.holder_id: row.balance for row in rows}
+
+def _credit(db: Session, company_id: str, holder_id: str, shares: int, transaction_id: str) -> None:
+    """Add to one balance in a single upsert; a credit cannot overdraw, so nothing is read first"""
+    insert = _dialect_insert(db)(ShareBalance).values(
+        holder_id=holder_id, company_id=company_id, balance=shares, last_transaction_id=transaction_id
+    )
+    db.execute(insert.on_conflict_do_update(
+        index_elements=["holder_id"],
+        set_={
+            "balance": ShareBalance.balance + insert.excluded.balance,
+            "last_transaction_id": insert.excluded.last_transaction_id,
+            "updated_at": func.now()
+        }
+    ))
+
+def _append(db: Session, company_id: str, deltas: Dict[str, int], **fields) -> ShareTransaction:
+    """Write the ledger entry and its balance changes, without committing"""
+    debits = any(delta < 0 for delta in deltas.values())
+    if debits:
+        _ensure_balances(db, company_id, deltas)
+        balances = _lock_balances(db, deltas)
+        for holder_id, delta in deltas.items():
+            if balances[holder_id] + delta < 0:
+                db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Insufficient shares: holder has {balances[holder_id]}, needs {-delta}"
+                )
+
+    transaction = ShareTransaction(company_id=company_id, **fields)
+    db.add(transaction)
+    db.flush()
+    for holder_id, delta in deltas.items():
+        if not debits:
+            _credit(db, company_id, holder_id, delta, transaction.id)
+            continue
+        db.execute(
+            update(ShareBalance)
+            .where(ShareBalance.holder_id == holder_id)
+            .values(balance=ShareBalance.balance + delta, last_transaction_id=transaction.id, updated_at=func.now())
+        )
+    return transaction
+
+def post_transaction(
+    db: Session,
+    kind: str,
+    number_of_shares: int,
+    company_id: Optional[str] = None,
+    from_holder_id: Optional[str] = None,
+    to_holder_id: Optional[str] = None,
+    price_per_share=None,
+    actor_id: Optional[str] = None,
+    note: Optional[str] = None
+) -> ShareTransaction:
+    """Append a ledger entry, apply it to the balances and commit"""
+    _validate(kind, from_holder_id, to_holder_id, number_of_shares)
+    deltas = _deltas(kind, from_holder_id, to_holder_id, number_of_shares)
+    holders = db.execute(
+        select(User.id, User.company_id).where(User.id.in_(deltas), *tenant_filter(User.company_id, company_id))
+    ).all()
+    companies = {holder.company_id for holder in holders}
+    if len(holders) != len(deltas) or len(companies) != 1:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Shareholder not found")
+    company_id = companies.pop()
+
+    transaction = _append(
+        db, company_id, deltas,
+        kind=kind,
+        from_holder_id=from_holder_id,
+        to_holder_id=to_holder_id,
+        number_of_shares=number_of_shares,
+        price_per_share=price_per_share,
+        actor_id=actor_id,
+        note=note
+    )
+    db.commit()
+    db.refresh(transaction)
+    version = bump_cap_table_version(company_id, ISSUANCES_CHANGED)
+    publish_holdings_changed(db, company_id, list(deltas), version, kind=kind, transaction_id=transaction.id)
+    return transaction
+
+def publish_holdings_changed(db: Session, company_id: str, holder_ids: List[str], version: int, **data) -> None:
+    """Notify each holder and their company's admins of new balances, then the distribution change"""
+    balances = dict(db.execute(
+        select(ShareBalance.holder_id, ShareBalance.balance).where(ShareBalance.holder_id.in_(holder_ids))
+    ).all())
+    for holder_id in sorted(holder_ids):
+        publish_event(HOLDINGS_CHANGED, {
+            "shareholder_id": holder_id,
+            "balance": balances.get(holder_id, 0),
+            **data
+        }, shareholder_id=holder_id, company_id=company_id)
+    publish_event(DISTRIBUTION_CHANGED, {"cap_table_version": version}, company_id=company_id)
+
+def record_issuance(db: Session, issuance: ShareIssuance, actor_id: Optional[str] = None) -> ShareTransaction:
+    """The issue entry for a new issuance; the caller has checked the holder and commits both together"""
+    return _append(
+        db, issuance.company_id, {issuance.shareholder_id: issuance.number_of_shares},
+        kind=TRANSACTION_ISSUE,
+        to_holder_id=issuance.shareholder_id,
+        number_of_shares=issuance.number_of_shares,
+        price_per_share=issuance.price_per_share,
+        issuance_id=issuance.id,
+        actor_id=actor_id
+    )
+
+def get_balance(db: Session, holder_id: str, company_id: Optional[str] = None) -> int:
+    """A holder's shares now: one primary key lookup"""
+    balance = db.execute(
+        select(ShareBalance.balance).where(
+            ShareBalance.holder_id == holder_id,
+            *tenant_filter(ShareBalance.company_id, company_id)
+        )
+    ).scalar()
+    return balance or 0
+
+def get_holdings(db: Session, company_id: Optional[str] = None) -> Dict[str, int]:
+    """Every holder's shares now, by holder id; holders without shares are left out"""
+    return dict(db.execute(
+        select(ShareBalance.holder_id, ShareBalance.balance).where(
+            *tenant_filter(ShareBalance.company_id, company_id),
+            ShareBalance.balance != 0
+        )
+    ).all())
+
+def get_balances(db: Session, company_id: Optional[str] = None, skip: int = 0, limit: int = 100):
+    """Holders with shares, largest first"""
+    return db.execute(
+        select(ShareBalance.holder_id, ShareBalance.balance, ShareBalance.updated_at).where(
+            *tenant_filter(ShareBalance.company_id, company_id),
+            ShareBalance.balance != 0
+        ).order_by(ShareBalance.balance.desc(), ShareBalance.holder_id).offset(skip).limit(limit)
+    ).all()
+
+def get_transactions(
+    db: Session,
+    company_id: Optional[str] = None,
+    holder_id: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[ShareTransaction]:
+    """Ledger entries, newest first; with holder_id only those debiting or crediting that holder"""
+    query = select(ShareTransaction).where(*tenant_filter(ShareTransaction.company_id, company_id))
+    if holder_id is not None:
+        query = query.where((ShareTransaction.from_holder_id == holder_id) | (ShareTransaction.to_holder_id == holder_id))
+    return db.execute(
+        query.order_by(ShareTransaction.created_at.desc(), ShareTransaction.id).offset(skip).limit(limit)
+    ).scalars().all()
+
+def _ledger_balances(db: Session, company_id: Optional[str] = None) -> Dict[str, int]:
+    """Every holder's balance summed from the ledger"""
+    expected: Dict[str, int] = {}
+    for column, sign in ((ShareTransaction.to_holder_id, 1), (ShareTransaction.from_holder_id, -1)):
+        rows = db.execute(
+            select(column, func.sum(ShareTransaction.number_of_shares))
+            .where(*tenant_filter(ShareTransaction.company_id, company_id), column.isnot(None))
+            .group_by(column)
+        ).all()
+        for holder_id, shares in rows:
+            expected[holder_id] = expected.get(holder_id, 0) + sign * int(shares)
+    return expected
+
+def check_ledger(db: Session, company_id: Optional[str] = None, repair: bool = False) -> Dict[str, Any]:
+    """Recompute every balance from the ledger and list the ones that differ.
+
+    With repair, the differing balances are set to the ledger's figure
+    (under the same row locks postings take) and committed.
+    """
+    expected = _ledger_balances(db, company_id)
+    stored = dict(db.execute(
+        select(ShareBalance.holder_id, ShareBalance.balance).where(*tenant_filter(ShareBalance.company_id, company_id))
+    ).all())
+    mismatches = [
+        {"holder_id": holder_id, "balance": stored.get(holder_id), "ledger": expected.get(holder_id, 0)}
+        for holder_id in sorted(set(expected) | set(stored))
+        if stored.get(holder_id, 0) != expected.get(holder_id, 0)
+    ]
+    repaired = 0
+    if repair and mismatches:
+        # Balances may have moved since they were read; recompute under the locks
+        holders = db.execute(
+            select(User.id, User.company_id).where(User.id.in_([m["holder_id"] for m in mismatches]))
+        ).all()
+        for holder_company, holder_ids in _group_by_company(holders).items():
+            _ensure_balances(db, holder_company, holder_ids)
+        _lock_balances(db, [m["holder_id"] for m in mismatches])
+        expected = _ledger_balances(db, company_id)
+        for mismatch in mismatches:
+            repaired += db.execute(
+                update(ShareBalance)
+                .where(ShareBalance.holder_id == mismatch["holder_id"])
+                .values(balance=expected.get(mismatch["holder_id"], 0), updated_at=func.now())
+            ).rowcount
+        db.commit()
+        version = bump_cap_table_version(company_id, ISSUANCES_CHANGED)
+        for holder_company, holder_ids in _group_by_company(holders).items():
+            publish_holdings_changed(
+                db, holder_company, holder_ids,
+                version if company_id is not None else get_cap_table_version(holder_company),
+                kind="repair"
+            )
+    return {
+        "holders": len(set(expected) | set(stored)),
+        "consistent": not mismatches,
+        "mismatches": mismatches,
+        "repaired": repaired
+    }
+
+def _group_by_company(holders) -> Dict[str, List[str]]:
+    groups: Dict[str, List[str]] = {}
+    for holder_id, company_id in holders:
+        groups.setdefault(company_id, []).append(holder_id)
+    return groups
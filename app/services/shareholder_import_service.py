@@ -0,0 +1,288 @@
+"""Bulk shareholder onboarding from CSV or NDJSON uploads.
+
+Rows are handled in chunks of BULK_IMPORT_CHUNK_SIZE: one set-based query
+finds the chunk's emails that are already registered, the passwords are
+hashed across a process pool, and the users and profiles go in as two
+multi-row INSERTs committed together. A row that fails is reported with
+its line number and does not stop the rest; nor does a chunk the database
+rejects, whose rows are reported as failed. Each committed chunk moves
+the cap-table version and is announced on the event stream. Rows without
+a password get an invite token instead, redeemed through /invites/accept
+before INVITE_TTL_HOURS pass.
+
+The hashing processes are started on the first upload that needs them and
+shared by every upload after it.
+"""
+import csv
+import io
+import json
+import logging
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from fastapi import HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.cache import SHAREHOLDERS_CHANGED, bump_cap_table_version
+from app.core.config import settings
+from app.core.events import publish_event, SHAREHOLDER_UPDATED
+from app.core.passwords import new_invite, password_hasher
+from app.core.tracing import span
+from app.models.company_model import DEFAULT_COMPANY_ID
+from app.models.shareholder_model import ShareholderProfile
+from app.models.user_model import User, UserRole
+from app.schemas.shareholder_schema import ShareholderImportRow
+from app.services.shareholder_search_service import invalidate_search_index
+
+logger = logging.getLogger(__name__)
+
+# Upload content types and the parser for each
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+}
+IMPORT_COLUMNS = tuple(ShareholderImportRow.model_fields)
+
+# (line number, fields, parse error)
+ParsedRow = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+def parse_rows(text: str, fmt: str) -> List[ParsedRow]:
+    """Every non-blank row of the upload; malformed rows carry an error instead of fields"""
+    rows = _parse_csv(text) if fmt == "csv" else _parse_ndjson(text)
+    if len(rows) > settings.BULK_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"At most {settings.BULK_IMPORT_MAX_ROWS} rows per upload"
+        )
+    return rows
+
+def _parse_csv(text: str) -> List[ParsedRow]:
+    reader = csv.DictReader(io.StringIO(text))
+    header = [name.strip() for name in reader.fieldnames or []]
+    unknown = sorted(set(header) - set(IMPORT_COLUMNS))
+    if "email" not in header or unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"CSV header must include email and may only name: {', '.join(IMPORT_COLUMNS)}"
+            + (f" (unknown: {', '.join(unknown)})" if unknown else "")
+        )
+    reader.fieldnames = header
+    rows = []
+    line = reader.line_num + 1
+    try:
+        for record in reader:
+            # A quoted field may span lines; report the line the row starts on
+            start, line = line, reader.line_num + 1
+            if None in record:
+                rows.append((start, None, "More fields than the header has columns"))
+                continue
+            values = {name: (value or "").strip() or None for name, value in record.items()}
+            if any(values.values()):
+                rows.append((start, values, None))
+    except csv.Error as e:
+        rows.append((reader.line_num, None, f"Malformed CSV: {e}"))
+    return rows
+
+def _parse_ndjson(text: str) -> List[ParsedRow]:
+    rows = []
+    for line, raw in enumerate(text.splitlines(), 1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError as e:
+            rows.append((line, None, f"Invalid JSON: {e}"))
+            continue
+        if not isinstance(record, dict):
+            rows.append((line, None, "Expected a JSON object"))
+            continue
+        rows.append((line, record, None))
+    return rows
+
+def _validate(record: Dict[str, Any]) -> Tuple[Optional[ShareholderImportRow], Optional[str]]:
+    try:
+        return ShareholderImportRow.model_validate(record), None
+    except ValidationError as e:
+        return None, "; ".join(
+            f"{'.'.join(str(part) for part in error['loc']) or 'row'}: {error['msg']}"
+            for error in e.errors()
+        )
+
+def _failed(line: int, email: Optional[str], error: str) -> Dict[str, Any]:
+    return {"row": line, "email": email, "status": "failed", "error": error}
+
+def _chunks(rows: Iterable[ParsedRow], size: int) -> Iterator[List[ParsedRow]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _registered(db: Session, emails: List[str]) -> set:
+    """Which of `emails` already belong to an account, in one query"""
+    if not emails:
+        return set()
+    return set(db.execute(select(User.email).where(User.email.in_(emails))).scalars())
+
+def _insert_chunk(
+    db: Session,
+    rows: List[Tuple[int, ShareholderImportRow]],
+    company_id: str,
+    pool: Optional[ProcessPoolExecutor],
+    workers: int
+) -> List[Dict[str, Any]]:
+    taken = _registered(db, [row.email for _, row in rows])
+    results = [_failed(line, row.email, "Email already registered") for line, row in rows if row.email in taken]
+    rows = [(line, row) for line, row in rows if row.email not in taken]
+    hashes = iter(password_hasher.hash_many([row.password for _, row in rows if row.password], pool, workers))
+
+    users, profiles, created = [], [], []
+    for line, row in rows:
+        user_id = str(uuid.uuid4())
+        invite_token = None
+        if row.password:
+            hashed_password = next(hashes)
+        else:
+            secret, hashed_password = new_invite()
+            invite_token = f"{user_id}.{secret}"
+        users.append({
+            "id": user_id,
+            "company_id": company_id,
+            "email": row.email,
+            "hashed_password": hashed_password,
+            "full_name": row.full_name,
+            "role": UserRole.SHAREHOLDER,
+            "is_active": True
+        })
+        if row.address or row.phone:
+            profiles.append({"id": user_id, "address": row.address, "phone": row.phone})
+        created.append({"row": line, "email": row.email, "status": "created", "id": user_id, "invite_token": invite_token})
+
+    for attempt in range(2):
+        if not users:
+            break
+        try:
+            db.execute(insert(User), users)
+            if profiles:
+                db.execute(insert(ShareholderProfile), profiles)
+            db.commit()
+            break
+        except IntegrityError:
+            db.rollback()
+            # Another request registered some of these emails after the check
+            taken = _registered(db, [user["email"] for user in users])
+            if attempt or not taken:
+                raise
+            users = [user for user in users if user["email"] not in taken]
+            kept = {user["id"] for user in users}
+            profiles = [profile for profile in profiles if profile["id"] in kept]
+            results.extend(
+                _failed(result["row"], result["email"], "Email already registered")
+                for result in created if result["email"] in taken
+            )
+            created = [result for result in created if result["id"] in kept]
+    _announce(company_id, users)
+    return results + created
+
+def _announce(company_id: str, users: List[Dict[str, Any]]) -> None:
+    """Invalidate caches for a committed chunk and tell event stream subscribers, as single creates do"""
+    if not users:
+        return
+    bump_cap_table_version(company_id, SHAREHOLDERS_CHANGED)
+    for user in users:
+        publish_event(SHAREHOLDER_UPDATED, {
+            "id": user["id"],
+            "action": "created",
+            "email": user["email"],
+            "full_name": user["full_name"],
+            "is_active": user["is_active"],
+            "is_disabled": False
+        }, shareholder_id=user["id"], company_id=company_id)
+
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+def _get_hash_pool(workers: int) -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # spawn: forking a process that holds DB connections and threads is unsafe
+            _hash_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _hash_pool
+
+def shutdown_hash_pool() -> None:
+    global _hash_pool
+    with _hash_pool_lock:
+        pool, _hash_pool = _hash_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _discard_hash_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a pool whose processes died, so the next upload starts a new one"""
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is pool:
+            _hash_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+def import_shareholders(
+    db: Session,
+    rows: Iterable[ParsedRow],
+    company_id: Optional[str] = None,
+    workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """Create a shareholder per valid row, in the given company (the default company if None)"""
+    company_id = company_id or DEFAULT_COMPANY_ID
+    workers = settings.BULK_IMPORT_HASH_WORKERS if workers is None else workers
+    results = []
+    seen = {}
+    try:
+        for chunk in _chunks(rows, settings.BULK_IMPORT_CHUNK_SIZE):
+            valid = []
+            for line, record, error in chunk:
+                row = None
+                if error is None:
+                    row, error = _validate(record)
+                if error is None and row.email in seen:
+                    error = f"Duplicate of row {seen[row.email]}"
+                if error is not None:
+                    email = record.get("email") if isinstance(record, dict) else None
+                    results.append(_failed(line, email if isinstance(email, str) else None, error))
+                    continue
+                seen[row.email] = line
+                valid.append((line, row))
+
+            pool = None
+            if workers > 0 and sum(1 for _, row in valid if row.password) > 1:
+                pool = _get_hash_pool(workers)
+            try:
+                with span("shareholders.import_chunk", rows=len(valid)):
+                    results.extend(_insert_chunk(db, valid, company_id, pool, workers))
+            except Exception as e:
+                db.rollback()
+                if isinstance(e, BrokenProcessPool):
+                    _discard_hash_pool(pool)
+                logger.exception("Bulk import chunk of %d rows failed", len(valid))
+                results.extend(_failed(line, row.email, "Not saved: the chunk it was in failed") for line, row in valid)
+    finally:
+        # Chunks committed before a failure are kept; the search index must see them
+        if any(result["status"] == "created" for result in results):
+            invalidate_search_index(company_id)
+
+    results.sort(key=lambda result: result["row"])
+    created = [result for result in results if result["status"] == "created"]
+    return {
+        "created": len(created),
+        "invited": sum(1 for result in created if result["invite_token"]),
+        "failed": len(results) - len(created),
+        "rows": results
+    }
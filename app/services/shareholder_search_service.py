@@ -0,0 +1,152 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.orm import Session
+from app.core.cache import SHAREHOLDERS_CHANGED, on_remote_invalidation
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.services.company_service import tenant_filter
+from app.utils.search_index import ShareholderSearchIndex, normalize
+
+# Fallback indexes for databases without trigram indexes (SQLite, or
+# Postgres without the pg_trgm extension), one per company. Kept in
+# sync by the shareholder write paths, rebuilt when another worker reports
+# a shareholder write through the cache backend, and fully rebuilt
+# periodically in case one went unreported.
+class _CompanyIndex:
+    __slots__ = ("index", "lock", "built_at")
+
+    def __init__(self):
+        self.index = ShareholderSearchIndex()
+        self.lock = threading.Lock()
+        self.built_at = 0.0
+
+_indexes: Dict[Optional[str], _CompanyIndex] = {}
+_indexes_lock = threading.Lock()
+
+_trigram_support = {}
+
+logger = logging.getLogger(__name__)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _has_trigram(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind.url not in _trigram_support:
+        _trigram_support[bind.url] = db.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).first() is not None
+    return _trigram_support[bind.url]
+
+def _company_index(company_id: Optional[str]) -> _CompanyIndex:
+    entry = _indexes.get(company_id)
+    if entry is None:
+        with _indexes_lock:
+            entry = _indexes.setdefault(company_id, _CompanyIndex())
+    return entry
+
+def _search_postgres(db: Session, q: str, limit: int, company_id: Optional[str]):
+    """Served by the trigram (substring) and text_pattern_ops (prefix) indexes on lower(...)"""
+    name = func.lower(User.full_name)
+    email = func.lower(User.email)
+    prefix = _escape_like(q) + "%"
+    substring = "%" + prefix
+
+    rank = case(
+        (or_(name.like(prefix, escape="\\"), email.like(prefix, escape="\\")), 0),
+        (name.like("% " + prefix, escape="\\"), 1),
+        else_=2
+    )
+    if len(q) >= 3:
+        match = or_(name.like(substring, escape="\\"), email.like(substring, escape="\\"))
+    else:
+        # Too short for trigrams: prefix only, which the btree indexes serve
+        match = or_(name.like(prefix, escape="\\"), email.like(prefix, escape="\\"))
+
+    order = [rank, func.greatest(func.similarity(name, q), func.similarity(email, q)).desc(), name]
+
+    rows = db.query(
+        User.id, User.full_name, User.email, User.is_active, rank.label("rank")
+    ).filter(
+        *tenant_filter(User.company_id, company_id),
+        User.role == UserRole.SHAREHOLDER,
+        match
+    ).order_by(*order).limit(limit).all()
+    return [row._asdict() for row in rows]
+
+def _load_index(db: Session, company_id: Optional[str], entry: _CompanyIndex):
+    rows = db.query(User.id, User.full_name, User.email, User.is_active).filter(
+        *tenant_filter(User.company_id, company_id),
+        User.role == UserRole.SHAREHOLDER
+    ).all()
+    entry.index.build(row._asdict() for row in rows)
+    entry.built_at = time.monotonic()
+
+def _refresh_in_background(company_id: Optional[str], entry: _CompanyIndex):
+    db = SessionLocal()
+    try:
+        _load_index(db, company_id, entry)
+    except Exception:
+        logger.warning("Search index refresh failed", exc_info=True)
+    finally:
+        db.close()
+        entry.lock.release()
+
+def _ensure_index(db: Session, company_id: Optional[str]) -> ShareholderSearchIndex:
+    entry = _company_index(company_id)
+    if not entry.index.built:
+        with entry.lock:
+            if not entry.index.built:
+                _load_index(db, company_id, entry)
+        return entry.index
+    if time.monotonic() - entry.built_at < settings.SEARCH_INDEX_REFRESH_SECONDS:
+        return entry.index
+    # Stale: keep serving the current index while one thread rebuilds it
+    if entry.lock.acquire(blocking=False):
+        threading.Thread(target=_refresh_in_background, args=(company_id, entry), daemon=True).start()
+    return entry.index
+
+def search_shareholders(db: Session, query: str, limit: int = 20, company_id: Optional[str] = None):
+    """Ranked prefix and substring search on shareholder name and email within one company"""
+    q = normalize(query)
+    if not q:
+        return []
+    if db.get_bind().dialect.name == "postgresql" and _has_trigram(db):
+        return _search_postgres(db, q, limit, company_id)
+    return _ensure_index(db, company_id).search(q, limit)
+
+def index_shareholder(user: User):
+    """Reflect a created or updated shareholder in their company's in-process index"""
+    entry = _indexes.get(user.company_id)
+    if entry is None or not entry.index.built or user.role != UserRole.SHAREHOLDER:
+        return
+    try:
+        entry.index.upsert({
+            "id": user.id,
+            "full_name": user.full_name,
+            "email": user.email,
+            "is_active": user.is_active
+        })
+    except Exception:
+        # The write is already committed; rebuild on the next search instead
+        logger.warning("Search index update failed for shareholder %s", user.id, exc_info=True)
+        invalidate_search_index(user.company_id)
+
+def invalidate_search_index(company_id: Optional[str] = None):
+    """Force a full rebuild on the next search, for one company or (None) all of them"""
+    with _indexes_lock:
+        entries = list(_indexes.values()) if company_id is None else [_indexes.get(company_id)]
+    for entry in entries:
+        if entry is not None:
+            entry.index.built = False
+
+def _on_remote_invalidation(company_id: Optional[str], reason: Optional[str]):
+    # Issuance writes do not touch names or emails
+    if reason in (None, SHAREHOLDERS_CHANGED):
+        invalidate_search_index(company_id)
+
+on_remote_invalidation(_on_remote_invalidation)
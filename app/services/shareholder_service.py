@@ -1,51 +1,146 @@
-from sqlalchemy.orm import Session
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, aliased, load_only, selectinload
 from app.models.user_model import User, UserRole
 from app.models.shareholder_model import ShareholderProfile
 from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance
 from app.schemas.shareholder_schema import (
     ShareholderCreate, 
     ShareholderProfileCreate,
     ShareholderUpdate,
     ShareholderProfileUpdate
 )
-from app.schemas.user_schema import UserCreate
-from app.services.user_service import create_user
+from app.models.company_model import DEFAULT_COMPANY_ID
 from app.core.security import get_password_hash
+from app.core.cache import SHAREHOLDERS_CHANGED, bump_cap_table_version
+from app.core.events import publish_event, SHAREHOLDER_UPDATED
+from app.services.shareholder_search_service import index_shareholder
+from app.services.company_service import tenant_filter
+from app.services.ledger_service import get_balance
 from sqlalchemy.exc import IntegrityError
 from fastapi import HTTPException, status
 
-def get_shareholders(db: Session, skip: int = 0, limit: int = 100):
-    """Get all shareholders with their total shares"""
-    shareholders = db.query(User).filter(User.role == UserRole.SHAREHOLDER).offset(skip).limit(limit).all()
-    
+# Response fields backed by a users column
+SHAREHOLDER_COLUMN_FIELDS = ("email", "full_name", "role", "is_active", "is_disabled", "created_at", "updated_at")
+SHAREHOLDER_FIELDS = ("id", *SHAREHOLDER_COLUMN_FIELDS, "total_shares", "shareholder_profile", "issuances", "issuance_count")
+SHAREHOLDER_INCLUDES = ("issuances",)
+
+def _wanted(fields, name):
+    return fields is None or name in fields
+
+def _shareholder_query(db: Session, fields=None, include_issuances: bool = False):
+    """Users query loading only the requested columns, with holdings read from the ledger balances"""
+    columns = [User.id, User.role] + [
+        getattr(User, name) for name in SHAREHOLDER_COLUMN_FIELDS
+        if name != "role" and _wanted(fields, name)
+    ]
+    options = [load_only(*columns)]
+    if _wanted(fields, "shareholder_profile"):
+        options.append(selectinload(User.shareholder_profile))
+
+    aggregates = []
+    if _wanted(fields, "total_shares"):
+        aggregates.append(
+            func.coalesce(
+                select(ShareBalance.balance)
+                .where(ShareBalance.holder_id == User.id)
+                .correlate(User)
+                .scalar_subquery(),
+                0
+            ).label("total_shares")
+        )
+    if include_issuances:
+        aggregates.append(
+            select(func.count(ShareIssuance.id))
+            .where(ShareIssuance.shareholder_id == User.id)
+            .correlate(User)
+            .scalar_subquery()
+            .label("issuance_count")
+        )
+    return db.query(User, *aggregates).options(*options)
+
+def _shareholder_rows(db: Session, rows, include_issuances: bool, issuances_offset: int, issuances_limit: int, company_id=None):
     result = []
-    for shareholder in shareholders:
-        total_shares = sum(issuance.number_of_shares for issuance in shareholder.issuances)
-        result.append({
-            "user": shareholder,
-            "total_shares": total_shares
-        })
-    
+    for row in rows:
+        if isinstance(row, User):
+            # No aggregate columns were requested
+            result.append({"user": row})
+            continue
+        data = row._asdict()
+        data["user"] = data.pop("User")
+        result.append(data)
+    if include_issuances:
+        pages = get_issuance_pages(db, [data["user"].id for data in result], issuances_offset, issuances_limit, company_id)
+        for data in result:
+            data["issuances"] = pages.get(data["user"].id, [])
     return result
 
-def get_shareholder_by_id(db: Session, shareholder_id: str):
+def get_issuance_pages(db: Session, shareholder_ids, offset: int = 0, limit: int = 20, company_id: Optional[str] = None):
+    """One page of issuances per shareholder, newest first, in a single windowed query"""
+    if not shareholder_ids:
+        return {}
+    position = func.row_number().over(
+        partition_by=ShareIssuance.shareholder_id,
+        order_by=(ShareIssuance.issue_date.desc(), ShareIssuance.id)
+    ).label("position")
+    ranked = select(ShareIssuance, position).where(
+        *tenant_filter(ShareIssuance.company_id, company_id),
+        ShareIssuance.shareholder_id.in_(shareholder_ids)
+    ).subquery()
+    issuance = aliased(ShareIssuance, ranked)
+    rows = db.query(issuance).filter(
+        ranked.c.position > offset,
+        ranked.c.position <= offset + limit
+    ).order_by(ranked.c.shareholder_id, ranked.c.position).all()
+
+    pages = {}
+    for row in rows:
+        pages.setdefault(row.shareholder_id, []).append(row)
+    return pages
+
+def get_shareholders(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    fields=None,
+    include_issuances: bool = False,
+    issuances_offset: int = 0,
+    issuances_limit: int = 20,
+    company_id: Optional[str] = None
+):
+    """Get shareholders with their total shares, loading only the requested fields"""
+    rows = _shareholder_query(db, fields, include_issuances).filter(
+        *tenant_filter(User.company_id, company_id),
+        User.role == UserRole.SHAREHOLDER
+    ).order_by(User.created_at, User.id).offset(skip).limit(limit).all()
+    return _shareholder_rows(db, rows, include_issuances, issuances_offset, issuances_limit, company_id)
+
+def get_shareholder_by_id(
+    db: Session,
+    shareholder_id: str,
+    fields=None,
+    include_issuances: bool = False,
+    issuances_offset: int = 0,
+    issuances_limit: int = 20,
+    company_id: Optional[str] = None
+):
     """Get a shareholder by ID with their shares"""
-    shareholder = db.query(User).filter(
+    row = _shareholder_query(db, fields, include_issuances).filter(
+        *tenant_filter(User.company_id, company_id),
         User.id == shareholder_id,
         User.role == UserRole.SHAREHOLDER
     ).first()
     
-    if not shareholder:
+    if not row:
         return None
     
-    total_shares = sum(issuance.number_of_shares for issuance in shareholder.issuances)
-    
-    return {
-        "user": shareholder,
-        "total_shares": total_shares
-    }
+    return _shareholder_rows(db, [row], include_issuances, issuances_offset, issuances_limit, company_id)[0]
 
-def create_shareholder(db: Session, shareholder_data: ShareholderCreate):
+def get_total_shares(db: Session, shareholder_id: str, company_id: Optional[str] = None) -> int:
+    return get_balance(db, shareholder_id, company_id)
+
+def create_shareholder(db: Session, shareholder_data: ShareholderCreate, company_id: Optional[str] = None):
     """Create a new shareholder (user + profile)"""
     # Check if email already exists
     existing_user = db.query(User).filter(User.email == shareholder_data.email).first()
@@ -56,24 +151,26 @@ def create_shareholder(db: Session, shareholder_data: ShareholderCreate):
         )
 
     try:
-        # Convert to dict and exclude shareholder_profile for user creation
-        user_data = shareholder_data.model_dump(exclude={"shareholder_profile"})
-        
-        # Create the user first
-        user = create_user(db, UserCreate(**user_data))
-        
-        # Create shareholder profile if data provided
+        # User and profile go in together, in one transaction
+        user = User(
+            email=shareholder_data.email,
+            hashed_password=get_password_hash(shareholder_data.password),
+            full_name=shareholder_data.full_name,
+            role=UserRole.SHAREHOLDER,
+            company_id=company_id or DEFAULT_COMPANY_ID,
+            is_active=True
+        )
+        db.add(user)
         if shareholder_data.shareholder_profile:
-            profile_data = shareholder_data.shareholder_profile.model_dump()
-            profile = ShareholderProfile(
-                id=user.id,
-                **profile_data
-            )
-            db.add(profile)
-            db.commit()
-            db.refresh(profile)
+            profile = ShareholderProfile(**shareholder_data.shareholder_profile.model_dump())
             user.shareholder_profile = profile
+            # Added explicitly: the relationship does not cascade it into the session
+            db.add(profile)
+        db.commit()
+        db.refresh(user)
         
+        bump_cap_table_version(user.company_id, SHAREHOLDERS_CHANGED)
+        publish_shareholder_updated(user, "created")
         return user
     except IntegrityError:
         db.rollback()
@@ -83,9 +180,10 @@ def create_shareholder(db: Session, shareholder_data: ShareholderCreate):
         )
 
 
-def update_shareholder(db: Session, shareholder_id: str, update_data: ShareholderUpdate):
+def update_shareholder(db: Session, shareholder_id: str, update_data: ShareholderUpdate, company_id: Optional[str] = None):
     """Update shareholder information"""
     shareholder = db.query(User).filter(
+        *tenant_filter(User.company_id, company_id),
         User.id == shareholder_id,
         User.role == UserRole.SHAREHOLDER
     ).first()
@@ -110,12 +208,15 @@ def update_shareholder(db: Session, shareholder_id: str, update_data: Shareholde
             setattr(shareholder.shareholder_profile, key, value)
     
     db.commit()
+    bump_cap_table_version(shareholder.company_id, SHAREHOLDERS_CHANGED)
     db.refresh(shareholder)
+    publish_shareholder_updated(shareholder, "updated")
     return shareholder
 
-def deactivate_shareholder(db: Session, shareholder_id: str):
+def deactivate_shareholder(db: Session, shareholder_id: str, company_id: Optional[str] = None):
     """Deactivate a shareholder"""
     shareholder = db.query(User).filter(
+        *tenant_filter(User.company_id, company_id),
         User.id == shareholder_id,
         User.role == UserRole.SHAREHOLDER
     ).first()
@@ -125,5 +226,19 @@ def deactivate_shareholder(db: Session, shareholder_id: str):
     
     shareholder.is_active = False
     db.commit()
+    bump_cap_table_version(shareholder.company_id, SHAREHOLDERS_CHANGED)
     db.refresh(shareholder)
-    return shareholder
\ No newline at end of file
+    publish_shareholder_updated(shareholder, "deactivated")
+    return shareholder
+
+def publish_shareholder_updated(shareholder: User, action: str):
+    """Notify the shareholder and their company's admins subscribed to the event stream"""
+    index_shareholder(shareholder)
+    publish_event(SHAREHOLDER_UPDATED, {
+        "id": shareholder.id,
+        "action": action,
+        "email": shareholder.email,
+        "full_name": shareholder.full_name,
+        "is_active": shareholder.is_active,
+        "is_disabled": shareholder.is_disabled
+    }, shareholder_id=shareholder.id, company_id=shareholder.company_id)
\ No newline at end of file
@@ -0,0 +1,353 @@
+import logging
+import multiprocessing
+import re
+import smtplib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator, Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy import and_, case, exists, func, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.session import SessionLocal, commit_keep_loaded
+from app.models.company_model import DEFAULT_COMPANY_ID
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareTransaction, TRANSACTION_ISSUE
+from app.models.statement_model import StatementDelivery, StatementRun
+from app.models.user_model import User, UserRole
+from app.utils.email_utils import SMTPMailer, build_statement_email
+from app.utils.pdf_utils import generate_holdings_statement
+from app.services.company_service import get_company_name
+
+logger = logging.getLogger(__name__)
+
+_PERIOD = re.compile(r"^(\d{4})-Q([1-4])$")
+# Rejected recipients or messages; anything else (auth, connection) aborts the run
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)
+
+def parse_period(period: Optional[str] = None) -> Tuple[str, datetime, datetime]:
+    """'2026-Q3' -> (period, start, exclusive end); defaults to the last completed quarter"""
+    if period is None:
+        today = date.today()
+        year, quarter = today.year, (today.month - 1) // 3
+        if quarter == 0:
+            year, quarter = year - 1, 4
+        period = f"{year}-Q{quarter}"
+    match = _PERIOD.match(period)
+    if not match:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Period must be a quarter such as 2026-Q3"
+        )
+    year, quarter = int(match.group(1)), int(match.group(2))
+    start = datetime(year, 3 * quarter - 2, 1)
+    end = datetime(year + 1, 1, 1) if quarter == 4 else datetime(year, 3 * quarter + 1, 1)
+    return period, start, end
+
+def _utc(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive UTC timestamps
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _eligible_shareholders(db: Session, company_id: str):
+    return db.query(User).filter(
+        User.company_id == company_id,
+        User.role == UserRole.SHAREHOLDER,
+        User.is_active.is_(True)
+    )
+
+def _delivered(period: str):
+    return exists().where(
+        StatementDelivery.period == period,
+        StatementDelivery.shareholder_id == User.id,
+        StatementDelivery.status == "sent"
+    )
+
+def claim_statement_run(db: Session, period: Optional[str] = None, company_id: str = DEFAULT_COMPANY_ID) -> StatementRun:
+    """Create a run for the company and period, unless another run for them is still alive.
+
+    Runs that stopped heartbeating are marked interrupted; the new run picks
+    up their work because delivered statements are skipped. A unique index
+    on running runs decides between claims racing in different workers.
+    """
+    period, _, _ = parse_period(period)
+    stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.STATEMENT_RUN_STALE_SECONDS)
+    active = db.query(StatementRun).filter(
+        StatementRun.company_id == company_id,
+        StatementRun.period == period,
+        StatementRun.status == "running"
+    )
+    for run in active:
+        if _utc(run.updated_at) > stale_before:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Statement run {run.id} for {period} is still in progress"
+            )
+        run.status = "interrupted"
+    db.commit()
+
+    eligible = _eligible_shareholders(db, company_id)
+    run = StatementRun(
+        company_id=company_id,
+        period=period,
+        total=eligible.count(),
+        skipped=eligible.filter(_delivered(period)).count(),
+        sent=0,
+        failed=0,
+        # Python clock for sub-second throughput; SQLite's now() has one-second resolution
+        started_at=datetime.now(timezone.utc)
+    )
+    db.add(run)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Another statement run for {period} is in progress"
+        )
+    db.refresh(run)
+    return run
+
+def _moved_shares(company_id: str, end: datetime):
+    """Per holder, shares moved by ledger entries other than issues (transfers, cancellations, repurchases) before `end`"""
+    posted = [
+        ShareTransaction.company_id == company_id,
+        ShareTransaction.kind != TRANSACTION_ISSUE,
+        ShareTransaction.created_at < end
+    ]
+    movements = union_all(
+        select(ShareTransaction.to_holder_id.label("holder_id"), ShareTransaction.number_of_shares.label("shares"))
+        .where(*posted, ShareTransaction.to_holder_id.isnot(None)),
+        select(ShareTransaction.from_holder_id.label("holder_id"), (-ShareTransaction.number_of_shares).label("shares"))
+        .where(*posted, ShareTransaction.from_holder_id.isnot(None))
+    ).subquery()
+    return select(
+        movements.c.holder_id, func.sum(movements.c.shares).label("shares")
+    ).group_by(movements.c.holder_id).subquery()
+
+def stream_statements(db: Session, period: str, batch_size: int, company_id: str = DEFAULT_COMPANY_ID) -> Iterator[dict]:
+    """Undelivered shareholders of a company with holdings as of the period end, in keyset batches.
+
+    Holdings are the shares issued by the period end plus the ledger
+    entries posted before it, so transfers and cancellations count.
+    """
+    period, start, end = parse_period(period)
+    company_name = get_company_name(company_id)
+    moved = _moved_shares(company_id, end)
+    issued = db.query(func.coalesce(func.sum(ShareIssuance.number_of_shares), 0)).filter(
+        ShareIssuance.company_id == company_id,
+        ShareIssuance.issue_date < end
+    ).scalar()
+    outstanding = int(issued) + int(db.query(func.coalesce(func.sum(moved.c.shares), 0)).scalar())
+
+    moved_shares = func.coalesce(moved.c.shares, 0)
+    holdings = (
+        User.id, User.email, User.full_name,
+        func.count(ShareIssuance.id).label("issuance_count"),
+        (func.coalesce(func.sum(ShareIssuance.number_of_shares), 0) + moved_shares).label("total_shares"),
+        func.coalesce(func.sum(case(
+            (ShareIssuance.issue_date >= start, ShareIssuance.number_of_shares), else_=0
+        )), 0).label("issued_in_period"),
+        func.coalesce(func.sum(ShareIssuance.number_of_shares * ShareIssuance.price_per_share), 0).label("total_invested"),
+    )
+    after = ""
+    while True:
+        rows = db.query(*holdings).outerjoin(
+            ShareIssuance,
+            and_(
+                ShareIssuance.company_id == company_id,
+                ShareIssuance.shareholder_id == User.id,
+                ShareIssuance.issue_date < end
+            )
+        ).outerjoin(moved, moved.c.holder_id == User.id).filter(
+            User.company_id == company_id,
+            User.role == UserRole.SHAREHOLDER,
+            User.is_active.is_(True),
+            User.id > after,
+            ~_delivered(period)
+        ).group_by(User.id, User.email, User.full_name, moved.c.shares).order_by(User.id).limit(batch_size).all()
+        # Release the snapshot so checkpoints commit between batches
+        db.commit()
+
+        for row in rows:
+            yield {
+                "shareholder_id": row.id,
+                "company_name": company_name,
+                "email": row.email,
+                "full_name": row.full_name,
+                "period": period,
+                "period_start": start,
+                "period_end": end - timedelta(days=1),
+                "issuance_count": row.issuance_count,
+                "total_shares": int(row.total_shares),
+                "issued_in_period": int(row.issued_in_period),
+                "total_invested": Decimal(str(row.total_invested)),
+                "ownership_percentage": int(row.total_shares) / outstanding * 100 if outstanding else 0.0,
+            }
+        if len(rows) < batch_size:
+            return
+        after = rows[-1].id
+
+def render_statements(statements: Iterable[dict], workers: int) -> Iterator[Tuple[dict, Optional[bytes], Optional[Exception]]]:
+    """Render in a process pool, keeping a bounded window of PDFs ahead of delivery, in input order"""
+    if workers <= 0:
+        for statement in statements:
+            try:
+                yield statement, generate_holdings_statement(statement), None
+            except Exception as e:
+                yield statement, None, e
+        return
+
+    # spawn: forking a process that holds DB connections and threads is unsafe
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    pending = deque()
+
+    def result(statement, future):
+        try:
+            return statement, future.result(), None
+        except Exception as e:
+            return statement, None, e
+
+    try:
+        for statement in statements:
+            pending.append((statement, pool.submit(generate_holdings_statement, statement)))
+            if len(pending) >= workers * 4:
+                yield result(*pending.popleft())
+        while pending:
+            yield result(*pending.popleft())
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+def _checkpoint(db: Session, run: StatementRun, shareholder_id: str, error: Optional[str]) -> None:
+    db.merge(StatementDelivery(
+        period=run.period,
+        shareholder_id=shareholder_id,
+        run_id=run.id,
+        status="failed" if error else "sent",
+        error=error,
+        delivered_at=func.now()
+    ))
+    if error:
+        run.failed += 1
+    else:
+        run.sent += 1
+    run.updated_at = func.now()
+    commit_keep_loaded(db)
+
+def statement_run_progress(run: StatementRun) -> dict:
+    """Counters plus throughput and an estimate of the time left"""
+    processed = run.sent + run.failed
+    remaining = max(0, run.total - run.skipped - processed)
+    end = _utc(run.finished_at) or datetime.now(timezone.utc)
+    elapsed = (end - _utc(run.started_at)).total_seconds() if run.started_at else 0
+    rate = processed / elapsed if elapsed > 0 else 0.0
+    return {
+        "id": run.id,
+        "period": run.period,
+        "status": run.status,
+        "total": run.total,
+        "skipped": run.skipped,
+        "sent": run.sent,
+        "failed": run.failed,
+        "remaining": remaining,
+        "error": run.error,
+        "started_at": run.started_at,
+        "updated_at": run.updated_at,
+        "finished_at": run.finished_at,
+        "statements_per_second": round(rate, 3),
+        "eta_seconds": round(remaining / rate, 1) if rate and run.status == "running" else None
+    }
+
+def execute_statement_run(
+    run_id: str,
+    workers: Optional[int] = None,
+    messages_per_second: Optional[float] = None,
+    batch_size: Optional[int] = None
+) -> StatementRun:
+    """Render and send every outstanding statement for the run's period, checkpointing each delivery"""
+    workers = settings.STATEMENT_RENDER_WORKERS if workers is None else workers
+    messages_per_second = settings.STATEMENT_EMAILS_PER_SECOND if messages_per_second is None else messages_per_second
+    batch_size = batch_size or settings.STATEMENT_BATCH_SIZE
+
+    db = SessionLocal()
+    try:
+        run = db.get(StatementRun, run_id)
+        started = time.monotonic()
+        try:
+            with SMTPMailer(messages_per_second) as mailer:
+                rendered = render_statements(stream_statements(db, run.period, batch_size, run.company_id), workers)
+                for processed, (statement, pdf, error) in enumerate(rendered, start=1):
+                    if error is None:
+                        try:
+                            mailer.send(build_statement_email(
+                                statement["email"],
+                                statement["full_name"] or statement["email"],
+                                run.period,
+                                pdf,
+                                statement["company_name"]
+                            ))
+                        except _MESSAGE_ERRORS as e:
+                            error = e
+                    if error is not None:
+                        logger.warning("Statement for %s not delivered: %s", statement["shareholder_id"], error)
+                    _checkpoint(db, run, statement["shareholder_id"], str(error) if error else None)
+
+                    if processed % batch_size == 0:
+                        logger.info(
+                            "Statement run %s: %d sent, %d failed of %d, %.1f/s",
+                            run.id, run.sent, run.failed, run.total - run.skipped,
+                            processed / (time.monotonic() - started)
+                        )
+        except BaseException as e:
+            db.rollback()
+            run.status = "failed"
+            run.error = str(e) or type(e).__name__
+            run.updated_at = func.now()
+            run.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            raise
+
+        run.status = "completed"
+        run.updated_at = func.now()
+        run.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        db.refresh(run)
+        logger.info(
+            "Statement run %s completed: %d sent, %d failed, %d already delivered in %.1fs",
+            run.id, run.sent, run.failed, run.skipped, time.monotonic() - started
+        )
+        return run
+    finally:
+        db.close()
+
+def _execute_in_background(run_id: str) -> None:
+    try:
+        execute_statement_run(run_id)
+    except Exception:
+        logger.exception("Statement run %s failed", run_id)
+
+def start_statement_run(db: Session, period: Optional[str] = None, company_id: str = DEFAULT_COMPANY_ID) -> StatementRun:
+    """Claim a run and execute it on a background thread"""
+    run = claim_statement_run(db, period, company_id)
+    threading.Thread(
+        target=_execute_in_background, args=(run.id,), name=f"statement-run-{run.period}", daemon=True
+    ).start()
+    return run
+
+def get_statement_run(db: Session, run_id: str, company_id: str = DEFAULT_COMPANY_ID) -> StatementRun:
+    run = db.get(StatementRun, run_id)
+    if run is None or run.company_id != company_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Statement run not found")
+    return run
+
+def list_statement_runs(db: Session, limit: int = 20, company_id: str = DEFAULT_COMPANY_ID):
+    return db.query(StatementRun).filter(
+        StatementRun.company_id == company_id
+    ).order_by(StatementRun.started_at.desc()).limit(limit).all()
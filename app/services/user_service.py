@@ -1,10 +1,12 @@
+from typing import Optional
 from sqlalchemy.orm import Session
+from app.models.company_model import DEFAULT_COMPANY_ID
 from app.models.user_model import User
 from app.schemas.user_schema import UserCreate
 from app.core.security import get_password_hash
 
-def create_user(db: Session, user_data: UserCreate):
-    """Create a new user in the database"""
+def create_user(db: Session, user_data: UserCreate, company_id: Optional[str] = None):
+    """Create a new user in the database, in the given company (the default company if None)"""
     # Check if user already exists
     existing_user = db.query(User).filter(User.email == user_data.email).first()
     if existing_user:
@@ -16,6 +18,7 @@ def create_user(db: Session, user_data: UserCreate):
         hashed_password=hashed_password,
         full_name=user_data.full_name,
         role=user_data.role,
+        company_id=company_id or DEFAULT_COMPANY_ID,
         is_active=True
     )
     db.add(db_user)
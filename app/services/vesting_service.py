@@ -0,0 +1,122 @@
+from datetime import date, datetime
+from typing import Optional, Tuple
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.core.cache import ISSUANCES_CHANGED, VersionedCache, bump_cap_table_version, get_cap_table_version
+from app.core.tracing import span
+from app.core.vesting import GrantRecord, GrantSet, vesting_as_of, vesting_by_holder
+from app.models.issuance_model import ShareIssuance
+from app.models.user_model import User
+from app.models.vesting_model import VestingSchedule
+from app.schemas.vesting_schema import VestingScheduleSet
+from app.services.company_service import tenant_filter
+from app.services.issuance_service import get_issuance_by_id
+from app.services.ledger_service import get_holdings
+
+# A company's grants as arrays, rebuilt when its cap table changes. Kept per
+# worker: the arrays are large and cheap to rebuild next to the database
+_grant_sets = VersionedCache("vesting.grants", shared=False)
+
+SCHEDULE_COLUMNS = (
+    VestingSchedule.start_date,
+    VestingSchedule.cliff_months,
+    VestingSchedule.duration_months,
+    VestingSchedule.frequency_months,
+    VestingSchedule.acceleration,
+    VestingSchedule.acceleration_percent,
+    VestingSchedule.change_of_control_date,
+    VestingSchedule.termination_date,
+)
+
+def _day(value) -> date:
+    if value is None:
+        return date.min
+    return value.date() if isinstance(value, datetime) else value
+
+def _grant_record(shareholder_id: str, shares: int, issue_date, schedule: Tuple) -> GrantRecord:
+    return (shareholder_id, shares, _day(issue_date), *schedule)
+
+def set_vesting_schedule(db: Session, issuance_id: str, data: VestingScheduleSet, company_id: Optional[str] = None):
+    """Attach a schedule to an issuance, replacing any it had; returns (issuance, schedule)"""
+    issuance = get_issuance_by_id(db, issuance_id, company_id)
+    if not issuance:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Issuance not found")
+
+    schedule = db.get(VestingSchedule, issuance_id)
+    if schedule is None:
+        schedule = VestingSchedule(issuance_id=issuance_id, company_id=issuance.company_id)
+        db.add(schedule)
+    for name, value in data.model_dump().items():
+        setattr(schedule, name, value)
+    schedule.start_date = data.start_date or _day(issuance.issue_date)
+    db.commit()
+    db.refresh(schedule)
+    bump_cap_table_version(issuance.company_id, ISSUANCES_CHANGED)
+    return issuance, schedule
+
+def get_vesting_schedule(db: Session, issuance_id: str, company_id: Optional[str] = None):
+    """(issuance, schedule); either is None when missing"""
+    issuance = get_issuance_by_id(db, issuance_id, company_id)
+    if not issuance:
+        return None, None
+    return issuance, db.get(VestingSchedule, issuance_id)
+
+def vesting_schedule_response(issuance: ShareIssuance, schedule: VestingSchedule, as_of: date) -> dict:
+    schedule_values = tuple(getattr(schedule, column.key) for column in SCHEDULE_COLUMNS)
+    grants = GrantSet.from_records([
+        _grant_record(issuance.shareholder_id, issuance.number_of_shares, issuance.issue_date, schedule_values)
+    ])
+    granted, vested = vesting_as_of(grants, as_of)
+    data = {column.key: value for column, value in zip(SCHEDULE_COLUMNS, schedule_values)}
+    data.update(
+        issuance_id=issuance.id,
+        number_of_shares=issuance.number_of_shares,
+        as_of=as_of,
+        vested_shares=int(vested[0]),
+        unvested_shares=int(granted[0] - vested[0]),
+        updated_at=schedule.updated_at
+    )
+    return data
+
+def load_grant_set(db: Session, company_id: Optional[str] = None) -> GrantSet:
+    """Every issuance of the company with its schedule, as arrays, cached per cap-table version"""
+    grants = _grant_sets.get("grants", company_id)
+    if grants is not None:
+        return grants
+    version = get_cap_table_version(company_id)
+    with span("vesting.load_grants"):
+        rows = db.query(
+            ShareIssuance.shareholder_id,
+            ShareIssuance.number_of_shares,
+            ShareIssuance.issue_date,
+            *SCHEDULE_COLUMNS
+        ).outerjoin(
+            VestingSchedule, VestingSchedule.issuance_id == ShareIssuance.id
+        ).filter(*tenant_filter(ShareIssuance.company_id, company_id)).all()
+        grants = GrantSet.from_records([_grant_record(row[0], row[1], row[2], tuple(row[3:])) for row in rows])
+    _grant_sets.set("grants", grants, version, company_id)
+    return grants
+
+def compute_vested_distribution(db: Session, as_of: date, company_id: Optional[str] = None):
+    """Per shareholder: shares issued by `as_of`, how many of them had vested, and the share of all vested"""
+    grants = load_grant_set(db, company_id)
+    with span("vesting.compute", grants=len(grants)):
+        granted, vested = vesting_by_holder(grants, as_of)
+    names = dict(db.query(User.id, User.full_name).filter(*tenant_filter(User.company_id, company_id)).all())
+    holdings = get_holdings(db, company_id)
+    total_vested = int(vested.sum()) or 1
+
+    distribution = []
+    for holder, holder_granted, holder_vested in zip(grants.holders, granted.tolist(), vested.tolist()):
+        if not holder_granted:
+            continue
+        distribution.append({
+            "shareholder_id": holder,
+            "shareholder_name": names.get(holder) or "Unknown",
+            "total_shares": holder_granted,
+            "vested_shares": holder_vested,
+            "unvested_shares": holder_granted - holder_vested,
+            "shares_held": holdings.get(holder, 0),
+            "percentage": holder_vested / total_vested * 100
+        })
+    return distribution
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import re
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Optional
+from app.core.config import settings
+
+# Earlier versions kept compressed copies next to certificates under
+# `<digest>.<encoding>`. None are written any more; the keys stay valid so
+# the copies left behind can be deleted
+LEGACY_VARIANT_ENCODINGS = ("gzip", "br", "zstd")
+
+# SHA-256 of the content, or of a legacy compressed copy's original plus its encoding
+_KEY = re.compile(rf"^[0-9a-f]{{64}}(\.({'|'.join(LEGACY_VARIANT_ENCODINGS)}))?$")
+
+class ArtifactStore(ABC):
+    """Content-addressed blob storage for rendered artifacts.
+
+    Keys are the SHA-256 of the stored bytes, so writing the same content
+    twice is a no-op. Object-store backends implement the same interface
+    and return None from `path`.
+    """
+
+    @abstractmethod
+    def put(self, data: bytes) -> str:
+        ...
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        ...
+
+    @abstractmethod
+    def open(self, key: str) -> BinaryIO:
+        ...
+
+    def read(self, key: str) -> bytes:
+        with self.open(key) as f:
+            return f.read()
+
+    def path(self, key: str) -> Optional[str]:
+        """Local file backing `key`, for sendfile-style serving; None when not on local disk"""
+        return None
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove `key`; a missing key is not an error"""
+
+    def delete_variants(self, digest: str) -> None:
+        """Remove the legacy compressed copies of `digest`"""
+        for encoding in LEGACY_VARIANT_ENCODINGS:
+            self.delete(f"{digest}.{encoding}")
+
+    def delete_with_variants(self, digest: str) -> None:
+        self.delete_variants(digest)
+        self.delete(digest)
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    @staticmethod
+    def validate_key(key: str) -> str:
+        if not _KEY.match(key):
+            raise ValueError(f"Invalid artifact key: {key!r}")
+        return key
+
+class LocalArtifactStore(ArtifactStore):
+    """Filesystem store, also the local stand-in for an object store in development and tests"""
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+
+    def _path(self, key: str) -> str:
+        self.validate_key(key)
+        return os.path.join(self.root, key[:2], key)
+
+    def _write(self, key: str, data: bytes) -> str:
+        target = self._path(key)
+        if os.path.exists(target):
+            return key
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Write then rename so readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return key
+
+    def put(self, data: bytes) -> str:
+        return self._write(self.digest(data), data)
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+artifact_store: ArtifactStore = LocalArtifactStore(settings.ARTIFACT_STORE_DIR)
+
+def get_artifact_store() -> ArtifactStore:
+    return artifact_store
+
+def set_artifact_store(store: ArtifactStore) -> None:
+    """Swap the backend, e.g. for an object store client"""
+    global artifact_store
+    artifact_store = store
@@ -0,0 +1,146 @@
+import zlib
+from typing import Callable, Dict, Hashable, Optional
+from fastapi import Request, Response
+from app.core.cache import VersionedCache, get_cap_table_version
+from app.core.config import settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Server preference when the client weighs several encodings equally
+_PREFERENCE = ("zstd", "br", "gzip")
+
+# PDFs are left out: their content streams are already deflated, so
+# compressing them again costs CPU for little gain
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "application/x-ndjson",
+)
+# Streams that must reach the client event by event
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+def available_encodings():
+    encodings = ["gzip"]
+    if brotli is not None:
+        encodings.append("br")
+    if zstandard is not None:
+        encodings.append("zstd")
+    return encodings
+
+def is_compressible(content_type: str) -> bool:
+    content_type = content_type.split(";", 1)[0].strip().lower()
+    if content_type.startswith(UNCOMPRESSIBLE_TYPES):
+        return False
+    return content_type.startswith(COMPRESSIBLE_TYPES) or content_type.endswith("+json")
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best supported encoding from an Accept-Encoding header; None for identity"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for encoding in _PREFERENCE:
+        if encoding not in available_encodings():
+            continue
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = StreamCompressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+class StreamCompressor:
+    """Incremental compressor; `flush` pushes buffered output out so streamed chunks reach the client"""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(settings.GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.BROTLI_COMPRESSION_QUALITY)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=settings.ZSTD_COMPRESSION_LEVEL).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "gzip":
+            return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            return self._compressor.flush()
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+class CompressedVariantCache:
+    """Cacheable payloads rendered once per company cap-table version and compressed once per encoding.
+
+    Responses carry Content-Encoding already, so the compression middleware
+    passes them through untouched.
+    """
+
+    def __init__(self, namespace: str, max_entries: int = 256):
+        self._cache = VersionedCache(namespace, max_entries)
+
+    def response(
+        self,
+        request: Request,
+        key: Hashable,
+        render: Callable[[], bytes],
+        media_type: str,
+        headers: Optional[Dict[str, str]] = None,
+        company_id: Optional[str] = None
+    ) -> Response:
+        variants = self._cache.get(key, company_id)
+        if variants is None:
+            version = get_cap_table_version(company_id)
+            variants = {"identity": render()}
+            self._cache.set(key, variants, version, company_id)
+
+        headers = dict(headers or {})
+        headers["Vary"] = "Accept-Encoding"
+        body = variants["identity"]
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None and len(body) >= settings.COMPRESSION_MINIMUM_SIZE:
+            encoded = variants.get(encoding)
+            if encoded is None:
+                # Concurrent misses may both compress; the result is identical
+                encoded = variants[encoding] = compress(body, encoding)
+            body = encoded
+            headers["Content-Encoding"] = encoding
+        return Response(content=body, media_type=media_type, headers=headers)
+
+    def clear(self) -> None:
+        self._cache.clear()
@@ -2,7 +2,9 @@ from email.mime.multipart import MIMEMultipart
 from email.mime.text import MIMEText
 from email.mime.application import MIMEApplication
 from app.core.config import settings
+from app.core.tracing import SPAN_KIND_CLIENT, span, traced
 import smtplib
+import time
 from typing import Optional
 from datetime import datetime
 import logging
@@ -82,7 +84,7 @@ def create_email_template(shareholder_name: str, issuance_data: dict) -> str:
                     <!-- Footer -->
                     <tr>
                         <td style="background-color: #f4f4f4; text-align: center; padding: 20px; font-size: 13px; color: #888;">
-                            &copy; {datetime.now().year} {settings.COMPANY_NAME}. All rights reserved.
+                            &copy; {datetime.now().year} {issuance_data.get('company_name') or settings.COMPANY_NAME}. All rights reserved.
                         </td>
                     </tr>
 
@@ -94,6 +96,7 @@ def create_email_template(shareholder_name: str, issuance_data: dict) -> str:
 </body>
 </html>
     """
+@traced("email.send_certificate_email")
 def send_certificate_email(
     to_email: str,
     shareholder_name: str,
@@ -102,7 +105,7 @@ def send_certificate_email(
 ) -> bool:
     """Send beautiful HTML email with certificate attachment"""
     try:
-        logger.info(f"Preparing email to {to_email} for certificate {issuance_data['id']}")
+        logger.info("Preparing email to %s for certificate %s", to_email, issuance_data['id'])
         
         # Create message container
         msg = MIMEMultipart('alternative')
@@ -123,25 +126,156 @@ def send_certificate_email(
         msg.attach(part)
         
         if settings.ENVIRONMENT == "testing":
-            logger.info(f"Email simulation (not sent): To: {to_email}")
+            logger.info("Email simulation (not sent): To: %s", to_email)
             return True
         
         # Connect to SMTP server
-        logger.info(f"Connecting to SMTP server at {settings.SMTP_HOST}:{settings.SMTP_PORT}")
+        logger.info("Connecting to SMTP server at %s:%s", settings.SMTP_HOST, settings.SMTP_PORT)
         
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.ehlo()
-            
-            # Only start TLS if explicitly configured
-            if getattr(settings, 'SMTP_USE_TLS', True):  # Safely get attribute with default
-                server.starttls()
+        smtp_attributes = {"server.address": settings.SMTP_HOST, "server.port": settings.SMTP_PORT}
+        with span("smtp.connect", SPAN_KIND_CLIENT, **smtp_attributes):
+            server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
+        with server:
+            with span("smtp.handshake", SPAN_KIND_CLIENT, **smtp_attributes):
                 server.ehlo()
-            
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(msg)
+                
+                # Only start TLS if explicitly configured
+                if getattr(settings, 'SMTP_USE_TLS', True):  # Safely get attribute with default
+                    server.starttls()
+                    server.ehlo()
+                
+                server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+            with span("smtp.send", SPAN_KIND_CLIENT, **smtp_attributes):
+                server.send_message(msg)
             logger.info("Email sent successfully")
             return True
             
-    except Exception as e:
-        logger.error(f"Failed to send email: {str(e)}", exc_info=True)
-        return False
\ No newline at end of file
+    except Exception:
+        logger.exception("Failed to send email to %s", to_email)
+        return False
+
+def create_statement_template(shareholder_name: str, period: str, company_name: Optional[str] = None) -> str:
+    """HTML body for a periodic holdings statement"""
+    return f"""
+<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="UTF-8">
+    <title>Holdings Statement</title>
+</head>
+<body style="margin: 0; padding: 0; font-family: 'Segoe UI', sans-serif; background-color: #f4f4f4;">
+    <table width="100%" cellpadding="0" cellspacing="0" style="background-color: #f4f4f4; padding: 40px 0;">
+        <tr>
+            <td align="center">
+                <table width="600" cellpadding="0" cellspacing="0" style="background-color: #ffffff; border-radius: 8px;">
+                    <tr>
+                        <td style="background-color: #2d89ef; color: white; padding: 20px; text-align: center;">
+                            <h2 style="margin: 0; font-size: 24px;">Holdings Statement {period}</h2>
+                        </td>
+                    </tr>
+                    <tr>
+                        <td style="padding: 30px; font-size: 16px; color: #333;">
+                            <p>Dear <strong>{shareholder_name}</strong>,</p>
+                            <p>Your holdings statement for {period} is attached.</p>
+                            <p>Thank you for being a valued shareholder.</p>
+                        </td>
+                    </tr>
+                    <tr>
+                        <td style="background-color: #f4f4f4; text-align: center; padding: 20px; font-size: 13px; color: #888;">
+                            &copy; {datetime.now().year} {company_name or settings.COMPANY_NAME}. All rights reserved.
+                        </td>
+                    </tr>
+                </table>
+            </td>
+        </tr>
+    </table>
+</body>
+</html>
+    """
+
+def build_statement_email(
+    to_email: str,
+    shareholder_name: str,
+    period: str,
+    pdf_attachment: bytes,
+    company_name: Optional[str] = None
+) -> MIMEMultipart:
+    msg = MIMEMultipart('alternative')
+    msg['From'] = settings.SMTP_FROM
+    msg['To'] = to_email
+    msg['Subject'] = f"Your Holdings Statement - {period}"
+    msg.attach(MIMEText(create_statement_template(shareholder_name, period, company_name), 'html'))
+    
+    part = MIMEApplication(pdf_attachment, Name=f"holdings_statement_{period}.pdf")
+    part['Content-Disposition'] = f'attachment; filename="holdings_statement_{period}.pdf"'
+    msg.attach(part)
+    return msg
+
+class SMTPMailer:
+    """One SMTP connection reused for a batch of messages, paced to a maximum send rate.
+
+    The connection is opened on the first send and re-established once if
+    the server drops it mid-batch. In the testing environment messages are
+    only logged, as with `send_certificate_email`.
+    """
+
+    def __init__(self, messages_per_second: Optional[float] = None):
+        self.interval = 1 / messages_per_second if messages_per_second else 0.0
+        self.server: Optional[smtplib.SMTP] = None
+        self.connections = 0
+        self.sent = 0
+        self._next_send = 0.0
+
+    def __enter__(self) -> "SMTPMailer":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _connect(self) -> None:
+        logger.info("Connecting to SMTP server at %s:%s", settings.SMTP_HOST, settings.SMTP_PORT)
+        server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
+        try:
+            server.ehlo()
+            if getattr(settings, 'SMTP_USE_TLS', True):
+                server.starttls()
+                server.ehlo()
+            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        self.server = server
+        self.connections += 1
+
+    def _throttle(self) -> None:
+        now = time.monotonic()
+        if now < self._next_send:
+            time.sleep(self._next_send - now)
+            now = self._next_send
+        self._next_send = now + self.interval
+
+    def send(self, msg) -> None:
+        """Send one message; recipient-level SMTP errors propagate for the caller to record"""
+        self._throttle()
+        if settings.ENVIRONMENT == "testing":
+            logger.info("Email simulation (not sent): To: %s", msg['To'])
+            self.sent += 1
+            return
+        
+        if self.server is None:
+            self._connect()
+        try:
+            self.server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.server = None
+            self._connect()
+            self.server.send_message(msg)
+        self.sent += 1
+
+    def close(self) -> None:
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                self.server.close()
+            self.server = None
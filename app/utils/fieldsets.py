@@ -0,0 +1,33 @@
+from typing import Dict, Iterable, Optional, Set
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+def parse_fieldset(value: Optional[str], allowed: Iterable[str], param: str = "fields") -> Optional[Set[str]]:
+    """Parse a comma-separated `fields=` or `include=` value; None when not given"""
+    if value is None:
+        return None
+    allowed = set(allowed)
+    requested = {part.strip() for part in value.split(",") if part.strip()}
+    unknown = requested - allowed
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {param}: {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(allowed))}"
+        )
+    return requested
+
+def require_includes(fields: Optional[Set[str]], includes: Set[str], needs: Dict[str, str]) -> None:
+    """Reject fields that only exist when a relation is embedded but whose include= is missing"""
+    missing = sorted(field for field, relation in needs.items() if fields and field in fields and relation not in includes)
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Fields {', '.join(missing)} require include={','.join(sorted({needs[f] for f in missing}))}"
+        )
+
+def sparse_response(items, fields: Optional[Set[str]]):
+    """Return items through the response model, or as plain JSON when a sparse fieldset was requested"""
+    if fields is None:
+        return items
+    return JSONResponse(jsonable_encoder(items))
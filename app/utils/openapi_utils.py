@@ -1,59 +1,124 @@
+import hashlib
+import json
+import threading
+from typing import Any, Dict, Optional
+from fastapi import FastAPI, Request, Response, status
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html, get_swagger_ui_oauth2_redirect_html
 from fastapi.openapi.utils import get_openapi
-from fastapi import FastAPI
-from typing import Dict, Any
-
-def custom_openapi(app: FastAPI):
-    def inner():
-        if app.openapi_schema:
-            return app.openapi_schema
-        
-        # First get the base OpenAPI schema
-        openapi_schema = get_openapi(
-            title="Cap Table Management API",
-            version="1.0.0",
-            description="API for managing company capitalization tables",
-            routes=app.routes,
-        )
-        
-        # Ensure components exist
-        if "components" not in openapi_schema:
-            openapi_schema["components"] = {}
-        
-        # Add security scheme
-        openapi_schema["components"]["securitySchemes"] = {
-            "BearerAuth": {
-                "type": "http",
-                "scheme": "bearer",
-                "bearerFormat": "JWT",
-                "description": "Enter: Bearer <token>"
-            }
+from app.utils.compression import available_encodings, compress, negotiate_encoding
+
+OPENAPI_URL = "/openapi.json"
+DOCS_URL = "/docs"
+DOCS_OAUTH2_REDIRECT_URL = "/docs/oauth2-redirect"
+REDOC_URL = "/redoc"
+
+SECURITY_SCHEME = "BearerAuth"
+
+def build_openapi(app: FastAPI) -> Dict[str, Any]:
+    """The OpenAPI schema, with bearer auth on every operation that needs it.
+
+    FastAPI already marks operations whose dependencies include a security
+    scheme (`oauth2_scheme`, via get_current_user or get_admin_user); those
+    are switched to the plain bearer scheme clients actually use, since
+    /token takes JSON rather than the OAuth2 password form.
+    """
+    openapi_schema = get_openapi(
+        title="Cap Table Management API",
+        version="1.0.0",
+        description="API for managing company capitalization tables",
+        routes=app.routes,
+    )
+
+    components = openapi_schema.setdefault("components", {})
+    components["securitySchemes"] = {
+        SECURITY_SCHEME: {
+            "type": "http",
+            "scheme": "bearer",
+            "bearerFormat": "JWT",
+            "description": "Enter: Bearer <token>"
         }
-        
-        # Ensure schemas exist under components
-        if "schemas" not in openapi_schema["components"]:
-            openapi_schema["components"]["schemas"] = {}
-        
-        # Secure all paths that need authentication
-        paths_to_secure = [
-            "/api/v1/register",
-            "/api/v1/me",
-            "/api/v1/refresh",
-            "/api/v1/shareholders/",
-            "/api/v1/shareholders/{shareholder_id}",
-            "/api/v1/issuances/",
-            "/api/v1/issuances/{issuance_id}/certificate",
-            "/api/v1/issuances/distribution"
-        ]
-        
-        for path in paths_to_secure:
-            if path in openapi_schema["paths"]:
-                for method in openapi_schema["paths"][path]:
-                    if method.lower() in ["get", "post", "put", "delete"]:
-                        # Initialize security if not exists
-                        if "security" not in openapi_schema["paths"][path][method]:
-                            openapi_schema["paths"][path][method]["security"] = []
-                        # Add our security requirement
-                        openapi_schema["paths"][path][method]["security"].append({"BearerAuth": []})
-        
-        return openapi_schema
-    return inner
\ No newline at end of file
+    }
+    components.setdefault("schemas", {})
+
+    for operations in openapi_schema["paths"].values():
+        for operation in operations.values():
+            if operation.get("security"):
+                operation["security"] = [{SECURITY_SCHEME: []}]
+    return openapi_schema
+
+class EncodedDocument:
+    """A JSON document serialized once, with precompressed variants and ETags"""
+
+    def __init__(self, document: Dict[str, Any]):
+        self.document = document
+        # Same separators as FastAPI's JSONResponse
+        self.body = json.dumps(document, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.variants = {None: (self.body, f'"{digest}"')}
+        for encoding in available_encodings():
+            # Each encoding is a representation of its own, so it gets its own strong ETag
+            self.variants[encoding] = (compress(self.body, encoding), f'"{digest}-{encoding}"')
+
+    def response(self, request: Request) -> Response:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        body, etag = self.variants[encoding]
+        headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+class OpenAPIDocument:
+    """The app's OpenAPI schema, generated and encoded once per process"""
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self._encoded: Optional[EncodedDocument] = None
+        self._lock = threading.Lock()
+
+    def build(self) -> EncodedDocument:
+        if self._encoded is None:
+            with self._lock:
+                if self._encoded is None:
+                    self._encoded = EncodedDocument(build_openapi(self.app))
+        return self._encoded
+
+    def schema(self) -> Dict[str, Any]:
+        return self.build().document
+
+    def response(self, request: Request) -> Response:
+        return self.build().response(request)
+
+def install_openapi(app: FastAPI) -> OpenAPIDocument:
+    """Serve the schema and the Swagger UI / ReDoc pages for an app created
+    with `openapi_url=None`; call after every router is included."""
+    document = OpenAPIDocument(app)
+    app.state.openapi_document = document
+    app.openapi = document.schema
+    app.openapi_schema = None
+
+    async def openapi(request: Request) -> Response:
+        return document.response(request)
+
+    async def swagger_ui(request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return get_swagger_ui_html(
+            openapi_url=root_path + OPENAPI_URL,
+            title=f"{app.title} - Swagger UI",
+            oauth2_redirect_url=root_path + DOCS_OAUTH2_REDIRECT_URL
+        )
+
+    async def swagger_ui_redirect(request: Request) -> Response:
+        return get_swagger_ui_oauth2_redirect_html()
+
+    async def redoc(request: Request) -> Response:
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        return get_redoc_html(openapi_url=root_path + OPENAPI_URL, title=f"{app.title} - ReDoc")
+
+    app.add_route(OPENAPI_URL, openapi, include_in_schema=False)
+    app.add_route(DOCS_URL, swagger_ui, include_in_schema=False)
+    app.add_route(DOCS_OAUTH2_REDIRECT_URL, swagger_ui_redirect, include_in_schema=False)
+    app.add_route(REDOC_URL, redoc, include_in_schema=False)
+    return document
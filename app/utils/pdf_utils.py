@@ -7,11 +7,22 @@ from reportlab.lib import colors
 from datetime import datetime
 import os
 from app.core.config import settings
+from app.core.tracing import traced
 
+# Bump whenever the certificate layout changes; stored certificates rendered
+# with an older version are re-rendered in the background. 3 keeps the
+# layout of 2 and is there so the re-render deletes the stored compressed copies
+CERTIFICATE_TEMPLATE_VERSION = 3
+
+@traced("pdf.generate_share_certificate")
 def generate_share_certificate(issuance_data: dict, shareholder_data: dict) -> BytesIO:
-    """Generate a PDF share certificate"""
+    """Generate a PDF share certificate.
+
+    The output depends only on the arguments (no render time, fixed PDF
+    metadata), so rendering the same certificate twice stores one artifact.
+    """
     buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf = canvas.Canvas(buffer, pagesize=letter, invariant=1)
     
     # Set up styles
     styles = getSampleStyleSheet()
@@ -22,8 +33,8 @@ def generate_share_certificate(issuance_data: dict, shareholder_data: dict) -> B
     
     # Company Info
     pdf.setFont("Helvetica", 12)
-    pdf.drawString(100, 700, f"Company: {settings.COMPANY_NAME}")
-    pdf.drawString(100, 680, f"Date: {datetime.now().strftime('%Y-%m-%d')}")
+    pdf.drawString(100, 700, f"Company: {issuance_data.get('company_name') or settings.COMPANY_NAME}")
+    pdf.drawString(100, 680, f"Date: {issuance_data['issue_date'].strftime('%Y-%m-%d')}")
     
     # Certificate Number
     pdf.setFont("Helvetica-Bold", 14)
@@ -60,8 +71,54 @@ def generate_share_certificate(issuance_data: dict, shareholder_data: dict) -> B
     # Footer
     pdf.setFont("Helvetica-Oblique", 10)
     pdf.drawString(100, 100, "This is an electronically generated certificate")
-    pdf.drawString(100, 80, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     pdf.save()
     buffer.seek(0)
-    return buffer
\ No newline at end of file
+    return buffer
+
+def generate_holdings_statement(statement: dict) -> bytes:
+    """Generate a PDF holdings statement.
+
+    Takes and returns plain picklable values so it can run in a worker process.
+    """
+    buffer = BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    
+    pdf.setFont("Helvetica-Bold", 22)
+    pdf.drawCentredString(300, 750, "HOLDINGS STATEMENT")
+    
+    pdf.setFont("Helvetica", 12)
+    pdf.drawString(100, 710, f"Company: {statement.get('company_name') or settings.COMPANY_NAME}")
+    pdf.drawString(100, 690, f"Period: {statement['period']} ({statement['period_start']:%Y-%m-%d} to {statement['period_end']:%Y-%m-%d})")
+    pdf.drawString(100, 660, f"Shareholder: {statement['full_name'] or statement['email']}")
+    pdf.drawString(100, 640, f"Shareholder ID: {statement['shareholder_id']}")
+    
+    total_invested = statement['total_invested']
+    data = [
+        ["Holding", "Value"],
+        ["Shares held at period end", f"{statement['total_shares']:,}"],
+        ["Shares issued this period", f"{statement['issued_in_period']:,}"],
+        ["Issuances to date", str(statement['issuance_count'])],
+        ["Ownership", f"{statement['ownership_percentage']:.4f}%"],
+        ["Total invested", f"${total_invested:,.2f}" if total_invested else "N/A"],
+    ]
+    
+    table = Table(data, colWidths=[220, 180])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 10),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+    table.wrapOn(pdf, 100, 480)
+    table.drawOn(pdf, 100, 480)
+    
+    pdf.setFont("Helvetica-Oblique", 10)
+    pdf.drawString(100, 100, "This is an electronically generated statement")
+    pdf.drawString(100, 80, f"Generated on: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    
+    pdf.save()
+    return buffer.getvalue()
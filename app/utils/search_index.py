@@ -0,0 +1,133 @@
+import bisect
+import heapq
+import re
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+_WORD_SPLIT = re.compile(r"[\s@._\-+]+")
+
+def normalize(value: Optional[str]) -> str:
+    return (value or "").strip().lower()
+
+def trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+class ShareholderSearchIndex:
+    """In-process prefix and substring index over shareholder names and emails.
+
+    Used where the database has no trigram support (SQLite). Prefix lookups
+    bisect sorted term lists; substring lookups intersect trigram postings
+    and only verify the surviving candidates. Results are ranked:
+    whole-field prefix, then word prefix, then substring anywhere, and by
+    name within a rank; every match is ranked before the limit applies.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+
+    def _clear(self):
+        self._docs: Dict[str, Tuple[str, str, dict]] = {}
+        # Sorted (term, doc_id) pairs for whole fields and for single words
+        self._fields: List[Tuple[str, str]] = []
+        self._words: List[Tuple[str, str]] = []
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self.built = False
+
+    def build(self, rows: Iterable[dict]) -> None:
+        """Replace the index contents; each row needs id, full_name and email"""
+        with self._lock:
+            self._clear()
+            fields, words = [], []
+            for row in rows:
+                name, email = normalize(row.get("full_name")), normalize(row.get("email"))
+                self._docs[row["id"]] = (name, email, row)
+                fields.extend(self._field_terms(row["id"], name, email))
+                words.extend(self._word_terms(row["id"], name, email))
+                for gram in trigrams(name) | trigrams(email):
+                    self._postings[gram].add(row["id"])
+            fields.sort()
+            words.sort()
+            self._fields, self._words = fields, words
+            self.built = True
+
+    @staticmethod
+    def _field_terms(doc_id, name, email):
+        return [(term, doc_id) for term in (name, email) if term]
+
+    @staticmethod
+    def _word_terms(doc_id, name, email):
+        return [(word, doc_id) for word in set(_WORD_SPLIT.split(name) + _WORD_SPLIT.split(email)) if word]
+
+    def remove(self, doc_id: str) -> None:
+        with self._lock:
+            entry = self._docs.pop(doc_id, None)
+            if entry is None:
+                return
+            name, email, _ = entry
+            for term in self._field_terms(doc_id, name, email):
+                self._discard(self._fields, term)
+            for term in self._word_terms(doc_id, name, email):
+                self._discard(self._words, term)
+            for gram in trigrams(name) | trigrams(email):
+                postings = self._postings.get(gram)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del self._postings[gram]
+
+    def upsert(self, row: dict) -> None:
+        with self._lock:
+            self.remove(row["id"])
+            name, email = normalize(row.get("full_name")), normalize(row.get("email"))
+            self._docs[row["id"]] = (name, email, row)
+            for term in self._field_terms(row["id"], name, email):
+                bisect.insort(self._fields, term)
+            for term in self._word_terms(row["id"], name, email):
+                bisect.insort(self._words, term)
+            for gram in trigrams(name) | trigrams(email):
+                self._postings[gram].add(row["id"])
+
+    @staticmethod
+    def _discard(terms: List[Tuple[str, str]], term: Tuple[str, str]):
+        i = bisect.bisect_left(terms, term)
+        if i < len(terms) and terms[i] == term:
+            del terms[i]
+
+    @staticmethod
+    def _prefix_matches(terms: List[Tuple[str, str]], prefix: str):
+        i = bisect.bisect_left(terms, (prefix, ""))
+        while i < len(terms) and terms[i][0].startswith(prefix):
+            yield terms[i][1]
+            i += 1
+
+    def search(self, query: str, limit: int = 20) -> List[dict]:
+        q = normalize(query)
+        if not q:
+            return []
+        with self._lock:
+            ranked: Dict[str, int] = {}
+            # Term order is not result order, so no scan stops early
+            for rank, terms in ((0, self._fields), (1, self._words)):
+                for doc_id in self._prefix_matches(terms, q):
+                    ranked.setdefault(doc_id, rank)
+
+            # Substring matches rank last: only needed while prefixes leave room
+            if len(ranked) < limit and len(q) >= 3:
+                # Walk the rarest trigram's postings, so common substrings
+                # never materialise a full intersection
+                postings = sorted((self._postings.get(g, ()) for g in trigrams(q)), key=len)
+                docs = self._docs
+                for doc_id in postings[0]:
+                    if doc_id in ranked or not all(doc_id in p for p in postings[1:]):
+                        continue
+                    name, email, _ = docs[doc_id]
+                    if q in name or q in email:
+                        ranked[doc_id] = 2
+
+            ordered = heapq.nsmallest(limit, ranked.items(), key=lambda item: (item[1], self._docs[item[0]][0], item[0]))
+            return [{**self._docs[doc_id][2], "rank": rank} for doc_id, rank in ordered]
+
+    def __len__(self):
+        return len(self._docs)
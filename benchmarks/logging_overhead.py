@@ -0,0 +1,78 @@
+"""Measure what logging adds to a request, synchronously and through the queue.
+
+Every request writes one access record. With --sink-delay the log stream
+sleeps on each write, standing in for a slow disk or log shipper: the
+synchronous handler pays it on the request thread, the queue does not.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.logging_overhead --requests 2000 --sink-delay 0.5
+"""
+import argparse
+import logging
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.logging_config import JsonFormatter, RequestContextFilter, configure_logging, shutdown_logging
+
+class SlowSink:
+    """A write-only stream that takes `delay` seconds per write"""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.writes = 0
+
+    def write(self, text: str) -> int:
+        if self.delay:
+            time.sleep(self.delay)
+        self.writes += 1
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+def run(client: TestClient, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/")
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--sink-delay", type=float, default=0.0, help="Milliseconds each log write takes")
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    root = logging.getLogger()
+    root.setLevel(logging.INFO)
+    run(client, 100)  # warm up
+
+    baseline = None
+    for mode in ("off", "sync", "queue"):
+        sink = SlowSink(args.sink_delay / 1000)
+        if mode == "sync":
+            handler = logging.StreamHandler(sink)
+            handler.setFormatter(JsonFormatter())
+            handler.addFilter(RequestContextFilter())
+            root.addHandler(handler)
+        elif mode == "queue":
+            configure_logging(sink)
+
+        elapsed = run(client, args.requests)
+
+        if mode == "sync":
+            root.removeHandler(handler)
+        elif mode == "queue":
+            drain_start = time.perf_counter()
+            shutdown_logging()
+            print(f"  (queue drained {sink.writes} records in {time.perf_counter() - drain_start:.2f}s after the run)")
+
+        per_request = elapsed / args.requests * 1e6
+        baseline = baseline or per_request
+        print(
+            f"logging={mode:<5} requests={args.requests} wall={elapsed:.2f}s "
+            f"per_request={per_request:.0f}us overhead={per_request - baseline:+.0f}us"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Replay a credential-stuffing run against POST /token and report CPU usage.
+
+Usage (against a throwaway database):
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.login_throttle --attempts 200
+"""
+import argparse
+import time
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.rate_limit import login_rate_limiter
+
+def replay_attack(client: TestClient, attempts: int, email: str):
+    statuses = {}
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    for i in range(attempts):
+        response = client.post("/api/v1/token", json={"email": email, "password": f"guess-{i}"})
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return time.process_time() - cpu_start, time.perf_counter() - wall_start, statuses
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--attempts", type=int, default=200)
+    parser.add_argument("--email", default="admin@example.com", help="An existing account, so every guess costs a bcrypt verify")
+    args = parser.parse_args()
+
+    with TestClient(app) as client:
+        for enabled in (False, True):
+            settings.LOGIN_RATE_LIMIT_ENABLED = enabled
+            login_rate_limiter.clear()
+            cpu, wall, statuses = replay_attack(client, args.attempts, args.email)
+            print(
+                f"throttling={'on ' if enabled else 'off'} attempts={args.attempts} "
+                f"cpu={cpu:.2f}s wall={wall:.2f}s cpu/attempt={cpu / args.attempts * 1000:.1f}ms statuses={statuses}"
+            )
+
+if __name__ == "__main__":
+    main()
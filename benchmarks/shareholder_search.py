@@ -0,0 +1,82 @@
+"""Seed shareholders and time search_shareholders at p50/p95.
+
+Usage (against a throwaway database; Postgres exercises the trigram indexes,
+SQLite the in-process index):
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.shareholder_search --shareholders 100000
+"""
+import argparse
+import random
+import statistics
+import string
+import time
+import uuid
+from sqlalchemy import insert
+from app.db.base import Base
+from app.db.init_db import create_search_indexes
+from app.db.session import engine, SessionLocal
+from app.models.user_model import User, UserRole
+from app.services.shareholder_search_service import search_shareholders, invalidate_search_index
+
+QUERIES = ["a", "jo", "smi", "son", "example", "ette", "zz9", "mar", "@corp", "lee"]
+
+def random_name(rng: random.Random) -> str:
+    first = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))).capitalize()
+    last = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10))).capitalize()
+    return f"{first} {last}"
+
+def seed(count: int):
+    rng = random.Random(42)
+    domains = ["example.com", "corp.io", "mail.net"]
+    with engine.begin() as conn:
+        conn.execute(User.__table__.delete().where(User.email.like("bench-%")))
+        batch = []
+        for i in range(count):
+            name = random_name(rng)
+            batch.append({
+                "id": str(uuid.uuid4()),
+                "email": f"bench-{i}-{name.split()[1].lower()}@{rng.choice(domains)}",
+                "hashed_password": "x",
+                "full_name": name,
+                "role": UserRole.SHAREHOLDER,
+                "is_active": True
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(User), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(User), batch)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--shareholders", type=int, default=100000)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    create_search_indexes()
+    if not args.no_seed:
+        seed(args.shareholders)
+    invalidate_search_index()
+
+    db = SessionLocal()
+    try:
+        # First call builds the in-process index where one is used
+        start = time.perf_counter()
+        search_shareholders(db, "warmup")
+        print(f"dialect={engine.dialect.name} warmup={(time.perf_counter() - start) * 1000:.0f}ms")
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.rounds):
+                start = time.perf_counter()
+                results = search_shareholders(db, query, 20)
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95) - 1]
+            print(f"q={query!r:10} hits={len(results):3} p50={statistics.median(timings):.2f}ms p95={p95:.2f}ms")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Measure what tracing adds to a request with sampling off and fully on.
+
+Requests go to the shareholder listing (a few SQL statements each) as an
+existing admin. Sampled traces are written to a temporary file.
+
+Usage (against a throwaway database with an admin account):
+    DATABASE_URL=sqlite:///./bench.db python -m benchmarks.tracing_overhead --requests 1000
+"""
+import argparse
+import os
+import tempfile
+import time
+import timeit
+from fastapi.testclient import TestClient
+from app.main import app
+from app.core.config import settings
+from app.core.tracing import OTLPJsonExporter, span, tracer
+
+def run(client: TestClient, requests: int, headers: dict) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get("/api/v1/shareholders/", headers=headers)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--email", default="admin@example.com")
+    parser.add_argument("--password", default="adminpassword")
+    args = parser.parse_args()
+
+    # The cost an unsampled request pays per instrumented call
+    per_call = min(timeit.repeat(lambda: span("SELECT"), number=100000, repeat=5)) / 100000
+    print(f"span() outside a trace: {per_call * 1e9:.0f}ns per call")
+
+    client = TestClient(app)
+    token = client.post("/api/v1/token", json={"email": args.email, "password": args.password}).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    run(client, 100, headers)  # warm up
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracer.exporter = OTLPJsonExporter(path=os.path.join(directory, "traces.jsonl"))
+        baseline = None
+        for rate in (0.0, 1.0):
+            settings.TRACE_SAMPLE_RATE = rate
+            elapsed = run(client, args.requests, headers)
+            tracer.exporter.flush()
+            per_request = elapsed / args.requests * 1e6
+            baseline = baseline or per_request
+            print(
+                f"sample_rate={rate:<4} requests={args.requests} wall={elapsed:.2f}s "
+                f"per_request={per_request:.0f}us overhead={per_request - baseline:+.0f}us "
+                f"traces_exported={tracer.exporter.exported}"
+            )
+        tracer.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+from datetime import datetime
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal, engine
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.core.cache import bump_cap_table_version
+from app.services.analytics_service import _filters, _grouping_sets_query, _union_query
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin with two shareholders and their issuances"""
+    try:
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    admin = User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    alice = User(email="alice@example.com", hashed_password="x", full_name="Alice", role=UserRole.SHAREHOLDER)
+    bob = User(email="bob@example.com", hashed_password="x", full_name="Bob", role=UserRole.SHAREHOLDER)
+    db.add_all([admin, alice, bob])
+    db.flush()
+    db.add_all([
+        ShareIssuance(shareholder_id=alice.id, number_of_shares=3, price_per_share=Decimal("10.10"), issue_date=datetime(2025, 1, 15)),
+        ShareIssuance(shareholder_id=alice.id, number_of_shares=7, price_per_share=Decimal("0.10"), issue_date=datetime(2025, 2, 1)),
+        ShareIssuance(shareholder_id=bob.id, number_of_shares=10, price_per_share=None, issue_date=datetime(2025, 2, 20)),
+    ])
+    db.commit()
+    bump_cap_table_version()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_capital_analytics():
+    response = client.get("/api/v1/analytics/capital", headers=get_admin_auth_headers())
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["issuance_count"] == 3
+    assert data["total_shares"] == 20
+    # 3 * 10.10 + 7 * 0.10, exact
+    assert Decimal(data["total_capital_raised"]) == Decimal("31.00")
+    # Weighted over priced shares only: 31.00 / 10
+    assert Decimal(data["weighted_average_price"]) == Decimal("3.10")
+    
+    months = {m["month"]: m for m in data["by_month"]}
+    assert months["2025-01"]["total_shares"] == 3
+    assert months["2025-02"]["issuance_count"] == 2
+    
+    holders = {h["shareholder_name"]: h for h in data["by_shareholder"]}
+    assert Decimal(holders["Alice"]["capital_raised"]) == Decimal("31.00")
+    assert holders["Bob"]["total_shares"] == 10
+
+def test_capital_analytics_date_range_and_cache_invalidation(db):
+    headers = get_admin_auth_headers()
+    response = client.get(
+        "/api/v1/analytics/issuances/monthly",
+        params={"start_date": "2025-02-01T00:00:00", "end_date": "2025-03-01T00:00:00"},
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert [m["month"] for m in response.json()] == ["2025-02"]
+    
+    # A new issuance through the API invalidates the cached summary
+    bob = db.query(User).filter(User.email == "bob@example.com").first()
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": bob.id, "number_of_shares": 5, "price_per_share": 2.5},
+        headers=headers
+    )
+    assert response.status_code == 201
+    response = client.get("/api/v1/analytics/capital/summary", headers=headers)
+    assert response.json()["total_shares"] == 25
+    assert Decimal(response.json()["total_capital_raised"]) == Decimal("43.50")
+
+def test_analytics_requires_admin():
+    response = client.get("/api/v1/analytics/capital")
+    assert response.status_code == 401
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="GROUPING SETS is only used on Postgres")
+def test_grouping_sets_query_matches_the_union_fallback(db):
+    filters = _filters(None, None, None)
+    def rows(query):
+        return sorted(
+            db.execute(query).all(),
+            key=lambda row: tuple("" if value is None else str(value) for value in row)
+        )
+
+    grouped = rows(_grouping_sets_query("postgresql", filters))
+    assert grouped == rows(_union_query("postgresql", filters))
+    assert [row[0] for row in grouped].count("month") == 2
+    assert [row[0] for row in grouped].count("shareholder") == 2
+    # NUMERIC sums come back as exact decimals
+    [total] = [row for row in grouped if row[0] == "total"]
+    assert total.capital_raised == Decimal("31.0000")
@@ -0,0 +1,120 @@
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.core.audit import audit_log
+from app.models.audit_model import AuditEvent
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create admin and one shareholder"""
+    try:
+        audit_log.flush()
+        db.query(AuditEvent).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add_all([
+        User(
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(id="holder", email="holder@example.com", hashed_password="x", full_name="Holder", role=UserRole.SHAREHOLDER)
+    ])
+    db.commit()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_issuance_and_certificate_download_are_audited(db):
+    headers = get_admin_auth_headers()
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": "holder", "number_of_shares": 100, "price_per_share": 1.25},
+        headers=headers
+    )
+    assert response.status_code == 201
+    issuance_id = response.json()["id"]
+    assert client.get(f"/api/v1/issuances/{issuance_id}/certificate", headers=headers).status_code == 200
+    
+    # Nothing is written on the request path
+    assert audit_log.pending() == 2
+    
+    response = client.get(
+        "/api/v1/admin/audit-events",
+        params={"entity_type": "issuance", "entity_id": issuance_id},
+        headers=headers
+    )
+    assert response.status_code == 200
+    events = response.json()
+    assert [e["action"] for e in events] == ["certificate.downloaded", "issuance.created"]
+    admin = db.query(User).filter(User.email == "admin@example.com").first()
+    assert all(e["actor_id"] == admin.id for e in events)
+    details = events[1]["details"]
+    assert details["shareholder_id"] == "holder"
+    assert details["number_of_shares"] == 100
+    assert Decimal(details["price_per_share"]) == Decimal("1.25")
+    assert audit_log.pending() == 0
+
+def test_audit_events_filter_by_action_and_time():
+    headers = get_admin_auth_headers()
+    before = datetime.now(timezone.utc) - timedelta(seconds=1)
+    client.put("/api/v1/shareholders/holder", json={"full_name": "Renamed"}, headers=headers)
+    client.delete("/api/v1/shareholders/holder", headers=headers)
+    
+    events = client.get("/api/v1/admin/audit-events", params={"action": "shareholder.updated"}, headers=headers).json()
+    assert len(events) == 1
+    assert events[0]["details"] == {"fields": ["full_name"]}
+    
+    recent = client.get("/api/v1/admin/audit-events", params={"since": before.isoformat()}, headers=headers).json()
+    assert [e["action"] for e in recent] == ["shareholder.deactivated", "shareholder.updated"]
+    old = client.get("/api/v1/admin/audit-events", params={"until": before.isoformat()}, headers=headers).json()
+    assert old == []
+    
+    assert len(client.get("/api/v1/admin/audit-events", params={"limit": 1}, headers=headers).json()) == 1
+
+def test_audit_events_require_admin():
+    assert client.get("/api/v1/admin/audit-events").status_code == 401
+
+def test_audit_writer_counters_in_metrics():
+    headers = get_admin_auth_headers()
+    client.post("/api/v1/issuances/", json={"shareholder_id": "holder", "number_of_shares": 1}, headers=headers)
+    written = audit_log.stats()["written"]
+    
+    client.get("/api/v1/admin/audit-events", headers=headers)
+    audit = client.get("/api/v1/admin/metrics", headers=headers).json()["audit"]
+    assert audit["written"] == written + 1
+    assert audit["pending"] == 0
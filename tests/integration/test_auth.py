@@ -6,6 +6,9 @@ from app.main import app
 from app.db.session import SessionLocal
 from app.services.auth_service import get_password_hash
 from app.models.user_model import User, UserRole
+from app.core.rate_limit import login_rate_limiter
+from app.core.passwords import password_hasher
+from passlib.context import CryptContext
 
 client = TestClient(app)
 
@@ -22,6 +25,7 @@ def db():
 @pytest.fixture(autouse=True)
 def setup_and_teardown(db):
     """Clean database and create test admin before each test"""
+    login_rate_limiter.clear()
     try:
         # Delete in correct order to respect foreign key constraints
         db.query(ShareIssuance).delete()
@@ -108,6 +112,24 @@ def test_login_failure_wrong_password():
     assert response.status_code == 401
     assert response.json()["detail"] == "Incorrect email or password"
 
+def test_login_throttled_after_repeated_failures():
+    for _ in range(5):
+        response = client.post("/api/v1/token", json={
+            "email": "admin@example.com",
+            "password": "wrongpass"
+        })
+        assert response.status_code == 401
+    
+    # Further attempts are rejected without checking the password
+    response = client.post("/api/v1/token", json={
+        "email": "admin@example.com",
+        "password": "adminpassword"
+    })
+    assert response.status_code == 429
+    assert int(response.headers["retry-after"]) > 0
+    
+    login_rate_limiter.clear()
+
 def test_refresh_token(db):
     # Create test user and get tokens
     user = User(
@@ -164,4 +186,36 @@ def test_get_me(db):
     assert response.status_code == 200
     data = response.json()
     assert data["email"] == "testuser@example.com"
-    assert "id" in data
\ No newline at end of file
+    assert "id" in data
+
+def test_login_rehashes_outdated_password_hash(db):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("testpass")
+    user = User(
+        email="legacy@example.com",
+        hashed_password=old_hash,
+        full_name="Legacy User",
+        role=UserRole.SHAREHOLDER,
+        is_active=True
+    )
+    db.add(user)
+    db.commit()
+    
+    headers = get_auth_headers("legacy@example.com", "testpass")
+    assert client.get("/api/v1/me", headers=headers).status_code == 200
+    
+    db.refresh(user)
+    assert user.hashed_password != old_hash
+    assert user.hashed_password.split("$")[2] == f"{password_hasher.rounds:02d}"
+    # And the new hash still logs in, without another rewrite
+    new_hash = user.hashed_password
+    get_auth_headers("legacy@example.com", "testpass")
+    db.refresh(user)
+    assert user.hashed_password == new_hash
+
+def test_metrics_report_password_hashing():
+    headers = get_auth_headers("admin@example.com", "adminpassword")
+    
+    hashing = client.get("/api/v1/admin/metrics", headers=headers).json()["password_hashing"]
+    assert hashing["rounds"] == password_hasher.rounds
+    assert hashing["verify"]["count"] >= 1
+    assert hashing["verify"]["p50_ms"] > 0
@@ -0,0 +1,206 @@
+import json
+from unittest.mock import patch
+import pytest
+from sqlalchemy.exc import OperationalError
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.issuance_model import ShareIssuance
+from app.models.user_model import User, UserRole
+from app.models.shareholder_model import ShareholderProfile
+from app.models.idempotency_model import IdempotencyKey
+from app.core.cache import get_cap_table_version
+from app.core.config import settings
+import app.services.shareholder_import_service as import_service
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db, monkeypatch):
+    """Clean database and create test admin before each test"""
+    try:
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    admin = User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    db.add(admin)
+    db.commit()
+    # Hash in the test process unless a test asks for the pool
+    monkeypatch.setattr(settings, "BULK_IMPORT_HASH_WORKERS", 0)
+    yield
+
+def get_admin_auth_headers(content_type):
+    """Helper to get admin auth headers for an upload"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}", "Content-Type": content_type}
+
+def upload(body, content_type="text/csv"):
+    return client.post("/api/v1/shareholders/bulk", content=body, headers=get_admin_auth_headers(content_type))
+
+def test_csv_upload_creates_shareholders_and_reports_each_row(db):
+    db.add(User(email="taken@example.com", hashed_password="x", role=UserRole.SHAREHOLDER))
+    db.commit()
+    body = (
+        "email,full_name,password,address,phone\n"
+        "alice@example.com,Alice,alicepassword,\"1 Main St,\nSpringfield\",+111\n"
+        "bob@example.com,Bob,,,\n"
+        "not-an-email,Nobody,pw,,\n"
+        "taken@example.com,Taken,pw,,\n"
+        "alice@example.com,Alice Again,pw,,\n"
+        "\n"
+    )
+    response = upload(body)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["created"], data["invited"], data["failed"]) == (2, 1, 3)
+
+    rows = {row["row"]: row for row in data["rows"]}
+    # Alice's quoted address spans lines 2-3, so Bob starts on line 4
+    assert rows[2]["status"] == "created" and rows[2]["invite_token"] is None
+    assert rows[4]["status"] == "created" and rows[4]["invite_token"]
+    assert rows[5]["status"] == "failed" and rows[5]["error"].startswith("email:")
+    assert rows[6]["error"] == "Email already registered"
+    assert rows[7]["error"] == "Duplicate of row 2"
+
+    db.expire_all()
+    alice = db.query(User).filter(User.email == "alice@example.com").one()
+    assert alice.role == UserRole.SHAREHOLDER
+    assert alice.shareholder_profile.address == "1 Main St,\nSpringfield"
+    assert db.query(User).filter(User.email == "bob@example.com").one().shareholder_profile is None
+
+    login = client.post("/api/v1/token", json={"email": "alice@example.com", "password": "alicepassword"})
+    assert login.status_code == 200
+
+def test_invited_shareholder_sets_a_password_once():
+    token = upload("email,full_name\ncarol@example.com,Carol\n").json()["rows"][0]["invite_token"]
+    # The invite secret is not a password
+    assert client.post("/api/v1/token", json={"email": "carol@example.com", "password": token}).status_code == 401
+
+    accepted = client.post("/api/v1/invites/accept", json={"token": token, "password": "carolpassword"})
+    assert accepted.status_code == 200, accepted.text
+    assert accepted.json()["user"]["email"] == "carol@example.com"
+    assert client.post("/api/v1/token", json={"email": "carol@example.com", "password": "carolpassword"}).status_code == 200
+
+    again = client.post("/api/v1/invites/accept", json={"token": token, "password": "otherpassword"})
+    assert again.status_code == 400
+
+def test_expired_invite_is_rejected(db):
+    token = upload("email\ndave@example.com\n").json()["rows"][0]["invite_token"]
+    dave = db.query(User).filter(User.email == "dave@example.com").one()
+    # Backdate the stored expiry by rewriting it
+    _, _, digest = dave.hashed_password.rpartition("$")
+    dave.hashed_password = f"invite$1${digest}"
+    db.commit()
+
+    response = client.post("/api/v1/invites/accept", json={"token": token, "password": "davepassword"})
+    assert response.status_code == 400
+
+def test_invite_tokens_are_not_stored_for_idempotent_retries(db):
+    headers = {**get_admin_auth_headers("text/csv"), "Idempotency-Key": "bulk-invites"}
+    first = client.post("/api/v1/shareholders/bulk", content="email\nerin@example.com\n", headers=headers)
+    assert first.status_code == 200, first.text
+    assert first.headers["cache-control"] == "no-store"
+    token = first.json()["rows"][0]["invite_token"]
+
+    db.expire_all()
+    row = db.query(IdempotencyKey).filter(IdempotencyKey.key == "bulk-invites").one()
+    assert token.split(".", 1)[1].encode() not in row.response_body
+
+    retry = client.post("/api/v1/shareholders/bulk", content="email\nerin@example.com\n", headers=headers)
+    assert retry.status_code == 409
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert db.query(User).filter(User.email == "erin@example.com").count() == 1
+
+def test_ndjson_upload_in_chunks(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+    lines = [json.dumps({"email": f"holder{i}@example.com", "full_name": f"Holder {i}", "password": "pw"}) for i in range(5)]
+    lines.insert(2, "{not json")
+    lines.append(json.dumps(["not", "an", "object"]))
+    response = upload("\n".join(lines), "application/x-ndjson")
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["created"], data["failed"]) == (5, 2)
+    assert [row["row"] for row in data["rows"] if row["status"] == "failed"] == [3, 7]
+
+    listing = client.get("/api/v1/shareholders/", headers=get_admin_auth_headers("application/json")).json()
+    assert len(listing) == 5
+
+def test_each_committed_chunk_is_announced(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+    published = []
+    monkeypatch.setattr(import_service, "publish_event", lambda kind, data, **scope: published.append((kind, data, scope)))
+    body = "email,password\n" + "".join(f"announced{i}@example.com,pw\n" for i in range(3))
+    data = upload(body).json()
+    assert data["created"] == 3
+
+    created = {row["id"] for row in data["rows"]}
+    assert {data["id"] for _, data, _ in published} == created
+    assert all(kind == "shareholder.updated" and data["action"] == "created" for kind, data, _ in published)
+    assert all(scope == {"shareholder_id": data["id"], "company_id": "default"} for _, data, scope in published)
+
+def test_passwords_hashed_in_worker_processes(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_HASH_WORKERS", 2)
+    body = "email,password\n" + "".join(f"pooled{i}@example.com,password{i}\n" for i in range(4))
+    data = upload(body).json()
+    assert data["created"] == 4
+    login = client.post("/api/v1/token", json={"email": "pooled3@example.com", "password": "password3"})
+    assert login.status_code == 200
+
+    # Later uploads reuse the same processes
+    pool = import_service._hash_pool
+    assert pool is not None
+    assert upload("email,password\nagain1@example.com,pw1\nagain2@example.com,pw2\n").json()["created"] == 2
+    assert import_service._hash_pool is pool
+
+def test_failed_chunk_is_reported_and_earlier_chunks_are_visible(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_IMPORT_CHUNK_SIZE", 2)
+    insert_chunk = import_service._insert_chunk
+    calls = []
+
+    def fail_second_chunk(*args):
+        calls.append(1)
+        if len(calls) == 2:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        return insert_chunk(*args)
+
+    version = get_cap_table_version("default")
+    body = "email\n" + "".join(f"chunked{i}@example.com\n" for i in range(5))
+    with patch.object(import_service, "_insert_chunk", side_effect=fail_second_chunk):
+        response = upload(body)
+    assert response.status_code == 200, response.text
+    data = response.json()
+    assert (data["created"], data["failed"]) == (3, 2)
+    assert [row["row"] for row in data["rows"] if row["status"] == "failed"] == [4, 5]
+    assert get_cap_table_version("default") > version
+
+def test_upload_is_rejected_as_a_whole(monkeypatch):
+    assert upload("email\na@example.com\n", "application/json").status_code == 415
+    assert upload("mail,name\na@example.com,A\n").status_code == 400
+    monkeypatch.setattr(settings, "BULK_IMPORT_MAX_ROWS", 1)
+    assert upload("email\na@example.com\nb@example.com\n").status_code == 413
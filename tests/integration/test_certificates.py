@@ -0,0 +1,195 @@
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.certificate_artifact_model import CertificateArtifact
+from app.core.security import get_password_hash
+from app.utils.artifact_store import LocalArtifactStore, get_artifact_store, set_artifact_store
+from app.utils.pdf_utils import generate_share_certificate
+import app.services.certificate_service as certificate_service
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db, tmp_path):
+    """Clean database, create an admin and a shareholder, and store artifacts in a temp dir"""
+    try:
+        db.query(CertificateArtifact).delete()
+        db.query(ShareIssuance).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add_all([
+        User(
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(email="holder@example.com", hashed_password="x", full_name="Holder", role=UserRole.SHAREHOLDER)
+    ])
+    db.commit()
+    
+    previous = get_artifact_store()
+    set_artifact_store(LocalArtifactStore(str(tmp_path)))
+    yield
+    set_artifact_store(previous)
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def create_issuance(db, headers):
+    holder = db.query(User).filter(User.email == "holder@example.com").first()
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": holder.id, "number_of_shares": 100, "price_per_share": 1.5},
+        headers=headers
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+def test_certificate_is_stored_once_and_served_from_the_store(db):
+    headers = get_admin_auth_headers()
+    issuance_id = create_issuance(db, headers)
+    
+    artifact = db.get(CertificateArtifact, issuance_id)
+    assert artifact is not None
+    assert get_artifact_store().exists(artifact.digest)
+    
+    with patch("app.services.certificate_service.generate_share_certificate") as render:
+        response = client.get(
+            f"/api/v1/issuances/{issuance_id}/certificate",
+            headers={**headers, "Accept-Encoding": "identity"}
+        )
+        render.assert_not_called()
+    
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    assert response.headers["etag"] == f'"{artifact.digest}"'
+    assert "max-age" in response.headers["cache-control"]
+    assert response.content == get_artifact_store().read(artifact.digest)
+
+def test_range_and_conditional_requests(db):
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "identity"}
+    issuance_id = create_issuance(db, headers)
+    url = f"/api/v1/issuances/{issuance_id}/certificate"
+    full = client.get(url, headers=headers)
+    
+    partial = client.get(url, headers={**headers, "Range": "bytes=0-99"})
+    assert partial.status_code == 206
+    assert partial.content == full.content[:100]
+    assert partial.headers["content-range"] == f"bytes 0-99/{len(full.content)}"
+    
+    cached = client.get(url, headers={**headers, "If-None-Match": full.headers["etag"]})
+    assert cached.status_code == 304
+
+def test_certificate_is_served_as_stored(db):
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "gzip, br"}
+    issuance_id = create_issuance(db, headers)
+    
+    response = client.get(f"/api/v1/issuances/{issuance_id}/certificate", headers=headers)
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert response.content.startswith(b"%PDF")
+    assert response.headers["etag"] == f'"{db.get(CertificateArtifact, issuance_id).digest}"'
+
+def test_missing_certificate_is_rendered_on_first_download(db):
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "identity"}
+    with patch("app.controllers.issuance_controller.send_certificate_notification"):
+        issuance_id = create_issuance(db, headers)
+    assert db.get(CertificateArtifact, issuance_id) is None
+    
+    with patch("app.services.certificate_service.generate_share_certificate", wraps=generate_share_certificate) as render:
+        client.get(f"/api/v1/issuances/{issuance_id}/certificate", headers=headers)
+        client.get(f"/api/v1/issuances/{issuance_id}/certificate", headers=headers)
+        assert render.call_count == 1
+
+def test_renamed_holder_gets_a_new_certificate(db):
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "identity"}
+    issuance_id = create_issuance(db, headers)
+    before = db.get(CertificateArtifact, issuance_id).digest
+    
+    db.query(User).filter(User.email == "holder@example.com").update({"full_name": "Holder Renamed"})
+    db.commit()
+    with patch("app.services.certificate_service.generate_share_certificate", wraps=generate_share_certificate) as render:
+        response = client.get(f"/api/v1/issuances/{issuance_id}/certificate", headers=headers)
+        client.get(f"/api/v1/issuances/{issuance_id}/certificate", headers=headers)
+        assert render.call_count == 1
+        assert render.call_args.args[1]["full_name"] == "Holder Renamed"
+    
+    db.expire_all()
+    after = db.get(CertificateArtifact, issuance_id).digest
+    assert after != before
+    assert response.headers["etag"] == f'"{after}"'
+    # The replaced certificate is removed from the store
+    assert not get_artifact_store().exists(before)
+    assert get_artifact_store().exists(after)
+
+def test_rendering_is_deterministic(db):
+    headers = get_admin_auth_headers()
+    issuance_id = create_issuance(db, headers)
+    issuance = db.get(ShareIssuance, issuance_id)
+    
+    first = certificate_service.render_certificate(issuance, issuance.shareholder)
+    assert certificate_service.render_certificate(issuance, issuance.shareholder) == first
+    assert get_artifact_store().digest(first) == db.get(CertificateArtifact, issuance_id).digest
+
+def test_template_version_change_rerenders_in_background_job(db, monkeypatch):
+    headers = get_admin_auth_headers()
+    issuance_id = create_issuance(db, headers)
+    
+    # Nothing to do while the template is unchanged
+    assert certificate_service.start_certificate_rerender() is False
+    assert certificate_service.rerender_stale_certificates() == 0
+    
+    digest = db.get(CertificateArtifact, issuance_id).digest
+    # A compressed copy an earlier version stored next to it
+    with open(get_artifact_store().path(f"{digest}.gzip"), "wb") as f:
+        f.write(b"compressed")
+    version = certificate_service.CERTIFICATE_TEMPLATE_VERSION + 1
+    monkeypatch.setattr(certificate_service, "CERTIFICATE_TEMPLATE_VERSION", version)
+    assert certificate_service.rerender_stale_certificates() == 1
+    
+    db.expire_all()
+    assert db.get(CertificateArtifact, issuance_id).template_version == version
+    assert certificate_service.start_certificate_rerender() is False
+    # Same inputs render the same bytes, which stay stored; the compressed copy goes
+    assert get_artifact_store().exists(digest)
+    assert not get_artifact_store().exists(f"{digest}.gzip")
+
+def test_orphaned_certificates_are_removed_with_their_files(db, monkeypatch):
+    headers = get_admin_auth_headers()
+    issuance_id = create_issuance(db, headers)
+    digest = db.get(CertificateArtifact, issuance_id).digest
+    
+    db.query(ShareIssuance).filter(ShareIssuance.id == issuance_id).delete()
+    db.commit()
+    monkeypatch.setattr(certificate_service, "CERTIFICATE_TEMPLATE_VERSION", certificate_service.CERTIFICATE_TEMPLATE_VERSION + 1)
+    assert certificate_service.rerender_stale_certificates() == 0
+    
+    db.expire_all()
+    assert db.get(CertificateArtifact, issuance_id) is None
+    assert not get_artifact_store().exists(digest)
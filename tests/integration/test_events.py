@@ -0,0 +1,169 @@
+import asyncio
+import json
+import threading
+import time
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.company_model import Company, DEFAULT_COMPANY_ID
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.events import broker
+from app.core.security import get_password_hash
+from app.services.company_service import create_company
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def clean(db):
+    db.query(ShareTransaction).delete()
+    db.query(ShareBalance).delete()
+    db.query(ShareIssuance).delete()
+    db.query(ShareholderProfile).delete()
+    db.query(User).delete()
+    db.query(Company).filter(Company.id != DEFAULT_COMPANY_ID).delete()
+    db.commit()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Admins of two companies, and two shareholders of the default one"""
+    try:
+        clean(db)
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    other = create_company(db, "Other Co")
+    hashed_password = get_password_hash("password")
+    db.add_all([
+        User(email="admin@example.com", hashed_password=hashed_password, full_name="Admin User",
+             role=UserRole.ADMIN, is_active=True),
+        User(email="admin@other.example.com", hashed_password=hashed_password, full_name="Other Admin",
+             role=UserRole.ADMIN, is_active=True, company_id=other.id),
+        User(id="alice-id", email="alice@example.com", hashed_password=hashed_password, full_name="Alice",
+             role=UserRole.SHAREHOLDER, is_active=True),
+        User(id="bob-id", email="bob@example.com", hashed_password=hashed_password, full_name="Bob",
+             role=UserRole.SHAREHOLDER, is_active=True),
+    ])
+    db.commit()
+    yield
+    clean(db)
+
+def auth_headers(email):
+    login_response = client.post("/api/v1/token", json={"email": email, "password": "password"})
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def issue(headers, shareholder_id, shares):
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": shareholder_id, "number_of_shares": shares, "issue_date": datetime(2025, 1, 1).isoformat()},
+        headers=headers
+    )
+    assert response.status_code == 201, response.text
+
+def read_stream(headers, last_event_id):
+    """Events replayed to a client resuming after `last_event_id`.
+
+    The test client returns a response only once it ends, so the stream is
+    closed as soon as the client has subscribed.
+    """
+    def close_when_subscribed():
+        deadline = time.monotonic() + 5
+        while broker.subscriber_count == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+        asyncio.run(broker.stop())
+
+    closer = threading.Thread(target=close_when_subscribed)
+    closer.start()
+    response = client.get("/api/v1/events/stream", headers={**headers, "Last-Event-ID": str(last_event_id)})
+    closer.join()
+    assert response.status_code == 200
+    # The stream's own finally unsubscribes it
+    assert broker.subscriber_count == 0
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = []
+    for block in response.text.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_stream_replays_events_by_audience():
+    admin = auth_headers("admin@example.com")
+    since = broker.bus.next_id()
+    issue(admin, "alice-id", 100)
+    issue(admin, "bob-id", 50)
+
+    admin_events = read_stream(admin, since)
+    assert [(kind, data.get("shareholder_id")) for _, kind, data in admin_events] == [
+        ("issuance.created", "alice-id"), ("distribution.changed", None),
+        ("issuance.created", "bob-id"), ("distribution.changed", None),
+    ]
+    ids = [event_id for event_id, _, _ in admin_events]
+    assert ids == sorted(ids) and ids[0] > since
+
+    # Shareholders only hear about themselves
+    alice_events = read_stream(auth_headers("alice@example.com"), since)
+    assert [(kind, data["shareholder_id"], data["number_of_shares"]) for _, kind, data in alice_events] == [
+        ("issuance.created", "alice-id", 100)
+    ]
+    assert alice_events[0][0] == ids[0]
+
+    # Admins of another company hear nothing
+    assert read_stream(auth_headers("admin@other.example.com"), since) == []
+
+def test_resuming_skips_events_already_seen():
+    admin = auth_headers("admin@example.com")
+    since = broker.bus.next_id()
+    issue(admin, "alice-id", 100)
+    issue(admin, "bob-id", 50)
+
+    seen = read_stream(admin, since)
+    resumed = read_stream(admin, seen[1][0])
+    assert resumed == seen[2:]
+
+def test_ledger_postings_and_repairs_are_streamed(db):
+    admin = auth_headers("admin@example.com")
+    issue(admin, "alice-id", 100)
+    since = broker.bus.next_id()
+    response = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "transfer", "from_holder_id": "alice-id", "to_holder_id": "bob-id", "number_of_shares": 30},
+        headers=admin
+    )
+    assert response.status_code == 201, response.text
+
+    events = read_stream(admin, since)
+    assert [(kind, data.get("shareholder_id"), data.get("balance")) for _, kind, data in events] == [
+        ("holdings.changed", "alice-id", 70), ("holdings.changed", "bob-id", 30), ("distribution.changed", None, None),
+    ]
+    assert events[0][2]["kind"] == "transfer"
+    alice_events = read_stream(auth_headers("alice@example.com"), since)
+    assert [(kind, data["balance"]) for _, kind, data in alice_events] == [("holdings.changed", 70)]
+
+    # A repaired balance reaches the stream too
+    since = broker.bus.next_id()
+    db.query(ShareBalance).filter(ShareBalance.holder_id == "bob-id").update({"balance": 1})
+    db.commit()
+    assert client.post("/api/v1/ledger/consistency/repair", headers=admin).json()["repaired"] == 1
+    assert [(kind, data.get("balance"), data.get("kind")) for _, kind, data in read_stream(admin, since)] == [
+        ("holdings.changed", 30, "repair"), ("distribution.changed", None, None),
+    ]
+
+def test_stream_requires_authentication():
+    assert client.get("/api/v1/events/stream").status_code == 401
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.models.idempotency_model import IdempotencyKey
+from app.core.security import get_password_hash
+from app.services.idempotency_service import begin_request, clear_cache, complete_request
+from app.utils.pdf_utils import generate_share_certificate
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create test users before each test"""
+    try:
+        db.query(IdempotencyKey).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    clear_cache()
+    
+    admin = User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    shareholder = User(
+        email="shareholder@example.com",
+        hashed_password="x",
+        full_name="Shareholder User",
+        role=UserRole.SHAREHOLDER,
+        is_active=True
+    )
+    db.add_all([admin, shareholder])
+    db.commit()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_retry_with_same_key_replays_response(db):
+    headers = {**get_admin_auth_headers(), "Idempotency-Key": "retry-1"}
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    payload = {"shareholder_id": shareholder.id, "number_of_shares": 10}
+    
+    with patch("app.controllers.issuance_controller.send_certificate_email", return_value=True) as mock_email:
+        first = client.post("/api/v1/issuances/", json=payload, headers=headers)
+        second = client.post("/api/v1/issuances/", json=payload, headers=headers)
+    
+    assert first.status_code == 201
+    assert second.status_code == 201
+    assert second.json()["id"] == first.json()["id"]
+    assert second.headers["idempotent-replayed"] == "true"
+    assert mock_email.call_count == 1
+    assert db.query(ShareIssuance).count() == 1
+
+def test_same_key_with_different_payload_is_rejected(db):
+    headers = {**get_admin_auth_headers(), "Idempotency-Key": "retry-2"}
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    
+    response = client.post("/api/v1/issuances/", json={"shareholder_id": shareholder.id, "number_of_shares": 10}, headers=headers)
+    assert response.status_code == 201
+    response = client.post("/api/v1/issuances/", json={"shareholder_id": shareholder.id, "number_of_shares": 11}, headers=headers)
+    assert response.status_code == 422
+
+def test_concurrent_duplicates_wait_for_first_request(db):
+    headers = {**get_admin_auth_headers(), "Idempotency-Key": "retry-3"}
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    payload = {"shareholder_id": shareholder.id, "number_of_shares": 10}
+    
+    def slow_certificate(*args, **kwargs):
+        time.sleep(0.5)
+        return generate_share_certificate(*args, **kwargs)
+    
+    responses = []
+    def post():
+        responses.append(client.post("/api/v1/issuances/", json=payload, headers=headers))
+    
+    with patch("app.services.certificate_service.generate_share_certificate", side_effect=slow_certificate) as mock_pdf:
+        threads = [threading.Thread(target=post) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    
+    assert [r.status_code for r in responses] == [201, 201, 201]
+    assert len({r.json()["id"] for r in responses}) == 1
+    assert mock_pdf.call_count == 1
+    assert db.query(ShareIssuance).count() == 1
+
+def test_requests_without_key_are_not_deduplicated(db):
+    headers = get_admin_auth_headers()
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    payload = {"shareholder_id": shareholder.id, "number_of_shares": 10}
+    
+    client.post("/api/v1/issuances/", json=payload, headers=headers)
+    client.post("/api/v1/issuances/", json=payload, headers=headers)
+    assert db.query(ShareIssuance).count() == 2
+
+def test_key_of_a_dead_request_is_reclaimed_once_its_lease_lapses(db):
+    headers = {**get_admin_auth_headers(), "Idempotency-Key": "retry-4"}
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    payload = {"shareholder_id": shareholder.id, "number_of_shares": 10}
+
+    # Left behind by a worker that died while holding the key
+    db.add(IdempotencyKey(
+        scope="admin@example.com:POST /api/v1/issuances/",
+        key="retry-4",
+        request_hash="stale",
+        status="in_progress",
+        lease_expires_at=datetime.now(timezone.utc) - timedelta(seconds=1)
+    ))
+    db.commit()
+
+    response = client.post("/api/v1/issuances/", json=payload, headers=headers)
+    assert response.status_code == 201
+    replay = client.post("/api/v1/issuances/", json=payload, headers=headers)
+    assert replay.json()["id"] == response.json()["id"]
+    assert db.query(ShareIssuance).count() == 1
+
+def test_responses_that_are_not_utf8_are_replayed_verbatim():
+    body = b"%PDF-1.4\n\xe2\xe3\xcf\xd3\x00"
+    assert asyncio.run(begin_request("test", "binary", "hash")) is None
+    complete_request("test", "binary", 200, {"content-type": "application/pdf"}, body)
+    clear_cache()
+
+    stored = asyncio.run(begin_request("test", "binary", "hash"))
+    assert stored.body == body
+    assert stored.headers == {"content-type": "application/pdf"}
@@ -3,7 +3,9 @@ from fastapi.testclient import TestClient
 from app.main import app
 from app.models.user_model import User, UserRole
 from app.models.issuance_model import ShareIssuance
-from app.db.session import SessionLocal
+from unittest.mock import patch
+from sqlalchemy import event
+from app.db.session import SessionLocal, engine
 from app.core.security import get_password_hash
 import pytest
 
@@ -203,4 +205,52 @@ def test_pdf_certificate_generation(db):
     
     # Clean up
     db.delete(other_user)
-    db.commit()
\ No newline at end of file
+    db.commit()
+
+def test_create_issuance_round_trips(db):
+    """The write path is one existence check, one INSERT ... RETURNING and the ledger writes in a single transaction"""
+    admin_headers = get_admin_auth_headers()
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    
+    statements, commits = [], []
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    def record_commit(conn):
+        commits.append(conn)
+    event.listen(engine, "before_cursor_execute", record_statement)
+    event.listen(engine, "commit", record_commit)
+    try:
+        # The certificate is rendered and stored after the response, outside the budget
+        with patch("app.controllers.issuance_controller.send_certificate_notification") as notify:
+            response = client.post(
+                "/api/v1/issuances/",
+                json={"shareholder_id": str(shareholder.id), "number_of_shares": 10},
+                headers=admin_headers
+            )
+        notify.assert_called_once()
+    finally:
+        event.remove(engine, "before_cursor_execute", record_statement)
+        event.remove(engine, "commit", record_commit)
+    
+    assert response.status_code == 201
+    data = response.json()
+    assert data["certificate_url"] == f"/api/v1/issuances/{data['id']}/certificate"
+    assert data["issue_date"] is not None
+    assert data["shareholder"]["email"] == "shareholder@example.com"
+    
+    # Auth lookup, shareholder existence check, INSERT ... RETURNING, then
+    # the ledger entry and the balance upsert
+    assert len(statements) <= 5, statements
+    assert sum(s.lstrip().upper().startswith("INSERT") for s in statements) == 3
+    assert not any(s.lstrip().upper().startswith("UPDATE") for s in statements)
+    assert len(commits) == 1
+
+def test_create_issuance_unknown_shareholder():
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": "does-not-exist", "number_of_shares": 10},
+        headers=get_admin_auth_headers()
+    )
+    
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Shareholder not found"
@@ -0,0 +1,67 @@
+import gzip
+import json
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.openapi_utils import SECURITY_SCHEME
+
+client = TestClient(app)
+
+def get_schema(**headers):
+    return client.get("/openapi.json", headers={"Accept-Encoding": "identity", **headers})
+
+def test_security_follows_route_dependencies():
+    schema = get_schema().json()
+    paths = schema["paths"]
+
+    secured = {
+        (method, path)
+        for path, operations in paths.items()
+        for method, operation in operations.items()
+        if operation.get("security")
+    }
+    assert ("get", "/api/v1/shareholders/{shareholder_id}") in secured
+    assert ("post", "/api/v1/admin/profile") in secured
+    # Authenticated by the token in the body, not a bearer header
+    assert ("post", "/api/v1/refresh") not in secured
+    assert ("post", "/api/v1/token") not in secured
+
+    # Every requirement points at a declared scheme
+    schemes = set(schema["components"]["securitySchemes"])
+    assert schemes == {SECURITY_SCHEME}
+    for method, path in secured:
+        for requirement in paths[path][method]["security"]:
+            assert set(requirement) <= schemes
+
+def test_document_is_built_once_and_served_as_bytes():
+    first = get_schema()
+    document = app.state.openapi_document
+    encoded = document.build()
+    second = get_schema()
+
+    assert first.content == second.content == encoded.body
+    assert document.build() is encoded
+    assert app.openapi() is encoded.document
+
+def test_precompressed_variants_have_their_own_etag():
+    identity = get_schema()
+    compressed = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["Vary"].startswith("Accept-Encoding")
+    assert compressed.headers["ETag"] != identity.headers["ETag"]
+    raw = app.state.openapi_document.build().variants["gzip"][0]
+    assert json.loads(gzip.decompress(raw)) == identity.json()
+
+def test_if_none_match_returns_not_modified():
+    etag = get_schema().headers["ETag"]
+
+    assert get_schema(**{"If-None-Match": etag}).status_code == 304
+    assert get_schema(**{"If-None-Match": f'"other", W/{etag}'}).status_code == 304
+    assert get_schema(**{"If-None-Match": '"other"'}).status_code == 200
+
+def test_docs_pages_load_the_schema():
+    docs = client.get("/docs")
+    assert docs.status_code == 200
+    assert "/openapi.json" in docs.text
+    assert client.get("/redoc").status_code == 200
+    assert client.get("/docs/oauth2-redirect").status_code == 200
@@ -0,0 +1,129 @@
+from datetime import date, datetime, timezone
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from app.main import app
+from app.db.session import SessionLocal, engine
+from app.db.partitions import (
+    DEFAULT_PARTITION, ensure_partitions, is_partitioned, list_partitions,
+    partition_share_issuances, unpartition_share_issuances
+)
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="partitioning is Postgres only")
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture; share_issuances is partitioned for the module"""
+    with engine.begin() as conn:
+        converted = partition_share_issuances(conn)
+        ensure_partitions(conn, since=date(2026, 1, 1))
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+        if converted:
+            with engine.begin() as conn:
+                unpartition_share_issuances(conn)
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create admin and one shareholder"""
+    try:
+        db.query(ShareTransaction).delete()
+        db.query(ShareBalance).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add_all([
+        User(
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(id="holder", email="holder@example.com", hashed_password="x", full_name="Holder", role=UserRole.SHAREHOLDER)
+    ])
+    db.commit()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def partition_of(db, issuance_id):
+    name = db.execute(
+        text("SELECT tableoid::regclass::text FROM share_issuances WHERE id = :id"), {"id": issuance_id}
+    ).scalar()
+    # Release the snapshot's locks before partitions are attached
+    db.rollback()
+    return name
+
+def test_issuances_are_routed_to_their_quarter(db):
+    headers = get_admin_auth_headers()
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": "holder", "number_of_shares": 10, "issue_date": "2026-05-20T12:00:00Z"},
+        headers=headers
+    )
+    assert response.status_code == 201
+    assert partition_of(db, response.json()["id"]) == "share_issuances_2026q2"
+    
+    # Undated issuances take today's date
+    response = client.post("/api/v1/issuances/", json={"shareholder_id": "holder", "number_of_shares": 5}, headers=headers)
+    assert response.status_code == 201
+    today = datetime.now(timezone.utc).date()
+    assert partition_of(db, response.json()["id"]) == f"share_issuances_{today.year}q{(today.month - 1) // 3 + 1}"
+    
+    distribution = client.get("/api/v1/issuances/distribution", headers=headers).json()
+    assert distribution[0]["total_shares"] == 15
+
+def test_rows_outside_partitions_move_out_of_the_default_partition(db):
+    db.add(ShareIssuance(shareholder_id="holder", number_of_shares=1, issue_date=datetime(1999, 2, 1, tzinfo=timezone.utc)))
+    db.commit()
+    issuance = db.query(ShareIssuance).first()
+    assert partition_of(db, issuance.id) == DEFAULT_PARTITION
+    
+    with engine.begin() as conn:
+        assert "share_issuances_1999q1" in ensure_partitions(conn)
+        assert ensure_partitions(conn) == []
+        assert is_partitioned(conn)
+    assert partition_of(db, issuance.id) == "share_issuances_1999q1"
+    assert db.get(ShareIssuance, issuance.id).number_of_shares == 1
+
+def test_future_partitions_are_created_ahead(db):
+    with engine.begin() as conn:
+        ensure_partitions(conn, ahead=8, today=date(2030, 2, 1))
+        partitions = list_partitions(conn)
+    assert "share_issuances_2030q1" in partitions
+    assert "share_issuances_2032q1" in partitions
+
+def test_date_range_queries_prune_partitions(db):
+    plan = "\n".join(db.execute(text(
+        "EXPLAIN SELECT sum(number_of_shares) FROM share_issuances "
+        "WHERE issue_date >= '2026-04-01 00:00:00+00' AND issue_date < '2026-07-01 00:00:00+00'"
+    )).scalars())
+    db.rollback()
+    
+    assert "share_issuances_2026q2" in plan
+    assert "share_issuances_2026q3" not in plan
+    assert DEFAULT_PARTITION not in plan
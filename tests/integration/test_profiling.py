@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.core import profiler
+from app.core.config import settings
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin and a shareholder who can log in"""
+    try:
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    db.add_all([
+        User(
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(
+            email="holder@example.com",
+            hashed_password=get_password_hash("holderpassword"),
+            full_name="Holder",
+            role=UserRole.SHAREHOLDER,
+            is_active=True
+        )
+    ])
+    db.commit()
+    yield
+
+def get_auth_headers(email="admin@example.com", password="adminpassword"):
+    """Helper to get auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": email, "password": password}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def spin_during_profile(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+def test_profile_returns_collapsed_stacks():
+    headers = get_auth_headers()
+    stop = threading.Event()
+    busy = threading.Thread(target=spin_during_profile, args=(stop,))
+    busy.start()
+    try:
+        response = client.post("/api/v1/admin/profile?seconds=0.2&interval_ms=5", headers=headers)
+    finally:
+        stop.set()
+        busy.join()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["samples"] > 0
+    assert body["interval_ms"] == 5
+    assert body["allocations"] is None
+    assert ":spin_during_profile" in body["collapsed"]
+
+    # Waiting threads are left out unless asked for
+    idle = client.post("/api/v1/admin/profile?seconds=0.05&include_idle=true", headers=headers).json()
+    assert "selectors:select" in idle["collapsed"] or "threading:wait" in idle["collapsed"]
+
+def test_collapsed_format_and_allocation_report():
+    headers = get_auth_headers()
+    text = client.post("/api/v1/admin/profile?seconds=0.1&format=collapsed", headers=headers)
+    assert text.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in text.text.splitlines())
+
+    report = client.post("/api/v1/admin/profile?seconds=0.1&allocations=3", headers=headers).json()
+    assert isinstance(report["allocations"], list) and len(report["allocations"]) <= 3
+
+def test_profiling_is_admin_only_and_limited():
+    response = client.post("/api/v1/admin/profile?seconds=0.1", headers=get_auth_headers("holder@example.com", "holderpassword"))
+    assert response.status_code == 403
+
+    headers = get_auth_headers()
+    too_long = client.post(f"/api/v1/admin/profile?seconds={settings.PROFILER_MAX_SECONDS + 1}", headers=headers)
+    assert too_long.status_code == 400
+
+def test_concurrent_session_is_refused():
+    headers = get_auth_headers()
+    running = threading.Thread(target=profiler.profile, args=(0.5, 0.01))
+    running.start()
+    while not profiler.is_running():
+        time.sleep(0.001)
+    try:
+        response = client.post("/api/v1/admin/profile?seconds=0.1", headers=headers)
+    finally:
+        running.join()
+
+    assert response.status_code == 409
@@ -0,0 +1,113 @@
+from datetime import datetime, timedelta
+import json
+import pytest
+from sqlalchemy import select, func, text
+from app.db.session import SessionLocal, engine
+from app.models.company_model import DEFAULT_COMPANY_ID
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+
+HOT_TABLES = {"users", "share_issuances"}
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session seeded with a small cap table"""
+    db = SessionLocal()
+    db.query(ShareIssuance).delete()
+    db.query(ShareholderProfile).delete()
+    db.query(User).delete()
+    db.commit()
+
+    start = datetime(2024, 1, 1)
+    for i in range(50):
+        user = User(
+            email=f"plan{i}@example.com",
+            hashed_password="x",
+            full_name=f"Plan Holder {i}",
+            role=UserRole.SHAREHOLDER,
+            is_active=i % 5 != 0
+        )
+        db.add(user)
+        db.flush()
+        for j in range(4):
+            db.add(ShareIssuance(
+                shareholder_id=user.id,
+                number_of_shares=100 + j,
+                price_per_share=1.5,
+                issue_date=start + timedelta(days=i * 7 + j)
+            ))
+    db.commit()
+    try:
+        yield db
+    finally:
+        db.query(ShareIssuance).delete()
+        db.query(User).delete()
+        db.commit()
+        db.close()
+
+def sequential_scans(db, statement):
+    """Return the hot tables the planner reads with a full table scan"""
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    if engine.dialect.name == "postgresql":
+        # Tiny test tables would otherwise always be scanned; this asks
+        # whether an index path exists at all
+        db.execute(text("SET LOCAL enable_seqscan = off"))
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+        db.rollback()
+        plan = plan if isinstance(plan, list) else json.loads(plan)
+        scans, nodes = set(), [plan[0]["Plan"]]
+        while nodes:
+            node = nodes.pop()
+            if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") in HOT_TABLES:
+                scans.add(node["Relation Name"])
+            nodes.extend(node.get("Plans", []))
+        return scans
+
+    rows = db.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    scans = set()
+    for row in rows:
+        detail = row[-1]
+        parts = detail.split()
+        if parts[0] == "SCAN" and parts[1] in HOT_TABLES and "INDEX" not in detail:
+            scans.add(parts[1])
+    return scans
+
+def test_issuances_by_shareholder_uses_index(db):
+    holder_id = db.query(User.id).filter(User.role == UserRole.SHAREHOLDER).first()[0]
+    statement = select(ShareIssuance).where(
+        ShareIssuance.company_id == DEFAULT_COMPANY_ID,
+        ShareIssuance.shareholder_id == holder_id
+    ).limit(100)
+    assert sequential_scans(db, statement) == set()
+
+def test_shareholder_listing_uses_index(db):
+    statement = select(User).where(
+        User.company_id == DEFAULT_COMPANY_ID,
+        User.role == UserRole.SHAREHOLDER
+    ).offset(0).limit(100)
+    assert sequential_scans(db, statement) == set()
+
+def test_active_shareholders_by_created_at_uses_index(db):
+    statement = (
+        select(User)
+        .where(User.company_id == DEFAULT_COMPANY_ID, User.role == UserRole.SHAREHOLDER, User.is_active == True)
+        .order_by(User.created_at)
+        .limit(100)
+    )
+    assert sequential_scans(db, statement) == set()
+
+def test_distribution_aggregate_uses_index(db):
+    statement = select(
+        ShareIssuance.shareholder_id,
+        func.sum(ShareIssuance.number_of_shares)
+    ).where(ShareIssuance.company_id == DEFAULT_COMPANY_ID).group_by(ShareIssuance.shareholder_id)
+    assert sequential_scans(db, statement) == set()
+
+def test_issue_date_range_uses_index(db):
+    statement = select(ShareIssuance).where(
+        ShareIssuance.company_id == DEFAULT_COMPANY_ID,
+        ShareIssuance.issue_date >= datetime(2024, 3, 1),
+        ShareIssuance.issue_date < datetime(2024, 4, 1)
+    )
+    assert sequential_scans(db, statement) == set()
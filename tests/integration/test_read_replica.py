@@ -0,0 +1,132 @@
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from app.main import app
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.services.ledger_service import record_issuance
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db, tmp_path, monkeypatch):
+    """Primary with one issuance, and an empty second database acting as a lagging replica"""
+    try:
+        db.query(ShareTransaction).delete()
+        db.query(ShareBalance).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    admin = User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    shareholder = User(email="shareholder@example.com", hashed_password="x", full_name="Shareholder", role=UserRole.SHAREHOLDER)
+    db.add_all([admin, shareholder])
+    db.flush()
+    issuance = ShareIssuance(shareholder_id=shareholder.id, number_of_shares=10)
+    db.add(issuance)
+    db.flush()
+    record_issuance(db, issuance)
+    db.commit()
+    
+    replica_engine = create_engine(f"sqlite:///{tmp_path}/replica.db")
+    Base.metadata.create_all(bind=replica_engine)
+    monkeypatch.setattr(db_session, "replica_engine", replica_engine)
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", sessionmaker(autocommit=False, autoflush=False, bind=replica_engine))
+    yield
+    replica_engine.dispose()
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_reads_go_to_replica():
+    response = client.get("/api/v1/issuances/", headers=get_admin_auth_headers())
+    assert response.status_code == 200
+    # The replica has not received the primary's issuance
+    assert response.json() == []
+
+def test_reads_after_write_stick_to_primary_until_replica_catches_up(db):
+    headers = get_admin_auth_headers()
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": shareholder.id, "number_of_shares": 5},
+        headers=headers
+    )
+    assert response.status_code == 201
+    token = response.headers["x-consistency-token"]
+    
+    response = client.get("/api/v1/issuances/", headers={**headers, "X-Consistency-Token": token})
+    assert len(response.json()) == 2
+    
+    # Once the token is older than the allowed lag the replica serves it again
+    with patch("app.db.consistency.settings") as mock_settings:
+        mock_settings.REPLICA_MAX_LAG_SECONDS = 0
+        response = client.get("/api/v1/issuances/", headers={**headers, "X-Consistency-Token": token})
+    assert response.json() == []
+
+def test_cached_reads_are_filled_from_the_primary(db):
+    headers = get_admin_auth_headers()
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": shareholder.id, "number_of_shares": 5},
+        headers=headers
+    )
+    assert response.status_code == 201
+    
+    # No token, yet the lagging replica's view is not cached under the new version
+    for _ in range(2):
+        response = client.get("/api/v1/issuances/distribution", headers=headers)
+        assert response.status_code == 200
+        assert [d["total_shares"] for d in response.json()] == [15]
+    summary = client.get("/api/v1/analytics/capital/summary", headers=headers).json()
+    assert summary["issuance_count"] == 2
+
+def test_no_token_issued_without_replica(db, monkeypatch):
+    monkeypatch.setattr(db_session, "replica_engine", None)
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", None)
+    shareholder = db.query(User).filter(User.email == "shareholder@example.com").first()
+    
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": shareholder.id, "number_of_shares": 5},
+        headers=get_admin_auth_headers()
+    )
+    assert response.status_code == 201
+    assert "x-consistency-token" not in response.headers
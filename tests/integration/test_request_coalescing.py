@@ -0,0 +1,149 @@
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.core.cache import bump_cap_table_version, reset_cache_stats
+from app.core.single_flight import single_flight
+from app.controllers.issuance_controller import response_variants
+from app.services.ledger_service import record_issuance
+import app.services.issuance_service as issuance_service
+import app.controllers.shareholder_controller as shareholder_controller
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin and a few shareholders"""
+    try:
+        db.query(ShareTransaction).delete()
+        db.query(ShareBalance).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add(User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    ))
+    holders = [
+        User(email=f"holder{i}@example.com", hashed_password="x", full_name=f"Holder {i}", role=UserRole.SHAREHOLDER)
+        for i in range(3)
+    ]
+    db.add_all(holders)
+    db.flush()
+    issuances = [
+        ShareIssuance(shareholder_id=holder.id, number_of_shares=100, issue_date=datetime(2025, 1, 1))
+        for holder in holders
+    ]
+    db.add_all(issuances)
+    db.flush()
+    for issuance in issuances:
+        record_issuance(db, issuance)
+    db.commit()
+    bump_cap_table_version()
+    response_variants.clear()
+    single_flight.reset_stats()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def get_concurrently(count, url, headers):
+    barrier = threading.Barrier(count)
+    responses = [None] * count
+    
+    def worker(i):
+        barrier.wait()
+        responses[i] = client.get(url, headers=headers)
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return responses
+
+def test_concurrent_distribution_requests_compute_once():
+    headers = get_admin_auth_headers()
+    compute = issuance_service.compute_ownership_distribution
+    
+    def slow_compute(*args, **kwargs):
+        time.sleep(0.3)
+        return compute(*args, **kwargs)
+    
+    with patch.object(issuance_service, "compute_ownership_distribution", side_effect=slow_compute) as spy:
+        responses = get_concurrently(6, "/api/v1/issuances/distribution", headers)
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert all(response.json() == responses[0].json() for response in responses)
+    assert len(responses[0].json()) == 3
+    assert spy.call_count < 6
+    
+    stats = client.get("/api/v1/admin/metrics", headers=headers).json()["single_flight"]
+    distribution = stats["namespaces"]["issuances.distribution"]
+    assert distribution["executions"] == spy.call_count
+    assert distribution["coalesced"] == 6 - spy.call_count
+    assert stats["in_flight"] == 0
+
+def test_concurrent_shareholder_listings_are_coalesced():
+    headers = get_admin_auth_headers()
+    get_shareholders = shareholder_controller.get_shareholders
+    
+    def slow_listing(*args, **kwargs):
+        time.sleep(0.3)
+        return get_shareholders(*args, **kwargs)
+    
+    with patch("app.controllers.shareholder_controller.get_shareholders", side_effect=slow_listing) as spy:
+        responses = get_concurrently(4, "/api/v1/shareholders/?fields=email,total_shares", headers)
+    
+    assert all(response.status_code == 200 for response in responses)
+    assert all(len(response.json()) == 3 for response in responses)
+    assert spy.call_count < 4
+
+def test_cache_hit_rates_in_metrics():
+    headers = get_admin_auth_headers()
+    reset_cache_stats()
+    for _ in range(4):
+        assert client.get("/api/v1/issuances/distribution", headers=headers).status_code == 200
+
+    cache = client.get("/api/v1/admin/metrics", headers=headers).json()["cache"]
+    assert (cache["backend"], cache["healthy"]) == ("memory", True)
+    distribution = cache["namespaces"]["distribution"]
+    assert (distribution["misses"], distribution["hits"]) == (1, 3)
+    assert distribution["hit_rate"] == 0.75
+
+def test_metrics_require_admin():
+    response = client.get("/api/v1/admin/metrics")
+    assert response.status_code == 401
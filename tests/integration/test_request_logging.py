@@ -0,0 +1,113 @@
+import logging
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.core.logging_config import RequestContextFilter
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+class CollectingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.addFilter(RequestContextFilter())
+        self.records = []
+    
+    def emit(self, record):
+        self.records.append(record)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create admin and one shareholder"""
+    try:
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add_all([
+        User(
+            id="admin",
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(id="holder", email="holder@example.com", hashed_password="x", full_name="Holder", role=UserRole.SHAREHOLDER)
+    ])
+    db.commit()
+    yield
+
+@pytest.fixture
+def records():
+    handler = CollectingHandler()
+    root = logging.getLogger()
+    level = root.level
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+    try:
+        yield handler.records
+    finally:
+        root.removeHandler(handler)
+        root.setLevel(level)
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_request_id_is_generated_or_echoed():
+    generated = client.get("/")
+    assert len(generated.headers["X-Request-ID"]) == 32
+    
+    assert client.get("/", headers={"X-Request-ID": "trace-abc.1"}).headers["X-Request-ID"] == "trace-abc.1"
+    # Not a plain token: replaced rather than copied into logs
+    assert client.get("/", headers={"X-Request-ID": "bad id\n"}).headers["X-Request-ID"] != "bad id\n"
+
+def test_access_record_carries_request_user_and_route(records):
+    response = client.get("/api/v1/shareholders/holder", headers=get_admin_auth_headers())
+    assert response.status_code == 200
+    
+    access = [r for r in records if r.name == "app.access" and r.request_id == response.headers["X-Request-ID"]]
+    assert len(access) == 1
+    assert access[0].user_id == "admin"
+    assert access[0].route == "/api/v1/shareholders/{shareholder_id}"
+    assert access[0].status == 200
+    assert access[0].duration_ms >= 0
+
+def test_records_from_worker_threads_keep_the_request_context(records):
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": "holder", "number_of_shares": 10},
+        headers=get_admin_auth_headers()
+    )
+    assert response.status_code == 201
+    
+    # Emitted from the background task that emails the certificate
+    email = [r for r in records if r.name == "app.utils.email_utils" and "simulation" in r.getMessage()]
+    assert len(email) == 1
+    assert email[0].request_id == response.headers["X-Request-ID"]
+    assert email[0].user_id == "admin"
+    assert email[0].route == "/api/v1/issuances/"
@@ -0,0 +1,118 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.core.config import settings
+from app.core.tracing import tracer, STATUS_ERROR
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(list(spans))
+
+    def shutdown(self):
+        pass
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create admin and one shareholder"""
+    try:
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    db.add_all([
+        User(
+            id="admin",
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(id="holder", email="holder@example.com", hashed_password="x", full_name="Holder", role=UserRole.SHAREHOLDER)
+    ])
+    db.commit()
+    yield
+
+@pytest.fixture
+def traces(monkeypatch):
+    exporter = ListExporter()
+    monkeypatch.setattr(tracer, "exporter", exporter)
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 1.0)
+    return exporter.traces
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_issuance_trace_covers_sql_pdf_and_email(traces):
+    headers = get_admin_auth_headers()
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": "holder", "number_of_shares": 10},
+        headers=headers
+    )
+    assert response.status_code == 201
+
+    login, issuance = traces
+    assert "password.verify" in [s.name for s in login]
+
+    root = issuance[-1]
+    assert root.name == "POST /api/v1/issuances/"
+    assert root.parent_id is None
+    assert root.attributes["http.response.status_code"] == 201
+    assert root.attributes["request.id"] == response.headers["X-Request-ID"]
+
+    names = [s.name for s in issuance]
+    for expected in ("SELECT", "INSERT", "db.commit", "pdf.generate_share_certificate", "email.send_certificate_email"):
+        assert expected in names
+    statements = [s for s in issuance if s.name in ("SELECT", "INSERT")]
+    assert all(s.attributes["db.query.text"] for s in statements)
+    assert {s.trace.trace_id for s in issuance} == {root.trace.trace_id}
+
+    # Every span hangs off another span of the same trace
+    ids = {s.span_id for s in issuance}
+    assert all(s.parent_id in ids for s in issuance if s is not root)
+
+def test_route_template_names_the_root_span(traces):
+    response = client.get("/api/v1/shareholders/missing", headers=get_admin_auth_headers())
+    assert response.status_code == 404
+
+    root = traces[-1][-1]
+    assert root.name == "GET /api/v1/shareholders/{shareholder_id}"
+    assert root.attributes["http.route"] == "/api/v1/shareholders/{shareholder_id}"
+    assert root.status != STATUS_ERROR
+
+def test_unsampled_requests_export_nothing(traces, monkeypatch):
+    monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", 0)
+    get_admin_auth_headers()
+    assert client.get("/").status_code == 200
+    assert traces == []
@@ -0,0 +1,115 @@
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.core.cache import bump_cap_table_version
+from app.controllers.issuance_controller import response_variants
+from app.services.ledger_service import record_issuance
+import app.utils.compression as compression
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin with enough shareholders for a compressible distribution"""
+    try:
+        db.query(ShareTransaction).delete()
+        db.query(ShareBalance).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add(User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    ))
+    holders = [
+        User(email=f"holder{i}@example.com", hashed_password="x", full_name=f"Holder {i}", role=UserRole.SHAREHOLDER)
+        for i in range(40)
+    ]
+    db.add_all(holders)
+    db.flush()
+    issuances = [
+        ShareIssuance(shareholder_id=holder.id, number_of_shares=100 + i, issue_date=datetime(2025, 1, 1))
+        for i, holder in enumerate(holders)
+    ]
+    db.add_all(issuances)
+    db.flush()
+    for issuance in issuances:
+        record_issuance(db, issuance)
+    db.commit()
+    bump_cap_table_version()
+    response_variants.clear()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_distribution_is_compressed_once_per_version():
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "gzip"}
+    
+    with patch("app.utils.compression.compress", wraps=compression.compress) as spy:
+        first = client.get("/api/v1/issuances/distribution", headers=headers)
+        second = client.get("/api/v1/issuances/distribution", headers=headers)
+        assert spy.call_count == 1
+        
+        bump_cap_table_version()
+        client.get("/api/v1/issuances/distribution", headers=headers)
+        assert spy.call_count == 2
+    
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"].count("Accept-Encoding") == 1
+    assert len(first.json()) == 40
+    assert second.json() == first.json()
+
+def test_distribution_identity_variant():
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "identity"}
+    response = client.get("/api/v1/issuances/distribution", headers=headers)
+    
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert sum(row["total_shares"] for row in response.json()) == sum(100 + i for i in range(40))
+
+def test_listing_is_compressed_by_middleware():
+    headers = {**get_admin_auth_headers(), "Accept-Encoding": "gzip"}
+    response = client.get("/api/v1/shareholders/", headers=headers)
+    
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 40
+
+def test_already_compressed_and_streamed_types_are_left_alone():
+    assert compression.is_compressible("application/json; charset=utf-8")
+    assert compression.is_compressible("application/problem+json")
+    assert not compression.is_compressible("application/pdf")
+    assert not compression.is_compressible("text/event-stream")
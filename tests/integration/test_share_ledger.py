@@ -0,0 +1,195 @@
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.user_model import User, UserRole
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin and two shareholders"""
+    try:
+        db.query(ShareTransaction).delete()
+        db.query(ShareBalance).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    db.add_all([
+        User(id="admin-id", email="admin@example.com", hashed_password=get_password_hash("adminpassword"),
+             full_name="Admin User", role=UserRole.ADMIN, is_active=True),
+        User(id="alice-id", email="alice@example.com", hashed_password=get_password_hash("alicepassword"),
+             full_name="Alice", role=UserRole.SHAREHOLDER, is_active=True),
+        User(id="bob-id", email="bob@example.com", hashed_password=get_password_hash("bobpassword"),
+             full_name="Bob", role=UserRole.SHAREHOLDER, is_active=True),
+    ])
+    db.commit()
+    yield
+
+def auth_headers(email, password):
+    login_response = client.post("/api/v1/token", json={"email": email, "password": password})
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def get_admin_auth_headers():
+    return auth_headers("admin@example.com", "adminpassword")
+
+def issue(headers, shareholder_id, shares):
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": shareholder_id, "number_of_shares": shares, "price_per_share": 1.0,
+              "issue_date": datetime(2024, 1, 1).isoformat()},
+        headers=headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()
+
+def balance(headers, holder_id):
+    response = client.get(f"/api/v1/ledger/balances/{holder_id}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["balance"]
+
+def test_issuance_is_recorded_in_the_ledger():
+    headers = get_admin_auth_headers()
+    issuance = issue(headers, "alice-id", 1000)
+    issue(headers, "alice-id", 500)
+
+    assert balance(headers, "alice-id") == 1500
+    entries = client.get("/api/v1/ledger/transactions", headers=headers).json()
+    assert [(e["kind"], e["to_holder_id"], e["number_of_shares"]) for e in entries] == [
+        ("issue", "alice-id", 500), ("issue", "alice-id", 1000)
+    ]
+    assert entries[1]["issuance_id"] == issuance["id"]
+    assert entries[1]["actor_id"] == "admin-id"
+
+def test_transfer_cancel_and_repurchase_move_balances():
+    headers = get_admin_auth_headers()
+    issue(headers, "alice-id", 1000)
+
+    transfer = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "transfer", "from_holder_id": "alice-id", "to_holder_id": "bob-id", "number_of_shares": 300},
+        headers=headers
+    )
+    assert transfer.status_code == 201, transfer.text
+    cancel = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "cancel", "from_holder_id": "alice-id", "number_of_shares": 100},
+        headers=headers
+    )
+    assert cancel.status_code == 201, cancel.text
+    repurchase = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "repurchase", "from_holder_id": "bob-id", "number_of_shares": 50, "price_per_share": 2.5},
+        headers=headers
+    )
+    assert repurchase.status_code == 201, repurchase.text
+
+    assert (balance(headers, "alice-id"), balance(headers, "bob-id")) == (600, 250)
+    balances = client.get("/api/v1/ledger/balances", headers=headers).json()
+    assert [(b["holder_id"], b["balance"]) for b in balances] == [("alice-id", 600), ("bob-id", 250)]
+    assert client.get("/api/v1/ledger/consistency", headers=headers).json()["consistent"] is True
+
+def test_postings_cannot_overdraw_or_be_malformed():
+    headers = get_admin_auth_headers()
+    issue(headers, "alice-id", 100)
+
+    overdraw = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "transfer", "from_holder_id": "alice-id", "to_holder_id": "bob-id", "number_of_shares": 101},
+        headers=headers
+    )
+    assert overdraw.status_code == 400
+    assert "Insufficient shares" in overdraw.json()["detail"]
+    same_holder = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "transfer", "from_holder_id": "alice-id", "to_holder_id": "alice-id", "number_of_shares": 1},
+        headers=headers
+    )
+    assert same_holder.status_code == 400
+    unknown = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "cancel", "from_holder_id": "nobody", "number_of_shares": 1},
+        headers=headers
+    )
+    assert unknown.status_code == 400
+
+    assert balance(headers, "alice-id") == 100
+    assert len(client.get("/api/v1/ledger/transactions", headers=headers).json()) == 1
+
+def test_shareholders_only_see_their_own_holdings():
+    headers = get_admin_auth_headers()
+    issue(headers, "alice-id", 100)
+    issue(headers, "bob-id", 200)
+
+    alice = auth_headers("alice@example.com", "alicepassword")
+    assert balance(alice, "alice-id") == 100
+    assert client.get("/api/v1/ledger/balances/bob-id", headers=alice).status_code == 403
+    assert client.get("/api/v1/ledger/balances", headers=alice).status_code == 403
+    entries = client.get("/api/v1/ledger/transactions", headers=alice).json()
+    assert [e["to_holder_id"] for e in entries] == ["alice-id"]
+    transfer = client.post(
+        "/api/v1/ledger/transactions",
+        json={"kind": "transfer", "from_holder_id": "alice-id", "to_holder_id": "bob-id", "number_of_shares": 10},
+        headers=alice
+    )
+    assert transfer.status_code == 403
+
+def test_consistency_check_finds_and_repairs_drift(db):
+    headers = get_admin_auth_headers()
+    issue(headers, "alice-id", 1000)
+    issue(headers, "bob-id", 400)
+
+    db.query(ShareBalance).filter(ShareBalance.holder_id == "alice-id").update({"balance": 999})
+    db.query(ShareBalance).filter(ShareBalance.holder_id == "bob-id").delete()
+    db.commit()
+
+    report = client.get("/api/v1/ledger/consistency", headers=headers).json()
+    assert report["consistent"] is False
+    assert report["mismatches"] == [
+        {"holder_id": "alice-id", "balance": 999, "ledger": 1000},
+        {"holder_id": "bob-id", "balance": None, "ledger": 400},
+    ]
+
+    repaired = client.post("/api/v1/ledger/consistency/repair", headers=headers).json()
+    assert repaired["repaired"] == 2
+    assert client.get("/api/v1/ledger/consistency", headers=headers).json()["consistent"] is True
+    assert (balance(headers, "alice-id"), balance(headers, "bob-id")) == (1000, 400)
+
+def test_holdings_everywhere_follow_the_balances():
+    headers = get_admin_auth_headers()
+    issue(headers, "alice-id", 1000)
+    issue(headers, "bob-id", 1000)
+    for posting in (
+        {"kind": "transfer", "from_holder_id": "alice-id", "to_holder_id": "bob-id", "number_of_shares": 400},
+        {"kind": "cancel", "from_holder_id": "bob-id", "number_of_shares": 200},
+    ):
+        assert client.post("/api/v1/ledger/transactions", json=posting, headers=headers).status_code == 201
+
+    balances = {b["holder_id"]: b["balance"] for b in client.get("/api/v1/ledger/balances", headers=headers).json()}
+    assert balances == {"alice-id": 600, "bob-id": 1200}
+    shareholders = client.get("/api/v1/shareholders/", headers=headers).json()
+    assert {s["id"]: s["total_shares"] for s in shareholders} == balances
+    assert client.get("/api/v1/shareholders/bob-id", headers=headers).json()["total_shares"] == 1200
+    distribution = client.get("/api/v1/issuances/distribution", headers=headers).json()
+    assert {d["shareholder_id"]: d["total_shares"] for d in distribution} == balances
+    assert sum(d["percentage"] for d in distribution) == pytest.approx(100)
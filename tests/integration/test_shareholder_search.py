@@ -0,0 +1,99 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.core.cache import bump_cap_table_version
+from app.services.shareholder_search_service import invalidate_search_index
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin with a few shareholders"""
+    try:
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add_all([
+        User(
+            email="admin@example.com",
+            hashed_password=get_password_hash("adminpassword"),
+            full_name="Admin User",
+            role=UserRole.ADMIN,
+            is_active=True
+        ),
+        User(email="alice@example.com", hashed_password="x", full_name="Alice Martin", role=UserRole.SHAREHOLDER),
+        User(email="bob@example.com", hashed_password="x", full_name="Bob Alison", role=UserRole.SHAREHOLDER),
+        User(email="carol@malice.io", hashed_password="x", full_name="Carol Smith", role=UserRole.SHAREHOLDER),
+        User(email="under_score@example.com", hashed_password="x", full_name="Dan", role=UserRole.SHAREHOLDER),
+    ])
+    db.commit()
+    bump_cap_table_version()
+    # Rows were inserted behind the service's back
+    invalidate_search_index()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_search_ranks_prefix_matches_first():
+    response = client.get("/api/v1/shareholders/search?q=Ali", headers=get_admin_auth_headers())
+    
+    assert response.status_code == 200
+    results = response.json()
+    assert [r["email"] for r in results] == ["alice@example.com", "bob@example.com", "carol@malice.io"]
+    assert [r["rank"] for r in results] == [0, 1, 2]
+
+def test_search_excludes_admins_and_respects_limit():
+    headers = get_admin_auth_headers()
+    
+    assert client.get("/api/v1/shareholders/search?q=admin", headers=headers).json() == []
+    assert len(client.get("/api/v1/shareholders/search?q=a&limit=1", headers=headers).json()) == 1
+
+def test_search_treats_like_wildcards_literally():
+    response = client.get("/api/v1/shareholders/search?q=under_", headers=get_admin_auth_headers())
+    
+    assert [r["full_name"] for r in response.json()] == ["Dan"]
+    assert client.get("/api/v1/shareholders/search?q=%25", headers=get_admin_auth_headers()).json() == []
+
+def test_search_sees_new_shareholders():
+    headers = get_admin_auth_headers()
+    client.get("/api/v1/shareholders/search?q=zed", headers=headers)
+    
+    response = client.post(
+        "/api/v1/shareholders/",
+        json={"email": "zed@example.com", "password": "password123", "full_name": "Zed Quinn"},
+        headers=headers
+    )
+    assert response.status_code in (200, 201), response.text
+    
+    results = client.get("/api/v1/shareholders/search?q=quinn", headers=headers).json()
+    assert [r["email"] for r in results] == ["zed@example.com"]
+
+def test_search_requires_admin():
+    assert client.get("/api/v1/shareholders/search?q=ali").status_code == 401
@@ -113,6 +113,9 @@ def test_create_shareholder(db):
     data = response.json()
     assert data["email"] == unique_email
 
+    profile = db.query(ShareholderProfile).filter(ShareholderProfile.id == data["id"]).one()
+    assert (profile.address, profile.phone) == ("123 Main St", "+1234567890")
+
 def test_get_shareholder_by_id(db):
     """Test getting shareholder by ID"""
     # Create test shareholder
@@ -0,0 +1,180 @@
+from contextlib import contextmanager
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from app.main import app
+from app.db.session import SessionLocal, engine
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.core.cache import bump_cap_table_version
+from app.services.ledger_service import record_issuance
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin and two shareholders, one with many issuances"""
+    try:
+        db.query(ShareTransaction).delete()
+        db.query(ShareBalance).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    admin = User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    )
+    alice = User(email="alice@example.com", hashed_password="x", full_name="Alice", role=UserRole.SHAREHOLDER)
+    bob = User(email="bob@example.com", hashed_password="x", full_name="Bob", role=UserRole.SHAREHOLDER)
+    db.add_all([admin, alice, bob])
+    db.flush()
+    db.add(ShareholderProfile(id=alice.id, address="1 Main St"))
+    issuances = [
+        ShareIssuance(shareholder_id=alice.id, number_of_shares=i + 1, issue_date=datetime(2024, 1, i + 1))
+        for i in range(25)
+    ]
+    issuances.append(ShareIssuance(shareholder_id=bob.id, number_of_shares=10, issue_date=datetime(2024, 6, 1)))
+    db.add_all(issuances)
+    db.flush()
+    for issuance in issuances:
+        record_issuance(db, issuance)
+    db.commit()
+    bump_cap_table_version()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+@contextmanager
+def captured_statements():
+    statements = []
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+def test_list_shareholders_omits_issuances_by_default():
+    response = client.get("/api/v1/shareholders/", headers=get_admin_auth_headers())
+    
+    assert response.status_code == 200
+    holders = {h["email"]: h for h in response.json()}
+    assert holders["alice@example.com"]["total_shares"] == sum(range(1, 26))
+    assert holders["alice@example.com"]["issuances"] == []
+    assert holders["alice@example.com"]["shareholder_profile"]["address"] == "1 Main St"
+
+def test_sparse_fieldset_loads_only_requested_columns():
+    headers = get_admin_auth_headers()
+    with captured_statements() as statements:
+        response = client.get("/api/v1/shareholders/?fields=full_name,total_shares", headers=headers)
+    
+    assert response.status_code == 200
+    holders = {h["full_name"]: h for h in response.json()}
+    assert set(holders["Alice"]) == {"id", "full_name", "total_shares"}
+    assert holders["Alice"]["total_shares"] == sum(range(1, 26))
+    assert holders["Bob"]["total_shares"] == 10
+    # The listing query itself; the other users query is the auth lookup
+    listing = [s for s in statements if "FROM users" in s and "total_shares" in s]
+    assert len(listing) == 1
+    assert "users.email" not in listing[0]
+    # Neither the profile nor the issuance rows are fetched
+    assert not any("FROM shareholder_profiles" in s for s in statements)
+    assert not any("share_issuances.certificate_url" in s for s in statements)
+
+def test_include_issuances_is_paginated():
+    headers = get_admin_auth_headers()
+    response = client.get(
+        "/api/v1/shareholders/?fields=email&include=issuances&issuances_limit=10&issuances_offset=5",
+        headers=headers
+    )
+    
+    assert response.status_code == 200
+    holders = {h["email"]: h for h in response.json()}
+    alice = holders["alice@example.com"]
+    assert set(alice) == {"id", "email", "issuances", "issuance_count"}
+    assert alice["issuance_count"] == 25
+    # Newest first: skip Jan 25..21, then Jan 20..11
+    assert [i["number_of_shares"] for i in alice["issuances"]] == list(range(20, 10, -1))
+    assert holders["bob@example.com"]["issuances"] == []
+    assert holders["bob@example.com"]["issuance_count"] == 1
+
+def test_get_shareholder_with_issuances(db):
+    alice = db.query(User).filter(User.email == "alice@example.com").first()
+    response = client.get(
+        f"/api/v1/shareholders/{alice.id}?include=issuances&issuances_limit=3",
+        headers=get_admin_auth_headers()
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["email"] == "alice@example.com"
+    assert data["issuance_count"] == 25
+    assert [i["number_of_shares"] for i in data["issuances"]] == [25, 24, 23]
+
+def test_unknown_fields_are_rejected():
+    headers = get_admin_auth_headers()
+    
+    response = client.get("/api/v1/shareholders/?fields=full_name,hashed_password", headers=headers)
+    assert response.status_code == 400
+    assert "hashed_password" in response.json()["detail"]
+    assert client.get("/api/v1/shareholders/?include=profile", headers=headers).status_code == 400
+
+def test_embedded_fields_require_their_include():
+    headers = get_admin_auth_headers()
+    
+    for url in (
+        "/api/v1/shareholders/?fields=full_name,issuances",
+        "/api/v1/shareholders/?fields=issuance_count",
+        "/api/v1/issuances/?fields=number_of_shares,shareholder",
+    ):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 400, url
+        assert "require include=" in response.json()["detail"]
+    
+    response = client.get("/api/v1/issuances/?fields=shareholder&include=shareholder&limit=5", headers=headers)
+    assert response.status_code == 200
+    assert all(i["shareholder"] is not None for i in response.json())
+
+def test_issuance_fields_and_include():
+    headers = get_admin_auth_headers()
+    
+    response = client.get("/api/v1/issuances/?fields=number_of_shares&limit=5", headers=headers)
+    assert response.status_code == 200
+    assert all(set(i) == {"id", "number_of_shares"} for i in response.json())
+    
+    response = client.get("/api/v1/issuances/?fields=number_of_shares&include=shareholder&limit=5", headers=headers)
+    assert all(i["shareholder"]["email"] in ("alice@example.com", "bob@example.com") for i in response.json())
+    
+    # Without include the shareholder is not loaded at all
+    response = client.get("/api/v1/issuances/?limit=5", headers=headers)
+    assert all(i["shareholder"] is None for i in response.json())
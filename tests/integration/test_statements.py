@@ -0,0 +1,208 @@
+import smtplib
+import time
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from sqlalchemy.exc import IntegrityError
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.models.statement_model import StatementRun, StatementDelivery
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.utils.email_utils import build_statement_email
+from app.services.statement_service import claim_statement_run, execute_statement_run, stream_statements
+
+client = TestClient(app)
+
+PERIOD = "2025-Q2"
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin and five shareholders with holdings"""
+    try:
+        db.query(StatementDelivery).delete()
+        db.query(StatementRun).delete()
+        db.query(ShareTransaction).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+    
+    db.add(User(
+        email="admin@example.com",
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True
+    ))
+    holders = [
+        User(email=f"holder{i}@example.com", hashed_password="x", full_name=f"Holder {i}", role=UserRole.SHAREHOLDER)
+        for i in range(5)
+    ]
+    db.add_all(holders)
+    db.flush()
+    for holder in holders:
+        db.add_all([
+            ShareIssuance(shareholder_id=holder.id, number_of_shares=100, price_per_share=2, issue_date=datetime(2025, 1, 15)),
+            ShareIssuance(shareholder_id=holder.id, number_of_shares=50, price_per_share=3, issue_date=datetime(2025, 5, 1)),
+            # After the period: not part of this statement
+            ShareIssuance(shareholder_id=holder.id, number_of_shares=999, issue_date=datetime(2025, 8, 1)),
+        ])
+    db.commit()
+    db.expire_all()
+    yield
+
+def get_admin_auth_headers():
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": "admin@example.com", "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def run_statements(db, **kwargs):
+    run = claim_statement_run(db, PERIOD)
+    return execute_statement_run(run.id, **kwargs)
+
+def test_holdings_are_aggregated_as_of_period_end(db):
+    statements = list(stream_statements(db, PERIOD, batch_size=2))
+    assert len(statements) == 5
+    statement = statements[0]
+    assert statement["total_shares"] == 150
+    assert statement["issued_in_period"] == 50
+    assert statement["issuance_count"] == 2
+    assert statement["total_invested"] == 350
+    assert statement["ownership_percentage"] == pytest.approx(20)
+
+def test_ledger_entries_before_period_end_move_holdings(db):
+    first, second = [holder.id for holder in db.query(User).filter(User.role == UserRole.SHAREHOLDER).order_by(User.id)][:2]
+    db.add_all([
+        ShareTransaction(kind="transfer", from_holder_id=first, to_holder_id=second, number_of_shares=30,
+                         created_at=datetime(2025, 6, 1)),
+        ShareTransaction(kind="cancel", from_holder_id=second, number_of_shares=50, created_at=datetime(2025, 6, 2)),
+        # After the period: not part of this statement
+        ShareTransaction(kind="cancel", from_holder_id=first, number_of_shares=100, created_at=datetime(2025, 7, 2)),
+    ])
+    db.commit()
+
+    statements = {s["shareholder_id"]: s for s in stream_statements(db, PERIOD, batch_size=2)}
+    assert (statements[first]["total_shares"], statements[second]["total_shares"]) == (120, 130)
+    assert statements[first]["ownership_percentage"] == pytest.approx(120 / 700 * 100)
+
+def test_run_sends_each_statement_once_over_one_connection(db):
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        run = run_statements(db, workers=0, messages_per_second=0, batch_size=2)
+        assert run.status == "completed"
+        assert (run.total, run.sent, run.failed, run.skipped) == (5, 5, 0, 0)
+        assert smtp.call_count == 1
+        assert smtp.return_value.send_message.call_count == 5
+        
+        # Nothing left for the period
+        run = run_statements(db, workers=0, messages_per_second=0)
+        assert (run.sent, run.skipped) == (0, 5)
+        assert smtp.return_value.send_message.call_count == 5
+
+def test_crashed_run_resumes_without_resending(db):
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        smtp.return_value.send_message.side_effect = [None, None] + [smtplib.SMTPServerDisconnected()] * 2
+        with pytest.raises(smtplib.SMTPServerDisconnected):
+            run_statements(db, workers=0, messages_per_second=0, batch_size=2)
+        
+        db.expire_all()
+        crashed = db.query(StatementRun).one()
+        assert crashed.status == "failed" and crashed.sent == 2
+        
+        smtp.return_value.send_message.side_effect = None
+        smtp.return_value.send_message.reset_mock()
+        run = run_statements(db, workers=0, messages_per_second=0)
+        assert (run.sent, run.skipped) == (3, 2)
+        recipients = [call.args[0]["To"] for call in smtp.return_value.send_message.call_args_list]
+        assert len(set(recipients)) == 3
+    
+    assert db.query(StatementDelivery).filter(StatementDelivery.status == "sent").count() == 5
+
+def test_rejected_recipient_is_recorded_and_retried(db):
+    refused = smtplib.SMTPRecipientsRefused({"holder0@example.com": (550, b"No such user")})
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        smtp.return_value.send_message.side_effect = [refused, None, None, None, None]
+        run = run_statements(db, workers=0, messages_per_second=0)
+        assert (run.status, run.sent, run.failed) == ("completed", 4, 1)
+        
+        smtp.return_value.send_message.side_effect = None
+        run = run_statements(db, workers=0, messages_per_second=0)
+        assert (run.sent, run.failed, run.skipped) == (1, 0, 4)
+
+def test_statements_render_in_a_process_pool(db):
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp, \
+            patch("app.services.statement_service.build_statement_email", wraps=build_statement_email) as build:
+        run = run_statements(db, workers=2, messages_per_second=0)
+    assert (run.status, run.sent) == ("completed", 5)
+    assert smtp.return_value.send_message.call_count == 5
+    assert all(call.args[3].startswith(b"%PDF") for call in build.call_args_list)
+
+def test_admin_endpoint_runs_in_background_and_reports_progress():
+    headers = get_admin_auth_headers()
+    with patch.object(settings, "STATEMENT_RENDER_WORKERS", 0), patch.object(settings, "ENVIRONMENT", "production"), \
+            patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        response = client.post("/api/v1/admin/statements", json={"period": PERIOD}, headers=headers)
+        assert response.status_code == 202
+        run_id = response.json()["id"]
+        
+        for _ in range(100):
+            progress = client.get(f"/api/v1/admin/statements/{run_id}", headers=headers).json()
+            if progress["status"] != "running":
+                break
+            time.sleep(0.05)
+    
+    assert progress["status"] == "completed"
+    assert (progress["total"], progress["sent"], progress["remaining"]) == (5, 5, 0)
+    assert progress["statements_per_second"] > 0
+    assert smtp.return_value.send_message.call_count == 5
+    
+    runs = client.get("/api/v1/admin/statements", headers=headers).json()
+    assert [run["id"] for run in runs] == [run_id]
+
+def test_concurrent_run_for_same_period_is_rejected(db):
+    db.add(StatementRun(period=PERIOD, status="running", total=5, skipped=0, sent=0, failed=0))
+    db.commit()
+    
+    response = client.post("/api/v1/admin/statements", json={"period": PERIOD}, headers=get_admin_auth_headers())
+    assert response.status_code == 409
+
+def test_stale_run_is_taken_over_and_only_one_run_can_be_live(db):
+    db.add(StatementRun(period=PERIOD, status="running", total=5, skipped=0, sent=2, failed=0,
+                        updated_at=datetime(2025, 7, 1)))
+    db.commit()
+
+    run = claim_statement_run(db, PERIOD)
+    assert run.status == "running"
+    assert db.query(StatementRun).filter(StatementRun.status == "interrupted").count() == 1
+
+    # A claim racing in another worker is stopped by the database
+    db.add(StatementRun(period=PERIOD, status="running", total=5, skipped=0, sent=0, failed=0))
+    with pytest.raises(IntegrityError):
+        db.commit()
+    db.rollback()
+
+def test_invalid_period_is_rejected():
+    response = client.post("/api/v1/admin/statements", json={"period": "Q3"}, headers=get_admin_auth_headers())
+    assert response.status_code == 400
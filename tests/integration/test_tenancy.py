@@ -0,0 +1,169 @@
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.company_model import Company, DEFAULT_COMPANY_ID
+from app.models.user_model import User, UserRole
+from app.models.issuance_model import ShareIssuance
+from app.models.ledger_model import ShareBalance, ShareTransaction
+from app.models.shareholder_model import ShareholderProfile
+from app.core.security import get_password_hash
+from app.services.company_service import create_company
+from app.services.ledger_service import record_issuance
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def clean(db):
+    db.query(ShareTransaction).delete()
+    db.query(ShareBalance).delete()
+    db.query(ShareIssuance).delete()
+    db.query(ShareholderProfile).delete()
+    db.query(User).delete()
+    db.query(Company).filter(Company.id != DEFAULT_COMPANY_ID).delete()
+    db.commit()
+
+def seed_company(db, company_id, admin_email, holders):
+    db.add(User(
+        email=admin_email,
+        hashed_password=get_password_hash("adminpassword"),
+        full_name="Admin User",
+        role=UserRole.ADMIN,
+        is_active=True,
+        company_id=company_id
+    ))
+    for name, shares in holders:
+        holder = User(
+            email=f"{name.lower()}@{company_id[:8]}.example.com",
+            hashed_password="x",
+            full_name=name,
+            role=UserRole.SHAREHOLDER,
+            company_id=company_id
+        )
+        db.add(holder)
+        db.flush()
+        issuance = ShareIssuance(
+            shareholder_id=holder.id,
+            company_id=company_id,
+            number_of_shares=shares,
+            price_per_share=1,
+            issue_date=datetime(2025, 1, 15)
+        )
+        db.add(issuance)
+        db.flush()
+        record_issuance(db, issuance)
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Two companies, each with an admin and shareholders holding shares"""
+    try:
+        clean(db)
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    other = create_company(db, "Other Co")
+    seed_company(db, DEFAULT_COMPANY_ID, "admin@example.com", [("Alice", 30), ("Bob", 10)])
+    seed_company(db, other.id, "admin@other.example.com", [("Zed", 500)])
+    db.commit()
+    db.expire_all()
+    yield other
+    clean(db)
+
+def get_auth_headers(email):
+    """Helper to get admin auth headers"""
+    login_response = client.post(
+        "/api/v1/token",
+        json={"email": email, "password": "adminpassword"}
+    )
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    token = login_response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+def test_shareholder_listing_is_scoped_to_company():
+    default = client.get("/api/v1/shareholders/", headers=get_auth_headers("admin@example.com"))
+    other = client.get("/api/v1/shareholders/", headers=get_auth_headers("admin@other.example.com"))
+
+    assert sorted(s["full_name"] for s in default.json()) == ["Alice", "Bob"]
+    assert [s["full_name"] for s in other.json()] == ["Zed"]
+
+def test_distribution_totals_are_per_company():
+    default = client.get("/api/v1/issuances/distribution", headers=get_auth_headers("admin@example.com")).json()
+    other = client.get("/api/v1/issuances/distribution", headers=get_auth_headers("admin@other.example.com")).json()
+
+    assert {d["shareholder_name"]: d["percentage"] for d in default} == {"Alice": 75.0, "Bob": 25.0}
+    assert [(d["shareholder_name"], d["percentage"]) for d in other] == [("Zed", 100.0)]
+
+def test_analytics_and_search_are_scoped_to_company():
+    headers = get_auth_headers("admin@other.example.com")
+
+    summary = client.get("/api/v1/analytics/capital/summary", headers=headers).json()
+    assert summary["total_shares"] == 500
+    assert client.get("/api/v1/shareholders/search?q=Ali", headers=headers).json() == []
+
+    results = client.get("/api/v1/shareholders/search?q=Ali", headers=get_auth_headers("admin@example.com")).json()
+    assert [r["full_name"] for r in results] == ["Alice"]
+
+def test_cannot_issue_to_or_read_another_companys_shareholder(db):
+    headers = get_auth_headers("admin@example.com")
+    zed = db.query(User).filter(User.full_name == "Zed").first()
+    issuance = db.query(ShareIssuance).filter(ShareIssuance.shareholder_id == zed.id).first()
+
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": zed.id, "number_of_shares": 5},
+        headers=headers
+    )
+    assert response.status_code == 400
+    assert client.get(f"/api/v1/shareholders/{zed.id}", headers=headers).status_code == 404
+    assert client.get(f"/api/v1/issuances/{issuance.id}/certificate", headers=headers).status_code == 404
+    assert client.get(f"/api/v1/issuances/test-email?issuance_id={issuance.id}", headers=headers).status_code == 404
+    assert client.get(f"/api/v1/issuances/test-email?issuance_id={issuance.id}").status_code == 401
+
+def test_emails_are_unique_across_companies(db):
+    response = client.post(
+        "/api/v1/register",
+        json={"email": "zed@other-co.example.com", "password": "pw", "full_name": "Zed", "role": "shareholder"},
+        headers=get_auth_headers("admin@example.com")
+    )
+    assert response.status_code == 201
+    response = client.post(
+        "/api/v1/register",
+        json={"email": "zed@other-co.example.com", "password": "pw", "full_name": "Zed", "role": "shareholder"},
+        headers=get_auth_headers("admin@other.example.com")
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already registered"
+
+def test_writes_invalidate_only_their_company(db):
+    default_headers = get_auth_headers("admin@example.com")
+    other_headers = get_auth_headers("admin@other.example.com")
+    client.get("/api/v1/analytics/capital/summary", headers=default_headers)
+    client.get("/api/v1/analytics/capital/summary", headers=other_headers)
+
+    zed = db.query(User).filter(User.full_name == "Zed").first()
+    response = client.post(
+        "/api/v1/issuances/",
+        json={"shareholder_id": zed.id, "number_of_shares": 100},
+        headers=other_headers
+    )
+    assert response.status_code == 201
+
+    assert client.get("/api/v1/analytics/capital/summary", headers=other_headers).json()["total_shares"] == 600
+    assert client.get("/api/v1/analytics/capital/summary", headers=default_headers).json()["total_shares"] == 40
+
+def test_company_endpoint_returns_current_company(setup_and_teardown):
+    response = client.get("/api/v1/admin/company", headers=get_auth_headers("admin@other.example.com"))
+
+    assert response.status_code == 200
+    assert response.json()["id"] == setup_and_teardown.id
+    assert response.json()["name"] == "Other Co"
@@ -0,0 +1,108 @@
+from datetime import datetime
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.session import SessionLocal
+from app.models.issuance_model import ShareIssuance
+from app.models.user_model import User, UserRole
+from app.models.shareholder_model import ShareholderProfile
+from app.models.vesting_model import VestingSchedule
+from app.core.security import get_password_hash
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def db():
+    """Database session fixture"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@pytest.fixture(autouse=True)
+def setup_and_teardown(db):
+    """Clean database and create an admin, two shareholders and their issuances"""
+    try:
+        db.query(VestingSchedule).delete()
+        db.query(ShareIssuance).delete()
+        db.query(ShareholderProfile).delete()
+        db.query(User).delete()
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise e
+
+    users = [
+        User(id="admin-id", email="admin@example.com", hashed_password=get_password_hash("adminpassword"),
+             full_name="Admin User", role=UserRole.ADMIN, is_active=True),
+        User(id="alice-id", email="alice@example.com", hashed_password=get_password_hash("alicepassword"),
+             full_name="Alice", role=UserRole.SHAREHOLDER, is_active=True),
+        User(id="bob-id", email="bob@example.com", hashed_password=get_password_hash("bobpassword"),
+             full_name="Bob", role=UserRole.SHAREHOLDER, is_active=True),
+    ]
+    db.add_all(users)
+    db.flush()
+    db.add_all([
+        ShareIssuance(id="alice-grant", shareholder_id="alice-id", number_of_shares=4800, issue_date=datetime(2024, 1, 15)),
+        ShareIssuance(id="bob-grant", shareholder_id="bob-id", number_of_shares=1000, issue_date=datetime(2024, 3, 1)),
+    ])
+    db.commit()
+    yield
+
+def auth_headers(email, password):
+    login_response = client.post("/api/v1/token", json={"email": email, "password": password})
+    assert login_response.status_code == 200, f"Login failed: {login_response.json()}"
+    return {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+def get_admin_auth_headers():
+    return auth_headers("admin@example.com", "adminpassword")
+
+def test_set_schedule_and_read_vested_shares():
+    headers = get_admin_auth_headers()
+    response = client.put(
+        "/api/v1/issuances/alice-grant/vesting",
+        json={"cliff_months": 12, "duration_months": 48},
+        headers=headers
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["start_date"] == "2024-01-15"
+
+    alice = auth_headers("alice@example.com", "alicepassword")
+    schedule = client.get("/api/v1/issuances/alice-grant/vesting?as_of=2025-07-20", headers=alice).json()
+    assert (schedule["vested_shares"], schedule["unvested_shares"]) == (1800, 3000)
+
+    assert client.get("/api/v1/issuances/bob-grant/vesting", headers=alice).status_code == 403
+    assert client.get("/api/v1/issuances/bob-grant/vesting", headers=headers).status_code == 404
+
+def test_vested_distribution_follows_schedules():
+    headers = get_admin_auth_headers()
+    before = client.get("/api/v1/issuances/distribution/vested?as_of=2025-07-20", headers=headers).json()
+    assert {row["shareholder_id"]: row["vested_shares"] for row in before} == {"alice-id": 4800, "bob-id": 1000}
+
+    client.put(
+        "/api/v1/issuances/alice-grant/vesting",
+        json={"cliff_months": 12, "duration_months": 48, "acceleration": "single_trigger",
+              "acceleration_percent": 50, "change_of_control_date": "2025-07-01"},
+        headers=headers
+    )
+    distribution = client.get("/api/v1/issuances/distribution/vested?as_of=2025-07-20", headers=headers).json()
+    by_holder = {row["shareholder_id"]: row for row in distribution}
+    # 1800 on schedule, plus half of the 3100 unvested at the change of control
+    assert by_holder["alice-id"]["vested_shares"] == 3350
+    assert by_holder["alice-id"]["unvested_shares"] == 1450
+    assert by_holder["alice-id"]["shareholder_name"] == "Alice"
+    assert round(by_holder["bob-id"]["percentage"], 2) == round(1000 / 4350 * 100, 2)
+
+    # Issuances after the as-of date are not counted
+    early = client.get("/api/v1/issuances/distribution/vested?as_of=2024-02-01", headers=headers).json()
+    assert [(row["shareholder_id"], row["total_shares"], row["vested_shares"]) for row in early] == [("alice-id", 4800, 0)]
+
+def test_schedule_validation():
+    headers = get_admin_auth_headers()
+    invalid = client.put("/api/v1/issuances/alice-grant/vesting", json={"cliff_months": 60, "duration_months": 48}, headers=headers)
+    assert invalid.status_code == 422
+    missing = client.put("/api/v1/issuances/nope/vesting", json={"duration_months": 48}, headers=headers)
+    assert missing.status_code == 404
+    alice = auth_headers("alice@example.com", "alicepassword")
+    assert client.put("/api/v1/issuances/alice-grant/vesting", json={"duration_months": 48}, headers=alice).status_code == 403
@@ -0,0 +1,37 @@
+import hashlib
+import pytest
+from app.utils.artifact_store import LocalArtifactStore
+
+def test_put_is_content_addressed_and_idempotent(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    
+    key = store.put(b"%PDF-1.4 certificate")
+    assert key == hashlib.sha256(b"%PDF-1.4 certificate").hexdigest()
+    assert store.put(b"%PDF-1.4 certificate") == key
+    assert store.exists(key)
+    assert store.read(key) == b"%PDF-1.4 certificate"
+    assert store.path(key) == str(tmp_path / key[:2] / key)
+    # No temporary files left behind
+    assert [p.name for p in (tmp_path / key[:2]).iterdir()] == [key]
+
+def test_delete_and_legacy_variants(tmp_path):
+    store = LocalArtifactStore(str(tmp_path))
+    key = store.put(b"data")
+    # Compressed copies are no longer written, but old ones can be removed
+    with open(store.path(f"{key}.gzip"), "wb") as f:
+        f.write(b"compressed")
+    
+    store.delete(key)
+    store.delete(key)
+    assert not store.exists(key)
+    assert store.exists(f"{key}.gzip")
+    
+    store.delete_with_variants(key)
+    assert not store.exists(f"{key}.gzip")
+
+@pytest.mark.parametrize("key", ["../etc/passwd", "abc", "0" * 64 + ".exe", "0" * 64 + "/x"])
+def test_rejects_invalid_keys(tmp_path, key):
+    store = LocalArtifactStore(str(tmp_path))
+    
+    with pytest.raises(ValueError):
+        store.exists(key)
@@ -0,0 +1,112 @@
+import threading
+import time
+from app.core.audit import AuditLog
+
+class RecordingSink:
+    def __init__(self, failures=0):
+        self.batches = []
+        self.failures = failures
+    
+    def __call__(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("database unavailable")
+        self.batches.append(list(rows))
+
+def make_log(sink, **kwargs):
+    options = {"max_queue": 1000, "batch_size": 100, "flush_interval": 60, "enqueue_timeout": 0.01}
+    options.update(kwargs)
+    return AuditLog(sink, **options)
+
+def test_record_only_enqueues_and_flush_writes_in_batches():
+    sink = RecordingSink()
+    audit = make_log(sink)
+    for i in range(250):
+        audit.record("issuance.created", "issuance", str(i), actor_id="admin", company_id="acme")
+    
+    assert sink.batches == []
+    assert audit.flush() == 250
+    assert [len(batch) for batch in sink.batches] == [100, 100, 50]
+    assert [row["entity_id"] for row in sink.batches[0][:3]] == ["0", "1", "2"]
+    assert sink.batches[0][0]["company_id"] == "acme"
+    assert audit.stats()["written"] == 250
+    assert audit.stats()["batches"] == 3
+
+def test_full_queue_drops_after_bounded_wait():
+    sink = RecordingSink()
+    audit = make_log(sink, max_queue=2, enqueue_timeout=0.05)
+    assert audit.record("a", "issuance")
+    assert audit.record("b", "issuance")
+    
+    started = time.monotonic()
+    assert not audit.record("c", "issuance")
+    assert time.monotonic() - started < 1
+    
+    stats = audit.stats()
+    assert stats["recorded"] == 2
+    assert stats["dropped"] == 1
+    assert stats["pending"] == 2
+
+def test_failed_batch_is_retried_on_next_flush():
+    sink = RecordingSink(failures=1)
+    audit = make_log(sink)
+    audit.record("a", "issuance", "1")
+    
+    assert audit.flush() == 0
+    assert audit.pending() == 1
+    assert audit.flush() == 1
+    assert sink.batches == [[sink.batches[0][0]]]
+    assert audit.stats()["failed_flushes"] == 1
+
+def test_batch_that_keeps_failing_is_dropped():
+    sink = RecordingSink(failures=3)
+    audit = make_log(sink)
+    audit.record("a", "issuance", "1")
+    
+    for _ in range(3):
+        audit.flush()
+    
+    assert audit.pending() == 0
+    assert audit.stats()["dropped"] == 1
+    audit.record("b", "issuance", "2")
+    assert audit.flush() == 1
+
+def test_writer_thread_flushes_full_batches_and_stop_flushes_the_rest():
+    sink = RecordingSink()
+    audit = make_log(sink, batch_size=10)
+    audit.start()
+    try:
+        for i in range(10):
+            audit.record("a", "issuance", str(i))
+        # A full batch wakes the writer without waiting for the interval
+        deadline = time.monotonic() + 5
+        while not sink.batches and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(sink.batches) == 1
+        
+        audit.record("b", "issuance", "late")
+    finally:
+        audit.stop()
+    
+    assert [row["entity_id"] for row in sink.batches[-1]] == ["late"]
+    assert audit.pending() == 0
+
+def test_concurrent_records_are_all_written_once():
+    sink = RecordingSink()
+    audit = make_log(sink, max_queue=10000, batch_size=64, flush_interval=0.01)
+    audit.start()
+    
+    def worker(n):
+        for i in range(200):
+            audit.record("a", "issuance", f"{n}-{i}")
+    
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    audit.stop()
+    
+    ids = [row["entity_id"] for batch in sink.batches for row in batch]
+    assert len(ids) == 1600
+    assert len(set(ids)) == 1600
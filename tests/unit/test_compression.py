@@ -0,0 +1,83 @@
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.middleware.compression import CompressionMiddleware
+from app.utils.compression import compress, negotiate_encoding, available_encodings
+
+
+def make_app():
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+
+    @app.get("/small")
+    def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/large")
+    def large():
+        return PlainTextResponse("row,value\n" * 500)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"line {i}\n" for i in range(200)), media_type="text/csv")
+
+    @app.get("/events")
+    def events():
+        return StreamingResponse(iter(["data: x\n\n"] * 50), media_type="text/event-stream")
+
+    @app.get("/precompressed")
+    def precompressed():
+        return PlainTextResponse(gzip.compress(b"x" * 500), headers={"Content-Encoding": "gzip"})
+
+    return app
+
+client = TestClient(make_app())
+
+def test_negotiate_encoding_honours_q_values():
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("gzip") == "gzip"
+    assert negotiate_encoding("gzip;q=0.5, identity") == "gzip"
+    assert negotiate_encoding("gzip;q=0, deflate") is None
+    assert negotiate_encoding("*;q=0.1, gzip;q=0") in ("br", "zstd", None)
+    if "br" in available_encodings():
+        assert negotiate_encoding("gzip;q=1, br;q=0.8") == "gzip"
+        assert negotiate_encoding("gzip, br") in ("br", "zstd")
+
+@pytest.mark.parametrize("encoding", available_encodings())
+def test_compress_round_trip(encoding):
+    data = b'{"shareholder": "Alice"}' * 100
+    response = client.get("/large", headers={"Accept-Encoding": encoding})
+    
+    assert response.headers["content-encoding"] == encoding
+    assert response.text == "row,value\n" * 500
+    assert len(compress(data, encoding)) < len(data)
+
+def test_small_bodies_are_not_compressed():
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    
+    assert "content-encoding" not in response.headers
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.text == "tiny"
+
+def test_streaming_responses_are_compressed_chunkwise():
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "".join(f"line {i}\n" for i in range(200))
+
+def test_event_streams_and_encoded_bodies_pass_through():
+    response = client.get("/events", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    
+    response = client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.content == b"x" * 500
+
+def test_identity_when_not_accepted():
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    
+    assert "content-encoding" not in response.headers
+    assert response.text == "row,value\n" * 500
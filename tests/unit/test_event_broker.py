@@ -0,0 +1,126 @@
+import asyncio
+import itertools
+import threading
+import pytest
+from app.core.config import settings
+from app.core.events import EventBroker, EventBus, HEARTBEAT, ISSUANCE_CREATED, DISTRIBUTION_CHANGED, configure_event_bus
+
+class SharedSequence:
+    """Stands in for a bus server: one id sequence, every worker attached"""
+
+    def __init__(self):
+        self.ids = itertools.count(1)
+        self.receivers = []
+
+class WorkerBus(EventBus):
+    def __init__(self, shared):
+        self.shared = shared
+
+    def start(self, on_event):
+        self.shared.receivers.append(on_event)
+
+    def next_id(self):
+        return next(self.shared.ids)
+
+    def publish(self, event):
+        for receiver in self.shared.receivers:
+            receiver(event)
+
+async def next_event(subscription, timeout=1.0):
+    return await asyncio.wait_for(subscription.get(), timeout)
+
+def test_events_are_filtered_by_audience():
+    async def scenario():
+        broker = EventBroker()
+        admin = broker.subscribe(shareholder_id=None, is_admin=True)
+        alice = broker.subscribe(shareholder_id="alice", is_admin=False)
+        bob = broker.subscribe(shareholder_id="bob", is_admin=False)
+        
+        # Publish from a worker thread like the sync endpoints do
+        thread = threading.Thread(target=lambda: (
+            broker.publish(ISSUANCE_CREATED, {"id": "i1"}, shareholder_id="alice"),
+            broker.publish(DISTRIBUTION_CHANGED, {"cap_table_version": 2})
+        ))
+        thread.start()
+        thread.join()
+        
+        assert (await next_event(admin)).type == ISSUANCE_CREATED
+        assert (await next_event(admin)).type == DISTRIBUTION_CHANGED
+        event = await next_event(alice)
+        assert event.type == ISSUANCE_CREATED and event.data["id"] == "i1"
+        
+        # Bob sees neither Alice's issuance nor the admin-only distribution
+        await asyncio.sleep(0.05)
+        assert bob.queue.empty()
+        assert alice.queue.empty()
+        
+        broker.unsubscribe(bob)
+        assert broker.subscriber_count == 2
+    
+    asyncio.run(scenario())
+
+def test_reconnect_replays_missed_events_and_heartbeats():
+    async def scenario():
+        broker = EventBroker()
+        admin = broker.subscribe(shareholder_id=None, is_admin=True)
+        broker.publish(ISSUANCE_CREATED, {"id": "i1"}, shareholder_id="alice")
+        broker.publish(ISSUANCE_CREATED, {"id": "i2"}, shareholder_id="alice")
+        seen = await next_event(admin)
+        broker.unsubscribe(admin)
+        
+        alice = broker.subscribe(shareholder_id="alice", is_admin=False, last_event_id=seen.id)
+        assert (await next_event(alice)).data["id"] == "i2"
+        
+        broker.start(heartbeat_interval=0.01)
+        assert await next_event(alice) is HEARTBEAT
+        await broker.stop()
+        
+        while (item := await next_event(alice)) is HEARTBEAT:
+            pass
+        assert item is None
+    
+    asyncio.run(scenario())
+
+def test_slow_subscriber_is_disconnected():
+    async def scenario():
+        broker = EventBroker(max_queue=2)
+        admin = broker.subscribe(shareholder_id=None, is_admin=True)
+        for i in range(5):
+            broker.publish(DISTRIBUTION_CHANGED, {"cap_table_version": i})
+        await asyncio.sleep(0.05)
+        
+        assert (await next_event(admin)).type == DISTRIBUTION_CHANGED
+        assert await next_event(admin) is None
+    
+    asyncio.run(scenario())
+
+def test_event_ids_are_shared_between_workers():
+    async def scenario():
+        shared = SharedSequence()
+        first, second = EventBroker(WorkerBus(shared)), EventBroker(WorkerBus(shared))
+        admin = first.subscribe(shareholder_id=None, is_admin=True)
+        first.publish(DISTRIBUTION_CHANGED, {"cap_table_version": 1})
+        second.publish(DISTRIBUTION_CHANGED, {"cap_table_version": 2})
+        seen = await next_event(admin)
+        
+        # Reconnecting to the other worker resumes after the same event
+        resumed = second.subscribe(shareholder_id=None, is_admin=True, last_event_id=seen.id)
+        event = await next_event(resumed)
+        assert event.data == {"cap_table_version": 2}
+        assert event.id == (await next_event(admin)).id
+    
+    asyncio.run(scenario())
+
+def test_bus_must_implement_the_interface():
+    class Incomplete(EventBus):
+        def start(self, on_event):
+            pass
+    
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_local_bus_refuses_several_workers(monkeypatch):
+    monkeypatch.setattr(settings, "EVENT_BUS_BACKEND", "local")
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    with pytest.raises(RuntimeError, match="WEB_CONCURRENCY"):
+        configure_event_bus()
@@ -21,11 +21,27 @@ def test_create_issuance_success():
         price_per_share=10.0
     )
 
+    mock_db.query.return_value.filter.return_value.first.return_value = User(id="valid-uuid")
+
     # Test successful creation
-    result = create_issuance(mock_db, mock_issuance)
+    with patch("app.services.issuance_service.record_issuance") as mock_record:
+        result = create_issuance(mock_db, mock_issuance, actor_id="admin-id")
+    # The ledger entry is written before the single commit
+    mock_record.assert_called_once_with(mock_db, result, "admin-id")
     mock_db.add.assert_called_once()
     mock_db.commit.assert_called_once()
-    mock_db.refresh.assert_called_once()
+    # Server defaults come back with the INSERT; no refresh round-trip
+    mock_db.refresh.assert_not_called()
+    assert result.certificate_url == f"/api/v1/issuances/{result.id}/certificate"
+
+def test_create_issuance_unknown_shareholder():
+    mock_db = Mock(spec=Session)
+    mock_db.query.return_value.filter.return_value.first.return_value = None
+
+    with pytest.raises(HTTPException) as exc_info:
+        create_issuance(mock_db, ShareIssuanceCreate(shareholder_id="missing", number_of_shares=1))
+    assert exc_info.value.status_code == 400
+    mock_db.add.assert_not_called()
 
 def test_get_issuances_filtered():
     mock_db = Mock(spec=Session)
@@ -44,26 +60,23 @@ def test_get_issuances_filtered():
 def test_get_ownership_distribution():
     mock_db = Mock(spec=Session)
     
-    # Mock database response - create proper mock objects with total_shares attribute
+    # Mock balance rows - create proper mock objects with total_shares attribute
     class MockResult:
         def __init__(self, shareholder_id, total_shares):
             self.shareholder_id = shareholder_id
             self.total_shares = total_shares
+            self.full_name = "Test User"
     
     mock_results = [
         MockResult("user1", 100),
         MockResult("user2", 200)
     ]
     
-    mock_db.query.return_value.group_by.return_value.all.return_value = mock_results
-    
-    # Mock user lookup
-    mock_user = Mock()
-    mock_user.full_name = "Test User"
-    mock_db.query.return_value.filter.return_value.first.return_value = mock_user
+    mock_db.query.return_value.outerjoin.return_value.filter.return_value.order_by.return_value.all.return_value = mock_results
     
     result = get_ownership_distribution(mock_db)
     
     assert len(result) == 2
+    assert result[0]["shareholder_name"] == "Test User"
     assert result[0]["percentage"] == pytest.approx(33.33, 0.1)
     assert result[1]["percentage"] == pytest.approx(66.66, 0.1)
\ No newline at end of file
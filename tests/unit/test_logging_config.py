@@ -0,0 +1,85 @@
+import json
+import logging
+import queue
+from app.core.logging_config import (
+    JsonFormatter, LazyQueueHandler, RequestContextFilter, request_context, route_template
+)
+
+def make_record(msg, args=(), exc_info=None, **extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, msg, args, exc_info)
+    record.__dict__.update(extra)
+    return record
+
+def test_json_formatter_includes_request_fields_and_extras():
+    record = make_record("Issued %d shares", (100,), request_id="req-1", user_id="u1", route="/api/v1/issuances/", status=201)
+    
+    entry = json.loads(JsonFormatter().format(record))
+    
+    assert entry["message"] == "Issued 100 shares"
+    assert entry["level"] == "INFO"
+    assert entry["logger"] == "app.test"
+    assert (entry["request_id"], entry["user_id"], entry["route"]) == ("req-1", "u1", "/api/v1/issuances/")
+    assert entry["status"] == 201
+
+def test_json_formatter_renders_exceptions():
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        import sys
+        record = make_record("failed", exc_info=sys.exc_info())
+    
+    entry = json.loads(JsonFormatter().format(record))
+    assert "ValueError: boom" in entry["exception"]
+
+def test_queue_handler_leaves_immutable_arguments_for_the_listener():
+    handler = LazyQueueHandler(queue.SimpleQueue())
+    record = make_record("Issued %d shares to %s", (100, "holder"))
+    
+    prepared = handler.prepare(record)
+    
+    assert prepared.msg == "Issued %d shares to %s"
+    assert prepared.args == (100, "holder")
+    assert prepared.getMessage() == "Issued 100 shares to holder"
+
+def test_queue_handler_renders_mutable_arguments_and_tracebacks_up_front():
+    handler = LazyQueueHandler(queue.SimpleQueue())
+    ids = ["a"]
+    try:
+        raise RuntimeError("smtp down")
+    except RuntimeError:
+        import sys
+        record = make_record("Failed for %s", (ids,), exc_info=sys.exc_info())
+    
+    prepared = handler.prepare(record)
+    ids.append("b")
+    
+    assert prepared.msg == "Failed for ['a']"
+    assert prepared.args is None
+    assert prepared.exc_info is None
+    assert "RuntimeError: smtp down" in prepared.exc_text
+
+def test_route_template_restores_path_parameters():
+    assert route_template("/api/v1/shareholders/abc", {"shareholder_id": "abc"}) == "/api/v1/shareholders/{shareholder_id}"
+    assert route_template("/api/v1/issuances/", {}) == "/api/v1/issuances/"
+    assert route_template("/a/x/b/x", {"first": "x", "second": "x"}) in ("/a/{first}/b/{second}", "/a/{second}/b/{first}")
+
+def test_filter_uses_route_template_of_the_current_request():
+    scope = {
+        "path": "/api/v1/issuances/123/certificate",
+        "endpoint": object(),
+        "path_params": {"issuance_id": "123"}
+    }
+    token = request_context.set({"request_id": "req-2", "user_id": "u2", "scope": scope})
+    try:
+        record = make_record("downloaded")
+        RequestContextFilter().filter(record)
+    finally:
+        request_context.reset(token)
+    
+    assert record.request_id == "req-2"
+    assert record.user_id == "u2"
+    assert record.route == "/api/v1/issuances/{issuance_id}/certificate"
+    
+    outside = make_record("startup")
+    RequestContextFilter().filter(outside)
+    assert outside.request_id is None and outside.route is None
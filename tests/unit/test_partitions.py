@@ -0,0 +1,27 @@
+from datetime import date
+from unittest.mock import Mock
+from app.db.partitions import ensure_partitions, next_quarter, partition_name, quarter_start, quarters
+
+def test_quarter_boundaries():
+    assert quarter_start(date(2026, 1, 1)) == date(2026, 1, 1)
+    assert quarter_start(date(2026, 9, 30)) == date(2026, 7, 1)
+    assert quarter_start(date(2026, 12, 31)) == date(2026, 10, 1)
+    assert next_quarter(date(2026, 7, 1)) == date(2026, 10, 1)
+    assert next_quarter(date(2026, 10, 1)) == date(2027, 1, 1)
+
+def test_partition_names():
+    assert partition_name(date(2026, 1, 1)) == "share_issuances_2026q1"
+    assert partition_name(date(2026, 10, 1)) == "share_issuances_2026q4"
+
+def test_quarters_cover_both_ends():
+    assert quarters(date(2025, 11, 15), date(2026, 4, 2)) == [
+        date(2025, 10, 1), date(2026, 1, 1), date(2026, 4, 1)
+    ]
+    assert quarters(date(2026, 5, 1), date(2026, 5, 1)) == [date(2026, 4, 1)]
+
+def test_ensure_partitions_is_a_no_op_off_postgres():
+    conn = Mock()
+    conn.dialect.name = "sqlite"
+    
+    assert ensure_partitions(conn) == []
+    conn.execute.assert_not_called()
@@ -0,0 +1,104 @@
+from passlib.context import CryptContext
+import pytest
+from app.core.config import settings
+from app.core.passwords import PasswordHasher, invite_matches, new_invite
+
+def hash_with(rounds, password="secret"):
+    return CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds).hash(password)
+
+def rounds_of(hashed):
+    return int(hashed.split("$")[2])
+
+def test_hash_uses_current_cost_and_verifies():
+    hasher = PasswordHasher(rounds=5)
+    hashed = hasher.hash("secret")
+
+    assert rounds_of(hashed) == 5
+    assert hasher.verify("secret", hashed) is True
+    assert hasher.verify("wrong", hashed) is False
+
+def test_weaker_hash_is_replaced_on_successful_verify():
+    hasher = PasswordHasher(rounds=5)
+    old = hash_with(4)
+
+    assert hasher.verify_and_update("wrong", old) == (False, None)
+    valid, new_hash = hasher.verify_and_update("secret", old)
+    assert valid is True
+    assert rounds_of(new_hash) == 5
+    assert hasher.verify("secret", new_hash)
+    assert hasher.stats()["rehashed"] == 1
+
+def test_stronger_hashes_are_never_rehashed_down():
+    hasher = PasswordHasher(rounds=5)
+
+    assert hasher.verify_and_update("secret", hash_with(6)) == (True, None)
+    assert hasher.verify_and_update("secret", hash_with(8)) == (True, None)
+    assert hasher.stats()["rehashed"] == 0
+
+def test_calibration_respects_floor_and_ceiling():
+    hasher = PasswordHasher(rounds=4)
+
+    # Any cost is slower than this target, so the floor wins
+    assert hasher.calibrate(target_ms=0.001, min_rounds=5, max_rounds=8) == 5
+    assert rounds_of(hasher.hash("secret")) == 5
+    assert hasher.stats()["calibrated_verify_ms"] > 0
+
+    assert hasher.calibrate(target_ms=60_000, min_rounds=4, max_rounds=6) == 6
+
+def test_calibration_picks_fewest_rounds_reaching_the_target(monkeypatch):
+    hasher = PasswordHasher(rounds=4)
+    # 1ms at 4 rounds, doubling per round: 64ms at 10, 256ms at 12
+    monkeypatch.setattr(hasher, "_time_verify", lambda rounds: 2.0 ** (rounds - 4))
+
+    assert hasher.calibrate(target_ms=250, min_rounds=10, max_rounds=16) == 12
+    assert hasher.calibrated_ms == 256
+    assert hasher.calibrate(target_ms=256, min_rounds=10, max_rounds=16) == 12
+    assert hasher.calibrate(target_ms=257, min_rounds=10, max_rounds=16) == 13
+    assert hasher.calibrate(target_ms=10, min_rounds=10, max_rounds=16) == 10
+
+def test_calibration_steps_back_after_a_noisy_floor(monkeypatch):
+    hasher = PasswordHasher(rounds=4)
+    # The floor measures slow once (e.g. a cold cache), then settles
+    timings = {10: [200.0]}
+    monkeypatch.setattr(hasher, "_time_verify", lambda rounds: timings.get(rounds, [2.0 ** (rounds - 4)]).pop())
+
+    # Extrapolating from 200ms asks for 11 rounds, which measures 128ms: one more.
+    # From 20ms it asks for 14, which is more than needed: back to 12
+    assert hasher.calibrate(target_ms=250, min_rounds=10, max_rounds=16) == 12
+    timings[10] = [20.0]
+    assert hasher.calibrate(target_ms=250, min_rounds=10, max_rounds=16) == 12
+
+def test_pinned_rounds_skip_calibration(monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_ROUNDS", 4)
+    hasher = PasswordHasher()
+
+    assert hasher.calibrate() == 4
+    assert hasher.calibrated_ms is None
+
+def test_latency_metrics():
+    hasher = PasswordHasher(rounds=4)
+    hashed = hasher.hash("secret")
+    for _ in range(3):
+        hasher.verify("secret", hashed)
+
+    stats = hasher.stats()
+    assert stats["rounds"] == 4
+    assert stats["hash"]["count"] == 1
+    assert stats["verify"]["count"] == 3
+    assert 0 < stats["verify"]["p50_ms"] <= stats["verify"]["p95_ms"] <= stats["verify"]["max_ms"]
+
+def test_invite_hash_matches_only_its_secret_and_never_as_a_password():
+    secret, stored = new_invite()
+    hasher = PasswordHasher(rounds=5)
+
+    assert invite_matches(stored, secret) is True
+    assert invite_matches(stored, secret + "x") is False
+    assert invite_matches(hasher.hash(secret), secret) is False
+    assert hasher.verify_and_update(secret, stored) == (False, None)
+
+def test_hash_many_without_a_pool_hashes_inline():
+    hasher = PasswordHasher(rounds=4)
+    hashed = hasher.hash_many(["a", "b"])
+
+    assert [hasher.verify(p, h) for p, h in zip("ab", hashed)] == [True, True]
+    assert hasher.stats()["hash"]["count"] == 2
@@ -0,0 +1,83 @@
+import sys
+import threading
+import time
+from collections import Counter
+import pytest
+from app.core import profiler
+from app.core.profiler import ProfilerBusy, collapse, profile, sample
+
+def spin_for_profiler(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+@pytest.fixture
+def busy_thread():
+    stop = threading.Event()
+    thread = threading.Thread(target=spin_for_profiler, args=(stop,), daemon=True)
+    thread.start()
+    yield thread
+    stop.set()
+    thread.join()
+
+def test_collapse_lists_frames_root_first():
+    def inner():
+        return collapse(sys._getframe())
+
+    stack = inner().split(";")
+    assert stack[-1].endswith(":inner")
+    assert stack[-2].endswith(":test_collapse_lists_frames_root_first")
+
+def test_sample_skips_the_sampling_thread_and_idle_threads(busy_thread):
+    idle = threading.Event()
+    waiter = threading.Thread(target=idle.wait, daemon=True)
+    waiter.start()
+    try:
+        stacks = Counter()
+        sample(stacks)
+    finally:
+        idle.set()
+        waiter.join()
+
+    assert any(":spin_for_profiler" in stack for stack in stacks)
+    assert not any("test_sample_skips_the_sampling_thread" in stack for stack in stacks)
+    assert not any(stack.endswith("threading:wait") for stack in stacks)
+
+def test_profile_counts_samples_of_busy_code(busy_thread):
+    result = profile(0.2, 0.005)
+
+    assert result.samples > 5
+    assert result.seconds >= 0.2
+    busy = sum(count for stack, count in result.stacks.items() if ":spin_for_profiler" in stack)
+    assert busy > 0
+    lines = result.collapsed().splitlines()
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert result.allocations is None
+
+def test_allocation_report_lists_growing_lines():
+    held = []
+
+    def allocate():
+        deadline = time.monotonic() + 0.15
+        while time.monotonic() < deadline:
+            held.append(bytearray(10000))
+            time.sleep(0.001)
+
+    worker = threading.Thread(target=allocate)
+    worker.start()
+    result = profile(0.2, 0.01, allocations_top=5)
+    worker.join()
+
+    assert 0 < len(result.allocations) <= 5
+    assert any(__file__ in stat["location"] for stat in result.allocations)
+    assert all(stat["size_bytes"] > 0 for stat in result.allocations)
+
+def test_only_one_session_at_a_time():
+    first = threading.Thread(target=profile, args=(0.3, 0.01))
+    first.start()
+    while not profiler.is_running():
+        time.sleep(0.001)
+    with pytest.raises(ProfilerBusy):
+        profile(0.1, 0.01)
+    first.join()
+
+    assert profile(0.01, 0.005).samples >= 1
@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from unittest.mock import patch
+import pytest
+from app.core.rate_limit import ShardedMemoryBackend, LoginRateLimiter, RateLimitBackend, client_ip
+
+def limiter_settings(mock_settings, email_capacity=3, email_per_minute=1):
+    mock_settings.LOGIN_RATE_LIMIT_ENABLED = True
+    mock_settings.LOGIN_RATE_LIMIT_IP_CAPACITY = 100
+    mock_settings.LOGIN_RATE_LIMIT_IP_PER_MINUTE = 60
+    mock_settings.LOGIN_RATE_LIMIT_EMAIL_CAPACITY = email_capacity
+    mock_settings.LOGIN_RATE_LIMIT_EMAIL_PER_MINUTE = email_per_minute
+
+def test_token_bucket_acquire_and_refill():
+    backend = ShardedMemoryBackend(shards=4)
+    
+    # Fresh bucket is full
+    assert backend.acquire("k", capacity=2, refill_per_second=1) == 0
+    assert backend.acquire("k", capacity=2, refill_per_second=1) == 0
+    
+    # An empty bucket gives nothing and says how long until it can
+    wait = backend.acquire("k", capacity=2, refill_per_second=1)
+    assert wait == pytest.approx(1, abs=0.05)
+    
+    # A refund gives one back
+    backend.refund("k", capacity=2, refill_per_second=1)
+    assert backend.acquire("k", capacity=2, refill_per_second=1) == 0
+    
+    # Refill after time passes
+    with patch("app.core.rate_limit.time.monotonic", return_value=10**9):
+        assert backend.acquire("k", capacity=2, refill_per_second=1) == 0
+        assert backend.acquire("k", capacity=2, refill_per_second=1) == 0
+
+def test_eviction_judges_each_bucket_by_its_own_limits():
+    backend = ShardedMemoryBackend(shards=1, max_keys_per_shard=1)
+    # A large, slowly refilling bucket is far from full after one token
+    backend.acquire("big", capacity=100, refill_per_second=0.001)
+    # Adding a small one must not evict it as if it were small too
+    backend.acquire("small", capacity=1, refill_per_second=1000)
+    assert "big" in backend._shards[0].buckets
+
+def test_backends_must_implement_every_operation():
+    class Incomplete(RateLimitBackend):
+        def acquire(self, key, capacity, refill_per_second, cost=1):
+            return 0.0
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+def test_login_limiter_blocks_after_failures_per_email():
+    limiter = LoginRateLimiter(ShardedMemoryBackend())
+    
+    with patch("app.core.rate_limit.settings") as mock_settings:
+        limiter_settings(mock_settings)
+        
+        # Failed attempts keep their reservations
+        for _ in range(3):
+            assert limiter.reserve("1.2.3.4", "victim@example.com") == 0
+        
+        # Same email from another IP is throttled, other emails are not
+        assert limiter.reserve("5.6.7.8", "Victim@example.com") > 0
+        assert limiter.reserve("1.2.3.4", "other@example.com") == 0
+        
+        # A successful login clears the email bucket
+        limiter.register_success("1.2.3.4", "victim@example.com")
+        for _ in range(3):
+            assert limiter.reserve("5.6.7.8", "victim@example.com") == 0
+
+def test_concurrent_attempts_cannot_exceed_the_limit():
+    limiter = LoginRateLimiter(ShardedMemoryBackend())
+    
+    with patch("app.core.rate_limit.settings") as mock_settings:
+        limiter_settings(mock_settings)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            waits = list(pool.map(lambda _: limiter.reserve("1.2.3.4", "victim@example.com"), range(20)))
+        assert waits.count(0) == 3
+        
+        # Rejected attempts took nothing from the IP bucket
+        assert limiter.backend._shard("login:ip:1.2.3.4").buckets["login:ip:1.2.3.4"][0] == pytest.approx(97, abs=0.5)
+
+def test_zero_rate_is_raised_to_a_finite_wait():
+    limiter = LoginRateLimiter(ShardedMemoryBackend())
+    
+    with patch("app.core.rate_limit.settings") as mock_settings:
+        limiter_settings(mock_settings, email_capacity=1, email_per_minute=0)
+        assert limiter.reserve("1.2.3.4", "victim@example.com") == 0
+        wait = limiter.reserve("1.2.3.4", "victim@example.com")
+        assert wait == pytest.approx(3600, abs=1)
+
+def test_client_ip_honours_trusted_proxies_only():
+    request = SimpleNamespace(
+        client=SimpleNamespace(host="10.0.0.1"),
+        headers=SimpleNamespace(getlist=lambda name: ["6.6.6.6, 1.2.3.4", "10.0.0.2"])
+    )
+    
+    with patch("app.core.rate_limit.settings") as mock_settings:
+        mock_settings.TRUSTED_PROXY_COUNT = 0
+        assert client_ip(request) == "10.0.0.1"
+        # Entries left of the trusted proxies' were written by the client
+        mock_settings.TRUSTED_PROXY_COUNT = 2
+        assert client_ip(request) == "1.2.3.4"
+        mock_settings.TRUSTED_PROXY_COUNT = 10
+        assert client_ip(request) == "6.6.6.6"
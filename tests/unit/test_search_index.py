@@ -0,0 +1,58 @@
+from app.utils.search_index import ShareholderSearchIndex
+
+ROWS = [
+    {"id": "1", "full_name": "Alice Martin", "email": "alice@example.com"},
+    {"id": "2", "full_name": "Bob Alison", "email": "bob@example.com"},
+    {"id": "3", "full_name": "Carol Smith", "email": "carol@malice.io"},
+    {"id": "4", "full_name": None, "email": "dave@example.com"},
+]
+
+def build():
+    index = ShareholderSearchIndex()
+    index.build(ROWS)
+    return index
+
+def test_ranks_prefix_before_word_prefix_before_substring():
+    results = build().search("ali")
+    
+    assert [(r["id"], r["rank"]) for r in results] == [("1", 0), ("2", 1), ("3", 2)]
+
+def test_search_is_case_insensitive_and_matches_email():
+    index = build()
+    
+    assert [r["id"] for r in index.search("DAVE")] == ["4"]
+    assert {r["id"] for r in index.search("example.com")} == {"1", "2", "4"}
+
+def test_short_queries_only_match_prefixes():
+    # "ol" is inside "Carol" but too short for the trigram path
+    assert build().search("ol") == []
+    assert [r["id"] for r in build().search("bo")] == ["2"]
+
+def test_limit_and_empty_query():
+    index = build()
+    
+    assert len(index.search("a", limit=1)) == 1
+    assert index.search("   ") == []
+
+def test_limit_keeps_the_best_ranked_matches():
+    index = ShareholderSearchIndex()
+    index.build([
+        {"id": "z", "full_name": "Zed", "email": "a@zed.io"},
+        {"id": "a", "full_name": "Anna", "email": "anna@example.com"},
+        {"id": "w", "full_name": "Wes Adams", "email": "wes@example.com"},
+    ])
+    
+    # The email "a@zed.io" sorts first, but Anna comes first by name
+    assert [r["id"] for r in index.search("a", limit=1)] == ["a"]
+    assert [r["id"] for r in index.search("a", limit=3)] == ["a", "z", "w"]
+
+def test_upsert_and_remove_keep_index_consistent():
+    index = build()
+    index.upsert({"id": "2", "full_name": "Robert Stone", "email": "rstone@example.com"})
+    
+    assert [r["id"] for r in index.search("ali")] == ["1", "3"]
+    assert [r["id"] for r in index.search("stone")] == ["2"]
+    
+    index.remove("2")
+    assert index.search("stone") == []
+    assert len(index) == 3
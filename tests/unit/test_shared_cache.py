@@ -0,0 +1,269 @@
+import asyncio
+import json
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+import pytest
+import app.core.cache as cache
+from app.core.cache import (
+    SHAREHOLDERS_CHANGED,
+    CacheBackend,
+    MemoryCacheBackend,
+    VersionedCache,
+    bump_cap_table_version,
+    cache_stats,
+    configure_cache,
+    get_cap_table_version,
+    on_remote_invalidation,
+    reset_cache_stats
+)
+from app.core.events import DISTRIBUTION_CHANGED, EventBroker
+from app.core.redis_cache import RedisCacheBackend, RespConnection
+from app.core.redis_events import RedisEventBus
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    """Just enough of a Redis server for the cache backend"""
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, port=0):
+        super().__init__(("127.0.0.1", port), StandInHandler)
+        self.lock = threading.Lock()
+        self.strings = {}
+        self.hashes = {}
+        self.published = []
+        self.subscribers = {}
+        self.connections = set()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def drop_connections(self):
+        with self.lock:
+            connections = list(self.connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def close(self):
+        self.shutdown()
+        self.server_close()
+        self.drop_connections()
+
+class StandInHandler(socketserver.StreamRequestHandler):
+    def reply(self, value):
+        if value is None:
+            data = b"$-1\r\n"
+        elif isinstance(value, int):
+            data = b":%d\r\n" % value
+        elif isinstance(value, str):
+            data = b"+%s\r\n" % value.encode()
+        elif isinstance(value, bytes):
+            data = b"$%d\r\n%s\r\n" % (len(value), value)
+        else:
+            data = b"*%d\r\n" % len(value) + b"".join(self.encode(item) for item in value)
+        self.wfile.write(data)
+
+    def encode(self, value):
+        return b"$%d\r\n%s\r\n" % (len(value), value) if isinstance(value, bytes) else b":%d\r\n" % value
+
+    def read_command(self):
+        header = self.rfile.readline()
+        if not header:
+            return None
+        args = []
+        for _ in range(int(header[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections.add(self.connection)
+        try:
+            while True:
+                args = self.read_command()
+                if args is None:
+                    return
+                command = args[0].upper()
+                with server.lock:
+                    if command in (b"AUTH", b"SELECT", b"PING"):
+                        self.reply("OK")
+                    elif command == b"GET":
+                        self.reply(server.strings.get(args[1]))
+                    elif command == b"SET":
+                        if b"NX" in args[3:] and args[1] in server.strings:
+                            self.reply(None)
+                        else:
+                            server.strings[args[1]] = args[2]
+                            self.reply("OK")
+                    elif command == b"INCR":
+                        server.strings[args[1]] = b"%d" % (int(server.strings.get(args[1], 0)) + 1)
+                        self.reply(int(server.strings[args[1]]))
+                    elif command == b"HINCRBY":
+                        fields = server.hashes.setdefault(args[1], {})
+                        fields[args[2]] = fields.get(args[2], 0) + int(args[3])
+                        self.reply(fields[args[2]])
+                    elif command == b"HGETALL":
+                        fields = server.hashes.get(args[1], {})
+                        self.reply([item for field, value in fields.items() for item in (field, str(value).encode())])
+                    elif command == b"SUBSCRIBE":
+                        server.subscribers.setdefault(args[1], []).append(self)
+                        self.reply([b"subscribe", args[1], 1])
+                    elif command == b"PUBLISH":
+                        server.published.append(json.loads(args[2]))
+                        subscribers = server.subscribers.get(args[1], [])
+                        for subscriber in subscribers:
+                            subscriber.reply([b"message", args[1], args[2]])
+                        self.reply(len(subscribers))
+                    else:
+                        self.reply(None)
+        except (OSError, ValueError):
+            pass
+        finally:
+            with server.lock:
+                server.connections.discard(self.connection)
+                for subscribers in server.subscribers.values():
+                    if self in subscribers:
+                        subscribers.remove(self)
+
+@pytest.fixture
+def server():
+    server = StandInServer()
+    yield server
+    server.close()
+
+@pytest.fixture
+def shared_backend(server):
+    backend = configure_cache(RedisCacheBackend("127.0.0.1", server.port, prefix="test", timeout=2))
+    assert backend.healthy
+    reset_cache_stats()
+    yield backend
+    configure_cache(MemoryCacheBackend())
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+def run_worker(port, script):
+    """Run `script` in another process connected to the same server, like a second uvicorn worker"""
+    setup = (
+        "from app.core.cache import *\n"
+        "from app.core.redis_cache import RedisCacheBackend\n"
+        f"configure_cache(RedisCacheBackend('127.0.0.1', {port}, prefix='test', timeout=2))\n"
+    )
+    subprocess.run([sys.executable, "-c", setup + script], check=True, timeout=30)
+
+def test_resp_encoding_and_replies():
+    assert RespConnection.encode("SET", "k", b"\x00v", "EX", 60) == (
+        b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\x00v\r\n$2\r\nEX\r\n$2\r\n60\r\n"
+    )
+
+def test_memory_backend_versions_and_hit_rates():
+    configure_cache(MemoryCacheBackend())
+    reset_cache_stats()
+    results = VersionedCache("test.memory")
+    before = get_cap_table_version("acme")
+
+    results.set("k", {"total": 1}, company_id="acme")
+    assert results.get("k", "acme") == {"total": 1}
+    assert results.get("k", "other") is None
+    assert bump_cap_table_version("acme") == before + 1
+    assert results.get("k", "acme") is None
+
+    stats = cache_stats()
+    assert (stats["backend"], stats["healthy"]) == ("memory", True)
+    assert stats["namespaces"]["test.memory"] == {
+        "hits": 1, "shared_hits": 0, "misses": 2, "bypassed": 0, "hit_rate": 0.3333
+    }
+
+def test_backends_must_keep_version_counters():
+    class NoCounters(CacheBackend):
+        def versions(self):
+            return {}
+
+    with pytest.raises(TypeError):
+        NoCounters()
+
+def test_entries_and_invalidations_are_shared_between_workers(shared_backend, server):
+    results = VersionedCache("test.shared")
+    heard = []
+    on_remote_invalidation(lambda company_id, reason: heard.append((company_id, reason)))
+    heard.clear()
+
+    # Another worker computes a result; this one reads it from the server
+    run_worker(server.port, "VersionedCache('test.shared').set('k', {'total': 7}, company_id='acme')")
+    assert results.get("k", "acme") == {"total": 7}
+    assert results.get("k", "acme") == {"total": 7}
+
+    # Another worker writes; this one stops serving what it cached before
+    version = get_cap_table_version("acme")
+    run_worker(server.port, "bump_cap_table_version('acme', SHAREHOLDERS_CHANGED)")
+    wait_for(lambda: get_cap_table_version("acme") == version + 1)
+    assert ("acme", SHAREHOLDERS_CHANGED) in heard
+    assert results.get("k", "acme") is None
+
+    # This worker's writes reach the others without echoing back to it
+    bump_cap_table_version("acme", SHAREHOLDERS_CHANGED)
+    assert server.published[-1]["counter"] == "acme"
+    assert server.published[-1]["version"] == version + 2
+    assert heard.count(("acme", SHAREHOLDERS_CHANGED)) == 1
+
+    stats = cache_stats()["namespaces"]["test.shared"]
+    assert (stats["hits"], stats["shared_hits"], stats["misses"]) == (1, 1, 1)
+
+def test_disconnected_worker_bypasses_the_cache_and_replays_its_writes(shared_backend, server):
+    results = VersionedCache("test.outage")
+    results.set("k", "cached", company_id="acme")
+    port = server.port
+    version = get_cap_table_version("acme")
+
+    server.close()
+    wait_for(lambda: not shared_backend.healthy)
+    assert results.get("k", "acme") is None
+    assert cache_stats()["namespaces"]["test.outage"]["bypassed"] == 1
+    # The write cannot be broadcast yet, but moves this worker's version
+    assert bump_cap_table_version("acme") == version + 1
+
+    restarted = StandInServer(port)
+    try:
+        wait_for(lambda: shared_backend.healthy)
+        # The restarted server starts empty; the replayed write is its first
+        assert restarted.hashes[b"test:versions"] == {b"acme": 1}
+        assert restarted.published[-1]["counter"] == "acme"
+        assert get_cap_table_version("acme") == 1
+        assert results.get("k", "acme") is None
+    finally:
+        configure_cache(MemoryCacheBackend())
+        restarted.close()
+
+def test_event_bus_reaches_the_clients_of_every_worker(server):
+    async def scenario():
+        first = EventBroker(RedisEventBus("127.0.0.1", server.port, prefix="test", timeout=2))
+        second = EventBroker(RedisEventBus("127.0.0.1", server.port, prefix="test", timeout=2))
+        try:
+            assert first.bus.connected and second.bus.connected
+            admin = second.subscribe(shareholder_id=None, is_admin=True, company_id="acme")
+            first.publish(DISTRIBUTION_CHANGED, {"cap_table_version": 1}, company_id="acme")
+            second.publish(DISTRIBUTION_CHANGED, {"cap_table_version": 2}, company_id="acme")
+
+            seen = [await asyncio.wait_for(admin.get(), 2) for _ in range(2)]
+            assert [event.data["cap_table_version"] for event in seen] == [1, 2]
+            # Ids come from one counter, seeded past ids a restarted server's clients may hold
+            assert seen[0].id > time.time() * 1000 - 60_000
+            assert seen[1].id == seen[0].id + 1
+        finally:
+            first.bus.stop()
+            second.bus.stop()
+
+    asyncio.run(scenario())
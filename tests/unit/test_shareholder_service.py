@@ -18,12 +18,16 @@ def test_get_shareholders_with_shares():
     mock_db = Mock()
     mock_user = Mock(spec=User)
     mock_user.role = UserRole.SHAREHOLDER
-    mock_user.issuances = [Mock(number_of_shares=100), Mock(number_of_shares=50)]
+    # Totals are summed in SQL and come back alongside each user
+    mock_row = Mock()
+    mock_row._asdict = Mock(return_value={"User": mock_user, "total_shares": 150})
     
-    mock_db.query.return_value.filter.return_value.offset.return_value.limit.return_value.all.return_value = [mock_user]
+    mock_query = mock_db.query.return_value.options.return_value
+    mock_query.filter.return_value.order_by.return_value.offset.return_value.limit.return_value.all.return_value = [mock_row]
     
     result = get_shareholders(mock_db)
     assert len(result) == 1
+    assert result[0]["user"] is mock_user
     assert result[0]["total_shares"] == 150
 
 def test_create_shareholder_success():
@@ -38,12 +42,14 @@ def test_create_shareholder_success():
         shareholder_profile=ShareholderProfileCreate(address="123 Test St")
     )
     
-    with patch("app.services.shareholder_service.create_user") as mock_create_user:
-        mock_create_user.return_value = Mock(id="new-user-id")
+    with patch("app.services.shareholder_service.get_password_hash", return_value="hashed"):
         result = create_shareholder(mock_db, data)
         
-        assert result is not None
-        mock_db.add.assert_called_once()
+        # One duplicate check, and the user and profile in a single commit
+        assert result.hashed_password == "hashed"
+        assert result.shareholder_profile.address == "123 Test St"
+        mock_db.query.assert_called_once()
+        assert [c.args[0] for c in mock_db.add.call_args_list] == [result, result.shareholder_profile]
         mock_db.commit.assert_called_once()
 
 def test_deactivate_shareholder():
@@ -0,0 +1,85 @@
+import threading
+import time
+import pytest
+from app.core.cache import bump_cap_table_version
+from app.core.single_flight import SingleFlight, coalesce, single_flight
+
+def run_concurrently(count, target):
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    
+    def worker(i):
+        barrier.wait()
+        try:
+            results[i] = target()
+        except Exception as e:
+            results[i] = e
+    
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+def test_concurrent_callers_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+    
+    def compute():
+        executions.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+    
+    results = run_concurrently(8, lambda: flight.do("ns", ("k",), compute))
+    
+    assert len(executions) == 1
+    assert all(result is results[0] for result in results)
+    stats = flight.stats()["ns"]
+    assert stats == {"calls": 8, "executions": 1, "coalesced": 7, "errors": 0}
+    assert flight.in_flight() == 0
+
+def test_errors_propagate_to_every_waiter_and_are_not_kept():
+    flight = SingleFlight()
+    
+    def fail():
+        time.sleep(0.2)
+        raise ValueError("boom")
+    
+    results = run_concurrently(4, lambda: flight.do("ns", ("k",), fail))
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.stats()["ns"]["errors"] == 1
+    
+    # The failure is not cached: the next call runs again
+    assert flight.do("ns", ("k",), lambda: "ok") == "ok"
+
+def test_sequential_and_distinct_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("ns", (1,), lambda: "a") == "a"
+    assert flight.do("ns", (1,), lambda: "b") == "b"
+    assert flight.do("ns", (2,), lambda: "c") == "c"
+    assert flight.stats()["ns"]["executions"] == 3
+    assert flight.stats()["ns"]["coalesced"] == 0
+
+def test_coalesce_keys_on_cap_table_version():
+    seen = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def slow():
+        seen.append("old")
+        started.set()
+        release.wait(2)
+        return "old"
+    
+    thread = threading.Thread(target=lambda: coalesce("test.version", ("k",), slow))
+    thread.start()
+    started.wait(2)
+    
+    # A write in between means later readers must not receive the pre-write result
+    bump_cap_table_version()
+    assert coalesce("test.version", ("k",), lambda: "new") == "new"
+    release.set()
+    thread.join()
+    assert seen == ["old"]
+    single_flight.reset_stats()
@@ -0,0 +1,50 @@
+import smtplib
+import time
+from datetime import datetime
+from unittest.mock import patch
+import pytest
+from fastapi import HTTPException
+from app.core.config import settings
+from app.services.statement_service import parse_period
+from app.utils.email_utils import SMTPMailer
+
+def test_parse_period():
+    assert parse_period("2026-Q1") == ("2026-Q1", datetime(2026, 1, 1), datetime(2026, 4, 1))
+    assert parse_period("2025-Q4") == ("2025-Q4", datetime(2025, 10, 1), datetime(2026, 1, 1))
+    with pytest.raises(HTTPException) as exc:
+        parse_period("2026-05")
+    assert exc.value.status_code == 400
+
+def test_default_period_is_last_completed_quarter():
+    period, start, end = parse_period()
+    assert end <= datetime.now()
+    assert (datetime.now() - end).days < 93
+
+def test_mailer_reuses_one_connection():
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        with SMTPMailer() as mailer:
+            for i in range(3):
+                mailer.send({"To": f"holder{i}@example.com"})
+        assert smtp.call_count == 1
+        assert smtp.return_value.login.call_count == 1
+        assert smtp.return_value.send_message.call_count == 3
+        smtp.return_value.quit.assert_called_once()
+
+def test_mailer_reconnects_once_when_dropped():
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        smtp.return_value.send_message.side_effect = [None, smtplib.SMTPServerDisconnected(), None]
+        with SMTPMailer() as mailer:
+            mailer.send({"To": "a@example.com"})
+            mailer.send({"To": "b@example.com"})
+        assert mailer.connections == 2
+        assert mailer.sent == 2
+
+def test_mailer_paces_sends():
+    with patch.object(settings, "ENVIRONMENT", "production"), patch("app.utils.email_utils.smtplib.SMTP") as smtp:
+        with SMTPMailer(messages_per_second=50) as mailer:
+            started = time.monotonic()
+            for i in range(6):
+                mailer.send({"To": f"holder{i}@example.com"})
+            # Five intervals between six messages
+            assert time.monotonic() - started >= 5 / 50 * 0.9
+        assert smtp.return_value.send_message.call_count == 6
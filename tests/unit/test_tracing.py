@@ -0,0 +1,182 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+import pytest
+from app.core.config import settings
+from app.core.tracing import (
+    NOOP_SPAN, STATUS_ERROR, OTLPJsonExporter, Tracer, current_span, encode_spans, span, traced
+)
+
+class ListExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(list(spans))
+
+    def shutdown(self):
+        pass
+
+@pytest.fixture
+def sampling(monkeypatch):
+    def set_rate(rate, trust_parent=False):
+        monkeypatch.setattr(settings, "TRACE_SAMPLE_RATE", rate)
+        monkeypatch.setattr(settings, "TRACE_TRUST_PARENT", trust_parent)
+    return set_rate
+
+def test_span_outside_a_trace_is_a_shared_noop():
+    assert current_span.get() is None
+    assert span("SELECT") is NOOP_SPAN
+
+    @traced("work")
+    def work(x):
+        return x * 2
+
+    assert work(21) == 42
+
+def test_sample_rate_zero_traces_nothing(sampling):
+    sampling(0)
+    assert Tracer(ListExporter()).start_trace("GET") is None
+
+def test_nested_spans_are_exported_when_the_root_ends(sampling):
+    sampling(1.0)
+    exporter = ListExporter()
+    root = Tracer(exporter).start_trace("GET /things")
+
+    with root:
+        with span("SELECT", **{"db.query.text": "SELECT 1"}) as child:
+            with span("password.verify"):
+                pass
+        with pytest.raises(ValueError):
+            with span("smtp.send"):
+                raise ValueError("refused")
+
+    assert current_span.get() is None
+    [spans] = exporter.traces
+    by_name = {s.name: s for s in spans}
+    assert set(by_name) == {"GET /things", "SELECT", "password.verify", "smtp.send"}
+    assert {s.trace.trace_id for s in spans} == {root.trace.trace_id}
+    assert by_name["SELECT"].parent_id == root.span_id
+    assert by_name["password.verify"].parent_id == child.span_id
+    assert by_name["smtp.send"].status == STATUS_ERROR
+    assert all(s.end_ns >= s.start_ns for s in spans)
+
+def test_trusted_traceparent_decides_sampling(sampling):
+    trace_id, parent_id = "4bf92f3577b34da6a3ce929d0e0e4736", "00f067aa0ba902b7"
+    tracer = Tracer(ListExporter())
+
+    sampling(0, trust_parent=True)
+    root = tracer.start_trace("GET", f"00-{trace_id}-{parent_id}-01")
+    assert root.trace.trace_id == trace_id and root.parent_id == parent_id
+    assert tracer.start_trace("GET", f"00-{trace_id}-{parent_id}-00") is None
+
+    sampling(0, trust_parent=False)
+    assert tracer.start_trace("GET", f"00-{trace_id}-{parent_id}-01") is None
+
+def test_encoding_follows_otlp_json(sampling):
+    sampling(1.0)
+    exporter = ListExporter()
+    with Tracer(exporter).start_trace("POST", rows=3, cached=False, ratio=0.5):
+        pass
+
+    request = encode_spans(exporter.traces[0])
+    resource = request["resourceSpans"][0]
+    [encoded] = resource["scopeSpans"][0]["spans"]
+    assert resource["resource"]["attributes"][0]["key"] == "service.name"
+    assert len(encoded["traceId"]) == 32 and len(encoded["spanId"]) == 16
+    assert "parentSpanId" not in encoded
+    assert int(encoded["endTimeUnixNano"]) >= int(encoded["startTimeUnixNano"])
+    assert {a["key"]: a["value"] for a in encoded["attributes"]} == {
+        "rows": {"intValue": "3"},
+        "cached": {"boolValue": False},
+        "ratio": {"doubleValue": 0.5}
+    }
+
+def test_file_exporter_appends_one_request_per_line(sampling, tmp_path):
+    sampling(1.0)
+    path = tmp_path / "traces.jsonl"
+    exporter = OTLPJsonExporter(path=str(path))
+    tracer = Tracer(exporter)
+    for _ in range(3):
+        with tracer.start_trace("GET"):
+            with span("SELECT"):
+                pass
+    exporter.flush()
+    exporter.shutdown()
+
+    # Traces that were waiting together share a line
+    lines = path.read_text().splitlines()
+    assert 1 <= len(lines) <= 3
+    spans = [
+        s for line in lines for s in json.loads(line)["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    ]
+    assert [s["name"] for s in spans] == ["SELECT", "GET"] * 3
+    assert exporter.exported == 3
+
+def test_http_exporter_posts_to_collector(sampling):
+    received = []
+
+    class Collector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append((self.path, json.loads(self.rfile.read(int(self.headers["Content-Length"])))))
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Collector)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sampling(1.0)
+        exporter = OTLPJsonExporter(url=f"http://127.0.0.1:{server.server_port}/v1/traces")
+        with Tracer(exporter).start_trace("GET"):
+            pass
+        exporter.flush()
+        exporter.shutdown()
+    finally:
+        server.shutdown()
+
+    assert exporter.exported == 1
+    [(path, body)] = received
+    assert path == "/v1/traces"
+    assert body["resourceSpans"][0]["scopeSpans"][0]["spans"][0]["name"] == "GET"
+
+def test_http_exporter_batches_behind_a_slow_collector_and_drops_past_the_bound(sampling):
+    received = []
+    posting = threading.Event()
+    release = threading.Event()
+
+    class SlowCollector(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            received.append(len(body["resourceSpans"][0]["scopeSpans"][0]["spans"]))
+            posting.set()
+            release.wait(5)
+            self.send_response(200)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), SlowCollector)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        sampling(1.0)
+        exporter = OTLPJsonExporter(url=f"http://127.0.0.1:{server.server_port}/v1/traces", max_queue=3)
+        tracer = Tracer(exporter)
+        with tracer.start_trace("GET"):
+            pass
+        assert posting.wait(5)
+        # While the first POST hangs, three traces wait and the rest are dropped
+        for _ in range(5):
+            with tracer.start_trace("GET"):
+                pass
+        release.set()
+        exporter.flush()
+        exporter.shutdown()
+    finally:
+        server.shutdown()
+
+    assert received == [1, 3]
+    assert (exporter.exported, exporter.dropped, exporter.failed) == (4, 2, 0)
@@ -0,0 +1,98 @@
+from datetime import date
+import numpy as np
+from app.core.vesting import GrantSet, months_elapsed, vesting_as_of, vesting_by_holder
+
+def grant(shares=4800, start=date(2024, 1, 15), cliff=12, duration=48, frequency=1,
+          acceleration=None, percent=None, change_of_control=None, termination=None,
+          holder="alice", issued=date(2024, 1, 15)):
+    return (holder, shares, issued, start, cliff, duration, frequency, acceleration, percent, change_of_control, termination)
+
+def vested_on(record, as_of):
+    granted, vested = vesting_as_of(GrantSet.from_records([record]), as_of)
+    return int(vested[0])
+
+def test_months_elapsed_completes_on_the_start_day_or_month_end():
+    start = np.array(["2024-01-31", "2024-01-15", "2024-01-15"], dtype="datetime64[D]")
+    at = np.array(["2024-02-29", "2024-02-14", "2023-12-31"], dtype="datetime64[D]")
+    assert months_elapsed(start, at).tolist() == [1, 0, -1]
+
+def test_cliff_then_monthly_vesting():
+    record = grant()
+    assert vested_on(record, date(2025, 1, 14)) == 0
+    assert vested_on(record, date(2025, 1, 15)) == 1200
+    assert vested_on(record, date(2025, 2, 15)) == 1300
+    assert vested_on(record, date(2028, 1, 15)) == 4800
+    assert vested_on(record, date(2030, 1, 1)) == 4800
+
+def test_quarterly_steps_round_down_until_the_end():
+    record = grant(shares=1000, cliff=0, duration=12, frequency=3)
+    assert vested_on(record, date(2024, 4, 14)) == 0
+    assert vested_on(record, date(2024, 4, 15)) == 250
+    assert vested_on(record, date(2024, 10, 14)) == 500
+    assert vested_on(record, date(2024, 12, 1)) == 750
+    assert vested_on(record, date(2025, 1, 15)) == 1000
+    # Rounding down leaves the remainder for the last step
+    assert vested_on(grant(shares=100, cliff=0, duration=3), date(2024, 2, 15)) == 33
+
+def test_termination_stops_vesting():
+    record = grant(termination=date(2026, 1, 20))
+    assert vested_on(record, date(2027, 6, 1)) == vested_on(record, date(2026, 1, 20)) == 2400
+
+def test_single_trigger_accelerates_part_of_the_unvested_shares():
+    record = grant(acceleration="single_trigger", percent=50, change_of_control=date(2026, 1, 15))
+    # 2400 vested, half of the other 2400 accelerated
+    assert vested_on(record, date(2026, 1, 14)) == 2300
+    assert vested_on(record, date(2026, 1, 15)) == 3600
+    # The schedule carries on, capped at the grant
+    assert vested_on(record, date(2026, 2, 15)) == 3700
+    assert vested_on(record, date(2027, 6, 15)) == 4800
+
+def test_double_trigger_needs_termination_after_the_change_of_control():
+    after = grant(acceleration="double_trigger", percent=100, change_of_control=date(2026, 1, 1), termination=date(2026, 1, 15))
+    assert vested_on(after, date(2025, 12, 31)) == 2300
+    assert vested_on(after, date(2026, 1, 15)) == 4800
+
+    before = grant(acceleration="double_trigger", percent=100, change_of_control=date(2026, 6, 1), termination=date(2026, 1, 15))
+    assert vested_on(before, date(2027, 1, 1)) == 2400
+
+def test_unscheduled_grants_vest_on_issue_and_future_grants_do_not_count():
+    unscheduled = ("bob", 500, date(2024, 3, 1), None, None, None, None, None, None, None, None)
+    future = grant(holder="bob", issued=date(2030, 1, 1), start=date(2030, 1, 1))
+    grants = GrantSet.from_records([grant(), unscheduled, future])
+
+    assert grants.holders == ["alice", "bob"]
+    granted, vested = vesting_by_holder(grants, date(2026, 1, 15))
+    assert granted.tolist() == [4800, 500]
+    assert vested.tolist() == [2400, 500]
+
+    granted, vested = vesting_by_holder(grants, date(2024, 2, 1))
+    assert granted.tolist() == [4800, 0]
+    assert vested.tolist() == [0, 0]
+
+def test_empty_grant_set():
+    granted, vested = vesting_by_holder(GrantSet.from_records([]), date(2026, 1, 1))
+    assert granted.tolist() == [] and vested.tolist() == []
+
+def test_whole_set_matches_grant_by_grant():
+    rng = np.random.default_rng(7)
+    records = []
+    for i in range(200):
+        start = date(2020 + int(rng.integers(0, 5)), int(rng.integers(1, 13)), int(rng.integers(1, 29)))
+        duration = int(rng.integers(0, 60))
+        records.append(grant(
+            shares=int(rng.integers(1, 100000)),
+            start=start,
+            issued=start,
+            cliff=int(rng.integers(0, duration + 1)),
+            duration=duration,
+            frequency=int(rng.choice([1, 3, 12])),
+            acceleration=str(rng.choice(["none", "single_trigger", "double_trigger"])),
+            percent=int(rng.integers(0, 101)),
+            change_of_control=date(2024, 6, 1) if rng.random() < 0.5 else None,
+            termination=date(2025, 3, 10) if rng.random() < 0.5 else None,
+            holder=f"holder{i % 17}"
+        ))
+    as_of = date(2025, 7, 1)
+    granted, vested = vesting_as_of(GrantSet.from_records(records), as_of)
+    assert vested.tolist() == [vested_on(record, as_of) for record in records]
+    assert (vested <= granted).all() and (vested >= 0).all()